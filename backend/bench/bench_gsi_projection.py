@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+GSI 投影的容量與儲存比較（ProjectionType.ALL vs 精簡 INCLUDE）
+以 loadtest 的資料集（經由處理器寫入，項目形狀與正式環境一致）填入資料表後掃描所有項目，
+依 DynamoDB 的計價規則估算 GSI1 ~ GSI3 在兩種投影下的：
+- 儲存量：索引項目大小 + 每筆 100 位元組索引額外負擔
+- 寫入容量：每筆項目寫入時，各索引依投影後大小消耗的 WCU（每 1 KB 一個，無條件進位）
+- 讀取容量：一頁 --page-size 筆的索引查詢 RCU（最終一致，每 4 KB 0.5 個，依整頁大小進位）；
+  INCLUDE 另計列表預設（fields=summary）不補讀與 fields=full 補讀描述的 BatchGetItem（每筆 0.5 RCU 起）成本
+
+描述長度以 --description-bytes 控制（預設資料集的描述很短，實際資料通常更長）。
+
+用法：
+    python bench_gsi_projection.py --backend moto [--events 2000] [--tasks 1000] [--description-bytes 400]
+    python bench_gsi_projection.py --backend local --endpoint http://localhost:8000
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import loadtest  # noqa: E402  (同時把 calendar_core 加入 sys.path)
+
+INDEXES = (('GSI1', 'GSI1PK', 'GSI1SK'), ('GSI2', 'GSI2PK', 'GSI2SK'), ('GSI3', 'GSI3PK', 'GSI3SK'))
+TABLE_KEYS = ('PK', 'SK')
+INDEX_OVERHEAD_BYTES = 100
+WRITE_UNIT_BYTES = 1024
+READ_UNIT_BYTES = 4096
+
+
+def value_size(value):
+    """AttributeValue（低階格式）的大小，依 DynamoDB 項目大小計算規則"""
+    (kind, data), = value.items()
+    if kind == 'S':
+        return len(data.encode('utf-8'))
+    if kind == 'N':
+        digits = Decimal(data).normalize().as_tuple().digits
+        return (len(digits) + 1) // 2 + 1
+    if kind == 'B':
+        return len(data)
+    if kind in ('BOOL', 'NULL'):
+        return 1
+    if kind == 'L':
+        return 3 + sum(value_size(v) + 1 for v in data)
+    if kind == 'M':
+        return 3 + sum(len(k.encode('utf-8')) + value_size(v) + 1 for k, v in data.items())
+    if kind in ('SS', 'BS'):
+        return sum(value_size({kind[0]: v}) for v in data)
+    if kind == 'NS':
+        return sum(value_size({'N': v}) for v in data)
+    raise ValueError(f'unknown attribute type {kind}')
+
+
+def item_size(item, attributes=None):
+    """項目大小；attributes 指定時只計算這些屬性"""
+    return sum(
+        len(name.encode('utf-8')) + value_size(value)
+        for name, value in item.items()
+        if attributes is None or name in attributes
+    )
+
+
+def scan_items(table_name):
+    from calendar_core.db import get_client
+
+    client = get_client()
+    kwargs = {'TableName': table_name}
+    while True:
+        response = client.scan(**kwargs)
+        yield from response.get('Items', [])
+        if 'LastEvaluatedKey' not in response:
+            return
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def compare(items, page_size):
+    """逐一索引計算兩種投影的儲存、寫入與讀取成本"""
+    from calendar_core.index_projection import INDEX_ATTRIBUTES
+
+    results = {}
+    for index_name, pk_name, sk_name in INDEXES:
+        included = set(TABLE_KEYS) | {pk_name, sk_name} | set(INDEX_ATTRIBUTES)
+        entries = [item for item in items if pk_name in item and sk_name in item]
+        stats = {'items': len(entries)}
+        for projection, attributes in (('ALL', None), ('INCLUDE', included)):
+            sizes = [item_size(item, attributes) for item in entries]
+            average = sum(sizes) / len(sizes) if sizes else 0
+            stats[projection] = {
+                'storageBytes': sum(sizes) + INDEX_OVERHEAD_BYTES * len(sizes),
+                'avgItemBytes': round(average, 1),
+                'writeUnits': sum(math.ceil(size / WRITE_UNIT_BYTES) for size in sizes),
+                'pageReadUnits': math.ceil(page_size * average / READ_UNIT_BYTES) * 0.5,
+            }
+        # fields=full 補讀描述：BatchGetItem 依每筆完整項目大小計算（最終一致，每 4 KB 0.5）
+        full_sizes = [item_size(item) for item in entries[:page_size]]
+        hydrate_units = sum(math.ceil(size / READ_UNIT_BYTES) * 0.5 for size in full_sizes)
+        stats['INCLUDE']['pageReadUnitsHydrated'] = stats['INCLUDE']['pageReadUnits'] + hydrate_units
+        results[index_name] = stats
+    return results
+
+
+def print_comparison(results, base_bytes, page_size):
+    print(f"base table: {base_bytes / 1024:.1f} KB\n")
+    print(f"{'index':<6} {'items':>7} {'projection':<10} {'avg B':>8} {'storage KB':>11} "
+          f"{'WCU':>7} {f'RCU/{page_size}':>8} {'+hydrate':>9}")
+    totals = {'ALL': [0, 0], 'INCLUDE': [0, 0]}
+    for index_name, stats in results.items():
+        for projection in ('ALL', 'INCLUDE'):
+            row = stats[projection]
+            hydrated = row.get('pageReadUnitsHydrated')
+            print(f"{index_name:<6} {stats['items']:>7} {projection:<10} {row['avgItemBytes']:>8.1f} "
+                  f"{row['storageBytes'] / 1024:>11.1f} {row['writeUnits']:>7} {row['pageReadUnits']:>8.1f} "
+                  f"{(f'{hydrated:.1f}' if hydrated is not None else ''):>9}")
+            totals[projection][0] += row['storageBytes']
+            totals[projection][1] += row['writeUnits']
+    (all_storage, all_writes), (include_storage, include_writes) = totals['ALL'], totals['INCLUDE']
+    print(f"\nGSI1~GSI3 storage: {all_storage / 1024:.1f} KB -> {include_storage / 1024:.1f} KB "
+          f"({(include_storage - all_storage) / all_storage * 100:+.1f}%)")
+    print(f"GSI1~GSI3 write units for the dataset: {all_writes} -> {include_writes} "
+          f"({(include_writes - all_writes) / all_writes * 100:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare GSI storage/capacity for ALL vs INCLUDE projections')
+    parser.add_argument('--backend', choices=('local', 'moto'), default='moto')
+    parser.add_argument('--endpoint', default='http://localhost:8000')
+    parser.add_argument('--table', default='calendar-gsi-bench')
+    parser.add_argument('--users', type=int, default=30)
+    parser.add_argument('--projects', type=int, default=10)
+    parser.add_argument('--members', type=int, default=4)
+    parser.add_argument('--events', type=int, default=2000)
+    parser.add_argument('--tasks', type=int, default=1000)
+    parser.add_argument('--start-year', type=int, default=2024)
+    parser.add_argument('--end-year', type=int, default=2026)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--description-bytes', type=int, default=400, help='approximate description length')
+    parser.add_argument('--page-size', type=int, default=50)
+    parser.add_argument('--output', help='write the comparison as JSON')
+    args = parser.parse_args()
+    # 以中文字元（UTF-8 每字 3 位元組）組出約 description_bytes 的描述
+    args.description = ('討論本週進度與下週規劃。' * (args.description_bytes // 36 + 1))[:max(args.description_bytes // 3, 1)]
+
+    loadtest.configure_environment(args)
+    mock = None
+    if args.backend == 'moto':
+        from moto import mock_aws
+
+        mock = mock_aws()
+        mock.start()
+    try:
+        loadtest.create_table(args.table)
+        handlers = {name: loadtest.load_handler(name) for name in loadtest.HANDLERS}
+        data = loadtest.Dataset(args, handlers)
+        data.seed()
+        items = list(scan_items(args.table))
+    finally:
+        if mock is not None:
+            mock.stop()
+
+    results = compare(items, args.page_size)
+    base_bytes = sum(item_size(item) for item in items)
+    print(f"seeded {len(items)} items ({len(data.events)} events, {len(data.tasks)} tasks), "
+          f"description ~{args.description_bytes} B\n")
+    print_comparison(results, base_bytes, args.page_size)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'baseTableBytes': base_bytes, 'pageSize': args.page_size, 'indexes': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+free/busy 區間合併基準測試
+比較 calendar_core.intervals 的 numpy（陣列運算）與純 Python 實作：
+每位成員在一週視窗內有 --events-per-member 個隨機事件，量測 merge + free_slots 的時間（取中位數）
+
+用法：
+    python bench_intervals.py [--members 50 200 500] [--events-per-member 15] [--slot-minutes 30] [--repeat 7]
+未安裝 numpy 時只量測純 Python 實作。
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAYER_PATH = os.path.join(BACKEND_DIR, 'lambda', 'layers', 'calendar_core', 'python')
+sys.path.insert(0, LAYER_PATH)
+
+from calendar_core import intervals  # noqa: E402
+
+WEEK_SECONDS = 7 * 86400
+
+
+def make_intervals(members, events_per_member, seed):
+    """產生各成員的事件區間：週一至週五 09:00~17:00 開始，15 分鐘對齊，長度 15 分鐘 ~ 3 小時"""
+    rng = random.Random(seed)
+    starts, ends = [], []
+    for _ in range(members * events_per_member):
+        start = rng.randrange(5) * 86400 + 9 * 3600 + rng.randrange(32) * 900
+        starts.append(start)
+        ends.append(start + rng.randrange(1, 13) * 900)
+    return starts, ends
+
+
+def measure(backend, starts, ends, slot, repeat):
+    """回傳 (各次耗時毫秒, 忙碌區塊數, 空閒時段數)"""
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        block_starts, block_ends = intervals.merge(starts, ends, backend)
+        free = intervals.free_slots(block_starts, block_ends, 0, WEEK_SECONDS, slot, backend)
+        timings.append((time.perf_counter() - t0) * 1000)
+    return timings, len(block_starts), len(free)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark free/busy interval merging')
+    parser.add_argument('--members', type=int, nargs='+', default=[50, 200, 500])
+    parser.add_argument('--events-per-member', type=int, default=15)
+    parser.add_argument('--slot-minutes', type=int, default=30)
+    parser.add_argument('--repeat', type=int, default=7)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    backends = ['python'] + (['numpy'] if intervals.np is not None else [])
+    if intervals.np is None:
+        print('numpy not installed: measuring the pure-Python implementation only\n')
+
+    print(f"{'members':>8} {'intervals':>10} {'backend':<8} {'median ms':>10} {'blocks':>7} {'free':>6}")
+    for members in args.members:
+        starts, ends = make_intervals(members, args.events_per_member, args.seed)
+        results = {}
+        for backend in backends:
+            timings, blocks, free = measure(backend, starts, ends, args.slot_minutes * 60, args.repeat)
+            results[backend] = (blocks, free)
+            print(f"{members:>8} {len(starts):>10} {backend:<8} {statistics.median(timings):>10.2f} {blocks:>7} {free:>6}")
+        if len(set(results.values())) > 1:
+            raise SystemExit(f'backends disagree for {members} members: {results}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+列表響應編碼與壓縮基準測試
+以 100 / 1k / 10k 筆中文事件（GET /events 回應格式）比較：
+1. 編碼時間：舊版 json.dumps(ensure_ascii=False) vs calendar_core.responses.dumps（orjson 或緊湊 json）
+2. 本文大小：原始 / gzip（API Gateway 的壓縮方式）位元組數，以及壓縮時間
+
+用法：
+    python bench_responses.py [--repeat 5] [--sizes 100 1000 10000]
+不需連線 AWS。
+"""
+
+import argparse
+import gzip
+import json
+import os
+import statistics
+import sys
+import time
+from decimal import Decimal
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAYER_PATH = os.path.join(BACKEND_DIR, 'lambda', 'layers', 'calendar_core', 'python')
+sys.path.insert(0, LAYER_PATH)
+
+
+def make_events(count):
+    """產生與 format_event 相同欄位的事件（含中文標題與描述）"""
+    events = []
+    for i in range(count):
+        day = f"2024-{(i % 12) + 1:02d}-{(i % 28) + 1:02d}"
+        events.append({
+            'userId': 'user-1',
+            'eventId': f'01HZX{i:021d}',
+            'title': f'團隊週會 #{i}：產品路線圖檢討',
+            'description': '討論本週進度與下週規劃，請準備各自的更新事項，並於會前在共用文件填寫風險與阻礙。',
+            'startDate': f'{day}T09:00:00Z',
+            'endDate': f'{day}T10:00:00Z',
+            'weekOfYear': '2024-W01',
+            'allDay': False,
+            'color': '#3788d8',
+            'createdAt': '2024-01-01T00:00:00Z',
+            'updatedAt': '2024-01-01T00:00:00Z',
+            'projectId': 'project-1',
+            'projectName': '行銷企劃專案',
+            'projectDescription': '第三季新品上市活動',
+            'ownerId': 'user-1',
+            'sequence': Decimal(i),
+        })
+    return {'events': events, 'count': count, 'nextCursor': None}
+
+
+def legacy_dumps(body):
+    """舊版 build_response：不支援 Decimal，需先轉換"""
+    return json.dumps(body, ensure_ascii=False, default=lambda value: int(value))
+
+
+def median_ms(func, repeat):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark response encoding and compression')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    args = parser.parse_args()
+
+    from calendar_core import responses
+
+    encoder = 'orjson' if responses.orjson is not None else 'json (compact)'
+    print(f"encoder: {encoder}")
+
+    print('\n== 編碼（ms，中位數）==')
+    print(f"{'events':>8} {'json.dumps':>11} {'dumps':>9} {'speedup':>8}")
+    for size in args.sizes:
+        body = make_events(size)
+        legacy_ms, _ = median_ms(lambda: legacy_dumps(body), args.repeat)
+        core_ms, _ = median_ms(lambda: responses.dumps(body), args.repeat)
+        print(f"{size:>8} {legacy_ms:>11.2f} {core_ms:>9.2f} {legacy_ms / core_ms:>7.1f}x")
+
+    print('\n== 本文大小（bytes）與壓縮時間（ms，中位數）==')
+    header = f"{'events':>8} {'legacy':>10} {'compact':>10} {'gzip':>9} {'gzip ms':>8}"
+    print(header)
+    for size in args.sizes:
+        body = make_events(size)
+        legacy = legacy_dumps(body).encode('utf-8')
+        raw = responses.dumps(body).encode('utf-8')
+        gzip_ms, gzipped = median_ms(lambda: gzip.compress(raw), args.repeat)
+        row = f"{size:>8} {len(legacy):>10} {len(raw):>10} {len(gzipped):>9} {gzip_ms:>8.2f}"
+        print(row)
+
+
+if __name__ == '__main__':
+    main()
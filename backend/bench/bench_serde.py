@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+冷啟動與反序列化基準測試
+比較 boto3.resource 路徑與 calendar_core 低階用戶端路徑：
+1. 匯入 + 建立 DynamoDB 物件的時間（每次以全新直譯器量測，取中位數）
+2. 1k / 10k 筆事件查詢結果的反序列化時間（boto3 TypeDeserializer vs calendar_core.serde）
+
+用法：
+    python bench_serde.py [--repeat 5] [--sizes 1000 10000]
+不需連線 AWS；只建立用戶端物件，不發送請求。
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAYER_PATH = os.path.join(BACKEND_DIR, 'lambda', 'layers', 'calendar_core', 'python')
+sys.path.insert(0, LAYER_PATH)
+
+IMPORT_SNIPPETS = {
+    'boto3.resource': (
+        "import boto3\n"
+        "from boto3.dynamodb.conditions import Key, Attr\n"
+        "boto3.resource('dynamodb').Table('calendar-app-data')\n"
+    ),
+    'calendar_core client': (
+        "from calendar_core import get_table, build_response\n"
+        "get_table().client\n"
+    ),
+}
+
+
+def measure_import(snippet, repeat):
+    """在全新直譯器中執行片段，回傳各次耗時（毫秒）"""
+    env = dict(os.environ)
+    env.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+    env.setdefault('DYNAMODB_TABLE', 'calendar-app-data')
+    env['PYTHONPATH'] = LAYER_PATH + os.pathsep + env.get('PYTHONPATH', '')
+    timer = (
+        "import time\n"
+        "_t0 = time.perf_counter()\n"
+        f"{snippet}"
+        "print((time.perf_counter() - _t0) * 1000)\n"
+    )
+    samples = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', timer], env=env, capture_output=True, text=True, check=True)
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return samples
+
+
+def make_event_items(count):
+    """產生與 handle_create_event 寫入格式相同的 AttributeValue 項目"""
+    items = []
+    for i in range(count):
+        day = f"2024-{(i % 12) + 1:02d}-{(i % 28) + 1:02d}"
+        items.append({
+            'PK': {'S': 'PROJECT#project-1'},
+            'SK': {'S': f'EVENT#{i:08d}'},
+            'GSI1PK': {'S': 'USER#user-1'},
+            'GSI1SK': {'S': f'EVENT#{i:08d}'},
+            'GSI2PK': {'S': 'USER#user-1'},
+            'GSI2SK': {'S': f'{day}T09:00:00Z'},
+            'eventId': {'S': f'{i:08d}'},
+            'title': {'S': f'團隊週會 #{i}'},
+            'description': {'S': '討論本週進度與下週規劃，請準備各自的更新事項。'},
+            'startDate': {'S': f'{day}T09:00:00Z'},
+            'endDate': {'S': f'{day}T10:00:00Z'},
+            'weekOfYear': {'S': '2024-W01'},
+            'allDay': {'BOOL': False},
+            'color': {'S': '#3788d8'},
+            'entityType': {'S': 'EVENT'},
+            'createdAt': {'S': '2024-01-01T00:00:00Z'},
+            'updatedAt': {'S': '2024-01-01T00:00:00Z'},
+            'projectId': {'S': 'project-1'},
+            'sequence': {'N': str(i)},
+        })
+    return items
+
+
+def measure_deserialize(func, items, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func(items)
+        samples.append((time.perf_counter() - t0) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark import time and item deserialization')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000])
+    args = parser.parse_args()
+
+    print('== 匯入 + 建立用戶端（ms，中位數）==')
+    for name, snippet in IMPORT_SNIPPETS.items():
+        samples = measure_import(snippet, args.repeat)
+        print(f"{name:<24} {statistics.median(samples):8.1f}")
+
+    from boto3.dynamodb.types import TypeDeserializer
+    from calendar_core.serde import deserialize_item
+
+    boto_deserializer = TypeDeserializer()
+
+    def boto3_path(items):
+        return [{k: boto_deserializer.deserialize(v) for k, v in item.items()} for item in items]
+
+    def calendar_core_path(items):
+        return [deserialize_item(item) for item in items]
+
+    print('\n== 反序列化（ms，中位數）==')
+    print(f"{'items':>8} {'boto3':>10} {'calendar_core':>14} {'speedup':>8}")
+    for size in args.sizes:
+        items = make_event_items(size)
+        boto_ms = statistics.median(measure_deserialize(boto3_path, items, args.repeat))
+        core_ms = statistics.median(measure_deserialize(calendar_core_path, items, args.repeat))
+        print(f"{size:>8} {boto_ms:>10.2f} {core_ms:>14.2f} {boto_ms / core_ms:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
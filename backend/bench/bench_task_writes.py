@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+任務建立/刪除延遲基準測試（DynamoDB Local）
+比較：
+- 舊路徑：batch_writer 建立（非原子）；刪除時 get_item + 三次 delete_item
+- 新路徑：task_manager 處理器，TransactWriteItems 單次往返建立；刪除時一次讀取 + 一次交易
+
+用法：
+    docker run -p 8000:8000 amazon/dynamodb-local
+    python bench_task_writes.py [--endpoint http://localhost:8000] [--iterations 200]
+每輪先建立再刪除同一任務，兩條路徑使用相同的資料與順序。
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import statistics
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAYER_PATH = os.path.join(BACKEND_DIR, 'lambda', 'layers', 'calendar_core', 'python')
+TASK_HANDLER_PATH = os.path.join(BACKEND_DIR, 'lambda', 'task_manager', 'handler.py')
+sys.path.insert(0, LAYER_PATH)
+
+PROJECT_ID = 'bench-project'
+OWNER_ID = 'bench-owner'
+ASSIGNEE_ID = 'bench-assignee'
+
+
+def configure_environment(endpoint, table_name):
+    """讓 boto3（含 calendar_core 的共用用戶端）連到 DynamoDB Local"""
+    os.environ['AWS_ENDPOINT_URL_DYNAMODB'] = endpoint
+    os.environ['DYNAMODB_TABLE'] = table_name
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+    os.environ.setdefault('AWS_ACCESS_KEY_ID', 'local')
+    os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'local')
+
+
+def ensure_table(table_name):
+    """建立與正式環境相同主鍵與 GSI1 的資料表（已存在則略過）"""
+    import boto3
+
+    client = boto3.client('dynamodb')
+    if table_name in client.list_tables()['TableNames']:
+        return
+    client.create_table(
+        TableName=table_name,
+        BillingMode='PAY_PER_REQUEST',
+        KeySchema=[{'AttributeName': 'PK', 'KeyType': 'HASH'}, {'AttributeName': 'SK', 'KeyType': 'RANGE'}],
+        AttributeDefinitions=[
+            {'AttributeName': name, 'AttributeType': 'S'} for name in ('PK', 'SK', 'GSI1PK', 'GSI1SK')
+        ],
+        GlobalSecondaryIndexes=[{
+            'IndexName': 'GSI1',
+            'KeySchema': [{'AttributeName': 'GSI1PK', 'KeyType': 'HASH'}, {'AttributeName': 'GSI1SK', 'KeyType': 'RANGE'}],
+            'Projection': {'ProjectionType': 'ALL'},
+        }],
+    )
+    client.get_waiter('table_exists').wait(TableName=table_name)
+
+
+def seed_project(table_name):
+    """建立基準測試用的專案與擁有者關係"""
+    import boto3
+
+    table = boto3.resource('dynamodb').Table(table_name)
+    table.put_item(Item={
+        'PK': f'PROJECT#{PROJECT_ID}', 'SK': f'PROJECT#{PROJECT_ID}',
+        'name': 'bench', 'status': 'ACTIVE', 'entityType': 'PROJECT',
+    })
+    table.put_item(Item={
+        'PK': f'PROJECT#{PROJECT_ID}', 'SK': f'MEMBER#{OWNER_ID}', 'role': 'OWNER',
+    })
+
+
+def old_create(table, task_id):
+    """改版前的 create_task：batch_writer 寫入三個項目"""
+    now = time.strftime('%Y-%m-%dT%H:%M:%S')
+    with table.batch_writer() as batch:
+        batch.put_item(Item={
+            'PK': f'TASK#{task_id}', 'SK': f'TASK#{task_id}',
+            'GSI1PK': f'TASK#{task_id}', 'GSI1SK': f'TASK#{task_id}',
+            'title': 'bench', 'status': 'TODO', 'priority': 'MEDIUM',
+            'projectId': PROJECT_ID, 'assigneeId': ASSIGNEE_ID,
+            'entityType': 'TASK', 'createdAt': now, 'updatedAt': now,
+        })
+        batch.put_item(Item={
+            'PK': f'PROJECT#{PROJECT_ID}', 'SK': f'TASK#{task_id}',
+            'GSI1PK': f'TASK#{task_id}', 'GSI1SK': f'PROJECT#{PROJECT_ID}', 'assignedAt': now,
+        })
+        batch.put_item(Item={
+            'PK': f'USER#{ASSIGNEE_ID}', 'SK': f'TASK#{task_id}',
+            'GSI1PK': f'TASK#{task_id}', 'GSI1SK': f'USER#{ASSIGNEE_ID}', 'assignedAt': now,
+        })
+
+
+def old_delete(table, task_id, user_id):
+    """改版前的 delete_task：權限檢查讀取、再讀一次任務、三次 delete_item"""
+    task = table.get_item(Key={'PK': f'TASK#{task_id}', 'SK': f'TASK#{task_id}'})['Item']
+    if task.get('assigneeId') != user_id:
+        table.get_item(Key={'PK': f'PROJECT#{task["projectId"]}', 'SK': f'MEMBER#{user_id}'})
+    task = table.get_item(Key={'PK': f'TASK#{task_id}', 'SK': f'TASK#{task_id}'})['Item']
+    table.delete_item(Key={'PK': f'TASK#{task_id}', 'SK': f'TASK#{task_id}'})
+    table.delete_item(Key={'PK': f'PROJECT#{task["projectId"]}', 'SK': f'TASK#{task_id}'})
+    table.delete_item(Key={'PK': f'USER#{task["assigneeId"]}', 'SK': f'TASK#{task_id}'})
+
+
+def load_task_handler():
+    spec = importlib.util.spec_from_file_location('task_manager_handler', TASK_HANDLER_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def api_event(method, user_id, path_parameters=None, body=None):
+    return {
+        'httpMethod': method,
+        'path': '/tasks',
+        'pathParameters': path_parameters,
+        'queryStringParameters': None,
+        'headers': {},
+        'body': json.dumps(body) if body is not None else None,
+        'requestContext': {'authorizer': {'claims': {'sub': user_id}}},
+    }
+
+
+def new_create(handler):
+    response = handler.lambda_handler(api_event('POST', OWNER_ID, body={
+        'title': 'bench', 'projectId': PROJECT_ID, 'assigneeId': ASSIGNEE_ID,
+    }), None)
+    if response['statusCode'] != 201:
+        raise RuntimeError(f"create_task failed: {response['body']}")
+    return json.loads(response['body'])['task']['id']
+
+
+def new_delete(handler, task_id, user_id):
+    response = handler.lambda_handler(api_event('DELETE', user_id, {'taskId': task_id}), None)
+    if response['statusCode'] != 200:
+        raise RuntimeError(f"delete_task failed: {response['body']}")
+
+
+def timed(func, *args):
+    t0 = time.perf_counter()
+    result = func(*args)
+    return (time.perf_counter() - t0) * 1000, result
+
+
+def summarize(name, samples):
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(f"{name:<28} {statistics.median(ordered):8.2f} {p95:8.2f} {statistics.mean(ordered):8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark task create/delete latency on DynamoDB Local')
+    parser.add_argument('--endpoint', default='http://localhost:8000')
+    parser.add_argument('--table', default='calendar-bench')
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    configure_environment(args.endpoint, args.table)
+    ensure_table(args.table)
+    seed_project(args.table)
+
+    import boto3
+
+    table = boto3.resource('dynamodb').Table(args.table)
+    handler = load_task_handler()
+    results = {name: [] for name in (
+        'old create', 'new create',
+        'old delete (assignee)', 'new delete (assignee)',
+        'old delete (owner)', 'new delete (owner)',
+    )}
+
+    for i in range(args.iterations):
+        # 刪除者輪流為負責人與專案擁有者，涵蓋兩種權限路徑
+        user_id, kind = (ASSIGNEE_ID, 'assignee') if i % 2 == 0 else (OWNER_ID, 'owner')
+
+        task_id = f'bench-old-{i}'
+        ms, _ = timed(old_create, table, task_id)
+        results['old create'].append(ms)
+        ms, _ = timed(old_delete, table, task_id, user_id)
+        results[f'old delete ({kind})'].append(ms)
+
+        ms, task_id = timed(new_create, handler)
+        results['new create'].append(ms)
+        ms, _ = timed(new_delete, handler, task_id, user_id)
+        results[f'new delete ({kind})'].append(ms)
+
+    print(f"== 任務寫入延遲（ms，{args.iterations} 輪）==")
+    print(f"{'path':<28} {'p50':>8} {'p95':>8} {'mean':>8}")
+    for name, samples in results.items():
+        summarize(name, samples)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,489 @@
+#!/usr/bin/env python3
+"""
+Lambda 處理器負載測試
+在同一個行程內直接呼叫 events / project_manager / task_manager 的 lambda_handler，
+對 DynamoDB Local 或 moto（記憶體內模擬）量測各端點：
+- 延遲 p50 / p95 / p99 / mean（ms）
+- 每個請求的 DynamoDB 呼叫次數
+- 每個請求的 ConsumedCapacity（讀/寫容量單位合計）
+
+資料集以固定亂數種子產生：N 位用戶、M 個專案（每個專案數名成員）、
+分布在多個年份的事件（部分為週期事件）、帶負責人與截止日的任務；
+資料透過處理器本身寫入，項目形狀與正式環境一致。
+
+結果寫成 JSON（預設 bench/results/loadtest-{commit}.json），可用 --compare 與另一份結果比較：
+    python loadtest.py --backend moto --compare results/loadtest-abc1234.json
+
+用法：
+    docker run -p 8000:8000 amazon/dynamodb-local
+    python loadtest.py [--endpoint http://localhost:8000] [--users 50] [--projects 20] [--events 5000] [--tasks 2000]
+    python loadtest.py --backend moto     # 不需 Docker；ConsumedCapacity 為 moto 的近似值
+
+DynamoDB 呼叫以 botocore 事件掛在 calendar_core 的共用用戶端上計數，
+並自動為支援的操作加上 ReturnConsumedCapacity=TOTAL；處理器程式碼不需修改。
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import random
+import secrets
+import subprocess
+import sys
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAMBDA_DIR = os.path.join(BACKEND_DIR, 'lambda')
+LAYER_PATH = os.path.join(LAMBDA_DIR, 'layers', 'calendar_core', 'python')
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+sys.path.insert(0, LAYER_PATH)
+
+HANDLERS = ('events', 'project_manager', 'task_manager')
+# 支援 ReturnConsumedCapacity 的操作
+CAPACITY_OPERATIONS = {
+    'GetItem', 'PutItem', 'UpdateItem', 'DeleteItem', 'Query', 'Scan',
+    'BatchGetItem', 'BatchWriteItem', 'TransactGetItems', 'TransactWriteItems'
+}
+EVENT_BATCH_SIZE = 500
+RECURRING_RATIO = 0.1
+
+
+class DynamoMeter:
+    """以 botocore 事件累計 DynamoDB 呼叫次數與消耗容量（處理器內的執行緒池也會計入）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.calls = 0
+            self.capacity = 0.0
+            self.operations = {}
+
+    def snapshot(self):
+        with self._lock:
+            return self.calls, self.capacity, dict(self.operations)
+
+    def install(self, client):
+        client.meta.events.register('provide-client-params.dynamodb', self._request_capacity)
+        client.meta.events.register('after-call.dynamodb', self._record)
+
+    def _request_capacity(self, params, model, **kwargs):
+        if model.name in CAPACITY_OPERATIONS:
+            params.setdefault('ReturnConsumedCapacity', 'TOTAL')
+
+    def _record(self, parsed, model, **kwargs):
+        consumed = parsed.get('ConsumedCapacity') or []
+        if isinstance(consumed, dict):
+            consumed = [consumed]
+        units = sum(float(entry.get('CapacityUnits', 0)) for entry in consumed)
+        with self._lock:
+            self.calls += 1
+            self.capacity += units
+            self.operations[model.name] = self.operations.get(model.name, 0) + 1
+
+
+def configure_environment(args):
+    os.environ['DYNAMODB_TABLE'] = args.table
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+    os.environ.setdefault('AWS_ACCESS_KEY_ID', 'local')
+    os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'local')
+    # 呼叫次數與容量由 DynamoMeter 統計，不輸出每個請求的 EMF 指標
+    os.environ.setdefault('METRICS_ENABLED', 'false')
+    if args.backend == 'local':
+        os.environ['AWS_ENDPOINT_URL_DYNAMODB'] = args.endpoint
+    # cursor 簽章金鑰：正式環境由 Secrets Manager 讀取，本地以隨機值代替
+    from calendar_core import pagination
+
+    pagination.set_secret(secrets.token_urlsafe(32))
+
+
+def create_table(table_name):
+    """建立與 DynamoDbStack 相同主鍵、GSI1~GSI4 與投影設定的資料表（已存在則刪除重建）"""
+    import boto3
+    from calendar_core.index_projection import INDEX_ATTRIBUTES
+
+    client = boto3.client('dynamodb')
+    if table_name in client.list_tables()['TableNames']:
+        client.delete_table(TableName=table_name)
+        client.get_waiter('table_not_exists').wait(TableName=table_name)
+
+    include = {'ProjectionType': 'INCLUDE', 'NonKeyAttributes': list(INDEX_ATTRIBUTES)}
+    indexes = [('GSI1', 'GSI1PK', 'GSI1SK', include), ('GSI2', 'GSI2PK', 'GSI2SK', include),
+               ('GSI3', 'GSI3PK', 'GSI3SK', include), ('GSI4', 'GSI4PK', 'updatedAt', {'ProjectionType': 'ALL'})]
+    attribute_names = ['PK', 'SK'] + [name for _, pk, sk, _ in indexes for name in (pk, sk)]
+    client.create_table(
+        TableName=table_name,
+        BillingMode='PAY_PER_REQUEST',
+        KeySchema=[{'AttributeName': 'PK', 'KeyType': 'HASH'}, {'AttributeName': 'SK', 'KeyType': 'RANGE'}],
+        AttributeDefinitions=[{'AttributeName': name, 'AttributeType': 'S'} for name in attribute_names],
+        GlobalSecondaryIndexes=[{
+            'IndexName': index_name,
+            'KeySchema': [{'AttributeName': pk, 'KeyType': 'HASH'}, {'AttributeName': sk, 'KeyType': 'RANGE'}],
+            'Projection': projection,
+        } for index_name, pk, sk, projection in indexes],
+    )
+    client.get_waiter('table_exists').wait(TableName=table_name)
+
+
+def load_handler(name):
+    spec = importlib.util.spec_from_file_location(f'{name}_handler', os.path.join(LAMBDA_DIR, name, 'handler.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def api_event(method, user_id, path, path_parameters=None, query=None, body=None):
+    return {
+        'httpMethod': method,
+        'path': path,
+        'resource': path,
+        'pathParameters': path_parameters,
+        'queryStringParameters': query,
+        'headers': {},
+        'body': json.dumps(body) if body is not None else None,
+        'requestContext': {'authorizer': {'claims': {'sub': user_id}}},
+    }
+
+
+def invoke(handler, event, expected=(200, 201, 204)):
+    response = handler.lambda_handler(event, None)
+    if response['statusCode'] not in expected:
+        raise RuntimeError(f"{event['httpMethod']} {event['path']} -> {response['statusCode']}: {response['body']}")
+    return json.loads(response['body']) if response.get('body') else {}
+
+
+def random_datetime(rng, years):
+    day = date(years[0], 1, 1) + timedelta(days=rng.randrange((date(years[1], 12, 31) - date(years[0], 1, 1)).days))
+    return datetime(day.year, day.month, day.day, rng.randrange(8, 19), rng.choice((0, 30)))
+
+
+class Dataset:
+    """產生並寫入測試資料，記錄之後產生請求所需的 ID"""
+
+    def __init__(self, args, handlers):
+        self.rng = random.Random(args.seed)
+        self.args = args
+        self.handlers = handlers
+        self.years = (args.start_year, args.end_year)
+        self.users = [f'user-{i:04d}' for i in range(args.users)]
+        self.projects = {}   # project_id -> 成員 userId 串列
+        self.events = []     # (project_id, event_id)
+        self.tasks = []      # (task_id, 負責人)
+        # 事件與任務的描述（bench_gsi_projection 以較長的描述量測投影差異）
+        self.description = getattr(args, 'description', None) or '討論本週進度與下週規劃'
+
+    def seed(self):
+        rng = self.rng
+        for i in range(self.args.projects):
+            owner = rng.choice(self.users)
+            others = rng.sample([u for u in self.users if u != owner], min(self.args.members, len(self.users) - 1))
+            body = invoke(self.handlers['project_manager'], api_event('POST', owner, '/projects', body={
+                'name': f'專案 {i}', 'description': '負載測試專案',
+                'members': [{'userId': user_id} for user_id in others],
+            }))
+            self.projects[body['project']['id']] = [owner, *others]
+
+        # 事件：依 (專案, 建立者) 分組，以批次端點寫入
+        groups = {}
+        for _ in range(self.args.events):
+            project_id = rng.choice(list(self.projects))
+            groups.setdefault((project_id, rng.choice(self.projects[project_id])), []).append(self.event_body())
+        for (project_id, user_id), bodies in groups.items():
+            for start in range(0, len(bodies), EVENT_BATCH_SIZE):
+                operations = [{'op': 'create', **body} for body in bodies[start:start + EVENT_BATCH_SIZE]]
+                result = invoke(self.handlers['events'], api_event(
+                    'POST', user_id, '/projects/{projectId}/events:batch', {'projectId': project_id},
+                    body={'operations': operations}
+                ))
+                self.events.extend((project_id, r['eventId']) for r in result['results'] if r['status'] == 201)
+
+        for _ in range(self.args.tasks):
+            self.create_task()
+
+    def event_body(self):
+        start = random_datetime(self.rng, self.years)
+        body = {
+            'title': f'會議 {self.rng.randrange(10000)}',
+            'description': self.description,
+            'startDate': start.isoformat(),
+            'endDate': (start + timedelta(minutes=self.rng.choice((30, 60, 90)))).isoformat(),
+        }
+        if self.rng.random() < RECURRING_RATIO:
+            body['rrule'] = f"FREQ=WEEKLY;COUNT={self.rng.randrange(4, 52)}"
+        return body
+
+    def create_task(self):
+        project_id = self.rng.choice(list(self.projects))
+        members = self.projects[project_id]
+        assignee = self.rng.choice(members)
+        body = {
+            'title': f'任務 {self.rng.randrange(10000)}',
+            'description': self.description,
+            'projectId': project_id,
+            'assigneeId': assignee,
+            'priority': self.rng.choice(('LOW', 'MEDIUM', 'HIGH')),
+            'status': self.rng.choice(('TODO', 'IN_PROGRESS', 'DONE')),
+        }
+        if self.rng.random() < 0.8:
+            body['dueDate'] = random_datetime(self.rng, self.years).date().isoformat()
+        task = invoke(self.handlers['task_manager'], api_event('POST', members[0], '/tasks', body=body))['task']
+        self.tasks.append((task['id'], assignee))
+        return task
+
+    def month_window(self):
+        start = random_datetime(self.rng, self.years).date().replace(day=1)
+        end = (start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+        return start.isoformat(), end.isoformat()
+
+    def iso_week(self):
+        year, week, _ = random_datetime(self.rng, self.years).isocalendar()
+        return f'{year}-W{week:02d}'
+
+
+def scenarios(data):
+    """端點名稱 -> 產生 (處理器名稱, 請求) 的函式；寫入端點使用資料集中既有的 ID"""
+    rng = data.rng
+
+    def project():
+        project_id = rng.choice(list(data.projects))
+        return project_id, rng.choice(data.projects[project_id])
+
+    def list_projects():
+        return 'project_manager', api_event('GET', rng.choice(data.users), '/projects', query={'limit': '50'})
+
+    def project_events():
+        project_id, user_id = project()
+        return 'events', api_event('GET', user_id, '/projects/{projectId}/events', {'projectId': project_id},
+                                   query={'limit': '100'})
+
+    def project_events_month():
+        project_id, user_id = project()
+        start, end = data.month_window()
+        return 'events', api_event('GET', user_id, '/projects/{projectId}/events', {'projectId': project_id},
+                                   query={'startDate': start, 'endDate': end})
+
+    def user_events_month():
+        start, end = data.month_window()
+        return 'events', api_event('GET', rng.choice(data.users), '/events', query={'startDate': start, 'endDate': end})
+
+    def user_events_week():
+        return 'events', api_event('GET', rng.choice(data.users), '/events', query={'weekOfYear': data.iso_week()})
+
+    def project_tasks():
+        project_id, user_id = project()
+        return 'task_manager', api_event('GET', user_id, '/projects/{projectId}/tasks', {'projectId': project_id},
+                                         query={'limit': '100'})
+
+    def assignee_tasks():
+        return 'task_manager', api_event('GET', rng.choice(data.users), '/tasks', query={'limit': '100', 'status': 'TODO,IN_PROGRESS'})
+
+    def create_event():
+        project_id, user_id = project()
+        return 'events', api_event('POST', user_id, '/projects/{projectId}/events', {'projectId': project_id},
+                                   body=data.event_body())
+
+    def update_event():
+        project_id, event_id = rng.choice(data.events)
+        start = random_datetime(rng, data.years)
+        return 'events', api_event('PUT', data.projects[project_id][0], '/events', body={
+            'eventId': event_id, 'projectId': project_id, 'title': '已更新',
+            'startDate': start.isoformat(), 'endDate': (start + timedelta(hours=1)).isoformat(),
+        })
+
+    def create_task():
+        project_id, user_id = project()
+        return 'task_manager', api_event('POST', user_id, '/tasks', body={
+            'title': '新任務', 'projectId': project_id, 'assigneeId': user_id, 'dueDate': data.month_window()[1],
+        })
+
+    def update_task():
+        task_id, assignee = rng.choice(data.tasks)
+        return 'task_manager', api_event('PUT', assignee, '/tasks/{taskId}', {'taskId': task_id},
+                                         body={'status': rng.choice(('TODO', 'IN_PROGRESS', 'DONE'))})
+
+    return {
+        'GET /projects': list_projects,
+        'GET /projects/{id}/events': project_events,
+        'GET /projects/{id}/events?month': project_events_month,
+        'GET /events?month': user_events_month,
+        'GET /events?weekOfYear': user_events_week,
+        'GET /projects/{id}/tasks': project_tasks,
+        'GET /tasks?assignee': assignee_tasks,
+        'POST /events': create_event,
+        'PUT /events': update_event,
+        'POST /tasks': create_task,
+        'PUT /tasks/{id}': update_task,
+    }
+
+
+def percentile(ordered, fraction):
+    """最近秩百分位數"""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered) + 0.5)) - 1))]
+
+
+def run_endpoint(handlers, make_request, meter, requests, warmup):
+    """依序送出 warmup + requests 個請求，只統計後者"""
+    latencies, calls, capacity, operations, errors = [], [], [], {}, 0
+    for i in range(warmup + requests):
+        handler_name, event = make_request()
+        handler = handlers[handler_name]
+        meter.reset()
+        t0 = time.perf_counter()
+        response = handler.lambda_handler(event, None)
+        elapsed = (time.perf_counter() - t0) * 1000
+        if i < warmup:
+            continue
+        request_calls, request_capacity, request_operations = meter.snapshot()
+        if response['statusCode'] >= 400:
+            errors += 1
+        latencies.append(elapsed)
+        calls.append(request_calls)
+        capacity.append(request_capacity)
+        for name, count in request_operations.items():
+            operations[name] = operations.get(name, 0) + count
+
+    ordered = sorted(latencies)
+    return {
+        'requests': requests,
+        'errors': errors,
+        'latencyMs': {
+            'p50': round(percentile(ordered, 0.50), 3),
+            'p95': round(percentile(ordered, 0.95), 3),
+            'p99': round(percentile(ordered, 0.99), 3),
+            'mean': round(sum(ordered) / len(ordered), 3),
+        },
+        'dynamoCallsPerRequest': round(sum(calls) / len(calls), 3),
+        'capacityUnitsPerRequest': round(sum(capacity) / len(capacity), 3),
+        'operations': {name: round(count / requests, 3) for name, count in sorted(operations.items())},
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def print_results(results):
+    print(f"{'endpoint':<34} {'p50':>8} {'p95':>8} {'p99':>8} {'calls':>6} {'CU':>7} {'err':>4}")
+    for name, stats in results['endpoints'].items():
+        latency = stats['latencyMs']
+        print(f"{name:<34} {latency['p50']:>8.2f} {latency['p95']:>8.2f} {latency['p99']:>8.2f} "
+              f"{stats['dynamoCallsPerRequest']:>6.2f} {stats['capacityUnitsPerRequest']:>7.2f} {stats['errors']:>4}")
+
+
+def print_comparison(baseline, results):
+    """與基準結果比較：延遲以百分比、呼叫次數與容量以差值表示"""
+    print(f"\n== 與 {baseline['meta']['commit']} 比較 ==")
+    print(f"{'endpoint':<34} {'p50':>9} {'p95':>9} {'p99':>9} {'calls':>7} {'CU':>7}")
+    for name, stats in results['endpoints'].items():
+        before = baseline['endpoints'].get(name)
+        if before is None:
+            print(f"{name:<34} {'(new)':>9}")
+            continue
+        row = f"{name:<34}"
+        for key in ('p50', 'p95', 'p99'):
+            old, new = before['latencyMs'][key], stats['latencyMs'][key]
+            row += f" {((new - old) / old * 100 if old else 0):>+8.1f}%"
+        row += f" {stats['dynamoCallsPerRequest'] - before['dynamoCallsPerRequest']:>+7.2f}"
+        row += f" {stats['capacityUnitsPerRequest'] - before['capacityUnitsPerRequest']:>+7.2f}"
+        print(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-test the Lambda handlers in-process')
+    parser.add_argument('--backend', choices=('local', 'moto'), default='local')
+    parser.add_argument('--endpoint', default='http://localhost:8000')
+    parser.add_argument('--table', default='calendar-loadtest')
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--projects', type=int, default=20)
+    parser.add_argument('--members', type=int, default=5, help='members per project besides the owner')
+    parser.add_argument('--events', type=int, default=5000)
+    parser.add_argument('--tasks', type=int, default=2000)
+    parser.add_argument('--start-year', type=int, default=2022)
+    parser.add_argument('--end-year', type=int, default=2026)
+    parser.add_argument('--requests', type=int, default=200, help='measured requests per endpoint')
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--only', nargs='+', help='run only endpoints whose name contains any of these strings')
+    parser.add_argument('--output', help='result JSON path (default: bench/results/loadtest-<commit>.json)')
+    parser.add_argument('--compare', help='baseline result JSON to compare against')
+    args = parser.parse_args()
+
+    configure_environment(args)
+    mock = None
+    if args.backend == 'moto':
+        from moto import mock_aws
+
+        mock = mock_aws()
+        mock.start()
+    try:
+        results = run(args)
+    finally:
+        if mock is not None:
+            mock.stop()
+
+    print_results(results)
+    output = args.output or os.path.join(RESULTS_DIR, f"loadtest-{results['meta']['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"\nresults written to {output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            print_comparison(json.load(f), results)
+
+
+def run(args):
+    create_table(args.table)
+    from calendar_core.db import get_client
+
+    meter = DynamoMeter()
+    meter.install(get_client())
+    handlers = {name: load_handler(name) for name in HANDLERS}
+
+    data = Dataset(args, handlers)
+    t0 = time.perf_counter()
+    data.seed()
+    seed_seconds = time.perf_counter() - t0
+    print(f"seeded {len(data.projects)} projects, {len(data.events)} events, {len(data.tasks)} tasks "
+          f"in {seed_seconds:.1f}s ({args.backend})\n")
+
+    endpoints = {}
+    for name, make_request in scenarios(data).items():
+        if args.only and not any(part in name for part in args.only):
+            continue
+        endpoints[name] = run_endpoint(handlers, make_request, meter, args.requests, args.warmup)
+
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.utcnow().isoformat() + 'Z',
+            'backend': args.backend,
+            'python': platform.python_version(),
+            'dataset': {
+                'users': args.users, 'projects': args.projects, 'members': args.members,
+                'events': len(data.events), 'tasks': len(data.tasks),
+                'years': [args.start_year, args.end_year], 'seed': args.seed,
+            },
+            'requestsPerEndpoint': args.requests,
+            'warmup': args.warmup,
+            'seedSeconds': round(seed_seconds, 2),
+        },
+        'endpoints': endpoints,
+    }
+
+
+if __name__ == '__main__':
+    main()
@@ -9,6 +9,8 @@ from stacks.cognito_stack import CognitoStack
 from stacks.dynamodb_stack import DynamoDBStack
 from stacks.api_gateway_stack import ApiGatewayStack
 from stacks.s3_frontend_stack import S3FrontendStack
+from stacks.stream_processing_stack import StreamProcessingStack
+from stacks.websocket_stack import WebSocketStack
 
 app = cdk.App()
 
@@ -33,6 +35,29 @@ api_gateway_stack = ApiGatewayStack(
     env=env
 )
 
+# 建立 WebSocket 即時推播
+websocket_stack = WebSocketStack(
+    app,
+    "CalendarAppWebSocketStack",
+    dynamodb_table=dynamodb_stack.table,
+    calendar_core_layer=api_gateway_stack.calendar_core_layer,
+    cognito_user_pool=cognito_stack.user_pool,
+    cognito_user_pool_client=cognito_stack.user_pool_client,
+    env=env
+)
+
+# 建立資料表串流處理（背景作業與即時推播）
+stream_processing_stack = StreamProcessingStack(
+    app,
+    "CalendarAppStreamProcessingStack",
+    dynamodb_table=dynamodb_stack.table,
+    calendar_core_layer=api_gateway_stack.calendar_core_layer,
+    connections_table=websocket_stack.connections_table,
+    websocket_api=websocket_stack.websocket_api,
+    websocket_callback_url=websocket_stack.websocket_stage.callback_url,
+    env=env
+)
+
 # 建立 S3 前端託管
 s3_frontend_stack = S3FrontendStack(app, "CalendarAppS3FrontendStack", env=env)
 
@@ -10,8 +10,13 @@ from aws_cdk import (
     aws_iam as iam,
     aws_cognito as cognito,
     aws_dynamodb as dynamodb,
+    aws_secretsmanager as secretsmanager,
+    aws_s3 as s3,
+    aws_s3_notifications as s3n,
     Duration,
+    Size,
     CfnOutput,
+    RemovalPolicy,
     Aws,
 )
 from constructs import Construct
@@ -28,6 +33,44 @@ class ApiGatewayStack(Stack):
     ) -> None:
         super().__init__(scope, construct_id, **kwargs)
 
+        # 分頁 cursor 的 HMAC 簽章金鑰：函數只拿到 ARN，執行環境啟動後以 GetSecretValue 讀取一次，
+        # 金鑰值不會出現在環境變數或合成的範本中
+        self.cursor_secret = secretsmanager.Secret(
+            self, "EventsCursorSecret",
+            generate_secret_string=secretsmanager.SecretStringGenerator(
+                password_length=48,
+                exclude_punctuation=True
+            )
+        )
+
+        # 共用資料存取層：calendar_core（連線池化的 DynamoDB 用戶端、鍵值組裝、響應輔助）
+        self.calendar_core_layer = lambda_.LayerVersion(
+            self, "CalendarCoreLayer",
+            code=lambda_.Code.from_asset("../lambda/layers/calendar_core"),
+            compatible_runtimes=[lambda_.Runtime.PYTHON_3_12],
+            description="calendar_core shared data-access layer"
+        )
+
+        # .ics 匯入/匯出暫存：客戶端以預簽 POST 上傳 imports/，匯出檔寫入 exports/ 後以預簽 URL 下載
+        self.calendar_files_bucket = s3.Bucket(
+            self, "CalendarFilesBucket",
+            block_public_access=s3.BlockPublicAccess.BLOCK_ALL,
+            encryption=s3.BucketEncryption.S3_MANAGED,
+            enforce_ssl=True,
+            lifecycle_rules=[
+                s3.LifecycleRule(prefix="imports/", expiration=Duration.days(7)),
+                s3.LifecycleRule(prefix="exports/", expiration=Duration.days(1)),
+                s3.LifecycleRule(abort_incomplete_multipart_upload_after=Duration.days(1))
+            ],
+            cors=[s3.CorsRule(
+                allowed_methods=[s3.HttpMethods.POST, s3.HttpMethods.GET],
+                allowed_origins=["*"],
+                allowed_headers=["*"]
+            )],
+            removal_policy=RemovalPolicy.DESTROY,  # 開發環境使用
+            auto_delete_objects=True  # 開發環境使用
+        )
+
         # 建立 Lambda 函數（命名對齊資源與路徑語義）
         # /events 集合資源：GET/POST/PUT 以及 /projects/{projectId}/events/{eventId} 的 DELETE 由同一處理器負責
         self.events_collection_lambda = lambda_.Function(
@@ -35,23 +78,59 @@ class ApiGatewayStack(Stack):
             runtime=lambda_.Runtime.PYTHON_3_12,
             handler="handler.lambda_handler",
             code=lambda_.Code.from_asset("../lambda/events"),
+            layers=[self.calendar_core_layer],
             timeout=Duration.seconds(30),
             environment={
-                "DYNAMODB_TABLE": dynamodb_table.table_name
+                "DYNAMODB_TABLE": dynamodb_table.table_name,
+                "CURSOR_SECRET_ARN": self.cursor_secret.secret_arn,
+                "ICS_BUCKET": self.calendar_files_bucket.bucket_name
             }
         )
+        self.calendar_files_bucket.grant_read_write(self.events_collection_lambda)
+        self.cursor_secret.grant_read(self.events_collection_lambda)
 
         # 刪除事件由同一個 events 處理器處理，無需單獨函數
 
+        # .ics 匯入背景作業：上傳完成的 S3 事件觸發，剩餘時間不足時以非同步呼叫自身續跑
+        self.events_import_lambda = lambda_.Function(
+            self, "EventsImportFunction",
+            function_name="calendar-app-events-import",
+            runtime=lambda_.Runtime.PYTHON_3_12,
+            handler="ics_transfer.import_handler",
+            code=lambda_.Code.from_asset("../lambda/events"),
+            layers=[self.calendar_core_layer],
+            timeout=Duration.minutes(15),
+            memory_size=512,
+            retry_attempts=2,
+            environment={
+                "DYNAMODB_TABLE": dynamodb_table.table_name,
+                "ICS_BUCKET": self.calendar_files_bucket.bucket_name
+            }
+        )
+        dynamodb_table.grant_read_write_data(self.events_import_lambda)
+        self.calendar_files_bucket.grant_read(self.events_import_lambda)
+        # 以固定函數名稱組 ARN，避免函數參照自身造成循環相依
+        self.events_import_lambda.add_to_role_policy(iam.PolicyStatement(
+            actions=["lambda:InvokeFunction"],
+            resources=[f"arn:aws:lambda:{Aws.REGION}:{Aws.ACCOUNT_ID}:function:calendar-app-events-import"]
+        ))
+        self.calendar_files_bucket.add_event_notification(
+            s3.EventType.OBJECT_CREATED,
+            s3n.LambdaDestination(self.events_import_lambda),
+            s3.NotificationKeyFilter(prefix="imports/", suffix=".ics")
+        )
+
         # /projects 集合資源：GET/POST/PUT/DELETE
         self.projects_collection_lambda = lambda_.Function(
             self, "ProjectsCollectionFunction",
             runtime=lambda_.Runtime.PYTHON_3_12,
             handler="handler.lambda_handler",
             code=lambda_.Code.from_asset("../lambda/project_manager"),
+            layers=[self.calendar_core_layer],
             timeout=Duration.seconds(30),
             environment={
-                "DYNAMODB_TABLE": dynamodb_table.table_name
+                "DYNAMODB_TABLE": dynamodb_table.table_name,
+                "CURSOR_SECRET_ARN": self.cursor_secret.secret_arn
             }
         )
 
@@ -61,11 +140,73 @@ class ApiGatewayStack(Stack):
             runtime=lambda_.Runtime.PYTHON_3_12,
             handler="handler.lambda_handler",
             code=lambda_.Code.from_asset("../lambda/task_manager"),
+            layers=[self.calendar_core_layer],
             timeout=Duration.seconds(30),
+            environment={
+                "DYNAMODB_TABLE": dynamodb_table.table_name,
+                "CURSOR_SECRET_ARN": self.cursor_secret.secret_arn
+            }
+        )
+
+        # /dashboard/summary：讀取串流維護的計數項目（唯讀）
+        self.dashboard_lambda = lambda_.Function(
+            self, "DashboardFunction",
+            runtime=lambda_.Runtime.PYTHON_3_12,
+            handler="handler.lambda_handler",
+            code=lambda_.Code.from_asset("../lambda/dashboard"),
+            layers=[self.calendar_core_layer],
+            timeout=Duration.seconds(10),
             environment={
                 "DYNAMODB_TABLE": dynamodb_table.table_name
             }
         )
+        dynamodb_table.grant_read_data(self.dashboard_lambda)
+
+        # /sync：差異同步（唯讀）
+        self.sync_lambda = lambda_.Function(
+            self, "SyncFunction",
+            runtime=lambda_.Runtime.PYTHON_3_12,
+            handler="handler.lambda_handler",
+            code=lambda_.Code.from_asset("../lambda/sync"),
+            layers=[self.calendar_core_layer],
+            timeout=Duration.seconds(30),
+            environment={
+                "DYNAMODB_TABLE": dynamodb_table.table_name,
+                "CURSOR_SECRET_ARN": self.cursor_secret.secret_arn
+            }
+        )
+        dynamodb_table.grant_read_data(self.sync_lambda)
+        self.cursor_secret.grant_read(self.sync_lambda)
+
+        # /projects/{projectId}/freebusy：成員空閒/忙碌查詢（唯讀，成員平行查詢）
+        self.freebusy_lambda = lambda_.Function(
+            self, "FreeBusyFunction",
+            runtime=lambda_.Runtime.PYTHON_3_12,
+            handler="handler.lambda_handler",
+            code=lambda_.Code.from_asset("../lambda/freebusy"),
+            layers=[self.calendar_core_layer],
+            timeout=Duration.seconds(30),
+            environment={
+                "DYNAMODB_TABLE": dynamodb_table.table_name
+            }
+        )
+        dynamodb_table.grant_read_data(self.freebusy_lambda)
+
+        # /search：事件與任務全文搜尋（唯讀，查詢串流維護的反向索引）
+        self.search_lambda = lambda_.Function(
+            self, "SearchFunction",
+            runtime=lambda_.Runtime.PYTHON_3_12,
+            handler="handler.lambda_handler",
+            code=lambda_.Code.from_asset("../lambda/search"),
+            layers=[self.calendar_core_layer],
+            timeout=Duration.seconds(30),
+            environment={
+                "DYNAMODB_TABLE": dynamodb_table.table_name,
+                "CURSOR_SECRET_ARN": self.cursor_secret.secret_arn
+            }
+        )
+        dynamodb_table.grant_read_data(self.search_lambda)
+        self.cursor_secret.grant_read(self.search_lambda)
 
         # 授予 Lambda 函數 DynamoDB 權限
         dynamodb_table.grant_read_write_data(self.events_collection_lambda)
@@ -73,16 +214,21 @@ class ApiGatewayStack(Stack):
         # 新增：授予專案和任務管理 Lambda 函數 DynamoDB 權限
         dynamodb_table.grant_read_write_data(self.projects_collection_lambda)
         dynamodb_table.grant_read_write_data(self.tasks_collection_lambda)
+        self.cursor_secret.grant_read(self.projects_collection_lambda)
+        self.cursor_secret.grant_read(self.tasks_collection_lambda)
 
         # 建立 API Gateway
         self.api = apigateway.RestApi(
             self, "CalendarAppApi",
             rest_api_name="Co-Caling 日暦共編 API",
             description="Co-Caling 日暦共編 - 多用戶共用日曆 API",
+            # 響應由 API Gateway 依 Accept-Encoding 壓縮（gzip/deflate），Lambda 回傳純文字 JSON，
+            # 不需設定 binary_media_types，請求本文也不會被轉為 base64
+            min_compression_size=Size.bytes(1024),
             default_cors_preflight_options=apigateway.CorsOptions(
                 allow_origins=["*"],
                 allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-                allow_headers=["Content-Type", "Authorization", "X-Amz-Date", "X-Api-Key", "X-Amz-Security-Token"]
+                allow_headers=["Content-Type", "Authorization", "X-Amz-Date", "X-Api-Key", "X-Amz-Security-Token", "If-None-Match"]
             )
         )
 
@@ -97,6 +243,8 @@ class ApiGatewayStack(Stack):
         # calendars = self.api.root.add_resource("calendars")
         events = self.api.root.add_resource("events")
         event_id = events.add_resource("{eventId}")
+        # 批次事件操作：POST /events:batch
+        events_batch = self.api.root.add_resource("events:batch")
         
         # 新增：專案管理資源
         projects = self.api.root.add_resource("projects")
@@ -111,6 +259,19 @@ class ApiGatewayStack(Stack):
         # 新增：專案事件資源
         project_events = project_id.add_resource("events")
         project_event_id = project_events.add_resource("{eventId}")
+        project_events_batch = project_id.add_resource("events:batch")
+        project_events_import = project_events.add_resource("import")
+        project_events_import_id = project_events_import.add_resource("{importId}")
+        project_events_export = project_events.add_resource("export")
+        # 儀表板彙總
+        dashboard = self.api.root.add_resource("dashboard")
+        dashboard_summary = dashboard.add_resource("summary")
+        # 差異同步
+        sync = self.api.root.add_resource("sync")
+        # 空閒/忙碌查詢
+        project_freebusy = project_id.add_resource("freebusy")
+
+        search = self.api.root.add_resource("search")
 
         # 建立 Lambda 整合
         events_collection_integration = apigateway.LambdaIntegration(
@@ -132,6 +293,26 @@ class ApiGatewayStack(Stack):
             request_templates={"application/json": '{"statusCode": "200"}'}
         )
 
+        dashboard_integration = apigateway.LambdaIntegration(
+            self.dashboard_lambda,
+            request_templates={"application/json": '{"statusCode": "200"}'}
+        )
+
+        sync_integration = apigateway.LambdaIntegration(
+            self.sync_lambda,
+            request_templates={"application/json": '{"statusCode": "200"}'}
+        )
+
+        freebusy_integration = apigateway.LambdaIntegration(
+            self.freebusy_lambda,
+            request_templates={"application/json": '{"statusCode": "200"}'}
+        )
+
+        search_integration = apigateway.LambdaIntegration(
+            self.search_lambda,
+            request_templates={"application/json": '{"statusCode": "200"}'}
+        )
+
         # 明確授予 API Gateway 調用 Lambda 的權限
         self.events_collection_lambda.add_permission(
             "ApiGatewayInvoke",
@@ -158,6 +339,32 @@ class ApiGatewayStack(Stack):
             source_arn=f"arn:aws:execute-api:{Aws.REGION}:{Aws.ACCOUNT_ID}:{self.api.rest_api_id}/*"
         )
 
+        self.dashboard_lambda.add_permission(
+            "ApiGatewayInvoke",
+            principal=iam.ServicePrincipal("apigateway.amazonaws.com"),
+            action="lambda:InvokeFunction",
+            source_arn=f"arn:aws:execute-api:{Aws.REGION}:{Aws.ACCOUNT_ID}:{self.api.rest_api_id}/*"
+        )
+
+        self.sync_lambda.add_permission(
+            "ApiGatewayInvoke",
+            principal=iam.ServicePrincipal("apigateway.amazonaws.com"),
+            action="lambda:InvokeFunction",
+            source_arn=f"arn:aws:execute-api:{Aws.REGION}:{Aws.ACCOUNT_ID}:{self.api.rest_api_id}/*"
+        )
+        self.freebusy_lambda.add_permission(
+            "ApiGatewayInvoke",
+            principal=iam.ServicePrincipal("apigateway.amazonaws.com"),
+            action="lambda:InvokeFunction",
+            source_arn=f"arn:aws:execute-api:{Aws.REGION}:{Aws.ACCOUNT_ID}:{self.api.rest_api_id}/*"
+        )
+        self.search_lambda.add_permission(
+            "ApiGatewayInvoke",
+            principal=iam.ServicePrincipal("apigateway.amazonaws.com"),
+            action="lambda:InvokeFunction",
+            source_arn=f"arn:aws:execute-api:{Aws.REGION}:{Aws.ACCOUNT_ID}:{self.api.rest_api_id}/*"
+        )
+
         # calendars 端點已移除
 
         # 主要資源端點 - 簡化設計，ID 通過請求體傳遞
@@ -268,6 +475,21 @@ class ApiGatewayStack(Stack):
             authorization_type=apigateway.AuthorizationType.COGNITO
         )
         
+        # 批次建立/更新/刪除事件
+        events_batch.add_method(
+            "POST",
+            events_collection_integration,
+            authorizer=auth,
+            authorization_type=apigateway.AuthorizationType.COGNITO
+        )
+
+        project_events_batch.add_method(
+            "POST",
+            events_collection_integration,
+            authorizer=auth,
+            authorization_type=apigateway.AuthorizationType.COGNITO
+        )
+
         # 關聯查詢端點（使用查詢參數過濾）
         project_tasks.add_method(
             "GET",
@@ -283,6 +505,61 @@ class ApiGatewayStack(Stack):
             authorization_type=apigateway.AuthorizationType.COGNITO
         )
 
+        # .ics 匯入（預簽上傳）、匯入進度與匯出
+        project_events_import.add_method(
+            "POST",
+            events_collection_integration,
+            authorizer=auth,
+            authorization_type=apigateway.AuthorizationType.COGNITO
+        )
+
+        project_events_import_id.add_method(
+            "GET",
+            events_collection_integration,
+            authorizer=auth,
+            authorization_type=apigateway.AuthorizationType.COGNITO
+        )
+
+        project_events_export.add_method(
+            "GET",
+            events_collection_integration,
+            authorizer=auth,
+            authorization_type=apigateway.AuthorizationType.COGNITO
+        )
+
+        # 儀表板彙總端點
+        dashboard_summary.add_method(
+            "GET",
+            dashboard_integration,
+            authorizer=auth,
+            authorization_type=apigateway.AuthorizationType.COGNITO
+        )
+
+        # 差異同步端點
+        sync.add_method(
+            "GET",
+            sync_integration,
+            authorizer=auth,
+            authorization_type=apigateway.AuthorizationType.COGNITO
+        )
+
+        # 空閒/忙碌查詢端點
+        project_freebusy.add_method(
+            "GET",
+            freebusy_integration,
+            authorizer=auth,
+            authorization_type=apigateway.AuthorizationType.COGNITO
+        )
+
+        # 全文搜尋端點
+        search.add_method(
+            "GET",
+            search_integration,
+            authorizer=auth,
+            authorization_type=apigateway.AuthorizationType.COGNITO
+        )
+
         # 輸出
         CfnOutput(self, "ApiGatewayUrl", value=self.api.url)
         CfnOutput(self, "ApiGatewayId", value=self.api.rest_api_id)
+        CfnOutput(self, "CalendarFilesBucketName", value=self.calendar_files_bucket.bucket_name)
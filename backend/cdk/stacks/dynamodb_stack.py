@@ -12,11 +12,25 @@ from aws_cdk import (
 )
 from constructs import Construct
 
+# GSI1 ~ GSI3 的精簡投影：只含列表端點輸出的欄位與篩選屬性，描述等長文字留在資料表
+# 必須與 calendar_core.index_projection.INDEX_ATTRIBUTES 一致
+LIST_INDEX_ATTRIBUTES = [
+    "eventId", "title", "startDate", "endDate", "weekOfYear", "allDay", "color",
+    "projectId", "projectName", "ownerId", "rrule",
+    "status", "priority", "assigneeId", "dueDate",
+    "name", "entityType",
+    "createdAt", "updatedAt",
+]
+
 
 class DynamoDBStack(Stack):
     def __init__(self, scope: Construct, construct_id: str, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
 
+        # 變更既有 GSI 的投影須先刪除再重建（一次部署只能刪除或建立一個 GSI），
+        # 以 -c omitIndexes=GSI1 暫時移除指定索引，詳見 README「精簡 GSI 投影」
+        omitted = set(filter(None, (self.node.try_get_context("omitIndexes") or "").split(",")))
+
         # 單表設計：儲存所有業務資料
         self.table = dynamodb.Table(
             self, "CalendarAppTable",
@@ -32,32 +46,71 @@ class DynamoDBStack(Stack):
             billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
             removal_policy=RemovalPolicy.DESTROY,  # 開發環境使用
             point_in_time_recovery=True,
-            stream=dynamodb.StreamViewType.NEW_AND_OLD_IMAGES
+            stream=dynamodb.StreamViewType.NEW_AND_OLD_IMAGES,
+            # 串流去重標記等暫存項目以 TTL 自動過期
+            time_to_live_attribute="expiresAt"
         )
 
         # GSI1: 用於按類型查詢和排序
-        self.table.add_global_secondary_index(
-            index_name="GSI1",
-            partition_key=dynamodb.Attribute(
-                name="GSI1PK",
-                type=dynamodb.AttributeType.STRING
-            ),
-            sort_key=dynamodb.Attribute(
-                name="GSI1SK",
-                type=dynamodb.AttributeType.STRING
-            ),
-            projection_type=dynamodb.ProjectionType.ALL
-        )
+        if "GSI1" not in omitted:
+            self.table.add_global_secondary_index(
+                index_name="GSI1",
+                partition_key=dynamodb.Attribute(
+                    name="GSI1PK",
+                    type=dynamodb.AttributeType.STRING
+                ),
+                sort_key=dynamodb.Attribute(
+                    name="GSI1SK",
+                    type=dynamodb.AttributeType.STRING
+                ),
+                projection_type=dynamodb.ProjectionType.INCLUDE,
+                non_key_attributes=LIST_INDEX_ATTRIBUTES
+            )
+
+        # GSI2: 用於按日期查詢（使用者 + 開始時間）
+        if "GSI2" not in omitted:
+            self.table.add_global_secondary_index(
+                index_name="GSI2",
+                partition_key=dynamodb.Attribute(
+                    name="GSI2PK",
+                    type=dynamodb.AttributeType.STRING
+                ),
+                sort_key=dynamodb.Attribute(
+                    name="GSI2SK",
+                    type=dynamodb.AttributeType.STRING
+                ),
+                projection_type=dynamodb.ProjectionType.INCLUDE,
+                non_key_attributes=LIST_INDEX_ATTRIBUTES
+            )
+
+        # GSI3: 專案 + 開始時間，讓專案的週/日期區間查詢成為純 KeyCondition 範圍查詢
+        # 既有事件需執行 backend/scripts/backfill_event_date_keys.py 回填
+        if "GSI3" not in omitted:
+            self.table.add_global_secondary_index(
+                index_name="GSI3",
+                partition_key=dynamodb.Attribute(
+                    name="GSI3PK",
+                    type=dynamodb.AttributeType.STRING
+                ),
+                sort_key=dynamodb.Attribute(
+                    name="GSI3SK",
+                    type=dynamodb.AttributeType.STRING
+                ),
+                projection_type=dynamodb.ProjectionType.INCLUDE,
+                non_key_attributes=LIST_INDEX_ATTRIBUTES
+            )
 
-        # GSI2: 用於按日期查詢
+        # GSI4: 差異同步（專案 + updatedAt），只有帶 GSI4PK 的項目會進入索引
+        # 同步回傳完整項目，維持 ProjectionType.ALL
+        # 既有資料需執行 backend/scripts/backfill_sync_index_keys.py 回填
         self.table.add_global_secondary_index(
-            index_name="GSI2",
+            index_name="GSI4",
             partition_key=dynamodb.Attribute(
-                name="GSI2PK",
+                name="GSI4PK",
                 type=dynamodb.AttributeType.STRING
             ),
             sort_key=dynamodb.Attribute(
-                name="GSI2SK",
+                name="updatedAt",
                 type=dynamodb.AttributeType.STRING
             ),
             projection_type=dynamodb.ProjectionType.ALL
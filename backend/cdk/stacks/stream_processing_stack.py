@@ -0,0 +1,119 @@
+"""
+資料表串流處理堆疊
+以 CalendarAppTable 的 DynamoDB Stream（NEW_AND_OLD_IMAGES）驅動背景作業。
+串流只有一個事件來源映射（stream_dispatcher），在行程內分派給各消費者：每個串流分片建議最多兩個讀取者，
+各消費者各自掛事件來源時會互相爭用讀取額度而被節流。
+"""
+
+import os
+
+from aws_cdk import (
+    Stack,
+    aws_lambda as lambda_,
+    aws_lambda_event_sources as lambda_event_sources,
+    aws_iam as iam,
+    aws_sqs as sqs,
+    aws_dynamodb as dynamodb,
+    aws_apigatewayv2 as apigwv2,
+    Duration,
+    Aws,
+)
+from constructs import Construct
+
+LAMBDA_ROOT = "../lambda"
+# stream_dispatcher 以套件方式匯入的消費者目錄（只打包這些目錄）
+STREAM_PACKAGES = (
+    "stream_dispatcher",
+    "membership_events",
+    "task_projector",
+    "dashboard_aggregator",
+    "search_indexer",
+    "slot_indexer",
+    "list_versions",
+    "realtime_fanout",
+)
+
+
+class StreamProcessingStack(Stack):
+    def __init__(
+        self,
+        scope: Construct,
+        construct_id: str,
+        dynamodb_table: dynamodb.Table,
+        calendar_core_layer: lambda_.ILayerVersion,
+        connections_table: dynamodb.Table,
+        websocket_api: apigwv2.WebSocketApi,
+        websocket_callback_url: str,
+        **kwargs
+    ) -> None:
+        super().__init__(scope, construct_id, **kwargs)
+
+        # 專案串聯刪除：專案 status 轉為 DELETING 時清除整個分區與相關任務
+        cleanup_function_name = "calendar-app-project-cleanup"
+        self.project_cleanup_lambda = lambda_.Function(
+            self, "ProjectCleanupFunction",
+            function_name=cleanup_function_name,
+            runtime=lambda_.Runtime.PYTHON_3_12,
+            handler="handler.lambda_handler",
+            code=lambda_.Code.from_asset("../lambda/project_cleanup"),
+            layers=[calendar_core_layer],
+            timeout=Duration.minutes(5),
+            environment={
+                "DYNAMODB_TABLE": dynamodb_table.table_name
+            }
+        )
+        dynamodb_table.grant_read_write_data(self.project_cleanup_lambda)
+
+        # 允許逾時前非同步呼叫自己續跑（以名稱組 ARN，避免角色與函數互相依賴）
+        self.project_cleanup_lambda.add_to_role_policy(iam.PolicyStatement(
+            actions=["lambda:InvokeFunction"],
+            resources=[f"arn:aws:lambda:{Aws.REGION}:{Aws.ACCOUNT_ID}:function:{cleanup_function_name}"]
+        ))
+
+        # 串流分派：成員關係快取失效（membership_events）、任務列表投影（task_projector）、
+        # 儀表板計數與寫入分片（dashboard_aggregator）、全文搜尋索引（search_indexer）、
+        # 衝突檢查分桶索引（slot_indexer）、列表 ETag 版本計數（list_versions）、即時推播（realtime_fanout），
+        # 以及以非同步呼叫啟動專案串聯刪除
+        self.stream_dispatcher_lambda = lambda_.Function(
+            self, "StreamDispatcherFunction",
+            function_name="calendar-app-stream-dispatcher",
+            runtime=lambda_.Runtime.PYTHON_3_12,
+            handler="stream_dispatcher/handler.lambda_handler",
+            code=lambda_.Code.from_asset(
+                LAMBDA_ROOT,
+                exclude=[name for name in os.listdir(LAMBDA_ROOT) if name not in STREAM_PACKAGES] + ["**/__pycache__"]
+            ),
+            layers=[calendar_core_layer],
+            timeout=Duration.minutes(2),
+            environment={
+                "DYNAMODB_TABLE": dynamodb_table.table_name,
+                "CONNECTIONS_TABLE": connections_table.table_name,
+                "WEBSOCKET_CALLBACK_URL": websocket_callback_url,
+                "PROJECT_CLEANUP_FUNCTION": cleanup_function_name,
+                # 專案事件 + 任務數達門檻時啟用寫入分片
+                "SHARD_THRESHOLD_ITEMS": "5000",
+                "PROJECT_SHARD_COUNT": "8"
+            }
+        )
+        dynamodb_table.grant_read_write_data(self.stream_dispatcher_lambda)
+        connections_table.grant_read_write_data(self.stream_dispatcher_lambda)
+        websocket_api.grant_manage_connections(self.stream_dispatcher_lambda)
+        self.project_cleanup_lambda.grant_invoke(self.stream_dispatcher_lambda)
+
+        # 重試用盡的記錄改送死信佇列（只含分片與序號範圍，據此從串流重讀；串流保留 24 小時）
+        self.stream_dispatcher_dlq = sqs.Queue(
+            self, "StreamDispatcherDLQ",
+            queue_name="calendar-app-stream-dispatcher-dlq",
+            retention_period=Duration.days(14)
+        )
+
+        # 各消費者都可重複套用（去重標記、覆寫寫入），任一失敗時整批重試並二分定位問題記錄
+        self.stream_dispatcher_lambda.add_event_source(lambda_event_sources.DynamoEventSource(
+            dynamodb_table,
+            starting_position=lambda_.StartingPosition.TRIM_HORIZON,
+            batch_size=100,
+            max_batching_window=Duration.seconds(1),
+            retry_attempts=10,
+            bisect_batch_on_error=True,
+            on_failure=lambda_event_sources.SqsDlq(self.stream_dispatcher_dlq)
+        ))
@@ -0,0 +1,95 @@
+"""
+WebSocket 即時推播堆疊
+- WebSocket API：$connect / $disconnect 由 websocket_connections 處理（以 Cognito token 的 sub 為用戶）
+- 連線表：connectionId + UserIndex（userId），TTL 自動清除逾期連線
+- 推播由 StreamProcessingStack 的串流分派函數執行（realtime_fanout），本堆疊提供連線表與 callback URL
+"""
+
+from aws_cdk import (
+    Stack,
+    aws_lambda as lambda_,
+    aws_dynamodb as dynamodb,
+    aws_cognito as cognito,
+    aws_apigatewayv2 as apigwv2,
+    aws_apigatewayv2_integrations as apigwv2_integrations,
+    Duration,
+    RemovalPolicy,
+    CfnOutput,
+)
+from constructs import Construct
+
+
+class WebSocketStack(Stack):
+    def __init__(
+        self,
+        scope: Construct,
+        construct_id: str,
+        dynamodb_table: dynamodb.Table,
+        calendar_core_layer: lambda_.ILayerVersion,
+        cognito_user_pool: cognito.UserPool,
+        cognito_user_pool_client: cognito.UserPoolClient,
+        **kwargs
+    ) -> None:
+        super().__init__(scope, construct_id, **kwargs)
+
+        # 連線表：連線短暫且頻繁變動，與業務單表分開（不進入資料表串流）
+        self.connections_table = dynamodb.Table(
+            self, "WebSocketConnectionsTable",
+            table_name="calendar-app-connections",
+            partition_key=dynamodb.Attribute(
+                name="connectionId",
+                type=dynamodb.AttributeType.STRING
+            ),
+            billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
+            removal_policy=RemovalPolicy.DESTROY,
+            time_to_live_attribute="expiresAt"
+        )
+        self.connections_table.add_global_secondary_index(
+            index_name="UserIndex",
+            partition_key=dynamodb.Attribute(
+                name="userId",
+                type=dynamodb.AttributeType.STRING
+            ),
+            projection_type=dynamodb.ProjectionType.KEYS_ONLY
+        )
+
+        # $connect / $disconnect
+        self.connections_lambda = lambda_.Function(
+            self, "WebSocketConnectionsFunction",
+            runtime=lambda_.Runtime.PYTHON_3_12,
+            handler="handler.lambda_handler",
+            code=lambda_.Code.from_asset("../lambda/websocket_connections"),
+            layers=[calendar_core_layer],
+            timeout=Duration.seconds(10),
+            environment={
+                "DYNAMODB_TABLE": dynamodb_table.table_name,
+                "CONNECTIONS_TABLE": self.connections_table.table_name,
+                "COGNITO_USER_POOL_ID": cognito_user_pool.user_pool_id,
+                "COGNITO_APP_CLIENT_ID": cognito_user_pool_client.user_pool_client_id
+            }
+        )
+        self.connections_table.grant_read_write_data(self.connections_lambda)
+
+        self.websocket_api = apigwv2.WebSocketApi(
+            self, "CalendarAppWebSocketApi",
+            api_name="Co-Caling 日暦共編 WebSocket",
+            connect_route_options=apigwv2.WebSocketRouteOptions(
+                integration=apigwv2_integrations.WebSocketLambdaIntegration(
+                    "ConnectIntegration", self.connections_lambda
+                )
+            ),
+            disconnect_route_options=apigwv2.WebSocketRouteOptions(
+                integration=apigwv2_integrations.WebSocketLambdaIntegration(
+                    "DisconnectIntegration", self.connections_lambda
+                )
+            )
+        )
+        self.websocket_stage = apigwv2.WebSocketStage(
+            self, "CalendarAppWebSocketStage",
+            web_socket_api=self.websocket_api,
+            stage_name="prod",
+            auto_deploy=True
+        )
+
+        # 輸出
+        CfnOutput(self, "WebSocketUrl", value=self.websocket_stage.url)
@@ -0,0 +1,72 @@
+"""
+後端單元測試共用設定
+- 把 calendar_core layer 加入 sys.path，Lambda 處理器以 load_handler 依目錄載入
+- table fixture 以 moto 建立與 DynamoDBStack 相同鍵結構的單表（GSI1 ~ GSI3 精簡投影、GSI4 完整投影）
+"""
+
+import importlib.util
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+LAMBDA_DIR = os.path.join(BACKEND_DIR, 'lambda')
+sys.path.insert(0, os.path.join(LAMBDA_DIR, 'layers', 'calendar_core', 'python'))
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+os.environ['DYNAMODB_TABLE'] = 'calendar-app-data-test'
+
+
+def load_handler(name):
+    """載入 lambda/{name}/handler.py（各 Lambda 的模組名稱相同，以目錄名稱區分）"""
+    spec = importlib.util.spec_from_file_location(f'{name}_handler', os.path.join(LAMBDA_DIR, name, 'handler.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def table():
+    moto = pytest.importorskip('moto')
+    import boto3
+
+    from calendar_core import db, pagination, sharding
+    from calendar_core.index_projection import INDEX_ATTRIBUTES
+
+    with moto.mock_aws():
+        attributes = {'PK', 'SK', 'GSI4PK', 'updatedAt'}
+        indexes = []
+        for name in ('GSI1', 'GSI2', 'GSI3'):
+            attributes.update({f'{name}PK', f'{name}SK'})
+            indexes.append({
+                'IndexName': name,
+                'KeySchema': [
+                    {'AttributeName': f'{name}PK', 'KeyType': 'HASH'},
+                    {'AttributeName': f'{name}SK', 'KeyType': 'RANGE'}
+                ],
+                'Projection': {'ProjectionType': 'INCLUDE', 'NonKeyAttributes': list(INDEX_ATTRIBUTES)}
+            })
+        indexes.append({
+            'IndexName': 'GSI4',
+            'KeySchema': [
+                {'AttributeName': 'GSI4PK', 'KeyType': 'HASH'},
+                {'AttributeName': 'updatedAt', 'KeyType': 'RANGE'}
+            ],
+            'Projection': {'ProjectionType': 'ALL'}
+        })
+        boto3.client('dynamodb').create_table(
+            TableName=os.environ['DYNAMODB_TABLE'],
+            KeySchema=[{'AttributeName': 'PK', 'KeyType': 'HASH'}, {'AttributeName': 'SK', 'KeyType': 'RANGE'}],
+            AttributeDefinitions=[{'AttributeName': name, 'AttributeType': 'S'} for name in sorted(attributes)],
+            GlobalSecondaryIndexes=indexes,
+            BillingMode='PAY_PER_REQUEST'
+        )
+        # 每個測試重新建立用戶端與分片設定快取，避免沿用上一個模擬環境的狀態
+        db._client = db._table = None
+        sharding._layouts.clear()
+        pagination.set_secret('test-cursor-secret')
+        yield db.get_table()
+        db._client = db._table = None
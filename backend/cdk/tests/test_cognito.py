@@ -0,0 +1,109 @@
+"""cognito：RS256 簽章與 claims 驗證的已知答案測試"""
+
+import base64
+import hashlib
+import json
+import time
+
+import pytest
+
+from calendar_core import cognito
+
+# 1024 位元測試金鑰（openssl genrsa 產生，只供測試）
+N = int(
+    'b189097cead203e11e1a5c9750ff3b094974fd31f957121a92c7e8f97a3932c16df671c2313a9e8d586fc79ed3d25977'
+    'd6a1ab0446716d8cd7e8c0a63f545f75c1b35b0fbe79a385862a2743af4af82b790e8a63688263035ef93965cfadc216'
+    'ec14a0be62e23c9b57bc8ab2a1dcd6f7791312c36b088fa2fb110cadaca1d727', 16
+)
+E = 65537
+D = int(
+    '28ffebc80476d1dc88563031e5cbbbb78e564d2ee0556261eea9ea3ccb24307b894893c6f415848e41f13699907390a3'
+    'e3565ca7551956e262ee66a73e12df24710c042bf35b9c4be7d842c7073462281780c2499b8407b02bde429f6b51a745'
+    'c9e1e39ffc269d86d22d68d0ebff380d34b50d0bc6754c848e52f50c9c354469', 16
+)
+# openssl dgst -sha256 -sign 對 KAT_MESSAGE 產生的簽章
+KAT_MESSAGE = b'calendar-core known answer'
+KAT_SIGNATURE = bytes.fromhex(
+    '96ccc0747d0e5b1df91a0951ba6e777a8142b0cf33e3aa465a5f141c376512061bf8170c2420d75df90a6bcda46bf352'
+    'aec94a2d91738014c77b635ff257f49f2b39a833e91f6b517a554a31048f7ad8ea876c02100dc8650a85234217dcdd56'
+    'cba3da2d9761253024cb8765d54cafe0d0ede9cbd56468fb7b199993a77b96ea'
+)
+
+POOL_ID = 'ap-east-1_TestPool'
+CLIENT_ID = 'test-app-client'
+KID = 'test-key'
+
+
+@pytest.fixture(autouse=True)
+def user_pool(monkeypatch):
+    monkeypatch.setenv('COGNITO_USER_POOL_ID', POOL_ID)
+    monkeypatch.setenv('COGNITO_APP_CLIENT_ID', CLIENT_ID)
+    monkeypatch.setattr(cognito, '_jwks', {KID: (N, E)})
+    monkeypatch.setattr(cognito, '_jwks_fetched_at', time.time())
+
+
+def b64(raw):
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def sign(message):
+    """以測試私鑰產生 PKCS#1 v1.5 / SHA-256 簽章"""
+    size = (N.bit_length() + 7) // 8
+    digest = cognito._SHA256_DIGEST_INFO + hashlib.sha256(message).digest()
+    encoded = b'\x00\x01' + b'\xff' * (size - len(digest) - 3) + b'\x00' + digest
+    return pow(int.from_bytes(encoded, 'big'), D, N).to_bytes(size, 'big')
+
+
+def make_token(**overrides):
+    claims = {
+        'sub': 'user-1',
+        'iss': f'https://cognito-idp.ap-east-1.amazonaws.com/{POOL_ID}',
+        'aud': CLIENT_ID,
+        'token_use': 'id',
+        'exp': int(time.time()) + 3600,
+        **overrides
+    }
+    signing_input = f"{b64(json.dumps({'alg': 'RS256', 'kid': KID}).encode())}.{b64(json.dumps(claims).encode())}"
+    return f'{signing_input}.{b64(sign(signing_input.encode("ascii")))}'
+
+
+def test_rsa_verify_accepts_openssl_signature():
+    assert cognito.rsa_sha256_verify(KAT_MESSAGE, KAT_SIGNATURE, N, E)
+    assert sign(KAT_MESSAGE) == KAT_SIGNATURE
+
+
+def test_rsa_verify_rejects_tampered_message_and_signature():
+    assert not cognito.rsa_sha256_verify(KAT_MESSAGE + b'!', KAT_SIGNATURE, N, E)
+    tampered = bytes([KAT_SIGNATURE[0] ^ 1]) + KAT_SIGNATURE[1:]
+    assert not cognito.rsa_sha256_verify(KAT_MESSAGE, tampered, N, E)
+    assert not cognito.rsa_sha256_verify(KAT_MESSAGE, KAT_SIGNATURE[1:], N, E)
+
+
+def test_verify_token_valid_id_and_access_tokens():
+    assert cognito.verify_token(make_token())['sub'] == 'user-1'
+    access = make_token(token_use='access', aud=None, client_id=CLIENT_ID)
+    assert cognito.verify_token(access)['sub'] == 'user-1'
+
+
+def test_verify_token_rejects_tampered_payload():
+    header, _, signature = make_token().split('.')
+    forged = b64(json.dumps({'sub': 'admin', 'aud': CLIENT_ID, 'token_use': 'id'}).encode())
+    with pytest.raises(cognito.InvalidTokenError, match='Signature mismatch'):
+        cognito.verify_token(f'{header}.{forged}.{signature}')
+
+
+@pytest.mark.parametrize('overrides, message', [
+    ({'exp': int(time.time()) - 1}, 'Token expired'),
+    ({'aud': 'other-client'}, 'Wrong audience'),
+    ({'token_use': 'access', 'aud': None, 'client_id': 'other-client'}, 'Wrong audience'),
+    ({'iss': 'https://cognito-idp.ap-east-1.amazonaws.com/ap-east-1_OtherPool'}, 'Wrong issuer'),
+])
+def test_verify_token_rejects_invalid_claims(overrides, message):
+    with pytest.raises(cognito.InvalidTokenError, match=message):
+        cognito.verify_token(make_token(**overrides))
+
+
+def test_verify_token_requires_app_client_id(monkeypatch):
+    monkeypatch.delenv('COGNITO_APP_CLIENT_ID')
+    with pytest.raises(RuntimeError):
+        cognito.verify_token(make_token())
@@ -0,0 +1,114 @@
+"""衝突檢查分桶：未帶 conflictCheck 的寫入由 slot_indexer 非同步維護，刪除在同一筆交易中清除"""
+
+import json
+
+import pytest
+
+from conftest import load_handler
+
+from calendar_core import conflicts
+from calendar_core import keys
+from calendar_core.serde import serialize_item
+
+USER_ID = 'user-1'
+PROJECT_ID = 'p1'
+
+
+@pytest.fixture
+def events():
+    return load_handler('events')
+
+
+@pytest.fixture
+def slot_indexer():
+    return load_handler('slot_indexer')
+
+
+def request(method, path=None, body=None):
+    return {
+        'httpMethod': method,
+        'path': f'/projects/{PROJECT_ID}/events',
+        'pathParameters': {'projectId': PROJECT_ID, **(path or {})},
+        'queryStringParameters': None,
+        'body': json.dumps(body) if body is not None else None,
+        'headers': {},
+        'requestContext': {'authorizer': {'claims': {'sub': USER_ID}}}
+    }
+
+
+def create_event(events, start, end, **extra):
+    body = {'projectId': PROJECT_ID, 'title': 'Review', 'startDate': start, 'endDate': end, **extra}
+    response = events.lambda_handler(request('POST', body=body), None)
+    assert response['statusCode'] == 201
+    return json.loads(response['body'])
+
+
+def slot_entries(table):
+    items = table.client.scan(TableName=table.name)['Items']
+    return sorted(
+        (item['PK']['S'], item['SK']['S']) for item in items
+        if item['PK']['S'].startswith(keys.SLOTS_PREFIX) and item['SK']['S'] != keys.SLOTS_VERSION_SK
+    )
+
+
+def stream_record(event_name, old_item=None, new_item=None):
+    images = {}
+    if old_item:
+        images['OldImage'] = serialize_item(old_item)
+    if new_item:
+        images['NewImage'] = serialize_item(new_item)
+    return {'eventName': event_name, 'dynamodb': images}
+
+
+def test_plain_create_leaves_slots_to_the_stream(table, events, slot_indexer):
+    item = create_event(events, '2026-03-02T09:00:00Z', '2026-03-02T10:00:00Z')['event']
+    assert slot_entries(table) == []
+
+    result = slot_indexer.lambda_handler({'Records': [stream_record('INSERT', new_item=item)]}, None)
+
+    assert result == {'written': 2, 'deleted': 0}
+    expected = sorted((e['PK'], e['SK']) for e in conflicts.entry_items(item))
+    assert slot_entries(table) == expected
+    # 已套用的分桶被併發檢查看到
+    overlapping = {**item, 'eventId': 'other', 'PK': keys.project_pk(PROJECT_ID), 'SK': keys.event_sk('other')}
+    found, _ = conflicts.find_conflicts(table, overlapping)
+    assert [c['eventId'] for c in found] == [item['eventId']]
+
+
+def test_slot_indexer_applies_net_change_per_event(table, events, slot_indexer):
+    item = create_event(events, '2026-03-02T09:00:00Z', '2026-03-02T10:00:00Z')['event']
+    renamed = {**item, 'title': 'Renamed'}
+    moved = {**renamed, 'startDate': '2026-03-04T09:00:00Z', 'endDate': '2026-03-04T10:00:00Z'}
+    records = [
+        stream_record('INSERT', new_item=item),
+        stream_record('MODIFY', item, renamed),
+        stream_record('MODIFY', renamed, moved)
+    ]
+
+    slot_indexer.lambda_handler({'Records': records}, None)
+    assert slot_entries(table) == sorted((e['PK'], e['SK']) for e in conflicts.entry_items(moved))
+
+    # 重播同一批記錄結果相同；只改標題時不寫入
+    slot_indexer.lambda_handler({'Records': records}, None)
+    assert slot_entries(table) == sorted((e['PK'], e['SK']) for e in conflicts.entry_items(moved))
+    title_only = {**moved, 'title': 'Again'}
+    assert slot_indexer.lambda_handler({'Records': [stream_record('MODIFY', moved, title_only)]}, None) == {
+        'written': 0, 'deleted': 0
+    }
+
+    slot_indexer.lambda_handler({'Records': [stream_record('REMOVE', old_item=moved)]}, None)
+    assert slot_entries(table) == []
+
+
+def test_delete_removes_slots_in_the_same_transaction(table, events):
+    created = create_event(events, '2026-03-02T09:00:00Z', '2026-03-02T10:00:00Z', conflictCheck='report')
+    event_id = created['event']['eventId']
+    assert created['conflicts'] == []
+    assert len(slot_entries(table)) == 2
+
+    response = events.lambda_handler(request('DELETE', path={'eventId': event_id}), None)
+
+    assert response['statusCode'] == 204
+    assert slot_entries(table) == []
+    tombstone = table.get_item(Key=keys.tombstone_key(PROJECT_ID, 'event', event_id)).get('Item')
+    assert tombstone is not None
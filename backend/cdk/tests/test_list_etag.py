@@ -0,0 +1,109 @@
+"""列表 ETag：以查詢前讀取的版本計數判斷，未修改時不執行列表查詢；計數由串流的 list_versions 遞增"""
+
+import json
+
+import pytest
+
+from conftest import load_handler
+
+from calendar_core import db
+from calendar_core import keys
+from calendar_core.serde import serialize_item
+
+USER_ID = 'user-1'
+
+
+@pytest.fixture
+def events():
+    return load_handler('events')
+
+
+def request(method, path=None, query=None, body=None, headers=None):
+    return {
+        'httpMethod': method,
+        'path': '/projects/p1/events',
+        'pathParameters': path,
+        'queryStringParameters': query,
+        'body': json.dumps(body) if body is not None else None,
+        'headers': headers or {},
+        'requestContext': {'authorizer': {'claims': {'sub': USER_ID}}}
+    }
+
+
+@pytest.fixture
+def list_versions():
+    return load_handler('list_versions')
+
+
+@pytest.fixture
+def queried_indexes(monkeypatch):
+    calls = []
+    original = db.Table.query
+
+    def query(self, **kwargs):
+        calls.append(kwargs.get('IndexName', 'table'))
+        return original(self, **kwargs)
+
+    monkeypatch.setattr(db.Table, 'query', query)
+    return calls
+
+
+def create_event(events, title):
+    body = {'projectId': 'p1', 'title': title, 'startDate': '2026-03-02T09:00:00Z', 'endDate': '2026-03-02T10:00:00Z'}
+    response = events.lambda_handler(request('POST', path={'projectId': 'p1'}, body=body), None)
+    assert response['statusCode'] == 201
+    return json.loads(response['body'])
+
+
+def stream_insert(table, key):
+    """以資料表中的項目組成 INSERT 串流記錄"""
+    item = table.get_item(Key=key)['Item']
+    return {'eventName': 'INSERT', 'dynamodb': {'Keys': serialize_item(key), 'NewImage': serialize_item(item)}}
+
+
+def test_unchanged_list_returns_304_before_list_query(table, events, queried_indexes):
+    create_event(events, 'Standup')
+    first = events.lambda_handler(request('GET', path={'projectId': 'p1'}), None)
+    assert first['statusCode'] == 200
+    etag = first['headers']['ETag']
+
+    queried_indexes.clear()
+    cached = events.lambda_handler(request('GET', path={'projectId': 'p1'}, headers={'If-None-Match': etag}), None)
+
+    assert cached['statusCode'] == 304
+    assert cached['body'] == ''
+    assert cached['headers']['ETag'] == etag
+    assert queried_indexes == []
+
+
+def test_write_in_project_changes_etag(table, events, list_versions):
+    # 專案不存在時不遞增專案計數
+    table.put_item(Item={**keys.project_key('p1'), 'entityType': 'PROJECT', 'name': 'Launch'})
+    create_event(events, 'Standup')
+    etag = events.lambda_handler(request('GET', path={'projectId': 'p1'}), None)['headers']['ETag']
+
+    retro = create_event(events, 'Retro')['event']
+    record = stream_insert(table, {'PK': retro['PK'], 'SK': retro['SK']})
+    list_versions.lambda_handler({'Records': [record]}, None)
+    response = events.lambda_handler(request('GET', path={'projectId': 'p1'}, headers={'If-None-Match': etag}), None)
+
+    assert response['statusCode'] == 200
+    assert response['headers']['ETag'] != etag
+    assert len(json.loads(response['body'])['events']) == 2
+
+
+def test_project_change_bumps_member_versions(table, list_versions):
+    projects = load_handler('project_manager')
+    created = projects.lambda_handler(request('POST', body={'name': 'Launch'}), None)
+    project_id = json.loads(created['body'])['project']['id']
+    list_request = dict(request('GET'), path='/projects')
+    etag = projects.lambda_handler(list_request, None)['headers']['ETag']
+
+    # 寫入後、串流處理前仍是舊版本戳
+    records = [stream_insert(table, keys.project_key(project_id)), stream_insert(table, keys.member_key(project_id, USER_ID))]
+    assert projects.lambda_handler(dict(list_request, headers={'If-None-Match': etag}), None)['statusCode'] == 304
+
+    assert list_versions.lambda_handler({'Records': records}, None) == {'projects': 1, 'users': 1}
+    response = projects.lambda_handler(dict(list_request, headers={'If-None-Match': etag}), None)
+    assert response['statusCode'] == 200
+    assert [project['id'] for project in json.loads(response['body'])['projects']] == [project_id]
@@ -0,0 +1,153 @@
+"""
+metrics：在 HTTP 傳送前攔截 DynamoDB 請求並回傳預設響應，確認每個請求的呼叫追蹤與 EMF 文件
+（botocore Stubber 在 before-call 就短路，追蹤事件收不到呼叫，因此改在 before-send 回應）
+"""
+
+import json
+
+import pytest
+
+from calendar_core import db
+from calendar_core import metrics
+from calendar_core.responses import build_response, http_handler
+
+TABLE_NAME = 'calendar-app-data-test'
+EVENT = {'httpMethod': 'GET', 'resource': '/projects/{projectId}/tasks', 'path': '/projects/p1/tasks'}
+
+
+class Context:
+    aws_request_id = 'req-1'
+
+
+class RawBody:
+    def __init__(self, content):
+        self.content = content
+
+    def stream(self, **kwargs):
+        yield self.content
+
+
+class StubbedEndpoint:
+    """依序回應的假 DynamoDB 端點；requests 記錄實際送出的操作與參數"""
+
+    def __init__(self):
+        self.responses = []
+        self.requests = []
+
+    def add_response(self, body):
+        self.responses.append(body)
+
+    def __call__(self, request, **kwargs):
+        from botocore.awsrequest import AWSResponse
+
+        operation = request.headers['X-Amz-Target'].decode().split('.')[-1]
+        self.requests.append((operation, json.loads(request.body)))
+        return AWSResponse(request.url, 200, {}, RawBody(json.dumps(self.responses.pop(0)).encode()))
+
+
+@pytest.fixture
+def stubbed():
+    """掛上追蹤事件的共用用戶端與假端點，以及收集 EMF 輸出的 sink"""
+    import boto3
+
+    client = boto3.client('dynamodb', config=db.client_config())
+    metrics.install(client)
+    endpoint = StubbedEndpoint()
+    client.meta.events.register('before-send.dynamodb', endpoint)
+    db._client, db._table = client, None
+    lines = []
+    previous = metrics.set_sink(lines.append)
+    yield endpoint, lines
+    metrics.set_sink(previous)
+    db._client = db._table = None
+    assert endpoint.responses == []
+
+
+def test_emf_document_totals_traced_calls(stubbed):
+    endpoint, lines = stubbed
+    endpoint.add_response({
+        'Item': {'PK': {'S': 'PROJECT#p1'}, 'SK': {'S': 'MEMBER#u1'}},
+        'ConsumedCapacity': {'TableName': TABLE_NAME, 'CapacityUnits': 0.5}
+    })
+    endpoint.add_response({
+        'Items': [{'PK': {'S': 'PROJECT#p1'}, 'SK': {'S': f'TASK#t{i}'}} for i in range(3)],
+        'Count': 3, 'ScannedCount': 4,
+        'ConsumedCapacity': {'TableName': TABLE_NAME, 'CapacityUnits': 1.5}
+    })
+
+    @http_handler
+    def handler(event, context):
+        table = db.get_table()
+        table.get_item(Key={'PK': 'PROJECT#p1', 'SK': 'MEMBER#u1'})
+        items = table.query(
+            IndexName='GSI3',
+            KeyConditionExpression='GSI3PK = :pk',
+            ExpressionAttributeValues={':pk': 'PROJECT#p1'}
+        )['Items']
+        return build_response(200, {'tasks': items})
+
+    response = handler(EVENT, Context())
+
+    # 請求內的可計量操作自動要求 ConsumedCapacity
+    assert [(operation, params['ReturnConsumedCapacity']) for operation, params in endpoint.requests] == [
+        ('GetItem', 'TOTAL'), ('Query', 'TOTAL')
+    ]
+
+    assert len(lines) == 1
+    document = json.loads(lines[0])
+    assert document['_aws']['CloudWatchMetrics'][0]['Dimensions'] == [['Service', 'Endpoint']]
+    assert {m['Name'] for m in document['_aws']['CloudWatchMetrics'][0]['Metrics']} == {
+        name for name, _ in metrics._METRICS
+    }
+    assert document['Endpoint'] == 'GET /projects/{projectId}/tasks'
+    assert document['requestId'] == 'req-1'
+    assert document['statusCode'] == 200
+    assert document['DynamoCalls'] == 2
+    assert document['ConsumedCapacity'] == 2.0
+    assert document['ItemsScanned'] == 4
+    assert document['ItemsReturned'] == 4
+    assert document['InefficientQueries'] == 0
+    assert document['ResponseBytes'] == len(response['body'])
+
+    get_call, query_call = document['dynamoTrace']
+    assert get_call['operation'] == 'GetItem' and get_call['returned'] == 1
+    assert query_call['operation'] == 'Query' and query_call['index'] == 'GSI3'
+    assert (query_call['scanned'], query_call['returned']) == (4, 3)
+    assert all(call['requestBytes'] > 0 and call['responseBytes'] > 0 for call in document['dynamoTrace'])
+    assert document['DynamoRequestBytes'] == sum(call['requestBytes'] for call in document['dynamoTrace'])
+
+
+def test_filtered_query_is_flagged_inefficient(stubbed):
+    endpoint, lines = stubbed
+    endpoint.add_response({'Items': [], 'Count': 2, 'ScannedCount': 200})
+
+    @http_handler
+    def handler(event, context):
+        db.get_table().query(
+            KeyConditionExpression='PK = :pk',
+            FilterExpression='#status = :status',
+            ExpressionAttributeNames={'#status': 'status'},
+            ExpressionAttributeValues={':pk': 'PROJECT#p1', ':status': 'DONE'}
+        )
+        return build_response(200, {})
+
+    handler(EVENT, Context())
+
+    warning, emf = lines
+    assert warning.startswith('Inefficient query on GET /projects/{projectId}/tasks')
+    assert 'Query table scanned 200 returned 2' in warning
+    document = json.loads(emf)
+    assert document['InefficientQueries'] == 1
+    assert document['dynamoTrace'][0]['filtered'] is True
+
+
+def test_calls_outside_a_request_are_not_traced(stubbed):
+    endpoint, lines = stubbed
+    endpoint.add_response({})
+
+    db.get_table().get_item(Key={'PK': 'A', 'SK': 'B'})
+
+    # 請求外不要求 ConsumedCapacity，也不輸出 EMF
+    assert 'ReturnConsumedCapacity' not in endpoint.requests[0][1]
+    assert metrics.finish() is None
+    assert lines == []
@@ -0,0 +1,38 @@
+"""sharding.query_page：啟用分片前取得的 cursor 續讀時不遺漏其他分片的項目"""
+
+from calendar_core import keys
+from calendar_core import pagination
+from calendar_core import sharding
+
+PROJECT_ID = 'p1'
+SCOPE = 'PK|project-events'
+
+
+def event_key(shard, index):
+    return {'PK': keys.project_shard_pk(PROJECT_ID, shard), 'SK': f'EVENT#{shard}-{index:02d}'}
+
+
+def test_legacy_cursor_continues_every_shard(table):
+    # 分片前的項目都在分片 0；啟用分片後新項目分散到其他分片
+    for index in range(5):
+        table.put_item(Item=event_key(0, index))
+    query_kwargs = {'KeyConditionExpression': 'PK = :pk', 'ExpressionAttributeValues': {':pk': keys.project_pk(PROJECT_ID)}}
+    first_page, legacy_cursor = pagination.query_page(table, query_kwargs, SCOPE, limit=2)
+    assert legacy_cursor
+
+    for shard in (1, 2, 3):
+        for index in range(3):
+            table.put_item(Item=event_key(shard, index))
+    pks = [keys.project_shard_pk(PROJECT_ID, shard) for shard in range(4)]
+
+    seen = [item['SK'] for item in first_page]
+    cursor = legacy_cursor
+    while cursor:
+        page, cursor = sharding.query_page(table, query_kwargs, pks, SCOPE, ('PK', 'SK'), limit=4, cursor=cursor)
+        seen.extend(item['SK'] for item in page)
+
+    expected = [f'EVENT#0-{index:02d}' for index in range(5)] + [
+        f'EVENT#{shard}-{index:02d}' for shard in (1, 2, 3) for index in range(3)
+    ]
+    assert sorted(seen) == sorted(expected)
+    assert len(seen) == len(expected)
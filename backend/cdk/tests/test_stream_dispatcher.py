@@ -0,0 +1,89 @@
+"""stream_dispatcher：各消費者只收到原本事件來源篩選條件會送達的記錄"""
+
+import pytest
+
+from conftest import LAMBDA_DIR, load_handler
+
+from calendar_core.serde import serialize_item
+
+
+@pytest.fixture
+def dispatcher(monkeypatch):
+    # 部署時以 ../lambda 為程式碼根目錄，消費者以套件方式匯入
+    monkeypatch.syspath_prepend(LAMBDA_DIR)
+    module = load_handler('stream_dispatcher')
+    calls = {}
+
+    def recorder(name):
+        def handle(event, context):
+            calls.setdefault(name, []).extend(event['Records'])
+            return {'records': len(event['Records'])}
+        return handle
+
+    monkeypatch.setattr(module, 'CONSUMERS', tuple(
+        (name, accepts, recorder(name)) for name, accepts, _ in module.CONSUMERS
+    ))
+    monkeypatch.setattr(module.realtime_fanout, 'lambda_handler', recorder('realtime_fanout'))
+    monkeypatch.setattr(module, 'start_project_cleanup', lambda records: recorder('project_cleanup')({'Records': records}, None))
+    return module, calls
+
+
+def record(event_name, keys, new_image=None, old_image=None):
+    images = {'Keys': serialize_item(keys)}
+    if new_image is not None:
+        images['NewImage'] = serialize_item({**keys, **new_image})
+    if old_image is not None:
+        images['OldImage'] = serialize_item({**keys, **old_image})
+    return {'eventID': f'{event_name}-{keys["SK"]}', 'eventName': event_name, 'dynamodb': images}
+
+
+def test_routes_records_to_matching_consumers(dispatcher):
+    module, calls = dispatcher
+    task_key = {'PK': 'TASK#t1', 'SK': 'TASK#t1'}
+    task_modify = record('MODIFY', task_key, {'entityType': 'TASK', 'title': 'b'}, {'entityType': 'TASK', 'title': 'a'})
+    event_remove = record('REMOVE', {'PK': 'PROJECT#p1', 'SK': 'EVENT#e1'}, old_image={'entityType': 'EVENT'})
+    member_insert = record('INSERT', {'PK': 'PROJECT#p1', 'SK': 'MEMBER#u1'}, {'role': 'viewer'})
+    task_list_item = record('MODIFY', {'PK': 'PROJECT#p1', 'SK': 'TASK#t1'},
+                            {'title': 'b', 'GSI4PK': 'PROJECT#p1'}, {'title': 'a', 'GSI4PK': 'PROJECT#p1'})
+    deleting = record('MODIFY', {'PK': 'PROJECT#p2', 'SK': 'PROJECT#p2'},
+                      {'entityType': 'PROJECT', 'status': 'DELETING'}, {'entityType': 'PROJECT', 'status': 'ACTIVE'})
+    checkpoint = record('MODIFY', {'PK': 'PROJECT#p2', 'SK': 'PROJECT#p2'},
+                        {'entityType': 'PROJECT', 'status': 'DELETING'}, {'entityType': 'PROJECT', 'status': 'DELETING'})
+    records = [task_modify, event_remove, member_insert, task_list_item, deleting, checkpoint]
+
+    module.lambda_handler({'Records': records}, None)
+
+    assert calls['membership_events'] == [member_insert]
+    assert calls['task_projector'] == [task_modify]
+    assert calls['dashboard_aggregator'] == [task_modify, event_remove]
+    assert calls['search_indexer'] == [task_modify, event_remove]
+    assert calls['slot_indexer'] == [event_remove]
+    assert calls['list_versions'] == [member_insert, task_list_item]
+    assert calls['project_cleanup'] == [deleting]
+    # 專案主項目與 MEMBER# 以外的 PROJECT# 分區變更才推播
+    assert calls['realtime_fanout'] == [event_remove, task_list_item, deleting, checkpoint]
+
+
+def test_consumer_failure_fails_batch_without_fanout(dispatcher, monkeypatch):
+    module, calls = dispatcher
+
+    def failing(event, context):
+        raise RuntimeError('throttled')
+
+    consumers = tuple(
+        (name, accepts, failing if name == 'task_projector' else handle)
+        for name, accepts, handle in module.CONSUMERS
+    )
+    monkeypatch.setattr(module, 'CONSUMERS', consumers)
+    task_key = {'PK': 'TASK#t1', 'SK': 'TASK#t1'}
+    records = [
+        record('MODIFY', task_key, {'entityType': 'TASK'}, {'entityType': 'TASK'}),
+        record('INSERT', {'PK': 'PROJECT#p1', 'SK': 'EVENT#e1'}, {'entityType': 'EVENT'})
+    ]
+
+    with pytest.raises(RuntimeError):
+        module.lambda_handler({'Records': records}, None)
+
+    # 其他消費者照常執行（重試時須可重複套用），推播等整批成功後才送出
+    assert len(calls['dashboard_aggregator']) == 2
+    assert 'realtime_fanout' not in calls
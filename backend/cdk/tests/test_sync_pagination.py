@@ -0,0 +1,94 @@
+"""GET /sync：完整同步與差異同步都依 nextCursor 分頁，syncToken 只在最後一頁"""
+
+import json
+
+import pytest
+
+from conftest import load_handler
+
+USER_ID = 'user-owner'
+
+
+@pytest.fixture
+def handlers():
+    return load_handler('project_manager'), load_handler('task_manager'), load_handler('sync')
+
+
+def request(method, path, query=None, body=None):
+    return {
+        'httpMethod': method,
+        'path': path,
+        'pathParameters': None,
+        'queryStringParameters': query,
+        'body': json.dumps(body) if body is not None else None,
+        'headers': {},
+        'requestContext': {'authorizer': {'claims': {'sub': USER_ID}}}
+    }
+
+
+def call(handler, *args, **kwargs):
+    response = handler.lambda_handler(request(*args, **kwargs), None)
+    return response['statusCode'], json.loads(response['body'])
+
+
+def sync_pages(sync_handler, query):
+    pages = []
+    while True:
+        status, body = call(sync_handler, 'GET', '/sync', query=query)
+        assert status == 200
+        pages.append(body)
+        if 'nextCursor' not in body:
+            return pages
+        query = {'cursor': body['nextCursor'], 'limit': query['limit']}
+
+
+def create_task(tasks, project_id, title):
+    status, _ = call(tasks, 'POST', '/tasks', body={'title': title, 'projectId': project_id, 'assigneeId': USER_ID})
+    assert status == 201
+
+
+def test_full_and_incremental_sync_are_paginated(table, handlers, monkeypatch):
+    projects, tasks, sync_handler = handlers
+    project_ids = []
+    for name in ('Launch', 'Hiring'):
+        status, body = call(projects, 'POST', '/projects', body={'name': name})
+        assert status == 201
+        project_ids.append(body['project']['id'])
+    titles = [f'task-{index}' for index in range(5)]
+    for index, title in enumerate(titles):
+        create_task(tasks, project_ids[index % 2], title)
+
+    pages = sync_pages(sync_handler, {'limit': '2'})
+
+    assert len(pages) > 2
+    assert all(len(page['projects']) + len(page['tasks']) + len(page['events']) <= 2 for page in pages)
+    assert pages[0]['full'] is True and all('full' not in page for page in pages[1:])
+    assert all('syncToken' not in page for page in pages[:-1]) and pages[-1]['syncToken']
+    synced_tasks = [task['title'] for page in pages for task in page['tasks']]
+    assert sorted(synced_tasks) == titles
+    assert sorted(p['id'] for page in pages for p in page['projects']) == sorted(project_ids)
+
+    # 水位不往前重疊，差異同步只取回之後的變動
+    monkeypatch.setattr(sync_handler, 'SYNC_OVERLAP_SECONDS', 0)
+    pages = sync_pages(sync_handler, {'limit': '2'})
+    for title in ('late-1', 'late-2', 'late-3'):
+        create_task(tasks, project_ids[0], title)
+
+    pages = sync_pages(sync_handler, {'since': pages[-1]['syncToken'], 'limit': '2'})
+
+    assert len(pages) == 2
+    assert pages[0]['full'] is False
+    assert [task['title'] for page in pages for task in page['tasks']] == ['late-1', 'late-2', 'late-3']
+
+
+def test_cursor_is_bound_to_the_user(table, handlers):
+    projects, tasks, sync_handler = handlers
+    _, body = call(projects, 'POST', '/projects', body={'name': 'Launch'})
+    create_task(tasks, body['project']['id'], 'Plan')
+    _, page = call(sync_handler, 'GET', '/sync', query={'limit': '1'})
+
+    other = request('GET', '/sync', query={'cursor': page['nextCursor']})
+    other['requestContext']['authorizer']['claims']['sub'] = 'user-other'
+    response = sync_handler.lambda_handler(other, None)
+
+    assert response['statusCode'] == 400
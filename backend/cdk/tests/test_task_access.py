@@ -0,0 +1,78 @@
+"""GET /tasks：專案任務限成員讀取，未指定專案時只能列出自己的任務"""
+
+import json
+
+import pytest
+
+from conftest import load_handler
+
+OWNER_ID = 'user-owner'
+OTHER_ID = 'user-other'
+
+
+@pytest.fixture
+def handlers():
+    return load_handler('project_manager'), load_handler('task_manager')
+
+
+def request(method, user_id, query=None, body=None):
+    return {
+        'httpMethod': method,
+        'path': '/tasks',
+        'pathParameters': None,
+        'queryStringParameters': query,
+        'body': json.dumps(body) if body is not None else None,
+        'headers': {},
+        'requestContext': {'authorizer': {'claims': {'sub': user_id}}}
+    }
+
+
+def call(handler, *args, **kwargs):
+    response = handler.lambda_handler(request(*args, **kwargs), None)
+    return response['statusCode'], json.loads(response['body']) if response.get('body') else None
+
+
+@pytest.fixture
+def project_with_task(table, handlers):
+    projects, tasks = handlers
+    status, body = call(projects, 'POST', OWNER_ID, body={'name': 'Launch'})
+    assert status == 201
+    project_id = body['project']['id']
+    status, _ = call(tasks, 'POST', OWNER_ID, body={
+        'title': 'Plan', 'description': 'Draft the schedule', 'projectId': project_id, 'assigneeId': OWNER_ID
+    })
+    assert status == 201
+    return project_id
+
+
+def test_assignee_filter_without_project_is_ignored(handlers, project_with_task):
+    _, tasks = handlers
+
+    status, body = call(tasks, 'GET', OTHER_ID, query={'assigneeId': OWNER_ID})
+    assert status == 200
+    assert body['tasks'] == []
+
+    status, body = call(tasks, 'GET', OWNER_ID)
+    assert [task['title'] for task in body['tasks']] == ['Plan']
+
+
+def test_project_tasks_require_membership(handlers, project_with_task):
+    _, tasks = handlers
+
+    status, _ = call(tasks, 'GET', OTHER_ID, query={'projectId': project_with_task, 'assigneeId': OWNER_ID})
+    assert status == 403
+
+    status, body = call(tasks, 'GET', OWNER_ID, query={'projectId': project_with_task, 'assigneeId': OWNER_ID})
+    assert status == 200
+    assert [task['title'] for task in body['tasks']] == ['Plan']
+
+
+def test_summary_omits_description(handlers, project_with_task):
+    _, tasks = handlers
+
+    status, body = call(tasks, 'GET', OWNER_ID, query={'projectId': project_with_task})
+    assert status == 200
+    assert 'description' not in body['tasks'][0]
+
+    status, body = call(tasks, 'GET', OWNER_ID, query={'projectId': project_with_task, 'fields': 'full'})
+    assert body['tasks'][0]['description'] == 'Draft the schedule'
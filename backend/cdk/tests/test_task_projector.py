@@ -0,0 +1,102 @@
+"""task_projector：關係項目以完整項目覆寫，負責人變更依現有關係項目清除"""
+
+import pytest
+
+from conftest import load_handler
+
+from calendar_core import keys
+from calendar_core import projections
+from calendar_core.serde import serialize_item
+
+TASK_ID = 'task-01HZX3M8N6Q9R2S4T5V7W8X9YZ'
+PROJECT_ID = 'project-01HZX3M8N6Q9R2S4T5V7W8X9YA'
+
+
+@pytest.fixture
+def projector():
+    return load_handler('task_projector')
+
+
+def task_version(assignee_id, updated_at, **fields):
+    return {
+        **keys.task_key(TASK_ID),
+        'GSI1PK': keys.task_pk(TASK_ID),
+        'GSI1SK': keys.task_pk(TASK_ID),
+        'entityType': 'TASK',
+        'taskId': TASK_ID,
+        'projectId': PROJECT_ID,
+        'title': 'Write report',
+        'status': 'TODO',
+        'assigneeId': assignee_id,
+        'createdAt': '2026-01-01T00:00:00.000000Z',
+        'updatedAt': updated_at,
+        **fields
+    }
+
+
+def modify_record(old_task, new_task):
+    return {
+        'eventName': 'MODIFY',
+        'dynamodb': {'OldImage': serialize_item(old_task), 'NewImage': serialize_item(new_task)}
+    }
+
+
+def user_rows(table):
+    response = table.query(
+        IndexName='GSI1',
+        KeyConditionExpression='GSI1PK = :pk AND begins_with(GSI1SK, :prefix)',
+        ExpressionAttributeValues={':pk': keys.task_pk(TASK_ID), ':prefix': keys.USER_PREFIX}
+    )
+    return sorted(item['PK'] for item in response['Items'])
+
+
+def create_task(table, task):
+    table.put_item(Item=task)
+    table.put_item(Item=projections.project_task_item(TASK_ID, task, task['createdAt']))
+    table.put_item(Item=projections.user_task_item(TASK_ID, task, task['createdAt']))
+
+
+def test_modify_puts_full_relation_items(table, projector):
+    v1 = task_version('alice', '2026-01-01T00:00:00.000000Z')
+    create_task(table, v1)
+    # 舊資料的關係項目缺少索引鍵：覆寫後應補齊
+    table.update_item(Key=keys.user_task_key('alice', TASK_ID), UpdateExpression='REMOVE GSI2PK, GSI2SK')
+    v2 = task_version('alice', '2026-01-02T00:00:00.000000Z', title='Write final report', dueDate='2026-02-01')
+    table.put_item(Item=v2)
+
+    assert projector.lambda_handler({'Records': [modify_record(v1, v2)]}, None) == {'projected': 1, 'skipped': 0}
+
+    user_row = table.get_item(Key=keys.user_task_key('alice', TASK_ID))['Item']
+    assert user_row == projections.user_task_item(TASK_ID, v2, v1['createdAt'])
+    project_row = table.get_item(Key=keys.project_task_key(PROJECT_ID, TASK_ID))['Item']
+    assert project_row == projections.project_task_item(TASK_ID, v2, v2['createdAt'])
+
+
+def test_skipped_then_replayed_reassignment_removes_first_assignee(table, projector):
+    v1 = task_version('alice', '2026-01-01T00:00:00.000000Z')
+    v2 = task_version('bob', '2026-01-02T00:00:00.000000Z')
+    v3 = task_version('carol', '2026-01-03T00:00:00.000000Z')
+    create_task(table, v1)
+    # 兩次改派都已寫入主項目，串流記錄才送達
+    table.put_item(Item=v3)
+    records = [modify_record(v1, v2), modify_record(v2, v3)]
+
+    # alice -> bob 已過時而略過；bob -> carol 的舊影像只知道 bob，仍須刪除 alice 的項目
+    assert projector.lambda_handler({'Records': records}, None) == {'projected': 1, 'skipped': 1}
+    assert user_rows(table) == [keys.user_pk('carol')]
+
+    # 整批重播（例如 Lambda 重試）結果不變
+    assert projector.lambda_handler({'Records': records}, None) == {'projected': 1, 'skipped': 1}
+    assert user_rows(table) == [keys.user_pk('carol')]
+    assert table.get_item(Key=keys.user_task_key('carol', TASK_ID))['Item']['assignedAt'] == v3['updatedAt']
+
+
+def test_unassigning_removes_every_user_row(table, projector):
+    v1 = task_version('alice', '2026-01-01T00:00:00.000000Z')
+    create_task(table, v1)
+    v2 = {key: value for key, value in task_version(None, '2026-01-02T00:00:00.000000Z').items() if key != 'assigneeId'}
+    table.put_item(Item=v2)
+
+    projector.lambda_handler({'Records': [modify_record(v1, v2)]}, None)
+
+    assert user_rows(table) == []
@@ -0,0 +1,45 @@
+"""
+儀表板 Lambda 函數
+GET /dashboard/summary：以一次 get_item 讀取 dashboard_aggregator 維護的計數項目
+- 預設為目前用戶（指派給自己的任務、自己建立的事件）
+- 帶 projectId 時為該專案（需為專案成員）
+"""
+
+from datetime import datetime, timezone
+
+from calendar_core import build_response, http_handler, get_user_id, get_table, get_member_role
+from calendar_core import keys
+from calendar_core import stats
+
+
+@http_handler
+def lambda_handler(event, context):
+    try:
+        if event['httpMethod'] != 'GET':
+            return build_response(405, {'error': 'Method not allowed'})
+
+        user_id = get_user_id(event)
+        if not user_id:
+            return build_response(401, {'error': 'Unauthorized'})
+
+        query_params = event.get('queryStringParameters') or {}
+        return get_summary(user_id, query_params.get('projectId'))
+
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        return build_response(500, {'error': 'Internal server error'})
+
+
+def get_summary(user_id, project_id=None):
+    """讀取計數項目並計算逾期/今日到期數"""
+    table = get_table()
+    if project_id:
+        if get_member_role(project_id, user_id, table) is None:
+            return build_response(403, {'error': 'Insufficient permissions'})
+        stats_key, scope = keys.project_stats_key(project_id), {'scope': 'project', 'projectId': project_id}
+    else:
+        stats_key, scope = keys.user_stats_key(user_id), {'scope': 'user', 'userId': user_id}
+
+    item = table.get_item(Key=stats_key).get('Item')
+    today = datetime.now(timezone.utc).date().isoformat()
+    return build_response(200, {**scope, 'asOf': today, **stats.summarize(item, today)})
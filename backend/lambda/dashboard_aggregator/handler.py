@@ -0,0 +1,108 @@
+"""
+儀表板彙總 Lambda
+由 stream_dispatcher 依資料表串流分派：依任務主項目與事件的新舊影像，以原子 ADD 維護專案與用戶的計數項目
+（計數定義見 calendar_core.stats）。
+
+每筆串流記錄以一筆交易寫入：去重標記（STREAM#{eventID}，帶 TTL）+ 各計數項目的 ADD，
+串流重試時已套用的記錄不會重複計數。專案已在刪除中時只更新用戶計數，
+避免串聯刪除途中重新建立專案的計數項目。
+
+每批記錄處理完後，對本批有新增事件/任務的專案檢查項目數，達門檻時啟用寫入分片（calendar_core.sharding）。
+"""
+
+import time
+
+from calendar_core import get_table
+from calendar_core import keys
+from calendar_core import sharding
+from calendar_core import stats
+from calendar_core.db import cancellation_codes
+from calendar_core.serde import deserialize_item
+
+CONSUMER_NAME = 'dashboard'
+DEDUPE_TTL_SECONDS = 2 * 24 * 60 * 60
+
+
+def lambda_handler(event, context):
+    table = get_table()
+    applied = duplicates = 0
+    growing_projects = set()
+    for record in event.get('Records', []):
+        images = record.get('dynamodb', {})
+        changes = stats.deltas(
+            deserialize_item(images.get('OldImage')),
+            deserialize_item(images.get('NewImage'))
+        )
+        if not changes:
+            continue
+        growing_projects.update(
+            keys.project_id_from_pk(pk) for (pk, _), counters in changes.items()
+            if pk.startswith(keys.PROJECT_PREFIX) and (counters.get('events', 0) > 0 or counters.get('tasks', 0) > 0)
+        )
+        if apply_changes(table, record['eventID'], changes):
+            applied += 1
+        else:
+            duplicates += 1
+
+    if applied or duplicates:
+        print(f"Applied {applied} stream records to dashboard counters, skipped {duplicates} duplicates")
+    if growing_projects:
+        for project_id in sharding.enable_if_needed(table, sorted(growing_projects)):
+            print(f"Enabled write sharding for project {project_id}")
+    return {'applied': applied, 'duplicates': duplicates}
+
+
+def apply_changes(table, event_id, changes):
+    """以交易套用單筆記錄的計數增減；記錄已套用過時回傳 False"""
+    operations = counter_operations(event_id, changes)
+    project_ids = {keys.strip_prefix(pk, keys.PROJECT_PREFIX) for pk, _ in changes if pk.startswith(keys.PROJECT_PREFIX)}
+    guards = [{'ConditionCheck': {
+        'Key': keys.project_key(project_id),
+        'ConditionExpression': 'attribute_exists(PK) AND (attribute_not_exists(#status) OR #status <> :deleting)',
+        'ExpressionAttributeNames': {'#status': 'status'},
+        'ExpressionAttributeValues': {':deleting': 'DELETING'}
+    }} for project_id in project_ids]
+
+    try:
+        table.transact_write(operations + guards)
+        return True
+    except table.exceptions.TransactionCanceledException as e:
+        codes = cancellation_codes(e)
+        if codes and codes[0] == 'ConditionalCheckFailed':
+            return False
+        if not guards or 'ConditionalCheckFailed' not in codes[len(operations):]:
+            raise
+
+    # 專案不存在或刪除中：略過專案計數，只套用用戶計數
+    user_changes = {scope: counters for scope, counters in changes.items() if not scope[0].startswith(keys.PROJECT_PREFIX)}
+    if not user_changes:
+        return True
+    try:
+        table.transact_write(counter_operations(event_id, user_changes))
+        return True
+    except table.exceptions.TransactionCanceledException as e:
+        codes = cancellation_codes(e)
+        if codes and codes[0] == 'ConditionalCheckFailed':
+            return False
+        raise
+
+
+def counter_operations(event_id, changes):
+    """去重標記 + 每個計數項目一個 ADD 更新"""
+    operations = [{'Put': {
+        'Item': {
+            **keys.stream_dedupe_key(CONSUMER_NAME, event_id),
+            'expiresAt': int(time.time()) + DEDUPE_TTL_SECONDS
+        },
+        'ConditionExpression': 'attribute_not_exists(PK)'
+    }}]
+    for (pk, sk), counters in changes.items():
+        names = {f'#c{i}': name for i, name in enumerate(counters)}
+        values = {f':c{i}': delta for i, delta in enumerate(counters.values())}
+        operations.append({'Update': {
+            'Key': {'PK': pk, 'SK': sk},
+            'UpdateExpression': 'ADD ' + ', '.join(f'#c{i} :c{i}' for i in range(len(counters))),
+            'ExpressionAttributeNames': names,
+            'ExpressionAttributeValues': values
+        }})
+    return operations
@@ -5,19 +5,57 @@
 - POST /events（建立事件）
 - PUT /events（更新事件，若無 id 則視為建立）
 - DELETE /projects/{projectId}/events/{eventId}
-"""
+- POST /events:batch 以及 POST /projects/{projectId}/events:batch（批次建立/更新/刪除）
 
-import json
-import boto3
-import os
-import uuid
-from datetime import datetime
-from boto3.dynamodb.conditions import Key, Attr
+週期事件：以 rrule 建立的事件只存一筆主項目，個別發生的修改/取消存為例外項目
+（PROJECT#{projectId} / EVENTEX#{eventId}#{原始開始時間}）。
+帶日期區間的 GET 只在視窗內以產生器展開發生時間（僅第一頁，不分頁）。
+
+大型專案啟用寫入分片後，事件依 eventId 落在 PROJECT#{projectId}#{shard}（例外項目與主項目同分片），
+專案事件的讀取平行查詢各分片後依排序鍵合併（見 calendar_core.sharding）。
 
-dynamodb = boto3.resource('dynamodb')
-table = dynamodb.Table(os.environ['DYNAMODB_TABLE'])
+GET 預設以分頁模式回傳：每次只執行一次有上限的 DynamoDB 查詢，
+並回傳簽章過的不透明 `nextCursor` 供下一頁使用；帶 `all=true` 則沿用舊的整批讀取。
+索引只投影列表欄位，預設省略描述欄位；帶 `fields=full` 時以 BatchGetItem 補上。
 
+衝突檢查：非週期事件的時間另以依日分桶的區間索引維護（見 calendar_core.conflicts）。
+建立/更新時帶 `conflictCheck`：`report` 照常寫入並在回應附上重疊的事件（同專案或同建立者），
+`reject` 有重疊時回傳 409 且不寫入；檢查與寫入以分桶版本為條件，併發寫入時不會漏報。
+
+.ics 匯入/匯出（見 ics_transfer）：
+- POST /projects/{projectId}/events/import、GET /projects/{projectId}/events/import/{importId}
+- GET /projects/{projectId}/events/export
+"""
 
+import json
+from datetime import datetime, date, timedelta
+
+from calendar_core import build_response, http_handler, build_list_response, not_modified_response, get_user_id, get_table, new_id
+from calendar_core import conflicts
+from calendar_core import index_projection
+from calendar_core import keys
+from calendar_core import pagination
+from calendar_core import sharding
+from calendar_core import sync
+from calendar_core import versions
+from calendar_core.db import cancellation_codes, cancellation_item
+from calendar_core.formatting import format_event
+
+# 批次 API 設定
+MAX_BATCH_OPERATIONS = 500
+BATCH_WRITE_WORKERS = 4
+BATCH_SUCCESS_STATUS = {'create': 201, 'update': 200, 'delete': 204}
+
+# 刪除時事件被併發修改的重試次數
+DELETE_EVENT_ATTEMPTS = 3
+
+# 週期事件設定
+MAX_OCCURRENCES_PER_SERIES = 1000
+UNBOUNDED_SERIES_END = '9999-12-31'
+OCCURRENCE_OVERRIDE_FIELDS = ('title', 'description', 'startDate', 'endDate', 'allDay', 'color')
+
+
+@http_handler
 def lambda_handler(event, context):
     try:
         method = event.get('httpMethod')
@@ -25,13 +63,28 @@ def lambda_handler(event, context):
         query_params = event.get('queryStringParameters', {}) or {}
 
         # 使用 Cognito user sub 當 userId
-        user_id = event['requestContext']['authorizer']['claims']['sub']
+        user_id = get_user_id(event)
+        if not user_id:
+            return build_response(401, {'error': 'Unauthorized'})
+
+        resource = event.get('resource') or event.get('path') or ''
 
         if method == 'GET':
-            return handle_get_events(user_id, path_params, query_params)
+            if resource.endswith('/events/export'):
+                from ics_transfer import handle_export
+                return handle_export(user_id, path_params.get('projectId'))
+            if path_params.get('importId'):
+                from ics_transfer import handle_import_status
+                return handle_import_status(user_id, path_params.get('projectId'), path_params['importId'])
+            return handle_get_events(user_id, path_params, query_params, event)
 
         if method == 'POST':
+            if resource.endswith('/events/import'):
+                from ics_transfer import handle_start_import
+                return handle_start_import(user_id, path_params.get('projectId'))
             body = json.loads(event.get('body', '{}'))
+            if resource.endswith(':batch'):
+                return handle_batch_events(user_id, path_params, body)
             return handle_create_event(user_id, path_params, body)
 
         if method == 'PUT':
@@ -47,13 +100,10 @@ def lambda_handler(event, context):
                     'error': 'Missing parameters',
                     'details': 'eventId and projectId are required in path'
                 })
-            table.delete_item(
-                Key={
-                    'PK': f'PROJECT#{project_id}',
-                    'SK': f'EVENT#{event_id}'
-                }
-            )
-            return build_response(204, {'message': 'Event deleted successfully'})
+            recurrence_id = query_params.get('recurrenceId')
+            if recurrence_id:
+                return handle_cancel_occurrence(project_id, event_id, recurrence_id)
+            return handle_delete_event(project_id, event_id)
 
         return build_response(405, {'error': 'Method Not Allowed'})
 
@@ -64,81 +114,230 @@ def lambda_handler(event, context):
         return build_response(500, {'error': 'Internal server error', 'message': str(e)})
 
 
-def handle_get_events(user_id, path_params, query_params):
+def handle_get_events(user_id, path_params, query_params, request):
     project_id_from_path = path_params.get('projectId')
     project_id = project_id_from_path or query_params.get('projectId')
     start_date = query_params.get('startDate')
     end_date = query_params.get('endDate')
     week_of_year = query_params.get('weekOfYear')
-
-    if project_id:
+    fetch_all = pagination.wants_all(query_params)
+    try:
+        fields = index_projection.parse_fields(query_params)
+    except ValueError as e:
+        return build_response(400, {'error': 'Invalid fields', 'details': str(e)})
+
+    limit = None
+    if not fetch_all:
+        try:
+            limit = pagination.parse_limit(query_params)
+        except ValueError as e:
+            return build_response(400, {'error': 'Invalid limit', 'details': str(e)})
+
+    # weekOfYear 轉為該 ISO 週的日期區間，與 startDate/endDate 共用同一條 KeyCondition 範圍查詢
+    if week_of_year:
+        try:
+            start_date, end_date = iso_week_bounds(week_of_year)
+        except ValueError:
+            return build_response(400, {'error': 'Invalid weekOfYear', 'details': 'expected format YYYY-Www'})
+
+    # 版本戳未變時直接回 304，不執行列表查詢
+    table = get_table()
+    version = versions.project_version(table, project_id) if project_id else versions.user_version(table, user_id)
+    cached = not_modified_response(request, version)
+    if cached:
+        return cached
+
+    if start_date or end_date:
+        # 日期索引：GSI2 = 使用者 + 開始時間，GSI3 = 專案 + 開始時間
+        if project_id:
+            index_name, pk_name, sk_name = 'GSI3', 'GSI3PK', 'GSI3SK'
+            partitions = sharding.partitions(project_id)
+        else:
+            index_name, pk_name, sk_name = 'GSI2', 'GSI2PK', 'GSI2SK'
+            partitions = [keys.user_pk(user_id)]
+        range_expr, range_values = date_range_condition(sk_name, start_date, end_date)
+        query_kwargs = {
+            'IndexName': index_name,
+            'KeyConditionExpression': f'{pk_name} = :pk AND {range_expr}',
+            'ExpressionAttributeValues': {':pk': partitions[0], **range_values}
+        }
+    elif project_id:
+        pk_name, sk_name = 'PK', 'SK'
+        partitions = sharding.partitions(project_id)
         query_kwargs = {
-            'KeyConditionExpression': Key('PK').eq(f'PROJECT#{project_id}') & Key('SK').begins_with('EVENT#'),
+            'KeyConditionExpression': 'PK = :pk AND begins_with(SK, :prefix)',
+            'ExpressionAttributeValues': {':pk': partitions[0], ':prefix': keys.EVENT_PREFIX},
             'ConsistentRead': True
         }
     else:
+        pk_name, sk_name = 'GSI1PK', 'GSI1SK'
+        partitions = [keys.user_pk(user_id)]
         query_kwargs = {
             'IndexName': 'GSI1',
-            'KeyConditionExpression': Key('GSI1PK').eq(f'USER#{user_id}') & Key('GSI1SK').begins_with('EVENT#')
+            'KeyConditionExpression': 'GSI1PK = :pk AND begins_with(GSI1SK, :prefix)',
+            'ExpressionAttributeValues': {':pk': keys.user_pk(user_id), ':prefix': keys.EVENT_PREFIX}
         }
 
-    if week_of_year:
-        query_kwargs['FilterExpression'] = Attr('weekOfYear').eq(week_of_year)
-    elif start_date and end_date and not project_id:
-        query_kwargs['IndexName'] = 'GSI2'
-        query_kwargs['KeyConditionExpression'] = Key('GSI2PK').eq(f'USER#{user_id}') & Key('GSI2SK').between(start_date, end_date)
-
-    response = table.query(**query_kwargs)
-    items = response.get('Items', [])
-    while 'LastEvaluatedKey' in response:
-        response = table.query(ExclusiveStartKey=response['LastEvaluatedKey'], **query_kwargs)
-        items.extend(response.get('Items', []))
-
-    formatted = []
-    for it in items:
-        evt = {
-            'userId': user_id,
-            'eventId': it.get('eventId') or it['SK'].replace('EVENT#', ''),
-            'title': it['title'],
-            'description': it.get('description', ''),
-            'startDate': it['startDate'],
-            'endDate': it['endDate'],
-            'weekOfYear': it.get('weekOfYear', ''),
-            'allDay': it.get('allDay', False),
-            'color': it.get('color', '#3788d8'),
-            'createdAt': it['createdAt'],
-            'updatedAt': it['updatedAt']
+    # cursor 綁定查詢範圍，避免被拿到其他分區或條件下重放
+    scope = cursor_scope(user_id, project_id, query_kwargs, week_of_year, start_date, end_date)
+    try:
+        items, next_cursor = sharding.query_page(
+            get_table(), query_kwargs, partitions, scope, (pk_name, sk_name),
+            limit=limit, cursor=query_params.get('cursor')
+        )
+    except pagination.InvalidCursorError as e:
+        return build_response(400, {'error': 'Invalid cursor', 'details': str(e)})
+
+    # 索引只投影列表欄位（calendar_core.index_projection），fields=full 時由資料表補上描述
+    full = fields == index_projection.FIELDS_FULL
+    if full and 'IndexName' in query_kwargs:
+        index_projection.hydrate(get_table(), items)
+    formatted = [format_event(user_id, it, full) for it in items]
+
+    # 日期區間查詢時，於第一頁加入視窗內的週期事件發生
+    if (start_date or end_date) and (fetch_all or not query_params.get('cursor')):
+        formatted.extend(expand_recurring_events(
+            user_id, index_name, pk_name, sk_name, partitions, start_date, end_date, full
+        ))
+
+    body = {'events': formatted, 'count': len(formatted)}
+    if not fetch_all:
+        body['nextCursor'] = next_cursor
+    return build_list_response(request, body, version)
+
+
+def expand_recurring_events(user_id, index_name, pk_name, sk_name, partitions, start_date, end_date, full=True):
+    """
+    產生視窗內的週期事件發生（產生器）
+    主項目在日期索引上的排序鍵為 RRULE#{序列結束}，因此只需讀取結束時間不早於視窗起點的主項目；
+    partitions 為日期索引上要查詢的分區（專案的各分片，或單一用戶分區）；
+    full 為 True 時由資料表補上索引未投影的描述，否則省略描述欄位
+    """
+    from itertools import islice
+    from calendar_core import recurrence
+
+    query_kwargs = {
+        'IndexName': index_name,
+        'KeyConditionExpression': f'{pk_name} = :pk AND {sk_name} BETWEEN :from AND :to',
+        'ExpressionAttributeValues': {
+            ':pk': partitions[0],
+            ':from': f'{keys.RECURRING_PREFIX}{start_date or ""}',
+            ':to': f'{keys.RECURRING_PREFIX}~'
         }
-        if 'projectId' in it:
-            evt['projectId'] = it['projectId']
-            evt['projectName'] = it.get('projectName', f"專案 {it['projectId']}")
-            evt['projectDescription'] = it.get('projectDescription', '')
-            evt['ownerId'] = it.get('ownerId', user_id)
-        formatted.append(evt)
-
-    return build_response(200, {'events': formatted, 'count': len(formatted)})
-
-
-def handle_create_event(user_id, path_params, body):
+    }
+    masters = sharding.query_all(get_table(), query_kwargs, partitions, sk_name)
+    if full:
+        index_projection.hydrate(get_table(), masters)
+
+    for master in masters:
+        try:
+            rule = recurrence.parse_rrule(master['rrule'])
+        except (KeyError, ValueError) as e:
+            print(f"Skipping invalid recurring event {master.get('eventId')}: {str(e)}")
+            continue
+
+        exceptions = load_occurrence_exceptions(master, start_date, end_date)
+        base = format_event(user_id, master, full)
+        start_dt = recurrence.parse_datetime(master['startDate'])
+        end_dt = recurrence.parse_datetime(master['endDate'])
+        duration = end_dt.replace(tzinfo=None) - start_dt.replace(tzinfo=None)
+
+        series = recurrence.occurrences(rule, master['startDate'], start_date, end_date)
+        for occurrence in islice(series, MAX_OCCURRENCES_PER_SERIES):
+            recurrence_id = recurrence.format_like(master['startDate'], occurrence, start_dt.tzinfo)
+            override = exceptions.get(recurrence_id)
+            if override and override.get('cancelled'):
+                continue
+            evt = dict(base)
+            evt['startDate'] = recurrence_id
+            evt['endDate'] = recurrence.format_like(master['endDate'], occurrence + duration, end_dt.tzinfo)
+            evt['recurrenceId'] = recurrence_id
+            if override:
+                evt.update({f: override[f] for f in OCCURRENCE_OVERRIDE_FIELDS if f in override})
+                # 修改單次發生也要推進該發生的 updatedAt，客戶端才能以 updatedAt 判斷是否需更新
+                evt['updatedAt'] = max(evt['updatedAt'], override.get('updatedAt', ''))
+            yield evt
+
+
+def load_occurrence_exceptions(master, start_date, end_date):
+    """讀取主項目在視窗內的例外項目，回傳 {recurrenceId: 例外項目}"""
+    prefix = keys.event_exception_sk(master['eventId'])
+    response = get_table().query(
+        KeyConditionExpression='PK = :pk AND SK BETWEEN :from AND :to',
+        ExpressionAttributeValues={
+            ':pk': master['PK'],
+            ':from': f'{prefix}{start_date or ""}',
+            ':to': f'{prefix}{end_date or ""}~'
+        }
+    )
+    return {item['recurrenceId']: item for item in response.get('Items', [])}
+
+
+def compute_week_of_year(start_date):
+    """以 ISO 週曆計算週次字串（例如 2025-W01），跨年週次歸屬正確的 ISO 年"""
+    start_dt = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
+    iso_year, iso_week, _ = start_dt.isocalendar()
+    return f"{iso_year}-W{iso_week:02d}"
+
+
+def iso_week_bounds(week_of_year):
+    """將 YYYY-Www 轉為 (週一, 週日) 日期字串"""
+    year_part, _, week_part = week_of_year.partition('-W')
+    monday = date.fromisocalendar(int(year_part), int(week_part), 1)
+    return monday.isoformat(), (monday + timedelta(days=6)).isoformat()
+
+
+def date_range_condition(sk_name, start_date, end_date):
+    """
+    建立日期排序鍵的範圍條件，回傳 (條件字串, 參數值)
+    僅有日期（YYYY-MM-DD）的結束值補上 '~'，使當天任何時間的 ISO 字串都落在範圍內
+    """
+    if end_date and len(end_date) == 10:
+        end_date = f"{end_date}~"
+    if start_date and end_date:
+        return f'{sk_name} BETWEEN :start AND :end', {':start': start_date, ':end': end_date}
+    if start_date:
+        # 需設上限，避免範圍涵蓋到週期事件主項目（RRULE# 前綴）
+        return f'{sk_name} BETWEEN :start AND :end', {':start': start_date, ':end': f'{UNBOUNDED_SERIES_END}~'}
+    return f'{sk_name} <= :end', {':end': end_date}
+
+
+def cursor_scope(user_id, project_id, query_kwargs, week_of_year, start_date, end_date):
+    """組出 cursor 所屬的查詢範圍字串（索引 + 分區 + 條件）"""
+    partition = keys.project_pk(project_id) if project_id else keys.user_pk(user_id)
+    return '|'.join([
+        query_kwargs.get('IndexName', 'TABLE'),
+        partition,
+        week_of_year or '',
+        start_date or '',
+        end_date or ''
+    ])
+
+
+def missing_event_field(body):
+    """回傳第一個缺少的必要欄位；皆存在時回傳 None"""
     for f in ['title', 'startDate', 'endDate']:
         if f not in body:
-            return build_response(400, {'error': 'Missing required field', 'field': f})
+            return f
+    return None
 
-    project_id = path_params.get('projectId') or body.get('projectId')
-    if not project_id:
-        return build_response(400, {'error': 'Missing projectId'})
 
-    event_id = str(uuid.uuid4())
-    start_dt = datetime.fromisoformat(body['startDate'].replace('Z', '+00:00'))
-    week_of_year = f"{start_dt.year}-W{start_dt.isocalendar()[1]:02d}"
+def build_event_item(user_id, project_id, body, event_id=None):
+    """依請求內容組出新的 EVENT 項目（含各索引鍵）；event_id 未指定時產生新 ID"""
+    event_id = event_id or new_id()
+    shard = sharding.shard_for(project_id, event_id)
+    week_of_year = compute_week_of_year(body['startDate'])
+    date_sort_key, rrule_text, series_end = event_date_sort_key(body['startDate'], body.get('rrule'))
 
     item = {
-        'PK': f'PROJECT#{project_id}',
-        'SK': f'EVENT#{event_id}',
-        'GSI1PK': f'USER#{user_id}',
-        'GSI1SK': f'EVENT#{event_id}',
-        'GSI2PK': f'USER#{user_id}',
-        'GSI2SK': body['startDate'],
+        **keys.event_key(project_id, event_id, shard),
+        'GSI1PK': keys.user_pk(user_id),
+        'GSI1SK': keys.event_sk(event_id),
+        'GSI2PK': keys.user_pk(user_id),
+        'GSI2SK': date_sort_key,
+        'GSI3PK': keys.project_shard_pk(project_id, shard),
+        'GSI3SK': date_sort_key,
+        **sync.index_keys(project_id, shard),
         'eventId': event_id,
         'title': body['title'],
         'description': body.get('description', ''),
@@ -148,8 +347,8 @@ def handle_create_event(user_id, path_params, body):
         'allDay': body.get('allDay', False),
         'color': body.get('color', '#3788d8'),
         'entityType': 'EVENT',
-        'createdAt': datetime.utcnow().isoformat() + 'Z',
-        'updatedAt': datetime.utcnow().isoformat() + 'Z',
+        'createdAt': sync.timestamp(),
+        'updatedAt': sync.timestamp(),
         'projectId': project_id
     }
     if 'projectName' in body:
@@ -158,13 +357,72 @@ def handle_create_event(user_id, path_params, body):
         item['projectDescription'] = body['projectDescription']
     if 'ownerId' in body:
         item['ownerId'] = body['ownerId']
+    if rrule_text:
+        item['rrule'] = rrule_text
+        item['seriesEnd'] = series_end
+    return item
+
+
+def event_date_sort_key(start_date, rrule_text=None):
+    """
+    計算日期索引（GSI2SK/GSI3SK）排序鍵，回傳 (排序鍵, 正規化 rrule, 序列結束)
+    一般事件為開始時間；週期事件主項目為 RRULE#{序列結束}，rrule 無效時拋出 ValueError
+    """
+    if not rrule_text:
+        return start_date, None, None
+    from calendar_core import recurrence
+
+    rule = recurrence.parse_rrule(rrule_text)
+    series_end = recurrence.series_end(rule, start_date) or UNBOUNDED_SERIES_END
+    return f'{keys.RECURRING_PREFIX}{series_end}', rule.text, series_end
+
 
+def handle_create_event(user_id, path_params, body):
+    missing = missing_event_field(body)
+    if missing:
+        return build_response(400, {'error': 'Missing required field', 'field': missing})
+
+    project_id = path_params.get('projectId') or body.get('projectId')
+    if not project_id:
+        return build_response(400, {'error': 'Missing projectId'})
+
+    try:
+        item = build_event_item(user_id, project_id, body)
+        mode = conflicts.parse_mode(body.get('conflictCheck'))
+    except ValueError as e:
+        return build_response(400, {'error': 'Invalid event', 'details': str(e)})
+
+    table = get_table()
+    condition = 'attribute_not_exists(PK) AND attribute_not_exists(SK)'
+    if not mode:
+        # 未要求衝突檢查：單筆寫入，分桶項目由串流非同步維護（slot_indexer）
+        try:
+            table.put_item(Item=item, ConditionExpression=condition)
+        except table.exceptions.ConditionalCheckFailedException:
+            return build_response(409, {'error': 'Duplicate event detected'})
+        return build_response(201, {'message': 'Event created successfully', 'event': item})
+
+    # 事件與其分桶項目在同一筆交易寫入
+    put = {'Put': {'Item': item, 'ConditionExpression': condition}}
     try:
-        table.put_item(Item=item, ConditionExpression="attribute_not_exists(PK) AND attribute_not_exists(SK)")
-    except table.meta.client.exceptions.ConditionalCheckFailedException:
-        return build_response(409, {'error': 'Duplicate event detected'})
+        found = conflicts.write(table, [put], None, item, mode)
+    except table.exceptions.TransactionCanceledException as e:
+        if cancellation_codes(e)[:1] == ['ConditionalCheckFailed']:
+            return build_response(409, {'error': 'Duplicate event detected'})
+        raise
+    except (ValueError, conflicts.ConflictError, conflicts.ContentionError) as e:
+        return conflict_error_response(e)
+
+    return build_response(201, {'message': 'Event created successfully', 'event': item, 'conflicts': found})
+
 
-    return build_response(201, {'message': 'Event created successfully', 'event': item})
+def conflict_error_response(error):
+    """衝突檢查失敗的回應：檢查不適用（400）、reject 模式有衝突或分桶持續被併發寫入（409）"""
+    if isinstance(error, conflicts.ConflictError):
+        return build_response(409, {'error': 'Event conflicts with existing events', 'conflicts': error.conflicts})
+    if isinstance(error, conflicts.ContentionError):
+        return build_response(409, {'error': 'Conflict check did not settle, please retry'})
+    return build_response(400, {'error': 'Invalid conflictCheck', 'details': str(error)})
 
 
 def handle_upsert_event(user_id, path_params, body):
@@ -177,6 +435,176 @@ def handle_upsert_event(user_id, path_params, body):
     if not project_id:
         return build_response(400, {'error': 'Missing projectId'})
 
+    if body.get('recurrenceId'):
+        return handle_upsert_occurrence(project_id, event_id, body)
+
+    try:
+        mode = conflicts.parse_mode(body.get('conflictCheck'))
+    except ValueError as e:
+        return build_response(400, {'error': 'Invalid event', 'details': str(e)})
+
+    # 變更時間或 rrule 時需知道是否為週期事件，才能算出正確的日期索引鍵（衝突檢查另需計算分桶項目）
+    table = get_table()
+    shard = sharding.shard_for(project_id, event_id)
+    key = keys.event_key(project_id, event_id, shard)
+    reindex = 'startDate' in body or 'endDate' in body or 'rrule' in body
+    existing = None
+    if reindex or mode:
+        existing = table.get_item(Key=key, ConsistentRead=True).get('Item')
+
+    try:
+        fields = event_update_fields(project_id, body, existing, shard)
+    except ValueError as e:
+        return build_response(400, {'error': 'Invalid event', 'details': str(e)})
+    if not fields:
+        return build_response(400, {'error': 'No fields to update'})
+
+    # 動態 Update 表達式
+    update_expr = 'SET ' + ', '.join([f"#{k} = :{k}" for k in fields.keys()])
+    expr_attr_names = {f"#{k}": k for k in fields.keys()}
+    expr_attr_values = {f":{k}": v for k, v in fields.items()}
+
+    # 日期索引鍵與分桶項目依讀到的原項目計算，原項目在此期間被修改時寫入失敗
+    update = {'Key': key, 'UpdateExpression': update_expr,
+              'ExpressionAttributeNames': expr_attr_names, 'ExpressionAttributeValues': expr_attr_values}
+    if reindex or mode:
+        if existing is None:
+            update['ConditionExpression'] = 'attribute_not_exists(PK)'
+        elif 'updatedAt' in existing:
+            update['ConditionExpression'] = '#updatedAt = :previousUpdatedAt'
+            expr_attr_values[':previousUpdatedAt'] = existing['updatedAt']
+
+    if not mode:
+        # 未要求衝突檢查：單筆更新，分桶項目由串流非同步維護（slot_indexer）
+        try:
+            table.update_item(**update)
+        except table.exceptions.ConditionalCheckFailedException:
+            return build_response(409, {'error': 'Event was modified, please retry'})
+        return build_response(200, {'message': 'Event updated successfully', 'eventId': event_id})
+
+    new_item = {**key, 'eventId': event_id, 'projectId': project_id, **(existing or {}), **fields}
+    try:
+        found = conflicts.write(table, [{'Update': update}], existing, new_item, mode)
+    except table.exceptions.TransactionCanceledException as e:
+        if cancellation_codes(e)[:1] == ['ConditionalCheckFailed']:
+            return build_response(409, {'error': 'Event was modified, please retry'})
+        raise
+    except (ValueError, conflicts.ConflictError, conflicts.ContentionError) as e:
+        return conflict_error_response(e)
+
+    return build_response(200, {'message': 'Event updated successfully', 'eventId': event_id, 'conflicts': found})
+
+
+def handle_batch_events(user_id, path_params, body):
+    """
+    批次建立/更新/刪除事件
+    body: {"operations": [{"op": "create" | "update" | "delete", "projectId"?, "eventId"?, ...事件欄位}]}
+    寫入以 BatchWriteItem（每批 25 筆）透過執行緒池平行送出；
+    更新需先以 BatchGetItem 取回原項目再整筆覆寫（BatchWriteItem 不支援 Update）。
+    批次不支援 conflictCheck：只寫入事件，分桶項目由串流非同步維護（slot_indexer，刪除時一併清除）。
+    回應逐筆列出 {index, op, eventId, status, error?}
+    """
+    operations = body.get('operations')
+    if not isinstance(operations, list) or not operations:
+        return build_response(400, {'error': 'Missing operations'})
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        return build_response(400, {'error': 'Too many operations', 'max': MAX_BATCH_OPERATIONS})
+
+    results = []
+    writes = []   # (結果索引, 'put' | 'delete', 項目或主鍵)
+    updates = []  # (結果索引, 主鍵, 更新欄位)
+    seen_keys = set()
+
+    for index, op in enumerate(operations):
+        op = op if isinstance(op, dict) else {}
+        action = op.get('op')
+        result = {'index': index, 'op': action}
+        results.append(result)
+
+        if action not in BATCH_SUCCESS_STATUS:
+            result.update({'status': 400, 'error': 'Unknown op'})
+            continue
+        project_id = path_params.get('projectId') or op.get('projectId')
+        if not project_id:
+            result.update({'status': 400, 'error': 'Missing projectId'})
+            continue
+
+        if action == 'create':
+            missing = missing_event_field(op)
+            if missing:
+                result.update({'status': 400, 'error': f'Missing required field: {missing}'})
+                continue
+            try:
+                item = build_event_item(user_id, project_id, op)
+            except ValueError as e:
+                result.update({'status': 400, 'error': str(e)})
+                continue
+            result['eventId'] = item['eventId']
+            writes.append((index, 'put', item))
+            continue
+
+        event_id = op.get('eventId') or op.get('id')
+        if not event_id:
+            result.update({'status': 400, 'error': 'Missing eventId'})
+            continue
+        result['eventId'] = event_id
+        # 同一批 BatchWriteItem 不允許重複主鍵
+        shard = sharding.shard_for(project_id, event_id)
+        key = keys.event_key(project_id, event_id, shard)
+        if (key['PK'], key['SK']) in seen_keys:
+            result.update({'status': 409, 'error': 'Duplicate operation for the same event'})
+            continue
+        seen_keys.add((key['PK'], key['SK']))
+
+        if action == 'delete':
+            writes.append((index, 'delete', key))
+            writes.append((index, 'put', sync.tombstone_item(project_id, 'event', event_id, shard)))
+        else:
+            updates.append((index, key, op, shard))
+
+    table = get_table()
+    if updates:
+        existing = table.batch_get([key for _, key, _, _ in updates])
+        for index, key, op, shard in updates:
+            item = existing.get((key['PK'], key['SK']))
+            if item is None:
+                results[index].update({'status': 404, 'error': 'Event not found'})
+                continue
+            try:
+                fields = event_update_fields(item['projectId'], op, item, shard)
+            except ValueError as e:
+                results[index].update({'status': 400, 'error': str(e)})
+                continue
+            if not fields:
+                results[index].update({'status': 400, 'error': 'No fields to update'})
+                continue
+            writes.append((index, 'put', {**item, **fields}))
+
+    from calendar_core.batch import write_batches
+
+    errors = write_batches(table.client, table.name, [(action, value) for _, action, value in writes],
+                           max_workers=BATCH_WRITE_WORKERS)
+    # 刪除操作含事件與墓碑兩筆寫入，任一失敗即視為失敗
+    for position, (index, _, _) in enumerate(writes):
+        result = results[index]
+        if position in errors:
+            result.update({'status': 500, 'error': errors[position]})
+        elif 'status' not in result:
+            result['status'] = BATCH_SUCCESS_STATUS[result['op']]
+
+    failed = sum(1 for r in results if r['status'] >= 400)
+    return build_response(200, {
+        'results': results,
+        'succeeded': len(results) - failed,
+        'failed': failed
+    })
+
+
+def event_update_fields(project_id, body, existing=None, shard=0):
+    """
+    由請求內容取出要更新的欄位（含日期索引鍵）；沒有可更新欄位時回傳空 dict
+    existing 為原項目（若已讀取），用於判斷週期事件與補齊未變更的開始時間；shard 為事件所在分片
+    """
     # 更新字段
     fields = {
         'title': body.get('title'),
@@ -185,43 +613,124 @@ def handle_upsert_event(user_id, path_params, body):
         'endDate': body.get('endDate'),
         'allDay': body.get('allDay'),
         'color': body.get('color'),
-        'updatedAt': datetime.utcnow().isoformat() + 'Z'
+        'updatedAt': sync.timestamp()
     }
+    existing = existing or {}
+    rrule_text = body.get('rrule', existing.get('rrule'))
+    start_date = fields['startDate'] or existing.get('startDate')
+    # 開始時間或 rrule 變動時，同步日期索引鍵與週次
+    if fields['startDate'] is not None or ('rrule' in body and start_date):
+        date_sort_key, rrule_text, series_end = event_date_sort_key(start_date, rrule_text)
+        fields['GSI2SK'] = date_sort_key
+        fields['GSI3PK'] = keys.project_shard_pk(project_id, shard)
+        fields['GSI3SK'] = date_sort_key
+        fields['weekOfYear'] = compute_week_of_year(start_date)
+        fields['rrule'] = rrule_text
+        fields['seriesEnd'] = series_end
     # 濾除 None
     fields = {k: v for k, v in fields.items() if v is not None}
+    # 只有 updatedAt 代表沒有實際要更新的欄位
+    if list(fields) == ['updatedAt']:
+        return {}
+    return fields
 
+
+def handle_upsert_occurrence(project_id, event_id, body):
+    """修改週期事件的單一發生：寫入/更新例外項目（recurrenceId 為原始開始時間）"""
+    recurrence_id = body['recurrenceId']
+    fields = {f: body[f] for f in OCCURRENCE_OVERRIDE_FIELDS if body.get(f) is not None}
     if not fields:
         return build_response(400, {'error': 'No fields to update'})
-
-    # 動態 Update 表達式
-    update_expr = 'SET ' + ', '.join([f"#{k} = :{k}" for k in fields.keys()])
-    expr_attr_names = {f"#{k}": k for k in fields.keys()}
-    expr_attr_values = {f":{k}": v for k, v in fields.items()}
-
-    table.update_item(
-        Key={
-            'PK': f'PROJECT#{project_id}',
-            'SK': f'EVENT#{event_id}'
-        },
-        UpdateExpression=update_expr,
-        ExpressionAttributeNames=expr_attr_names,
-        ExpressionAttributeValues=expr_attr_values,
-        ReturnValues='UPDATED_NEW'
+    shard = sharding.shard_for(project_id, event_id)
+    fields.update({
+        **sync.index_keys(project_id, shard),
+        'eventId': event_id,
+        'projectId': project_id,
+        'recurrenceId': recurrence_id,
+        'entityType': 'EVENT_EXCEPTION',
+        'updatedAt': sync.timestamp()
+    })
+
+    get_table().update_item(
+        Key=keys.event_exception_key(project_id, event_id, recurrence_id, shard),
+        UpdateExpression='SET ' + ', '.join(f"#{k} = :{k}" for k in fields) + ' REMOVE #cancelled',
+        ExpressionAttributeNames={**{f"#{k}": k for k in fields}, '#cancelled': 'cancelled'},
+        ExpressionAttributeValues={f":{k}": v for k, v in fields.items()}
     )
-
-    return build_response(200, {'message': 'Event updated successfully', 'eventId': event_id})
+    return build_response(200, {'message': 'Occurrence updated successfully', 'eventId': event_id, 'recurrenceId': recurrence_id})
 
 
-def build_response(status_code, body):
-    return {
-        'statusCode': status_code,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Headers': 'Content-Type,Authorization,X-Amz-Date,X-Api-Key,X-Amz-Security-Token',
-            'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS'
-        },
-        'body': json.dumps(body, ensure_ascii=False) if body is not None else ''
+def handle_cancel_occurrence(project_id, event_id, recurrence_id):
+    """取消週期事件的單一發生：寫入 cancelled 例外項目"""
+    shard = sharding.shard_for(project_id, event_id)
+    get_table().put_item(Item={
+        **keys.event_exception_key(project_id, event_id, recurrence_id, shard),
+        **sync.index_keys(project_id, shard),
+        'eventId': event_id,
+        'projectId': project_id,
+        'recurrenceId': recurrence_id,
+        'cancelled': True,
+        'entityType': 'EVENT_EXCEPTION',
+        'updatedAt': sync.timestamp()
+    })
+    return build_response(204, {'message': 'Occurrence cancelled successfully'})
+
+
+def handle_delete_event(project_id, event_id):
+    """
+    刪除事件並寫入同步墓碑；一般事件的分桶項目在同一筆交易中刪除，週期事件另外刪除其例外項目
+    分桶項目的鍵依事件時間計算，因此先讀一次事件；讀取後被修改時由交易失敗附帶的最新事件重建交易
+    """
+    deleted = build_response(204, {'message': 'Event deleted successfully'})
+    table = get_table()
+    shard = sharding.shard_for(project_id, event_id, table)
+    old = table.get_item(Key=keys.event_key(project_id, event_id, shard), ConsistentRead=True).get('Item')
+    for _ in range(DELETE_EVENT_ATTEMPTS):
+        if not old:
+            return deleted
+        try:
+            table.transact_write(delete_event_operations(project_id, event_id, shard, old))
+            break
+        except table.exceptions.TransactionCanceledException as e:
+            if cancellation_codes(e)[0] != 'ConditionalCheckFailed':
+                raise
+            old = cancellation_item(e, 0)
+    else:
+        return build_response(409, {'error': 'Event was modified, please retry'})
+    if 'rrule' not in old:
+        return deleted
+
+    query_kwargs = {
+        'KeyConditionExpression': 'PK = :pk AND begins_with(SK, :prefix)',
+        'ExpressionAttributeValues': {':pk': keys.project_shard_pk(project_id, shard), ':prefix': keys.event_exception_sk(event_id)},
+        'ProjectionExpression': 'PK, SK'
     }
-
-
+    response = table.query(**query_kwargs)
+    exception_keys = response.get('Items', [])
+    while 'LastEvaluatedKey' in response:
+        response = table.query(ExclusiveStartKey=response['LastEvaluatedKey'], **query_kwargs)
+        exception_keys.extend(response.get('Items', []))
+    if exception_keys:
+        table.batch_write(delete_keys=exception_keys)
+    return deleted
+
+
+def delete_event_operations(project_id, event_id, shard, event):
+    """
+    事件、同步墓碑與分桶項目在同一筆交易中刪除/寫入；以 updatedAt 確認讀取後未被修改，
+    條件失敗時附帶最新事件（第一個操作）
+    """
+    delete = {'Key': keys.event_key(project_id, event_id, shard), 'ReturnValuesOnConditionCheckFailure': 'ALL_OLD'}
+    if 'updatedAt' in event:
+        delete.update({
+            'ConditionExpression': '#updatedAt = :updatedAt',
+            'ExpressionAttributeNames': {'#updatedAt': 'updatedAt'},
+            'ExpressionAttributeValues': {':updatedAt': event['updatedAt']}
+        })
+    else:
+        delete['ConditionExpression'] = 'attribute_exists(PK) AND attribute_not_exists(updatedAt)'
+    return [
+        {'Delete': delete},
+        {'Put': {'Item': sync.tombstone_item(project_id, 'event', event_id, shard)}},
+        *conflicts.delete_operations(event)
+    ]
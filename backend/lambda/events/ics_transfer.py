@@ -0,0 +1,528 @@
+"""
+事件 .ics 匯入/匯出
+與事件處理器同一份部署套件；匯入的背景作業為另一個 Lambda（handler 為 ics_transfer.import_handler）：
+- POST /projects/{projectId}/events/import：建立匯入工作（PROJECT#{projectId} / IMPORT#{importId}），
+  回傳 S3 預簽 POST，由客戶端直接上傳到 imports/{projectId}/{importId}.ics
+- GET /projects/{projectId}/events/import/{importId}：匯入進度
+- GET /projects/{projectId}/events/export：逐頁查詢專案各分片的 EVENT#/EVENTEX# 項目，
+  串流寫入 S3 分段上傳，回傳預簽下載 URL
+- import_handler：上傳完成的 S3 ObjectCreated 事件觸發，逐行解析（calendar_core.ical），
+  每 IMPORT_FLUSH_EVENTS 個 VEVENT 以 BatchWriteItem 寫入並把進度寫回匯入工作
+
+兩個方向都不會把整份行事曆載入記憶體：匯入只保留一批待寫入項目與週期事件主項目的 UID 對照，
+匯出只保留一個上傳分段與目前分片的週期事件主項目。
+
+匯入的事件 ID 由匯入工作 ID 與 VEVENT 的序號決定，重跑同一段內容會覆寫相同項目；
+剩餘執行時間不足時以非同步呼叫自身，從檢查點（已處理的 VEVENT 數）續跑。
+
+匯入不經過衝突檢查：只寫入事件，不與既有事件比對，也不參與分桶版本條件。
+衝突檢查的分桶項目與批次 API 相同，由串流（slot_indexer）在寫入後非同步補上，之後的 conflictCheck 才看得到匯入的事件。
+"""
+
+import json
+import os
+import time
+from urllib.parse import unquote_plus
+
+from calendar_core import build_response, get_table, get_member_role
+from calendar_core import ical
+from calendar_core import keys
+from calendar_core import sharding
+from calendar_core import sync
+from calendar_core.batch import write_batches
+from calendar_core.ids import derived_ulid, new_ulid
+
+from handler import OCCURRENCE_OVERRIDE_FIELDS, build_event_item
+
+ICS_BUCKET = os.environ.get('ICS_BUCKET', '')
+IMPORT_KEY_PREFIX = 'imports/'
+EXPORT_KEY_PREFIX = 'exports/'
+MAX_IMPORT_BYTES = 50 * 1024 * 1024
+UPLOAD_URL_SECONDS = 15 * 60
+DOWNLOAD_URL_SECONDS = 15 * 60
+IMPORT_JOB_TTL_SECONDS = 7 * 24 * 60 * 60
+
+# 匯入背景作業
+IMPORT_READ_CHUNK_BYTES = 64 * 1024
+IMPORT_FLUSH_EVENTS = 200
+IMPORT_WRITE_WORKERS = 4
+MAX_PENDING_OVERRIDES = 5000
+MAX_REPORTED_ERRORS = 20
+RESUME_MARGIN_MS = 60 * 1000
+UNTITLED = '(無標題)'
+
+# 匯出
+EXPORT_PAGE_SIZE = 200
+EXPORT_PART_BYTES = 8 * 1024 * 1024  # S3 分段上傳除最後一段外至少 5 MiB
+
+_s3_client = None
+
+
+def s3_client():
+    """S3 用戶端（SigV4，預簽 URL 需要）"""
+    global _s3_client
+    if _s3_client is None:
+        import boto3
+        from botocore.config import Config
+
+        _s3_client = boto3.client('s3', config=Config(signature_version='s3v4'))
+    return _s3_client
+
+
+def import_object_key(project_id, import_id):
+    return f'{IMPORT_KEY_PREFIX}{project_id}/{import_id}.ics'
+
+
+def parse_import_object_key(object_key):
+    """imports/{projectId}/{importId}.ics -> (projectId, importId)；不符合時回傳 None"""
+    if not object_key.startswith(IMPORT_KEY_PREFIX) or not object_key.endswith('.ics'):
+        return None
+    parts = object_key[len(IMPORT_KEY_PREFIX):-len('.ics')].split('/')
+    return tuple(parts) if len(parts) == 2 and all(parts) else None
+
+
+def format_import_job(item):
+    job = {
+        'importId': item['importId'],
+        'projectId': item['projectId'],
+        'status': item['status'],
+        'processed': item.get('processed', 0),
+        'created': item.get('created', 0),
+        'failed': item.get('failed', 0),
+        'errors': item.get('errors', []),
+        'createdAt': item['createdAt'],
+        'updatedAt': item['updatedAt']
+    }
+    if item.get('error'):
+        job['error'] = item['error']
+    return job
+
+
+# ---- API ----
+
+def handle_start_import(user_id, project_id):
+    if not ICS_BUCKET:
+        return build_response(503, {'error': 'Import is not configured'})
+    table = get_table()
+    if get_member_role(project_id, user_id, table) is None:
+        return build_response(403, {'error': 'Insufficient permissions'})
+
+    import_id = new_ulid()
+    now = sync.timestamp()
+    job = {
+        **keys.import_job_key(project_id, import_id),
+        'entityType': 'IMPORT',
+        'importId': import_id,
+        'projectId': project_id,
+        'userId': user_id,
+        'status': 'PENDING',
+        'processed': 0,
+        'created': 0,
+        'failed': 0,
+        'errors': [],
+        'createdAt': now,
+        'updatedAt': now,
+        'expiresAt': int(time.time()) + IMPORT_JOB_TTL_SECONDS
+    }
+    table.put_item(Item=job)
+    upload = s3_client().generate_presigned_post(
+        ICS_BUCKET, import_object_key(project_id, import_id),
+        Conditions=[['content-length-range', 1, MAX_IMPORT_BYTES]],
+        ExpiresIn=UPLOAD_URL_SECONDS
+    )
+    return build_response(202, {
+        **format_import_job(job),
+        'upload': {'url': upload['url'], 'fields': upload['fields']},
+        'expiresIn': UPLOAD_URL_SECONDS,
+        'maxBytes': MAX_IMPORT_BYTES
+    })
+
+
+def handle_import_status(user_id, project_id, import_id):
+    table = get_table()
+    if get_member_role(project_id, user_id, table) is None:
+        return build_response(403, {'error': 'Insufficient permissions'})
+    item = table.get_item(Key=keys.import_job_key(project_id, import_id), ConsistentRead=True).get('Item')
+    if not item:
+        return build_response(404, {'error': 'Import not found'})
+    return build_response(200, format_import_job(item))
+
+
+def handle_export(user_id, project_id):
+    if not ICS_BUCKET:
+        return build_response(503, {'error': 'Export is not configured'})
+    table = get_table()
+    if get_member_role(project_id, user_id, table) is None:
+        return build_response(403, {'error': 'Insufficient permissions'})
+    project = table.get_item(
+        Key=keys.project_key(project_id),
+        ProjectionExpression='#name',
+        ExpressionAttributeNames={'#name': 'name'}
+    ).get('Item')
+    if project is None:
+        return build_response(404, {'error': 'Project not found'})
+
+    export_id = new_ulid()
+    object_key = f'{EXPORT_KEY_PREFIX}{project_id}/{export_id}.ics'
+    counts = {'events': 0, 'exceptions': 0}
+    upload_stream(ICS_BUCKET, object_key, ical.calendar_lines(export_components(table, project_id, counts), project.get('name')))
+    url = s3_client().generate_presigned_url('get_object', Params={
+        'Bucket': ICS_BUCKET,
+        'Key': object_key,
+        'ResponseContentType': 'text/calendar; charset=utf-8',
+        'ResponseContentDisposition': f'attachment; filename="{project_id}.ics"'
+    }, ExpiresIn=DOWNLOAD_URL_SECONDS)
+    return build_response(200, {'exportId': export_id, 'url': url, 'expiresIn': DOWNLOAD_URL_SECONDS, **counts})
+
+
+# ---- 匯出 ----
+
+def partition_items(table, pk):
+    """逐頁產出分區內的事件與例外項目（排序鍵 EVENT 前綴同時涵蓋 EVENT# 與其後的 EVENTEX#）"""
+    query_kwargs = {
+        'KeyConditionExpression': 'PK = :pk AND begins_with(SK, :prefix)',
+        'ExpressionAttributeValues': {':pk': pk, ':prefix': 'EVENT'},
+        'Limit': EXPORT_PAGE_SIZE
+    }
+    while True:
+        response = table.query(**query_kwargs)
+        yield from response.get('Items', [])
+        if 'LastEvaluatedKey' not in response:
+            return
+        query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def export_components(table, project_id, counts):
+    """專案事件的 VEVENT 產生器；例外項目與主項目同分片且排在其後，只需保留目前分片的週期事件主項目"""
+    for pk in sharding.partitions(project_id, table):
+        series = {}
+        for item in partition_items(table, pk):
+            if item['SK'].startswith(keys.EVENT_EXCEPTION_PREFIX):
+                master = series.get(item.get('eventId'))
+                if master is None or 'recurrenceId' not in item:
+                    continue
+                counts['exceptions'] += 1
+                yield ical.event_lines(item, master, item['recurrenceId'])
+                continue
+            if 'rrule' in item:
+                series[item['eventId']] = {
+                    k: item[k] for k in ('eventId', 'icalUid', 'title', 'description', 'startDate', 'endDate') if k in item
+                }
+            counts['events'] += 1
+            yield ical.event_lines(item)
+
+
+def upload_stream(bucket, object_key, chunks):
+    """把字串產生器以 S3 分段上傳寫入，記憶體中只保留一個分段（EXPORT_PART_BYTES）"""
+    client = s3_client()
+    upload_id = client.create_multipart_upload(
+        Bucket=bucket, Key=object_key, ContentType='text/calendar; charset=utf-8'
+    )['UploadId']
+    parts = []
+    buffer, size = [], 0
+
+    def send_part():
+        part_number = len(parts) + 1
+        response = client.upload_part(
+            Bucket=bucket, Key=object_key, UploadId=upload_id, PartNumber=part_number, Body=b''.join(buffer)
+        )
+        parts.append({'PartNumber': part_number, 'ETag': response['ETag']})
+
+    try:
+        for chunk in chunks:
+            data = chunk.encode('utf-8')
+            buffer.append(data)
+            size += len(data)
+            if size >= EXPORT_PART_BYTES:
+                send_part()
+                buffer, size = [], 0
+        if buffer or not parts:
+            send_part()
+        client.complete_multipart_upload(
+            Bucket=bucket, Key=object_key, UploadId=upload_id, MultipartUpload={'Parts': parts}
+        )
+    except Exception:
+        client.abort_multipart_upload(Bucket=bucket, Key=object_key, UploadId=upload_id)
+        raise
+
+
+# ---- 匯入 ----
+
+def import_handler(event, context):
+    """S3 ObjectCreated（imports/{projectId}/{importId}.ics），或自身續跑的非同步呼叫（{"resume": {...}}）"""
+    for record in event.get('Records', []):
+        bucket = record['s3']['bucket']['name']
+        object_key = unquote_plus(record['s3']['object']['key'])
+        parsed = parse_import_object_key(object_key)
+        if parsed is None:
+            print(f"Skipping unexpected object {object_key}")
+            continue
+        run_import(bucket, object_key, parsed[0], parsed[1], context)
+    if 'resume' in event:
+        resume = event['resume']
+        run_import(resume['bucket'], resume['key'], resume['projectId'], resume['importId'], context)
+
+
+def run_import(bucket, object_key, project_id, import_id, context):
+    table = get_table()
+    try:
+        job = table.update_item(
+            Key=keys.import_job_key(project_id, import_id),
+            UpdateExpression='SET #status = :running, updatedAt = :now',
+            # 重複的 S3 通知或非同步重試可續跑；已完成或失敗的工作不再處理
+            ConditionExpression='#status IN (:pending, :running)',
+            ExpressionAttributeNames={'#status': 'status'},
+            ExpressionAttributeValues={
+                ':running': 'RUNNING', ':pending': 'PENDING', ':now': sync.timestamp()
+            },
+            ReturnValues='ALL_NEW'
+        )['Attributes']
+    except table.exceptions.ConditionalCheckFailedException:
+        print(f"Skipping import {import_id}: job not found or already finished")
+        return
+
+    importer = EventImporter(table, job)
+    try:
+        body = s3_client().get_object(Bucket=bucket, Key=object_key)['Body']
+        finished = importer.run(ical.parse_components(body.iter_lines(chunk_size=IMPORT_READ_CHUNK_BYTES)), context)
+    except ical.ICalError as e:
+        importer.save('FAILED', error=str(e))
+        return
+    except Exception as e:
+        # 保留檢查點後交由非同步重試續跑
+        print(f"Error importing {import_id}: {str(e)}")
+        importer.save('RUNNING', error=str(e))
+        raise
+
+    if finished:
+        importer.save('COMPLETED')
+        return
+    importer.save('RUNNING')
+    import boto3
+
+    boto3.client('lambda').invoke(
+        FunctionName=context.invoked_function_arn,
+        InvocationType='Event',
+        Payload=json.dumps({'resume': {
+            'bucket': bucket, 'key': object_key, 'projectId': project_id, 'importId': import_id
+        }}).encode('utf-8')
+    )
+
+
+class EventImporter:
+    """
+    把 VEVENT 逐一轉為事件項目並分批寫入，進度與檢查點寫回匯入工作項目
+    - 週期事件主項目以 UID 對照，RECURRENCE-ID 的 VEVENT 轉為例外項目，EXDATE 轉為取消的例外項目
+    - 主項目出現前的例外先暫存（最多 MAX_PENDING_OVERRIDES 筆），結束時仍找不到主項目即記為失敗
+    - 續跑時檢查點前的 VEVENT 只重建主項目對照與暫存的例外，不再寫入
+    """
+
+    def __init__(self, table, job):
+        self.table = table
+        self.project_id = job['projectId']
+        self.import_id = job['importId']
+        self.user_id = job['userId']
+        self.job_key = keys.import_job_key(self.project_id, self.import_id)
+        self.id_millis = sharding.ulid_millis(self.import_id)
+        self.checkpoint = int(job.get('processed', 0))
+        self.counts = {
+            'processed': self.checkpoint,
+            'created': int(job.get('created', 0)),
+            'failed': int(job.get('failed', 0))
+        }
+        self.errors = list(job.get('errors', []))
+        self.masters = {}   # UID -> {eventId, startDate, shard}
+        self.pending = {}   # UID -> [(序號, 例外欄位)]
+        self.pending_count = 0
+        self.writes = []    # (序號, UID, 項目)
+        self.queued = 0
+        self.position = self.checkpoint
+
+    def run(self, components, context=None):
+        """處理所有 VEVENT，回傳是否完成（False 表示剩餘時間不足，需從檢查點續跑）"""
+        for ordinal, component in enumerate(components):
+            if ordinal < self.checkpoint:
+                self.replay(ordinal, component)
+                continue
+            self.add(ordinal, component)
+            self.position = ordinal + 1
+            if self.queued >= IMPORT_FLUSH_EVENTS:
+                self.flush()
+                if context is not None and context.get_remaining_time_in_millis() < RESUME_MARGIN_MS:
+                    return False
+        for uid, overrides in self.pending.items():
+            for ordinal, _ in overrides:
+                self.fail(ordinal, uid, 'RECURRENCE-ID without a matching recurring event')
+        self.pending = {}
+        self.flush()
+        return True
+
+    def build_item(self, ordinal, fields):
+        """VEVENT 欄位轉為事件項目（ID 由匯入工作與序號決定）；欄位無效時拋出 ValueError"""
+        body = {
+            'title': fields['title'] or UNTITLED,
+            'description': fields['description'],
+            'startDate': fields['startDate'],
+            'endDate': fields['endDate'],
+            'allDay': fields['allDay']
+        }
+        for name in ('color', 'rrule'):
+            if name in fields:
+                body[name] = fields[name]
+        event_id = derived_ulid(self.id_millis, f'{self.import_id}#{ordinal}')
+        item = build_event_item(self.user_id, self.project_id, body, event_id=event_id)
+        if fields.get('uid'):
+            item['icalUid'] = fields['uid']
+        return item
+
+    def register_master(self, uid, item):
+        master = {
+            'eventId': item['eventId'],
+            'startDate': item['startDate'],
+            'shard': sharding.shard_for(self.project_id, item['eventId'], self.table)
+        }
+        if uid:
+            self.masters[uid] = master
+        return master
+
+    def hold(self, ordinal, uid, fields):
+        """暫存主項目尚未出現的例外"""
+        if self.pending_count >= MAX_PENDING_OVERRIDES:
+            self.fail(ordinal, uid, 'Too many RECURRENCE-ID events before their recurring event')
+            return
+        self.pending.setdefault(uid, []).append((ordinal, fields))
+        self.pending_count += 1
+
+    def replay(self, ordinal, component):
+        """檢查點前的 VEVENT：已寫入，只重建週期事件主項目對照與仍在等待主項目的例外"""
+        try:
+            fields = ical.event_fields(component)
+        except ValueError:
+            return
+        uid = fields.get('uid')
+        if 'recurrenceId' in fields:
+            if uid and uid not in self.masters:
+                self.hold(ordinal, uid, fields)
+            return
+        if not fields.get('rrule'):
+            return
+        try:
+            item = self.build_item(ordinal, fields)
+        except ValueError:
+            return
+        self.register_master(uid, item)
+        # 主項目寫入時已一併寫入先前暫存的例外
+        self.pending_count -= len(self.pending.pop(uid, []))
+
+    def add(self, ordinal, component):
+        self.queued += 1
+        try:
+            fields = ical.event_fields(component)
+        except ValueError as e:
+            self.fail(ordinal, None, str(e))
+            return
+        uid = fields.get('uid')
+        if 'recurrenceId' in fields:
+            master = self.masters.get(uid)
+            if master is not None:
+                self.add_exception(ordinal, uid, master, fields)
+            elif uid:
+                self.hold(ordinal, uid, fields)
+            else:
+                self.fail(ordinal, None, 'RECURRENCE-ID without UID')
+            return
+        if fields.get('cancelled'):
+            # 已取消的單一事件不匯入
+            return
+
+        try:
+            item = self.build_item(ordinal, fields)
+        except ValueError as e:
+            self.fail(ordinal, uid, str(e))
+            return
+        self.writes.append((ordinal, uid, item))
+        if 'rrule' not in item:
+            return
+
+        master = self.register_master(uid, item)
+        for exdate in fields.get('exdates', []):
+            self.add_exception(ordinal, uid, master, {'recurrenceId': exdate, 'cancelled': True})
+        overrides = self.pending.pop(uid, []) if uid else []
+        self.pending_count -= len(overrides)
+        for pending_ordinal, pending_fields in overrides:
+            self.add_exception(pending_ordinal, uid, master, pending_fields)
+
+    def add_exception(self, ordinal, uid, master, fields):
+        """週期事件單次發生的修改或取消（同 PUT/DELETE 帶 recurrenceId 寫入的例外項目）"""
+        try:
+            recurrence_id = ical.recurrence_id_like(master['startDate'], fields['recurrenceId'])
+        except ValueError as e:
+            self.fail(ordinal, uid, str(e))
+            return
+        shard = master['shard']
+        item = {
+            **keys.event_exception_key(self.project_id, master['eventId'], recurrence_id, shard),
+            **sync.index_keys(self.project_id, shard),
+            'eventId': master['eventId'],
+            'projectId': self.project_id,
+            'recurrenceId': recurrence_id,
+            'entityType': 'EVENT_EXCEPTION',
+            'updatedAt': sync.timestamp()
+        }
+        if fields.get('cancelled'):
+            item['cancelled'] = True
+        else:
+            item.update({f: fields[f] for f in OCCURRENCE_OVERRIDE_FIELDS if fields.get(f) not in (None, '')})
+        self.writes.append((ordinal, uid, item))
+
+    def fail(self, ordinal, uid, message):
+        self.counts['failed'] += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            error = {'index': ordinal, 'error': message}
+            if uid:
+                error['uid'] = uid
+            self.errors.append(error)
+
+    def flush(self):
+        """寫入暫存的項目（同一主鍵只保留最後一筆），更新計數並儲存檢查點"""
+        if self.writes:
+            latest = {(item['PK'], item['SK']): (ordinal, uid, item) for ordinal, uid, item in self.writes}
+            writes = list(latest.values())
+            errors = write_batches(self.table.client, self.table.name, [('put', item) for _, _, item in writes],
+                                   max_workers=IMPORT_WRITE_WORKERS)
+
+            failed = {}
+            for position, message in errors.items():
+                failed.setdefault(writes[position][0], (writes[position][1], message))
+            for ordinal in dict.fromkeys(ordinal for ordinal, _, _ in writes):
+                if ordinal in failed:
+                    self.fail(ordinal, *failed[ordinal])
+                else:
+                    self.counts['created'] += 1
+        self.writes = []
+        self.queued = 0
+        # 檢查點只在寫入後前進，中途失敗時續跑會重新處理未寫入的 VEVENT
+        self.counts['processed'] = self.position
+        self.save('RUNNING')
+
+    def save(self, status, error=None):
+        """把狀態、計數、錯誤樣本與檢查點寫回匯入工作項目"""
+        values = {
+            ':status': status,
+            ':errors': self.errors,
+            ':now': sync.timestamp(),
+            **{f':{name}': value for name, value in self.counts.items()}
+        }
+        names = {'#status': 'status', **{f'#{name}': name for name in self.counts}}
+        update_expr = 'SET #status = :status, ' + ''.join(f'#{name} = :{name}, ' for name in self.counts) + \
+            'errors = :errors, updatedAt = :now'
+        if error:
+            update_expr += ', #error = :error'
+            names['#error'] = 'error'
+            values[':error'] = error
+        self.table.update_item(
+            Key=self.job_key,
+            UpdateExpression=update_expr,
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values
+        )
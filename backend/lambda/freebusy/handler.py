@@ -0,0 +1,221 @@
+"""
+空閒/忙碌查詢 Lambda
+GET /projects/{projectId}/freebusy?start=&end=&slot=30m[&members=u1,u2]
+回答「專案成員在這段時間什麼時候都有空」，不需前端拉回每位成員的所有事件：
+- 每位成員平行查詢 GSI2（USER# + 開始時間）的日期範圍，以及視窗內仍有發生的週期事件主項目（展開並套用例外）
+- 所有成員的區間以 calendar_core.intervals 掃描線合併為忙碌區塊，再切出完全空閒的固定長度時段
+- 只回傳時間，不回傳事件標題等內容；查詢者須為專案成員
+
+時間：不帶時區的字串視為 UTC；回應沿用 start 參數的格式（帶時區時以 Z 表示）。
+僅日期的結束時間（全天事件、end 參數）包含當天整天。
+成員的事件為其建立的事件（GSI2 的範圍）。開始於視窗前超過 LOOKBACK_DAYS 天、仍跨入視窗的事件不會被計入。
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from itertools import islice
+
+from calendar_core import build_response, http_handler, get_user_id, get_table, get_member_role
+from calendar_core import intervals
+from calendar_core.intervals import to_epoch
+from calendar_core import keys
+from calendar_core import pagination
+from calendar_core import recurrence
+from calendar_core.permissions import project_member_ids
+
+MAX_WINDOW_DAYS = 31
+LOOKBACK_DAYS = 7
+DEFAULT_SLOT = '30m'
+MIN_SLOT_SECONDS = 5 * 60
+SLOT_UNITS = {'m': 60, 'h': 3600, 'd': 86400}
+QUERY_WORKERS = 16
+MAX_OCCURRENCES_PER_SERIES = 1000
+
+EVENT_PROJECTION = 'PK, eventId, startDate, endDate, rrule'
+EXCEPTION_PROJECTION = 'recurrenceId, startDate, endDate, cancelled'
+
+
+@http_handler
+def lambda_handler(event, context):
+    try:
+        if event['httpMethod'] != 'GET':
+            return build_response(405, {'error': 'Method not allowed'})
+
+        user_id = get_user_id(event)
+        if not user_id:
+            return build_response(401, {'error': 'Unauthorized'})
+
+        project_id = (event.get('pathParameters') or {}).get('projectId')
+        if not project_id:
+            return build_response(400, {'error': 'Missing projectId'})
+        return handle_freebusy(user_id, project_id, event.get('queryStringParameters') or {})
+
+    except Exception as e:
+        print(f"Error getting free/busy: {str(e)}")
+        return build_response(500, {'error': 'Internal server error'})
+
+
+def handle_freebusy(user_id, project_id, query_params):
+    if not query_params.get('start') or not query_params.get('end'):
+        return build_response(400, {'error': 'Missing parameters', 'details': 'start and end are required'})
+    try:
+        window_start = to_epoch(query_params['start'])
+        window_end = to_epoch(query_params['end'], end=True)
+    except ValueError as e:
+        return build_response(400, {'error': 'Invalid date', 'details': str(e)})
+    if window_end <= window_start:
+        return build_response(400, {'error': 'Invalid range', 'details': 'end must be after start'})
+    if window_end - window_start > MAX_WINDOW_DAYS * 86400:
+        return build_response(400, {'error': 'Invalid range', 'details': f'range must not exceed {MAX_WINDOW_DAYS} days'})
+    try:
+        slot = parse_slot(query_params.get('slot') or DEFAULT_SLOT)
+    except ValueError as e:
+        return build_response(400, {'error': 'Invalid slot', 'details': str(e)})
+
+    table = get_table()
+    if get_member_role(project_id, user_id, table) is None:
+        return build_response(403, {'error': 'Insufficient permissions'})
+
+    member_ids = project_member_ids(table, project_id)
+    if query_params.get('members'):
+        requested = {v for v in query_params['members'].split(',') if v}
+        member_ids = [member_id for member_id in member_ids if member_id in requested]
+
+    with ThreadPoolExecutor(max_workers=QUERY_WORKERS) as executor:
+        busy_by_member = list(executor.map(
+            lambda member_id: member_busy_intervals(table, member_id, window_start, window_end),
+            member_ids
+        ))
+
+    starts = [start for busy in busy_by_member for start, _ in busy]
+    ends = [end for busy in busy_by_member for _, end in busy]
+    block_starts, block_ends = intervals.merge(starts, ends)
+    free = intervals.free_slots(block_starts, block_ends, window_start, window_end, slot)
+
+    aware = has_timezone(query_params['start'])
+    return build_response(200, {
+        'projectId': project_id,
+        'start': format_epoch(window_start, aware),
+        'end': format_epoch(window_end, aware),
+        'slotMinutes': slot // 60,
+        'members': member_ids,
+        'busy': [
+            {'start': format_epoch(start, aware), 'end': format_epoch(end, aware)}
+            for start, end in intervals.clip(block_starts, block_ends, window_start, window_end)
+        ],
+        'freeSlots': [
+            {'start': format_epoch(start, aware), 'end': format_epoch(start + slot, aware)}
+            for start in free
+        ]
+    })
+
+
+def member_busy_intervals(table, member_id, window_start, window_end):
+    """成員在視窗內的忙碌區間 [(start, end)]（epoch 秒）：一般事件 + 展開後的週期事件發生"""
+    lower = date_key(window_start - LOOKBACK_DAYS * 86400)
+    upper = f'{date_key(window_end)}~'
+    single = pagination.query_page(table, {
+        'IndexName': 'GSI2',
+        'KeyConditionExpression': 'GSI2PK = :pk AND GSI2SK BETWEEN :from AND :to',
+        'ProjectionExpression': EVENT_PROJECTION,
+        'ExpressionAttributeValues': {':pk': keys.user_pk(member_id), ':from': lower, ':to': upper}
+    }, None)[0]
+    # 週期事件主項目的排序鍵為 RRULE#{序列結束}
+    masters = pagination.query_page(table, {
+        'IndexName': 'GSI2',
+        'KeyConditionExpression': 'GSI2PK = :pk AND GSI2SK BETWEEN :from AND :to',
+        'ProjectionExpression': EVENT_PROJECTION,
+        'ExpressionAttributeValues': {
+            ':pk': keys.user_pk(member_id),
+            ':from': f'{keys.RECURRING_PREFIX}{lower}',
+            ':to': f'{keys.RECURRING_PREFIX}~'
+        }
+    }, None)[0]
+
+    busy = []
+    for item in single:
+        try:
+            start, end = to_epoch(item['startDate']), to_epoch(item['endDate'], end=True)
+        except (KeyError, ValueError):
+            continue
+        if end > window_start and start < window_end:
+            busy.append((start, end))
+    for master in masters:
+        busy.extend(series_busy_intervals(table, master, window_start, window_end))
+    return busy
+
+
+def series_busy_intervals(table, master, window_start, window_end):
+    """展開週期事件在視窗內的發生，套用例外（取消 / 改時間）"""
+    try:
+        rule = recurrence.parse_rrule(master['rrule'])
+        start_dt = recurrence.parse_datetime(master['startDate'])
+        duration = to_epoch(master['endDate'], end=True) - to_epoch(master['startDate'])
+    except (KeyError, ValueError) as e:
+        print(f"Skipping invalid recurring event {master.get('eventId')}: {str(e)}")
+        return []
+
+    tz = start_dt.tzinfo or timezone.utc
+    # 在視窗前開始、仍延續到視窗內的發生也要計入
+    series = recurrence.occurrences(
+        rule, master['startDate'],
+        datetime.fromtimestamp(window_start - max(duration, 0), timezone.utc),
+        datetime.fromtimestamp(window_end, timezone.utc)
+    )
+    exceptions = load_exceptions(table, master, window_start, window_end)
+
+    busy = []
+    for occurrence in islice(series, MAX_OCCURRENCES_PER_SERIES):
+        override = exceptions.get(recurrence.format_like(master['startDate'], occurrence, start_dt.tzinfo))
+        if override and override.get('cancelled'):
+            continue
+        start = int(occurrence.replace(tzinfo=tz).timestamp())
+        end = start + duration
+        if override and 'startDate' in override:
+            start = to_epoch(override['startDate'])
+            end = to_epoch(override['endDate'], end=True) if 'endDate' in override else start + duration
+        if end > window_start and start < window_end:
+            busy.append((start, end))
+    return busy
+
+
+def load_exceptions(table, master, window_start, window_end):
+    """主項目在視窗附近的例外項目，回傳 {recurrenceId: 例外項目}"""
+    prefix = keys.event_exception_sk(master['eventId'])
+    items = pagination.query_page(table, {
+        'KeyConditionExpression': 'PK = :pk AND SK BETWEEN :from AND :to',
+        'ProjectionExpression': EXCEPTION_PROJECTION,
+        'ExpressionAttributeValues': {
+            ':pk': master['PK'],
+            ':from': f'{prefix}{date_key(window_start - LOOKBACK_DAYS * 86400)}',
+            ':to': f'{prefix}{date_key(window_end + 86400)}~'
+        }
+    }, None)[0]
+    return {item['recurrenceId']: item for item in items}
+
+
+def parse_slot(text):
+    """時段長度（如 15m、1h、1d）轉為秒數"""
+    unit = SLOT_UNITS.get(text[-1:].lower())
+    if unit is None or not text[:-1].isdigit():
+        raise ValueError('slot must look like 30m, 1h or 1d')
+    seconds = int(text[:-1]) * unit
+    if seconds < MIN_SLOT_SECONDS:
+        raise ValueError(f'slot must be at least {MIN_SLOT_SECONDS // 60} minutes')
+    return seconds
+
+
+def has_timezone(text):
+    return len(text) > 10 and recurrence.parse_datetime(text).tzinfo is not None
+
+
+def format_epoch(seconds, aware):
+    value = datetime.fromtimestamp(seconds, timezone.utc)
+    if aware:
+        return value.isoformat().replace('+00:00', 'Z')
+    return value.replace(tzinfo=None).isoformat()
+
+
+def date_key(seconds):
+    """epoch 秒的 UTC 日期字串，作為日期排序鍵的範圍邊界"""
+    return datetime.fromtimestamp(seconds, timezone.utc).date().isoformat()
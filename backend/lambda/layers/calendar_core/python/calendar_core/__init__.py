@@ -0,0 +1,51 @@
+"""
+calendar_core 共用資料存取層（以 Lambda Layer 部署）
+提供：
+- db：延遲建立、連線池調校過的低階 DynamoDB 用戶端與 Table 包裝
+- serde：AttributeValue <-> Python 快速轉換
+- keys：PROJECT#/EVENT#/TASK#/MEMBER#/USER# 鍵值組裝
+- responses：HTTP 響應與 Cognito 用戶ID 擷取
+- pagination：HMAC 簽章的不透明分頁 cursor
+- ids：可依時間排序的唯一 ID（ULID）
+- permissions：(projectId, userId) 成員角色 TTL/LRU 快取
+- sync：差異同步索引鍵與刪除墓碑
+- sharding：大型專案的寫入分片與跨分片讀取
+- metrics：請求層級的 DynamoDB 呼叫追蹤與 EMF 指標
+- intervals：free/busy 區間合併與空閒時段
+- index_projection：GSI 精簡投影的欄位與列表描述補讀
+- conflicts：事件衝突檢查的依日分桶區間索引
+- ical：.ics 逐行解析與輸出
+- search：全文搜尋的斷詞、反向索引項目與排序
+- versions：列表 ETag 的版本戳（查詢前讀取）
+
+頂層名稱採延遲導入（PEP 562），處理器只會載入當次請求實際用到的子模組。
+"""
+
+import importlib
+
+_EXPORTS = {
+    'get_client': 'calendar_core.db',
+    'get_table': 'calendar_core.db',
+    'build_response': 'calendar_core.responses',
+    'build_list_response': 'calendar_core.responses',
+    'not_modified_response': 'calendar_core.responses',
+    'http_handler': 'calendar_core.responses',
+    'get_user_id': 'calendar_core.responses',
+    'InvalidCursorError': 'calendar_core.pagination',
+    'encode_cursor': 'calendar_core.pagination',
+    'decode_cursor': 'calendar_core.pagination',
+    'new_id': 'calendar_core.ids',
+    'get_member_role': 'calendar_core.permissions',
+    'has_project_role': 'calendar_core.permissions',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module 'calendar_core' has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,119 @@
+"""
+BatchWriteItem / BatchGetItem 批次輔助
+- 寫入以 25 筆為一批，多批次透過小型執行緒池平行送出
+- UnprocessedItems / UnprocessedKeys 以指數退避（full jitter）重試
+- 逐筆回報結果，讓呼叫端能組出每個操作的狀態
+"""
+
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from calendar_core.serde import serialize_item, deserialize_item
+
+BATCH_WRITE_LIMIT = 25
+BATCH_GET_LIMIT = 100
+BATCH_MAX_RETRIES = 8
+BATCH_BACKOFF_BASE_SECONDS = 0.05
+BATCH_BACKOFF_MAX_SECONDS = 2.0
+DEFAULT_MAX_WORKERS = 4
+
+
+def _backoff(attempt):
+    # full jitter：0 ~ min(上限, base * 2^attempt)
+    time.sleep(random.uniform(0, min(BATCH_BACKOFF_MAX_SECONDS, BATCH_BACKOFF_BASE_SECONDS * (2 ** attempt))))
+
+
+def _key_of(request):
+    """
+    由 PutRequest/DeleteRequest 取出主鍵，用於對應未處理項目
+    寫入項目以單表的 PK/SK 為鍵；刪除鍵整組比對，其他鍵結構的資料表（如 WebSocket 連線表）也能批次刪除
+    """
+    if 'PutRequest' in request:
+        item = request['PutRequest']['Item']
+        return item['PK']['S'], item['SK']['S']
+    return json.dumps(request['DeleteRequest']['Key'], sort_keys=True)
+
+
+def _write_chunk(client, table_name, chunk):
+    """
+    寫入單一批次（最多 25 筆），回傳 {index: 錯誤訊息}
+    chunk: [(index, request)]
+    """
+    index_by_key = {_key_of(request): index for index, request in chunk}
+    pending = [request for _, request in chunk]
+    try:
+        for attempt in range(BATCH_MAX_RETRIES + 1):
+            response = client.batch_write_item(RequestItems={table_name: pending})
+            pending = (response.get('UnprocessedItems') or {}).get(table_name, [])
+            if not pending:
+                return {}
+            if attempt < BATCH_MAX_RETRIES:
+                _backoff(attempt)
+    except Exception as e:
+        print(f"Error writing batch: {str(e)}")
+        return {index: str(e) for index, _ in chunk}
+    return {index_by_key[_key_of(request)]: 'Unprocessed after retries' for request in pending}
+
+
+def write_batches(client, table_name, writes, max_workers=DEFAULT_MAX_WORKERS):
+    """
+    批次寫入/刪除
+    writes: [('put', item)] 或 [('delete', key)]，值為一般 Python dict
+    回傳 {index: 錯誤訊息}；成功的項目不會出現在結果中
+    同一次呼叫中的主鍵必須唯一（DynamoDB 限制）
+    """
+    requests = []
+    for index, (action, value) in enumerate(writes):
+        if action == 'put':
+            requests.append((index, {'PutRequest': {'Item': serialize_item(value)}}))
+        else:
+            requests.append((index, {'DeleteRequest': {'Key': serialize_item(value)}}))
+
+    chunks = [requests[i:i + BATCH_WRITE_LIMIT] for i in range(0, len(requests), BATCH_WRITE_LIMIT)]
+    if not chunks:
+        return {}
+    if len(chunks) == 1 or max_workers <= 1:
+        results = [_write_chunk(client, table_name, chunk) for chunk in chunks]
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as executor:
+            results = list(executor.map(lambda chunk: _write_chunk(client, table_name, chunk), chunks))
+
+    errors = {}
+    for result in results:
+        errors.update(result)
+    return errors
+
+
+def get_batches(client, table_name, keys, attributes=None, consistent=False):
+    """
+    以 BatchGetItem 讀取多筆項目（每批 100 筆），回傳 {(PK, SK): item}
+    不存在的項目不會出現在結果中；attributes 指定時只取回這些屬性（PK、SK 一律包含）；
+    consistent=True 時以強一致讀取
+    """
+    found = {}
+    unique_keys = list({(k['PK'], k['SK']): k for k in keys}.values())
+    projection = {}
+    if attributes:
+        names = {f'#a{i}': name for i, name in enumerate(('PK', 'SK', *attributes))}
+        projection = {'ProjectionExpression': ', '.join(names), 'ExpressionAttributeNames': names}
+    if consistent:
+        projection['ConsistentRead'] = True
+    for start in range(0, len(unique_keys), BATCH_GET_LIMIT):
+        pending = {table_name: {
+            'Keys': [serialize_item(k) for k in unique_keys[start:start + BATCH_GET_LIMIT]],
+            **projection
+        }}
+        for attempt in range(BATCH_MAX_RETRIES + 1):
+            response = client.batch_get_item(RequestItems=pending)
+            for raw in response.get('Responses', {}).get(table_name, []):
+                item = deserialize_item(raw)
+                found[(item['PK'], item['SK'])] = item
+            pending = response.get('UnprocessedKeys') or {}
+            if not pending:
+                break
+            if attempt == BATCH_MAX_RETRIES:
+                raise RuntimeError('BatchGetItem left unprocessed keys after retries')
+            _backoff(attempt)
+    return found
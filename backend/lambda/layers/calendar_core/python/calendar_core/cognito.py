@@ -0,0 +1,119 @@
+"""
+Cognito JWT 驗證（不依賴第三方套件）
+WebSocket 的 $connect 無法使用 REST API 的 Cognito Authorizer，瀏覽器也不能自訂 WebSocket 標頭，
+因此 token 以查詢參數傳入，由此模組驗證：
+- RS256 簽章：以用戶池 JWKS 的 RSA 公鑰驗證 PKCS#1 v1.5 / SHA-256（JWKS 於執行環境內快取）
+- exp、iss（用戶池）、token_use，以及 aud（ID token）/ client_id（access token）
+環境變數：COGNITO_USER_POOL_ID、COGNITO_APP_CLIENT_ID（皆為必要；未設定客戶端時拋出 RuntimeError，
+不略過 audience 檢查，否則同一用戶池其他客戶端簽發的 token 也會被接受）
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import os
+import time
+
+# SHA-256 的 DER DigestInfo 前綴（RFC 8017 9.2）
+_SHA256_DIGEST_INFO = bytes.fromhex('3031300d060960864801650304020105000420')
+# 遇到未知 kid 時重新下載 JWKS 的最短間隔（用戶池輪替金鑰時）
+JWKS_REFRESH_SECONDS = 300
+JWKS_TIMEOUT_SECONDS = 3
+
+_jwks = {}
+_jwks_fetched_at = 0.0
+
+
+class InvalidTokenError(ValueError):
+    """token 格式錯誤、簽章不符、已過期或不屬於本用戶池/客戶端"""
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def _b64int(text):
+    return int.from_bytes(_b64decode(text), 'big')
+
+
+def issuer():
+    """用戶池的 iss，例如 https://cognito-idp.ap-east-1.amazonaws.com/ap-east-1_xxx"""
+    pool_id = os.environ['COGNITO_USER_POOL_ID']
+    region = pool_id.split('_', 1)[0]
+    return f'https://cognito-idp.{region}.amazonaws.com/{pool_id}'
+
+
+def app_client_id():
+    """允許的用戶池應用程式客戶端 ID；未設定時拋出 RuntimeError"""
+    client_id = os.environ.get('COGNITO_APP_CLIENT_ID')
+    if not client_id:
+        raise RuntimeError('COGNITO_APP_CLIENT_ID is not configured')
+    return client_id
+
+
+def _fetch_jwks():
+    from urllib.request import urlopen
+
+    with urlopen(f'{issuer()}/.well-known/jwks.json', timeout=JWKS_TIMEOUT_SECONDS) as response:
+        document = json.loads(response.read())
+    return {key['kid']: (_b64int(key['n']), _b64int(key['e'])) for key in document.get('keys', []) if key.get('kty') == 'RSA'}
+
+
+def _public_key(kid):
+    """取得 kid 對應的 (n, e)；未知 kid 時在間隔外重新下載一次"""
+    global _jwks, _jwks_fetched_at
+    if kid not in _jwks and time.time() - _jwks_fetched_at > JWKS_REFRESH_SECONDS:
+        _jwks = _fetch_jwks()
+        _jwks_fetched_at = time.time()
+    key = _jwks.get(kid)
+    if key is None:
+        raise InvalidTokenError('Unknown signing key')
+    return key
+
+
+def rsa_sha256_verify(message, signature, n, e):
+    """RSASSA-PKCS1-v1_5 + SHA-256 簽章驗證"""
+    size = (n.bit_length() + 7) // 8
+    if len(signature) != size:
+        return False
+    decrypted = pow(int.from_bytes(signature, 'big'), e, n).to_bytes(size, 'big')
+    digest = _SHA256_DIGEST_INFO + hashlib.sha256(message).digest()
+    padding = size - len(digest) - 3
+    if padding < 8:
+        return False
+    expected = b'\x00\x01' + b'\xff' * padding + b'\x00' + digest
+    return hmac.compare_digest(decrypted, expected)
+
+
+def verify_token(token):
+    """驗證 Cognito ID / access token，回傳 claims；無效時拋出 InvalidTokenError"""
+    try:
+        header_part, payload_part, signature_part = token.split('.')
+        header = json.loads(_b64decode(header_part))
+        claims = json.loads(_b64decode(payload_part))
+        signature = _b64decode(signature_part)
+    except (AttributeError, ValueError):
+        raise InvalidTokenError('Malformed token')
+
+    if header.get('alg') != 'RS256':
+        raise InvalidTokenError('Unsupported algorithm')
+    n, e = _public_key(header.get('kid'))
+    if not rsa_sha256_verify(f'{header_part}.{payload_part}'.encode('ascii'), signature, n, e):
+        raise InvalidTokenError('Signature mismatch')
+
+    if claims.get('exp', 0) < time.time():
+        raise InvalidTokenError('Token expired')
+    if claims.get('iss') != issuer():
+        raise InvalidTokenError('Wrong issuer')
+    client_id = app_client_id()
+    token_use = claims.get('token_use')
+    if token_use == 'id':
+        audience = claims.get('aud')
+    elif token_use == 'access':
+        audience = claims.get('client_id')
+    else:
+        raise InvalidTokenError('Unsupported token_use')
+    if audience != client_id:
+        raise InvalidTokenError('Wrong audience')
+    return claims
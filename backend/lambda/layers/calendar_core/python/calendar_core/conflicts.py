@@ -0,0 +1,296 @@
+"""
+事件衝突檢查：依日分桶的事件區間索引
+每個非週期事件在所屬專案與建立者各有一組分桶項目：
+- SLOTS#PROJECT#{projectId}#{UTC 日期} / EVENT#{eventId}：事件涵蓋的每一天一筆，記錄 start/end（epoch 秒）
+- SLOTS#USER#{userId}#{UTC 日期} / EVENT#{eventId}：同上，範圍為建立者（GSI2 的 USER#）
+- 跨越超過 MAX_BUCKET_DAYS 天的事件改放在 ...#LONG 分桶，避免一筆事件寫入大量分桶
+- 每個分桶有一筆 VERSION 項目，任何寫入分桶的操作都會遞增版本
+
+維護方式：
+- 帶 conflictCheck 的建立/更新以一筆交易寫入事件與分桶項目（write）
+- 其他寫入（一般建立/更新、批次、.ics 匯入）只寫事件，由 slot_indexer 依資料表串流非同步套用（apply_changes）；
+  串流延遲期間（通常 1 秒內）剛寫入的事件還不在分桶中，衝突檢查看不到
+- 刪除事件時分桶項目與事件在同一筆交易中刪除
+
+檢查時對候選事件涵蓋的每一天（加上 LONG）以強一致讀取各查詢一個分桶分區，
+再以 BatchGetItem（強一致）確認候選事件仍存在且時間確實重疊，過期或殘留的分桶項目因此不影響結果。
+提交時以讀到的分桶版本為交易條件：檢查後若有重疊的事件被併發寫入分桶（另一個帶 conflictCheck 的寫入，或串流套用的分桶項目），
+它必然寫入了同一個分桶（重疊即共用至少一天，或位於 LONG），版本不符使交易失敗並重新檢查。
+
+週期事件不建立分桶項目，也不參與衝突檢查。分桶項目以 expiresAt 在事件結束 SLOT_RETENTION_SECONDS 後過期。
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from calendar_core import keys
+from calendar_core import pagination
+from calendar_core.intervals import to_epoch
+
+MODES = ('report', 'reject')
+MAX_BUCKET_DAYS = 7
+MAX_CHECK_DAYS = 31
+MAX_ATTEMPTS = 3
+LONG_BUCKET = 'LONG'
+SLOT_RETENTION_SECONDS = 30 * 24 * 60 * 60
+QUERY_WORKERS = 8
+
+VERIFY_ATTRIBUTES = ('eventId', 'projectId', 'title', 'startDate', 'endDate', 'rrule')
+
+
+class ConflictError(Exception):
+    """reject 模式下發現衝突"""
+
+    def __init__(self, conflicts):
+        super().__init__(f'{len(conflicts)} conflicting events')
+        self.conflicts = conflicts
+
+
+class ContentionError(Exception):
+    """分桶在每次檢查後都被併發寫入，重試次數用盡"""
+
+
+def parse_mode(value):
+    """conflictCheck 參數；未帶時回傳 None，值無效時拋出 ValueError"""
+    if value in (None, False, ''):
+        return None
+    if value is True:
+        return 'report'
+    if value not in MODES:
+        raise ValueError(f"conflictCheck must be one of {', '.join(MODES)}")
+    return value
+
+
+def event_span(item):
+    """非週期事件的 (start, end) epoch 秒；週期事件、缺少或無效的時間回傳 None"""
+    if not item or item.get('rrule') or not item.get('startDate') or not item.get('endDate'):
+        return None
+    try:
+        start, end = to_epoch(item['startDate']), to_epoch(item['endDate'], end=True)
+    except ValueError:
+        return None
+    return (start, end) if end > start else None
+
+
+def owner_scopes(item):
+    """事件所屬的分桶範圍 [(範圍名稱, 分區前綴)]：專案，以及建立者（GSI2PK）"""
+    scopes = [('project', keys.project_pk(item['projectId']))]
+    if item.get('GSI2PK'):
+        scopes.append(('owner', item['GSI2PK']))
+    return scopes
+
+
+def days(start, end):
+    """區間 [start, end) 涵蓋的 UTC 日期字串"""
+    first = datetime.fromtimestamp(start, timezone.utc).date()
+    last = datetime.fromtimestamp(end - 1, timezone.utc).date()
+    return [(first + timedelta(days=n)).isoformat() for n in range((last - first).days + 1)]
+
+
+def entry_buckets(span):
+    """事件區間項目所在的分桶"""
+    covered = days(*span)
+    return covered if len(covered) <= MAX_BUCKET_DAYS else [LONG_BUCKET]
+
+
+def check_buckets(span):
+    """檢查區間時需讀取的分桶：涵蓋的每一天與 LONG；超過 MAX_CHECK_DAYS 天時拋出 ValueError"""
+    covered = days(*span)
+    if len(covered) > MAX_CHECK_DAYS:
+        raise ValueError(f'conflict check supports events up to {MAX_CHECK_DAYS} days')
+    return covered + [LONG_BUCKET]
+
+
+def entry_items(item):
+    """事件的分桶項目；週期事件或時間無效時為空"""
+    span = event_span(item)
+    if span is None:
+        return []
+    return [
+        {
+            **keys.slot_entry_key(owner_pk, bucket, item['eventId']),
+            'entityType': 'EVENT_SLOT',
+            'eventId': item['eventId'],
+            'projectId': item['projectId'],
+            'eventPK': item['PK'],
+            'start': span[0],
+            'end': span[1],
+            'expiresAt': span[1] + SLOT_RETENTION_SECONDS
+        }
+        for _, owner_pk in owner_scopes(item)
+        for bucket in entry_buckets(span)
+    ]
+
+
+def find_conflicts(table, item):
+    """
+    查詢與 item 重疊的事件，回傳 (衝突列表, 分桶版本 {分桶分區鍵: 版本或 None})
+    衝突為 {eventId, projectId, title, startDate, endDate, scopes}，依開始時間排序
+    item 為週期事件或時間無效時拋出 ValueError
+    """
+    span = event_span(item)
+    if span is None:
+        raise ValueError('conflict check requires a non-recurring event with valid startDate/endDate')
+    buckets = [
+        (name, keys.slot_bucket_pk(owner_pk, bucket))
+        for name, owner_pk in owner_scopes(item)
+        for bucket in check_buckets(span)
+    ]
+
+    def read_bucket(bucket):
+        return pagination.query_page(table, {
+            'KeyConditionExpression': 'PK = :pk',
+            'ConsistentRead': True,
+            'ExpressionAttributeValues': {':pk': bucket[1]}
+        }, None)[0]
+
+    with ThreadPoolExecutor(max_workers=QUERY_WORKERS) as executor:
+        pages = list(executor.map(read_bucket, buckets))
+
+    versions = {}
+    candidates = {}
+    for (scope, pk), page in zip(buckets, pages):
+        versions[pk] = None
+        for entry in page:
+            if entry['SK'] == keys.SLOTS_VERSION_SK:
+                versions[pk] = int(entry['version'])
+            elif entry['eventId'] != item['eventId'] and entry['start'] < span[1] and entry['end'] > span[0]:
+                candidate = candidates.setdefault(entry['eventId'], {'entry': entry, 'scopes': set()})
+                candidate['scopes'].add(scope)
+
+    return verify(table, candidates, span), versions
+
+
+def verify(table, candidates, span):
+    """以事件項目確認候選衝突（已刪除、改為週期或改期的事件略過）"""
+    if not candidates:
+        return []
+    event_keys = [
+        {'PK': c['entry']['eventPK'], 'SK': keys.event_sk(event_id)}
+        for event_id, c in candidates.items()
+    ]
+    found = table.batch_get(event_keys, VERIFY_ATTRIBUTES, consistent=True)
+    conflicts = []
+    for event_key in event_keys:
+        event = found.get((event_key['PK'], event_key['SK']))
+        other = event_span(event)
+        if other is None or other[0] >= span[1] or other[1] <= span[0]:
+            continue
+        conflicts.append({
+            'eventId': event['eventId'],
+            'projectId': event['projectId'],
+            'title': event.get('title'),
+            'startDate': event['startDate'],
+            'endDate': event['endDate'],
+            'scopes': sorted(candidates[event['eventId']]['scopes'])
+        })
+    conflicts.sort(key=lambda c: (to_epoch(c['startDate']), c['eventId']))
+    return conflicts
+
+
+def index_operations(old_item, new_item, versions=None):
+    """
+    維護分桶項目的交易操作：寫入新區間、刪除不再涵蓋的分桶項目、遞增寫入分桶的版本
+    versions 為 find_conflicts 讀到的版本時，讀取過的分桶一併以該版本為條件遞增
+    """
+    new_entries = entry_items(new_item) if new_item else []
+    new_keys = {(e['PK'], e['SK']) for e in new_entries}
+    operations = [{'Put': {'Item': entry}} for entry in new_entries]
+    operations.extend(
+        {'Delete': {'Key': {'PK': e['PK'], 'SK': e['SK']}}}
+        for e in (entry_items(old_item) if old_item else [])
+        if (e['PK'], e['SK']) not in new_keys
+    )
+    operations.extend({'Update': update} for update in version_updates(new_entries, versions))
+    return operations
+
+
+def version_updates(entries, versions=None):
+    """
+    分桶版本遞增（UpdateItem 參數）：寫入 entries 的分桶一律遞增，
+    versions 中讀取過的分桶也遞增並以讀到的版本為條件
+    """
+    expires = int(time.time()) + SLOT_RETENTION_SECONDS
+    bucket_expires = {pk: expires for pk in (versions or {})}
+    for entry in entries:
+        bucket_expires[entry['PK']] = max(bucket_expires.get(entry['PK'], expires), entry['expiresAt'])
+
+    updates = []
+    for pk, expires_at in bucket_expires.items():
+        update = {
+            'Key': {'PK': pk, 'SK': keys.SLOTS_VERSION_SK},
+            'UpdateExpression': 'ADD #version :one SET expiresAt = :expires',
+            'ExpressionAttributeNames': {'#version': 'version'},
+            'ExpressionAttributeValues': {':one': 1, ':expires': expires_at}
+        }
+        if versions is not None and pk in versions:
+            if versions[pk] is None:
+                update['ConditionExpression'] = 'attribute_not_exists(#version)'
+            else:
+                update['ConditionExpression'] = '#version = :seen'
+                update['ExpressionAttributeValues'][':seen'] = versions[pk]
+        updates.append(update)
+    return updates
+
+
+def bump_versions(table, entries):
+    """
+    以非交易方式（BatchWriteItem）寫入分桶項目後呼叫：遞增各分桶版本，
+    使寫入前已讀取這些分桶的衝突檢查在提交時失敗並重新檢查
+    """
+    updates = version_updates(entries)
+    if not updates:
+        return
+    with ThreadPoolExecutor(max_workers=QUERY_WORKERS) as executor:
+        list(executor.map(lambda update: table.update_item(**update), updates))
+
+
+def apply_changes(table, changes):
+    """
+    以非交易方式套用事件異動的分桶項目（串流非同步維護），回傳寫入與刪除的項目數
+    changes 為 [(舊事件或 None, 新事件或 None)]，每個事件一組；
+    寫入/刪除以 BatchWriteItem 送出後遞增寫入分桶的版本。重複套用結果相同，可安全重試
+    """
+    entries, delete_keys = [], []
+    for old_item, new_item in changes:
+        for operation in index_operations(old_item, new_item):
+            if 'Put' in operation:
+                entries.append(operation['Put']['Item'])
+            elif 'Delete' in operation:
+                delete_keys.append(operation['Delete']['Key'])
+    if entries or delete_keys:
+        table.batch_write(put_items=entries, delete_keys=delete_keys)
+        bump_versions(table, entries)
+    return len(entries), len(delete_keys)
+
+
+def delete_operations(item):
+    """刪除事件時一併刪除分桶項目的交易操作（刪除不會造成新的重疊，不需遞增版本）"""
+    return [{'Delete': {'Key': {'PK': e['PK'], 'SK': e['SK']}}} for e in entry_items(item)]
+
+
+def write(table, operations, old_item, new_item, mode):
+    """
+    帶 conflictCheck 的寫入：以一筆交易寫入事件（operations 置於交易開頭）並維護分桶項目，回傳衝突列表
+    先檢查再以分桶版本為條件提交，版本不符時重新檢查（最多 MAX_ATTEMPTS 次）
+    reject 模式有衝突時拋出 ConflictError 且不寫入；重試用盡時拋出 ContentionError；
+    operations 本身的條件失敗以 TransactionCanceledException 原樣拋出
+    """
+    from calendar_core.db import cancellation_codes
+
+    for _ in range(MAX_ATTEMPTS):
+        conflicts, versions = find_conflicts(table, new_item)
+        if conflicts and mode == 'reject':
+            raise ConflictError(conflicts)
+        try:
+            table.transact_write(operations + index_operations(old_item, new_item, versions))
+            return conflicts
+        except table.exceptions.TransactionCanceledException as e:
+            codes = cancellation_codes(e)
+            # 只有分桶版本不符（或與其他交易同時寫入分桶）時重新檢查
+            if 'ConditionalCheckFailed' in codes[:len(operations)]:
+                raise
+            if not set(codes[len(operations):]) & {'ConditionalCheckFailed', 'TransactionConflict'}:
+                raise
+    raise ContentionError('slot buckets kept changing during the conflict check')
@@ -0,0 +1,173 @@
+"""
+DynamoDB 連線管理
+每個執行環境只建立一次低階用戶端，並在首次使用時才建立（縮短冷啟動）；
+透過調校過的 botocore Config 重用 keep-alive 連線並採用 adaptive 重試。
+用戶端建立時掛上 calendar_core.metrics 的呼叫追蹤。
+
+不使用 boto3.resource：Table 以低階用戶端實作，參數命名與 boto3 相同，
+但 Key / Item / ExpressionAttributeValues / ExclusiveStartKey 皆傳入一般 Python 值，
+回應中的 Item / Items / Attributes / LastEvaluatedKey 亦已轉回 Python 值。
+"""
+
+import os
+
+from calendar_core.serde import serialize, serialize_item, deserialize_item
+
+# 連線池與重試設定
+MAX_POOL_CONNECTIONS = 32
+MAX_RETRY_ATTEMPTS = 5
+CONNECT_TIMEOUT_SECONDS = 2
+READ_TIMEOUT_SECONDS = 10
+
+_client = None
+_table = None
+
+
+def table_name():
+    """單表名稱（由 CDK 注入 DYNAMODB_TABLE）"""
+    return os.environ['DYNAMODB_TABLE']
+
+
+def client_config():
+    """建立調校過的 botocore Config"""
+    from botocore.config import Config
+
+    return Config(
+        max_pool_connections=MAX_POOL_CONNECTIONS,
+        tcp_keepalive=True,
+        connect_timeout=CONNECT_TIMEOUT_SECONDS,
+        read_timeout=READ_TIMEOUT_SECONDS,
+        retries={'mode': 'adaptive', 'max_attempts': MAX_RETRY_ATTEMPTS}
+    )
+
+
+def get_client():
+    """取得共用的低階 DynamoDB 用戶端"""
+    global _client
+    if _client is None:
+        import boto3
+
+        from calendar_core import metrics
+
+        _client = boto3.client('dynamodb', config=client_config())
+        metrics.install(_client)
+    return _client
+
+
+def get_table():
+    """取得單表的 Table 物件"""
+    global _table
+    if _table is None:
+        _table = Table(table_name())
+    return _table
+
+
+def _serialize_values(kwargs):
+    """轉換請求中以 Python 值表示的參數"""
+    values = kwargs.get('ExpressionAttributeValues')
+    if values:
+        kwargs['ExpressionAttributeValues'] = {k: serialize(v) for k, v in values.items()}
+    start_key = kwargs.get('ExclusiveStartKey')
+    if start_key:
+        kwargs['ExclusiveStartKey'] = serialize_item(start_key)
+    return kwargs
+
+
+def cancellation_codes(error):
+    """TransactionCanceledException 中各操作的失敗代碼（未失敗的操作為 'None'）"""
+    return [reason.get('Code', 'None') for reason in error.response.get('CancellationReasons', [])]
+
+
+def condition_failure_item(error):
+    """
+    取出 ConditionalCheckFailedException 附帶的既有項目
+    （請求需帶 ReturnValuesOnConditionCheckFailure='ALL_OLD'）；項目不存在時回傳 None
+    """
+    item = error.response.get('Item')
+    return deserialize_item(item) if item else None
+
+
+def cancellation_item(error, index):
+    """
+    TransactionCanceledException 中第 index 個操作條件失敗時的既有項目
+    （該操作需帶 ReturnValuesOnConditionCheckFailure='ALL_OLD'）；項目不存在時回傳 None
+    """
+    reasons = error.response.get('CancellationReasons', [])
+    item = reasons[index].get('Item') if index < len(reasons) else None
+    return deserialize_item(item) if item else None
+
+
+class Table:
+    """以低階用戶端實作的單表操作"""
+
+    def __init__(self, name):
+        self.name = name
+
+    @property
+    def client(self):
+        return get_client()
+
+    @property
+    def exceptions(self):
+        return self.client.exceptions
+
+    def get_item(self, Key, **kwargs):
+        response = self.client.get_item(TableName=self.name, Key=serialize_item(Key), **kwargs)
+        if 'Item' in response:
+            response['Item'] = deserialize_item(response['Item'])
+        return response
+
+    def put_item(self, Item, **kwargs):
+        return self.client.put_item(TableName=self.name, Item=serialize_item(Item), **_serialize_values(kwargs))
+
+    def update_item(self, Key, **kwargs):
+        response = self.client.update_item(TableName=self.name, Key=serialize_item(Key), **_serialize_values(kwargs))
+        if 'Attributes' in response:
+            response['Attributes'] = deserialize_item(response['Attributes'])
+        return response
+
+    def delete_item(self, Key, **kwargs):
+        response = self.client.delete_item(TableName=self.name, Key=serialize_item(Key), **_serialize_values(kwargs))
+        if 'Attributes' in response:
+            response['Attributes'] = deserialize_item(response['Attributes'])
+        return response
+
+    def query(self, **kwargs):
+        response = self.client.query(TableName=self.name, **_serialize_values(kwargs))
+        response['Items'] = [deserialize_item(i) for i in response.get('Items', [])]
+        if 'LastEvaluatedKey' in response:
+            response['LastEvaluatedKey'] = deserialize_item(response['LastEvaluatedKey'])
+        return response
+
+    def batch_write(self, put_items=(), delete_keys=(), max_workers=1):
+        """以 25 筆為一批寫入/刪除，任一項目失敗時拋出 RuntimeError"""
+        from calendar_core.batch import write_batches
+
+        writes = [('put', i) for i in put_items] + [('delete', k) for k in delete_keys]
+        errors = write_batches(self.client, self.name, writes, max_workers=max_workers)
+        if errors:
+            raise RuntimeError(f'BatchWriteItem failed for {len(errors)} items')
+
+    def batch_get(self, keys, attributes=None, consistent=False):
+        """以 BatchGetItem 讀取多筆項目，回傳 {(PK, SK): item}；attributes 可限定取回的屬性"""
+        from calendar_core.batch import get_batches
+
+        return get_batches(self.client, self.name, keys, attributes, consistent)
+
+    def transact_write(self, operations, **kwargs):
+        """
+        以 TransactWriteItems 原子寫入，單次往返
+        operations 為 [{'Put'|'Update'|'Delete'|'ConditionCheck': {...}}]，
+        內容同 boto3 參數但以 Python 值表示，且不需指定 TableName；
+        任一條件不成立時拋出 TransactionCanceledException（可用 cancellation_codes 解析）
+        """
+        transact_items = []
+        for operation in operations:
+            (action, params), = operation.items()
+            params = _serialize_values(dict(params))
+            if 'Item' in params:
+                params['Item'] = serialize_item(params['Item'])
+            if 'Key' in params:
+                params['Key'] = serialize_item(params['Key'])
+            transact_items.append({action: {'TableName': self.name, **params}})
+        return self.client.transact_write_items(TransactItems=transact_items, **kwargs)
@@ -0,0 +1,76 @@
+"""
+DynamoDB 項目轉 API 回應格式
+列表端點與差異同步共用，確保同一筆資料在兩處的欄位一致
+full 為 False（列表 fields=summary）時省略索引未投影的描述欄位，而不是回傳空字串，
+客戶端據此區分「未取得」與「描述為空」
+"""
+
+from calendar_core import keys
+from calendar_core.index_projection import HYDRATED_ATTRIBUTES
+
+
+def _summary(item, full):
+    """full 為 False 時移除描述欄位"""
+    if not full:
+        for name in HYDRATED_ATTRIBUTES:
+            item.pop(name, None)
+    return item
+
+
+def format_event(user_id, it, full=True):
+    """事件項目"""
+    evt = {
+        'userId': user_id,
+        'eventId': it.get('eventId') or keys.strip_prefix(it['SK'], keys.EVENT_PREFIX),
+        'title': it['title'],
+        'description': it.get('description', ''),
+        'startDate': it['startDate'],
+        'endDate': it['endDate'],
+        'weekOfYear': it.get('weekOfYear', ''),
+        'allDay': it.get('allDay', False),
+        'color': it.get('color', '#3788d8'),
+        'createdAt': it['createdAt'],
+        'updatedAt': it['updatedAt']
+    }
+    if 'projectId' in it:
+        evt['projectId'] = it['projectId']
+        evt['projectName'] = it.get('projectName', f"專案 {it['projectId']}")
+        evt['projectDescription'] = it.get('projectDescription', '')
+        evt['ownerId'] = it.get('ownerId', user_id)
+    if 'rrule' in it:
+        evt['rrule'] = it['rrule']
+    return _summary(evt, full)
+
+
+def format_event_exception(it):
+    """週期事件例外項目（單一發生的修改或取消）"""
+    return {k: v for k, v in it.items() if k not in ('PK', 'SK', 'GSI4PK', 'entityType')}
+
+
+def format_task(it, full=True):
+    """任務列表項目（PROJECT# / USER# 關係項目）"""
+    return _summary({
+        'id': keys.strip_prefix(it['SK'], keys.TASK_PREFIX),
+        'title': it['title'],
+        'description': it.get('description', ''),
+        'status': it.get('status', 'TODO'),
+        'priority': it.get('priority', 'MEDIUM'),
+        'projectId': it.get('projectId'),
+        'assigneeId': it.get('assigneeId'),
+        'dueDate': it.get('dueDate'),
+        'createdAt': it['createdAt'],
+        'updatedAt': it['updatedAt']
+    }, full)
+
+
+def format_project(it, full=True):
+    """專案主項目"""
+    return _summary({
+        'id': keys.strip_prefix(it['PK'], keys.PROJECT_PREFIX),
+        'name': it['name'],
+        'description': it.get('description', ''),
+        'color': it.get('color', '#FF9900'),
+        'status': it.get('status', 'ACTIVE'),
+        'createdAt': it['createdAt'],
+        'updatedAt': it['updatedAt']
+    }, full)
@@ -0,0 +1,365 @@
+"""
+iCalendar（RFC 5545）串流解析與輸出
+匯入與匯出都以產生器逐行處理，不會把整份行事曆載入記憶體：
+- parse_components：由行迭代器（bytes 或 str，可直接接 S3 StreamingBody.iter_lines）逐一產出 VEVENT
+- event_fields：VEVENT 轉為事件欄位（時間轉為本專案的 ISO 字串格式）
+- calendar_lines / event_lines：事件項目轉為 .ics 內容行（含 75 位元組折行）
+
+時間格式對應：
+- 僅日期（VALUE=DATE）<-> 'YYYY-MM-DD'；iCalendar 的 DTEND 不含當天，本專案的 endDate 含當天
+- UTC（...Z）<-> 'YYYY-MM-DDTHH:MM:SSZ'；浮動時間 <-> 不帶時區的字串
+- TZID 以 zoneinfo 轉為該時間的固定時差；匯出時非 UTC 的時差以 TZID="UTC±HH:MM"（含冒號需加引號）與對應的 VTIMEZONE 表示。
+  週期事件沿用開始時間的固定時差，跨日光節約時間的發生會差一小時
+"""
+
+import re
+from datetime import date, datetime, timedelta, timezone
+
+from calendar_core.recurrence import parse_datetime
+
+MAX_LINE_BYTES = 256 * 1024
+FOLD_BYTES = 75
+PRODID = '-//Co-Caling//Calendar Export//ZH-TW'
+COLOR_PROPERTY = 'X-CO-CALING-COLOR'
+# 匯入時直接略過的 RRULE 部分（不影響展開結果）
+IGNORED_RRULE_PARTS = ('WKST',)
+
+_OFFSET_TZID = re.compile(r'^UTC([+-])(\d{2}):?(\d{2})$')
+_DURATION = re.compile(r'^([+-])?P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$')
+
+
+class ICalError(ValueError):
+    """內容不是可解析的 iCalendar"""
+
+
+def unfold(lines):
+    """合併折行（以空白或 tab 開頭的行接續上一行），逐一產出邏輯行"""
+    current = None
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8', errors='replace')
+        line = line.rstrip('\r\n')
+        if line[:1] in (' ', '\t') and current is not None:
+            current += line[1:]
+            if len(current) > MAX_LINE_BYTES:
+                raise ICalError(f'content line exceeds {MAX_LINE_BYTES} bytes')
+            continue
+        if current:
+            yield current
+        current = line
+    if current:
+        yield current
+
+
+def parse_line(line):
+    """內容行拆為 (屬性名, 參數 dict, 值)；參數值的引號內可含 ':' 與 ';'"""
+    quoted = False
+    for index, char in enumerate(line):
+        if char == '"':
+            quoted = not quoted
+        elif char == ':' and not quoted:
+            head, value = line[:index], line[index + 1:]
+            break
+    else:
+        raise ICalError(f'invalid content line: {line[:80]}')
+
+    parts = re.findall(r'(?:[^;"]|"[^"]*")+', head)
+    params = {}
+    for part in parts[1:]:
+        key, _, param_value = part.partition('=')
+        params[key.upper()] = param_value.strip('"')
+    return parts[0].upper(), params, value
+
+
+def parse_components(lines):
+    """
+    逐一產出 VEVENT：{屬性名: [(參數, 值), ...]}
+    VEVENT 內的子元件（VALARM 等）與 VTIMEZONE 等其他元件略過；第一行不是 BEGIN:VCALENDAR 時拋出 ICalError
+    """
+    stack = []
+    component = None
+    for line in unfold(lines):
+        name, params, value = parse_line(line)
+        if not stack and not (name == 'BEGIN' and value.upper() == 'VCALENDAR'):
+            raise ICalError('content does not start with BEGIN:VCALENDAR')
+        if name == 'BEGIN':
+            stack.append(value.upper())
+            if stack == ['VCALENDAR', 'VEVENT']:
+                component = {}
+        elif name == 'END':
+            if not stack or stack[-1] != value.upper():
+                raise ICalError(f'unbalanced END:{value}')
+            if stack == ['VCALENDAR', 'VEVENT']:
+                yield component
+                component = None
+            stack.pop()
+        elif component is not None and len(stack) == 2:
+            component.setdefault(name, []).append((params, value))
+    if stack:
+        raise ICalError('unexpected end of calendar')
+
+
+def unescape(value):
+    """TEXT 值反跳脫"""
+    return re.sub(r'\\([\\;,nN])', lambda m: '\n' if m.group(1) in 'nN' else m.group(1), value)
+
+
+def escape(value):
+    return value.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\r\n', '\\n').replace('\n', '\\n')
+
+
+def _tzinfo(tzid):
+    """TZID 轉為 tzinfo；UTC±HH:MM 為固定時差，無法辨識的時區回傳 None（視為浮動時間）"""
+    match = _OFFSET_TZID.match(tzid)
+    if match:
+        sign, hours, minutes = match.groups()
+        offset = timedelta(hours=int(hours), minutes=int(minutes))
+        return timezone(-offset if sign == '-' else offset)
+    try:
+        from zoneinfo import ZoneInfo
+
+        return ZoneInfo(tzid)
+    except (ValueError, KeyError, ImportError, OSError):
+        return None
+
+
+def to_iso(params, value):
+    """DATE / DATE-TIME 值轉為本專案的 ISO 字串，格式錯誤時拋出 ValueError"""
+    value = value.strip()
+    if params.get('VALUE', '').upper() == 'DATE' or len(value) == 8:
+        return datetime.strptime(value[:8], '%Y%m%d').date().isoformat()
+    if value.endswith('Z'):
+        return datetime.strptime(value, '%Y%m%dT%H%M%SZ').isoformat() + 'Z'
+    wall = datetime.strptime(value, '%Y%m%dT%H%M%S')
+    tz = _tzinfo(params['TZID']) if 'TZID' in params else None
+    if tz is None:
+        return wall.isoformat()
+    text = wall.replace(tzinfo=tz).isoformat()
+    return text[:-6] + 'Z' if text.endswith('+00:00') else text
+
+
+def parse_duration(value):
+    """DURATION（如 PT1H30M、P1D、P2W）轉為 timedelta"""
+    match = _DURATION.match(value.strip())
+    if not match:
+        raise ValueError(f'invalid DURATION: {value}')
+    sign, weeks, days, hours, minutes, seconds = match.groups()
+    delta = timedelta(weeks=int(weeks or 0), days=int(days or 0), hours=int(hours or 0),
+                      minutes=int(minutes or 0), seconds=int(seconds or 0))
+    return -delta if sign == '-' else delta
+
+
+def _first(component, name):
+    values = component.get(name)
+    return values[0] if values else None
+
+
+def _normalize_rrule(value):
+    parts = [p for p in value.split(';') if p.split('=', 1)[0].upper() not in IGNORED_RRULE_PARTS]
+    return ';'.join(parts)
+
+
+def event_fields(component):
+    """
+    VEVENT 轉為事件欄位：title、description、startDate、endDate、allDay，以及（有的話）
+    color、rrule、uid、recurrenceId、exdates（list）、cancelled；缺少或無效的 DTSTART 拋出 ValueError
+    """
+    start = _first(component, 'DTSTART')
+    if start is None:
+        raise ValueError('VEVENT without DTSTART')
+    start_date = to_iso(*start)
+    all_day = len(start_date) == 10
+
+    end = _first(component, 'DTEND')
+    duration = _first(component, 'DURATION')
+    if end is not None:
+        end_date = to_iso(*end)
+    elif duration is not None:
+        end_value = parse_datetime(start_date) + parse_duration(duration[1])
+        end_date = end_value.date().isoformat() if all_day else _format_like(start_date, end_value)
+    else:
+        end_date = start_date if not all_day else (date.fromisoformat(start_date) + timedelta(days=1)).isoformat()
+    if len(end_date) == 10:
+        # DTEND 不含當天：轉為含當天的結束日，且不早於開始日
+        inclusive = date.fromisoformat(end_date) - timedelta(days=1)
+        end_date = max(inclusive, date.fromisoformat(start_date[:10])).isoformat()
+
+    summary = _first(component, 'SUMMARY')
+    description = _first(component, 'DESCRIPTION')
+    fields = {
+        'title': unescape(summary[1]) if summary else '',
+        'description': unescape(description[1]) if description else '',
+        'startDate': start_date,
+        'endDate': end_date,
+        'allDay': all_day
+    }
+    color = _first(component, COLOR_PROPERTY)
+    if color:
+        fields['color'] = color[1]
+    uid = _first(component, 'UID')
+    if uid:
+        fields['uid'] = uid[1]
+    rrule = _first(component, 'RRULE')
+    if rrule:
+        fields['rrule'] = _normalize_rrule(rrule[1])
+    recurrence_id = _first(component, 'RECURRENCE-ID')
+    if recurrence_id:
+        fields['recurrenceId'] = to_iso(*recurrence_id)
+    exdates = [
+        to_iso(params, value)
+        for params, values in component.get('EXDATE', [])
+        for value in values.split(',') if value
+    ]
+    if exdates:
+        fields['exdates'] = exdates
+    status = _first(component, 'STATUS')
+    if status and status[1].upper() == 'CANCELLED':
+        fields['cancelled'] = True
+    return fields
+
+
+def _format_like(template, value):
+    """依 template 的時區格式輸出 datetime"""
+    text = value.isoformat()
+    if template.endswith('Z') and text.endswith('+00:00'):
+        return text[:-6] + 'Z'
+    return text
+
+
+def recurrence_id_like(master_start, value):
+    """把匯入的 RECURRENCE-ID 轉為與主項目 startDate 相同格式的 recurrenceId（例外項目的鍵）"""
+    if len(master_start) == 10:
+        return value[:10]
+    master_tz = parse_datetime(master_start).tzinfo
+    occurrence = parse_datetime(value if len(value) > 10 else f'{value}T00:00:00')
+    if occurrence.tzinfo is not None and master_tz is not None:
+        occurrence = occurrence.astimezone(master_tz)
+    elif occurrence.tzinfo is not None:
+        occurrence = occurrence.replace(tzinfo=None)
+    elif master_tz is not None:
+        occurrence = occurrence.replace(tzinfo=master_tz)
+    return _format_like(master_start, occurrence)
+
+
+# ---- 匯出 ----
+
+def fold(line):
+    """依 75 位元組折行（不切斷 UTF-8 多位元組字元）"""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= FOLD_BYTES:
+        return line + '\r\n'
+    chunks, current, size, limit = [], [], 0, FOLD_BYTES
+    for char in line:
+        width = len(char.encode('utf-8'))
+        if size + width > limit:
+            chunks.append(''.join(current))
+            current, size, limit = [], 0, FOLD_BYTES - 1
+        current.append(char)
+        size += width
+    chunks.append(''.join(current))
+    return '\r\n '.join(chunks) + '\r\n'
+
+
+def offset_tzid(offset):
+    """固定時差的 TZID，例如 UTC+08:00"""
+    total = int(offset.total_seconds()) // 60
+    sign = '-' if total < 0 else '+'
+    return f'UTC{sign}{abs(total) // 60:02d}:{abs(total) % 60:02d}'
+
+
+def timezone_lines(offset):
+    """固定時差的 VTIMEZONE 元件"""
+    tzid = offset_tzid(offset)
+    compact = tzid[3:].replace(':', '')
+    return [
+        'BEGIN:VTIMEZONE', f'TZID:{tzid}',
+        'BEGIN:STANDARD', 'DTSTART:19700101T000000',
+        f'TZOFFSETFROM:{compact}', f'TZOFFSETTO:{compact}', f'TZNAME:{tzid}',
+        'END:STANDARD', 'END:VTIMEZONE'
+    ]
+
+
+def date_property(name, value, end=False):
+    """
+    本專案的時間字串轉為 (屬性行, 非 UTC 時差或 None)
+    end=True 時僅日期的值改為隔天（iCalendar 的 DTEND 不含當天）
+    """
+    if len(value) == 10:
+        day = date.fromisoformat(value) + timedelta(days=1 if end else 0)
+        return f'{name};VALUE=DATE:{day.strftime("%Y%m%d")}', None
+    parsed = parse_datetime(value)
+    offset = parsed.utcoffset()
+    if offset is None:
+        return f'{name}:{parsed.strftime("%Y%m%dT%H%M%S")}', None
+    if not offset:
+        return f'{name}:{parsed.strftime("%Y%m%dT%H%M%S")}Z', None
+    return f'{name};TZID="{offset_tzid(offset)}":{parsed.strftime("%Y%m%dT%H%M%S")}', offset
+
+
+def _utc_stamp(value):
+    try:
+        parsed = parse_datetime(value)
+    except (TypeError, ValueError):
+        parsed = datetime.utcnow()
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.strftime('%Y%m%dT%H%M%SZ')
+
+
+def event_uid(item):
+    """匯出的 UID：匯入時保留的原始 UID，否則為 eventId"""
+    return item.get('icalUid') or f"{item['eventId']}@co-caling"
+
+
+def event_lines(item, master=None, recurrence_id=None):
+    """
+    事件（或週期事件單次發生的例外）轉為 (內容行, 使用到的非 UTC 時差)
+    例外項目需帶 master（主項目）與 recurrence_id；取消的發生輸出 STATUS:CANCELLED
+    """
+    source = master or item
+    start = item.get('startDate') or recurrence_id
+    end = item.get('endDate')
+    if end is None:
+        duration = parse_datetime(source['endDate']) - parse_datetime(source['startDate'])
+        end_value = parse_datetime(start) + duration
+        end = end_value.date().isoformat() if len(start) == 10 else _format_like(start, end_value)
+
+    lines = ['BEGIN:VEVENT', f'UID:{event_uid(source)}', f"DTSTAMP:{_utc_stamp(item.get('updatedAt'))}"]
+    offsets = set()
+    properties = [date_property('DTSTART', start), date_property('DTEND', end, end=True)]
+    if recurrence_id is not None:
+        properties.append(date_property('RECURRENCE-ID', recurrence_id))
+    for line, offset in properties:
+        lines.append(line)
+        if offset is not None:
+            offsets.add(offset)
+    lines.append(f"SUMMARY:{escape(item.get('title') or source.get('title') or '')}")
+    description = item.get('description', source.get('description') if master else None)
+    if description:
+        lines.append(f'DESCRIPTION:{escape(description)}')
+    if item.get('color'):
+        lines.append(f"{COLOR_PROPERTY}:{item['color']}")
+    if item.get('rrule') and master is None:
+        rrule = item['rrule']
+        lines.append(f"RRULE:{rrule[6:] if rrule.upper().startswith('RRULE:') else rrule}")
+    if item.get('cancelled'):
+        lines.append('STATUS:CANCELLED')
+    lines.append('END:VEVENT')
+    return lines, offsets
+
+
+def calendar_lines(components, name=None):
+    """
+    整份行事曆的內容行產生器（已折行、以 CRLF 結尾）
+    components 為 (內容行, 時差) 的迭代器；每個時差的 VTIMEZONE 在第一次用到前輸出一次
+    """
+    yield from (fold(line) for line in ['BEGIN:VCALENDAR', 'VERSION:2.0', f'PRODID:{PRODID}', 'CALSCALE:GREGORIAN'])
+    if name:
+        yield fold(f'X-WR-CALNAME:{escape(name)}')
+    emitted = set()
+    for lines, offsets in components:
+        for offset in sorted(offsets - emitted):
+            emitted.add(offset)
+            yield from (fold(line) for line in timezone_lines(offset))
+        yield from (fold(line) for line in lines)
+    yield fold('END:VCALENDAR')
@@ -0,0 +1,76 @@
+"""
+可依時間排序的唯一 ID（ULID 格式）
+- 48 位元毫秒時間戳 + 80 位元隨機數，以 Crockford Base32 編碼為 26 個字元
+- 字典序 = 建立時間順序，可直接作為排序鍵的一部分（例如 GSI1SK = PROJECT#{id}）
+- 同一毫秒內遞增隨機部分，確保同一執行環境產生的 ID 嚴格遞增
+
+舊版 ID 不改寫（已出現在網址、客戶端快取與串流消費者中），與 ULID 混在同樣的排序鍵裡：
+- 任務/專案為 {前綴}{epoch 秒}：數字開頭的 '1' 大於 ULID 開頭的 '0'，字典序排在所有 ULID 之後，
+  因此依 ID 倒序的列表（例如 GSI1 的專案列表）舊專案會排在最前面
+- 事件為 UUID4，沒有時間資訊
+在記憶體中依建立時間比較 ID 時改用 ordering_key()；排序鍵本身維持原 ID，不需回填
+"""
+
+import os
+import threading
+import time
+
+_ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+_RANDOM_BITS = 80
+_RANDOM_MAX = (1 << _RANDOM_BITS) - 1
+
+_lock = threading.Lock()
+_last_millis = -1
+_last_random = 0
+
+
+def _encode(value, length):
+    chars = []
+    for _ in range(length):
+        chars.append(_ALPHABET[value & 31])
+        value >>= 5
+    return ''.join(reversed(chars))
+
+
+def new_ulid():
+    """產生單調遞增的 ULID 字串"""
+    global _last_millis, _last_random
+    with _lock:
+        millis = int(time.time() * 1000)
+        if millis <= _last_millis:
+            # 時鐘未前進（或倒退）：沿用上一個時間戳並遞增隨機部分
+            millis = _last_millis
+            random_part = _last_random + 1
+            if random_part > _RANDOM_MAX:
+                millis += 1
+                random_part = int.from_bytes(os.urandom(10), 'big')
+        else:
+            random_part = int.from_bytes(os.urandom(10), 'big')
+        _last_millis, _last_random = millis, random_part
+    return _encode(millis, 10) + _encode(random_part, 16)
+
+
+def new_id(prefix=''):
+    """帶前綴的 ID，例如 new_id('task-') -> task-01HZX3...；同前綴的 ID 依建立時間排序"""
+    return f'{prefix}{new_ulid()}'
+
+
+def derived_ulid(millis, seed):
+    """以固定時間戳與 seed 的雜湊組成 ULID：同樣的輸入得到同一個 ID，供可重跑的批次匯入使用"""
+    import hashlib
+
+    random_part = int.from_bytes(hashlib.sha256(seed.encode('utf-8')).digest()[:10], 'big')
+    return _encode(millis, 10) + _encode(random_part, 16)
+
+
+def ordering_key(entity_id):
+    """
+    依建立時間比較 ID 用的鍵（不含前綴）：ULID 原樣回傳；舊版 {前綴}{epoch 秒} 轉為同一秒的最小 ULID；
+    舊版事件 UUID 沒有時間資訊，視為最舊（空字串）
+    """
+    suffix = entity_id.rsplit('-', 1)[-1]
+    if len(suffix) == 26:
+        return suffix
+    if suffix.isdigit():
+        return _encode(int(suffix) * 1000, 10) + '0' * 16
+    return ''
@@ -0,0 +1,56 @@
+"""
+GSI1 ~ GSI3 的精簡投影（INCLUDE）
+列表端點（事件、任務、專案）讀取的索引只投影 format_event / format_task / format_project
+需要的欄位與篩選用屬性；描述等長文字欄位只存在資料表本身，不再複製到每個索引：
+- 索引項目變小，寫入時各索引消耗的 WCU 與儲存量隨之下降
+- 列表預設（fields=summary）直接回傳索引上的欄位（省略描述欄位），只查詢一次索引
+- 查詢參數 fields=full 時以一次 BatchGetItem（只取 HYDRATED_ATTRIBUTES）補上描述，由需要描述的畫面明確要求
+
+INDEX_ATTRIBUTES 須與 DynamoDBStack 的 non_key_attributes 一致；新增列表欄位時兩處一起修改，
+並依 README「精簡 GSI 投影」重建索引。GSI4（差異同步）需要完整項目，維持 ProjectionType.ALL。
+"""
+
+# 投影到 GSI1 ~ GSI3 的非鍵屬性（資料表與各索引的鍵一律投影）
+INDEX_ATTRIBUTES = (
+    # 事件
+    'eventId', 'title', 'startDate', 'endDate', 'weekOfYear', 'allDay', 'color',
+    'projectId', 'projectName', 'ownerId', 'rrule',
+    # 任務列表項目
+    'status', 'priority', 'assigneeId', 'dueDate',
+    # 專案主項目（entityType 供 get_projects 篩選）
+    'name', 'entityType',
+    # 共用
+    'createdAt', 'updatedAt',
+)
+
+# 不在索引上、列表需要時才從資料表補上的屬性
+HYDRATED_ATTRIBUTES = ('description', 'projectDescription')
+
+FIELDS_FULL = 'full'
+FIELDS_SUMMARY = 'summary'
+
+
+def parse_fields(query_params):
+    """
+    解析 fields 查詢參數：summary（預設）或 full
+    其他值拋出 ValueError
+    """
+    fields = (query_params.get('fields') or FIELDS_SUMMARY).lower()
+    if fields not in (FIELDS_FULL, FIELDS_SUMMARY):
+        raise ValueError('fields must be full or summary')
+    return fields
+
+
+def hydrate(table, items):
+    """
+    以 BatchGetItem 從資料表補上索引未投影的屬性（就地更新並回傳 items）
+    只讀取 HYDRATED_ATTRIBUTES；項目已不存在（查詢後被刪除）時維持索引上的內容
+    """
+    if not items:
+        return items
+    found = table.batch_get([{'PK': item['PK'], 'SK': item['SK']} for item in items], HYDRATED_ATTRIBUTES)
+    for item in items:
+        full = found.get((item['PK'], item['SK']))
+        if full:
+            item.update({name: full[name] for name in HYDRATED_ATTRIBUTES if name in full})
+    return items
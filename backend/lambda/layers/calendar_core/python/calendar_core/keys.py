@@ -0,0 +1,176 @@
+"""
+單表鍵值組裝
+集中 PROJECT#/EVENT#/TASK#/MEMBER#/USER# 前綴，避免各處理器各自拼字串
+"""
+
+from typing import Dict, Optional
+
+PROJECT_PREFIX = 'PROJECT#'
+EVENT_PREFIX = 'EVENT#'
+TASK_PREFIX = 'TASK#'
+MEMBER_PREFIX = 'MEMBER#'
+USER_PREFIX = 'USER#'
+# 週期事件：例外項目排序鍵前綴，以及主項目在日期索引上的排序鍵前綴
+EVENT_EXCEPTION_PREFIX = 'EVENTEX#'
+RECURRING_PREFIX = 'RRULE#'
+# 任務沒有截止日時的排序值（排在所有日期之後）
+NO_DUE_DATE = '~'
+# 權限快取失效用的全域 generation 項目
+ACL_PREFIX = 'ACL#'
+# 儀表板計數項目排序鍵（位於 PROJECT# / USER# 分區內）
+STATS_SK = 'STATS#SUMMARY'
+# 列表 ETag 版本計數項目排序鍵（位於 PROJECT# / USER# 分區內）
+LIST_VERSION_SK = 'VERSION#LIST'
+# 串流消費者的去重項目
+STREAM_PREFIX = 'STREAM#'
+# 差異同步：刪除墓碑項目排序鍵前綴（位於 PROJECT# 分區內）
+TOMBSTONE_PREFIX = 'TOMBSTONE#'
+# .ics 匯入工作項目排序鍵前綴（位於 PROJECT# 分區內）
+IMPORT_PREFIX = 'IMPORT#'
+# 衝突檢查：依日分桶的事件區間索引分區前綴與各分桶的版本項目
+SLOTS_PREFIX = 'SLOTS#'
+SLOTS_VERSION_SK = 'VERSION'
+# 全文搜尋：反向索引分區前綴（對應專案或其分片分區）
+SEARCH_PREFIX = 'SEARCH#'
+
+Key = Dict[str, str]
+
+
+def project_pk(project_id: str) -> str:
+    return f'{PROJECT_PREFIX}{project_id}'
+
+
+def project_shard_pk(project_id: str, shard: int = 0) -> str:
+    """專案寫入分片分區：分片 0 即 PROJECT#{id}，其餘為 PROJECT#{id}#{shard}"""
+    return project_pk(project_id) if not shard else f'{project_pk(project_id)}#{shard}'
+
+
+def project_id_from_pk(pk: str) -> str:
+    """由專案（或其分片）分區鍵取出 projectId"""
+    return strip_prefix(pk, PROJECT_PREFIX).split('#', 1)[0]
+
+
+def event_sk(event_id: str) -> str:
+    return f'{EVENT_PREFIX}{event_id}'
+
+
+def task_pk(task_id: str) -> str:
+    return f'{TASK_PREFIX}{task_id}'
+
+
+def member_sk(user_id: str) -> str:
+    return f'{MEMBER_PREFIX}{user_id}'
+
+
+def user_pk(user_id: str) -> str:
+    return f'{USER_PREFIX}{user_id}'
+
+
+def strip_prefix(value: str, prefix: str) -> str:
+    """移除鍵值前綴，例如 EVENT#abc -> abc"""
+    return value[len(prefix):] if value.startswith(prefix) else value
+
+
+def project_key(project_id: str) -> Key:
+    """專案主項目：PROJECT#{id} / PROJECT#{id}"""
+    return {'PK': project_pk(project_id), 'SK': project_pk(project_id)}
+
+
+def event_key(project_id: str, event_id: str, shard: int = 0) -> Key:
+    """事件項目：PROJECT#{projectId}[#{shard}] / EVENT#{eventId}"""
+    return {'PK': project_shard_pk(project_id, shard), 'SK': event_sk(event_id)}
+
+
+def event_exception_sk(event_id: str, recurrence_id: str = '') -> str:
+    """週期事件例外：EVENTEX#{eventId}#{原始開始時間}；recurrence_id 留空時為前綴"""
+    return f'{EVENT_EXCEPTION_PREFIX}{event_id}#{recurrence_id}'
+
+
+def event_exception_key(project_id: str, event_id: str, recurrence_id: str, shard: int = 0) -> Key:
+    """週期事件例外項目（與主項目同分片）：PROJECT#{projectId}[#{shard}] / EVENTEX#{eventId}#{recurrenceId}"""
+    return {'PK': project_shard_pk(project_id, shard), 'SK': event_exception_sk(event_id, recurrence_id)}
+
+
+def member_key(project_id: str, user_id: str) -> Key:
+    """專案成員關係：PROJECT#{projectId} / MEMBER#{userId}"""
+    return {'PK': project_pk(project_id), 'SK': member_sk(user_id)}
+
+
+def task_key(task_id: str) -> Key:
+    """任務主項目：TASK#{id} / TASK#{id}"""
+    return {'PK': task_pk(task_id), 'SK': task_pk(task_id)}
+
+
+def project_task_key(project_id: str, task_id: str, shard: int = 0) -> Key:
+    """專案任務關係：PROJECT#{projectId}[#{shard}] / TASK#{taskId}"""
+    return {'PK': project_shard_pk(project_id, shard), 'SK': task_pk(task_id)}
+
+
+def task_due_sk(due_date: Optional[str], task_id: str) -> str:
+    """任務在 GSI2（負責人）/ GSI3（專案）上的排序鍵：TASK#{截止日}#{taskId}"""
+    return f'{TASK_PREFIX}{due_date or NO_DUE_DATE}#{task_id}'
+
+
+def acl_generation_key() -> Key:
+    """成員關係 generation：ACL#GENERATION / ACL#GENERATION"""
+    return {'PK': f'{ACL_PREFIX}GENERATION', 'SK': f'{ACL_PREFIX}GENERATION'}
+
+
+def user_task_key(user_id: str, task_id: str) -> Key:
+    """用戶任務關係：USER#{userId} / TASK#{taskId}"""
+    return {'PK': user_pk(user_id), 'SK': task_pk(task_id)}
+
+
+def project_stats_key(project_id: str) -> Key:
+    """專案計數：PROJECT#{projectId} / STATS#SUMMARY"""
+    return {'PK': project_pk(project_id), 'SK': STATS_SK}
+
+
+def user_stats_key(user_id: str) -> Key:
+    """用戶計數：USER#{userId} / STATS#SUMMARY"""
+    return {'PK': user_pk(user_id), 'SK': STATS_SK}
+
+
+def project_list_version_key(project_id: str) -> Key:
+    """專案列表版本計數：PROJECT#{projectId} / VERSION#LIST"""
+    return {'PK': project_pk(project_id), 'SK': LIST_VERSION_SK}
+
+
+def user_list_version_key(user_id: str) -> Key:
+    """用戶列表版本計數：USER#{userId} / VERSION#LIST"""
+    return {'PK': user_pk(user_id), 'SK': LIST_VERSION_SK}
+
+
+def stream_dedupe_key(consumer: str, event_id: str) -> Key:
+    """串流記錄已處理標記：STREAM#{eventID} / STREAM#{consumer}"""
+    return {'PK': f'{STREAM_PREFIX}{event_id}', 'SK': f'{STREAM_PREFIX}{consumer}'}
+
+
+def tombstone_key(project_id: str, entity_type: str, entity_id: str, shard: int = 0) -> Key:
+    """刪除墓碑（與被刪項目同分片）：PROJECT#{projectId}[#{shard}] / TOMBSTONE#{類型}#{id}"""
+    return {'PK': project_shard_pk(project_id, shard), 'SK': f'{TOMBSTONE_PREFIX}{entity_type}#{entity_id}'}
+
+
+def import_job_key(project_id: str, import_id: str) -> Key:
+    """.ics 匯入工作：PROJECT#{projectId} / IMPORT#{importId}"""
+    return {'PK': project_pk(project_id), 'SK': f'{IMPORT_PREFIX}{import_id}'}
+
+
+def slot_bucket_pk(owner_pk: str, bucket: str) -> str:
+    """事件區間分桶：SLOTS#{PROJECT#id | USER#id}#{UTC 日期 | LONG}"""
+    return f'{SLOTS_PREFIX}{owner_pk}#{bucket}'
+
+
+def slot_entry_key(owner_pk: str, bucket: str, event_id: str) -> Key:
+    """分桶中的事件區間：SLOTS#...#{bucket} / EVENT#{eventId}"""
+    return {'PK': slot_bucket_pk(owner_pk, bucket), 'SK': event_sk(event_id)}
+
+
+def search_pk(partition_pk: str) -> str:
+    """搜尋索引分區：SEARCH#PROJECT#{projectId}[#{shard}]"""
+    return f'{SEARCH_PREFIX}{partition_pk}'
+
+
+def search_posting_key(partition_pk: str, token: str, entity_type: str, entity_id: str) -> Key:
+    """搜尋索引項目：SEARCH#PROJECT#... / {詞元}#{EVENT|TASK}#{id}"""
+    return {'PK': search_pk(partition_pk), 'SK': f'{token}#{entity_type}#{entity_id}'}
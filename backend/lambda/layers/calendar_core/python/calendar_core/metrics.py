@@ -0,0 +1,197 @@
+"""
+請求層級的 DynamoDB 呼叫追蹤與 CloudWatch Embedded Metric Format（EMF）指標
+- install：在共用的低階用戶端掛上 botocore 事件（db.get_client 建立用戶端時呼叫），
+  因此 Table、batch_write、transact_write 以及處理器內執行緒池發出的呼叫都會被記錄
+- 每次呼叫記錄操作、索引、延遲、ConsumedCapacity（自動加上 ReturnConsumedCapacity=TOTAL）、
+  讀取/回傳筆數（ScannedCount / Count）與請求/響應位元組數
+- http_handler 在請求開始時 start、結束時 finish，輸出一行 EMF JSON 到 stdout，
+  CloudWatch Logs 會自動轉為 Namespace（METRICS_NAMESPACE，預設 CalendarApp）下的指標，
+  維度為 Service（函數名稱）+ Endpoint（方法 + 資源路徑）
+- 讀取筆數 / 回傳筆數達 SCAN_RATIO_THRESHOLD 的查詢（FilterExpression 濾掉大部分項目）標記為低效，
+  計入 InefficientQueries 並另印一行警告
+
+輸出透過 set_sink 可替換，測試可直接收集 EMF 文件，不需連線 AWS。
+每個 Lambda 執行環境一次只處理一個請求，因此以模組層級保存目前請求的記錄器。
+"""
+
+import json
+import os
+import threading
+import time
+import weakref
+
+NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'CalendarApp')
+ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() not in ('0', 'false', 'no')
+SCAN_RATIO_THRESHOLD = float(os.environ.get('METRICS_SCAN_RATIO_THRESHOLD', '5'))
+# 讀取筆數太少時比例沒有意義（例如讀 5 筆回 0 筆）
+SCAN_RATIO_MIN_SCANNED = int(os.environ.get('METRICS_SCAN_MIN_ITEMS', '50'))
+MAX_TRACED_CALLS = 50
+
+CAPACITY_OPERATIONS = {
+    'GetItem', 'PutItem', 'UpdateItem', 'DeleteItem', 'Query', 'Scan',
+    'BatchGetItem', 'BatchWriteItem', 'TransactGetItems', 'TransactWriteItems'
+}
+_CONTEXT_KEY = 'calendar_core_metrics'
+
+# (指標名稱, 單位)
+_METRICS = (
+    ('Latency', 'Milliseconds'),
+    ('DynamoCalls', 'Count'),
+    ('DynamoLatency', 'Milliseconds'),
+    ('ConsumedCapacity', 'None'),
+    ('ItemsScanned', 'Count'),
+    ('ItemsReturned', 'Count'),
+    ('DynamoRequestBytes', 'Bytes'),
+    ('DynamoResponseBytes', 'Bytes'),
+    ('ResponseBytes', 'Bytes'),
+    ('InefficientQueries', 'Count'),
+)
+
+_current = None
+# 已掛上事件的用戶端（弱參照：id() 在用戶端回收後可能被新用戶端重用）
+_installed = weakref.WeakSet()
+_sink = print
+
+
+class RequestMetrics:
+    """單一請求的 DynamoDB 呼叫記錄"""
+
+    def __init__(self, endpoint, request_id=None):
+        self.endpoint = endpoint
+        self.request_id = request_id
+        self.started = time.perf_counter()
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def record(self, call):
+        with self._lock:
+            self.calls.append(call)
+
+    def totals(self):
+        with self._lock:
+            calls = list(self.calls)
+        return {
+            'DynamoCalls': len(calls),
+            'DynamoLatency': round(sum(c['ms'] for c in calls), 3),
+            'ConsumedCapacity': round(sum(c['capacity'] for c in calls), 3),
+            'ItemsScanned': sum(c.get('scanned', 0) for c in calls),
+            'ItemsReturned': sum(c.get('returned', 0) for c in calls),
+            'DynamoRequestBytes': sum(c['requestBytes'] for c in calls),
+            'DynamoResponseBytes': sum(c['responseBytes'] for c in calls),
+            'InefficientQueries': sum(1 for c in calls if c.get('inefficient')),
+        }, calls
+
+
+def set_sink(sink):
+    """替換 EMF 輸出函式（預設 print），回傳原本的函式"""
+    global _sink
+    previous, _sink = _sink, sink
+    return previous
+
+
+def install(client):
+    """在 DynamoDB 用戶端掛上追蹤事件（同一用戶端只掛一次）"""
+    if not ENABLED or client in _installed:
+        return
+    _installed.add(client)
+    events = client.meta.events
+    events.register('provide-client-params.dynamodb', _provide_params)
+    events.register('before-call.dynamodb', _before_call)
+    events.register('after-call.dynamodb', _after_call)
+
+
+def start(event, context=None):
+    """請求開始：建立記錄器；停用時回傳 None"""
+    global _current
+    if not ENABLED:
+        return None
+    endpoint = f"{event.get('httpMethod', '')} {event.get('resource') or event.get('path') or ''}".strip()
+    _current = RequestMetrics(endpoint, getattr(context, 'aws_request_id', None))
+    return _current
+
+
+def finish(response=None):
+    """請求結束：輸出 EMF 文件並回傳；沒有進行中的請求時回傳 None"""
+    global _current
+    recorder, _current = _current, None
+    if recorder is None:
+        return None
+
+    totals, calls = recorder.totals()
+    body = (response or {}).get('body') or ''
+    values = {
+        'Latency': round((time.perf_counter() - recorder.started) * 1000, 3),
+        'ResponseBytes': len(body),
+        **totals,
+    }
+    document = {
+        '_aws': {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': NAMESPACE,
+                'Dimensions': [['Service', 'Endpoint']],
+                'Metrics': [{'Name': name, 'Unit': unit} for name, unit in _METRICS],
+            }],
+        },
+        'Service': os.environ.get('AWS_LAMBDA_FUNCTION_NAME', 'local'),
+        'Endpoint': recorder.endpoint,
+        **values,
+        'statusCode': (response or {}).get('statusCode', 500),
+        'requestId': recorder.request_id,
+        'dynamoTrace': calls[:MAX_TRACED_CALLS],
+    }
+    inefficient = [c for c in calls if c.get('inefficient')]
+    if inefficient:
+        _sink(f"Inefficient query on {recorder.endpoint}: " + '; '.join(
+            f"{c['operation']} {c.get('index') or 'table'} scanned {c['scanned']} returned {c['returned']}"
+            for c in inefficient
+        ))
+    _sink(json.dumps(document, ensure_ascii=False, separators=(',', ':')))
+    return document
+
+
+def _provide_params(params, model, context=None, **kwargs):
+    if _current is None or context is None:
+        return
+    if model.name in CAPACITY_OPERATIONS:
+        params.setdefault('ReturnConsumedCapacity', 'TOTAL')
+    call = {'operation': model.name}
+    if params.get('IndexName'):
+        call['index'] = params['IndexName']
+    if params.get('FilterExpression'):
+        call['filtered'] = True
+    context[_CONTEXT_KEY] = call
+
+
+def _before_call(model, params, context=None, **kwargs):
+    call = (context or {}).get(_CONTEXT_KEY)
+    if call is not None:
+        call['requestBytes'] = len(params.get('body') or b'')
+        call['started'] = time.perf_counter()
+
+
+def _after_call(http_response, parsed, model, context=None, **kwargs):
+    call = (context or {}).pop(_CONTEXT_KEY, None)
+    recorder = _current
+    if call is None or recorder is None or 'started' not in call:
+        return
+    call['ms'] = round((time.perf_counter() - call.pop('started')) * 1000, 3)
+    call['responseBytes'] = len(getattr(http_response, 'content', None) or b'')
+
+    consumed = parsed.get('ConsumedCapacity') or []
+    if isinstance(consumed, dict):
+        consumed = [consumed]
+    call['capacity'] = sum(float(entry.get('CapacityUnits', 0)) for entry in consumed)
+
+    if 'ScannedCount' in parsed:
+        call['scanned'] = parsed['ScannedCount']
+        call['returned'] = parsed.get('Count', 0)
+        call['inefficient'] = (
+            call['scanned'] >= SCAN_RATIO_MIN_SCANNED
+            and call['scanned'] >= SCAN_RATIO_THRESHOLD * max(call['returned'], 1)
+        )
+    elif model.name == 'GetItem':
+        call['returned'] = 1 if parsed.get('Item') else 0
+    elif model.name == 'BatchGetItem':
+        call['returned'] = sum(len(items) for items in (parsed.get('Responses') or {}).values())
+    recorder.record(call)
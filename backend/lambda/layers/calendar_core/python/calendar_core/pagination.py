@@ -0,0 +1,120 @@
+"""
+不透明分頁 cursor
+將 LastEvaluatedKey 與查詢範圍一起以 HMAC 簽章，
+避免客戶端竄改起始鍵或把 cursor 拿到其他分區/條件下重放。
+另提供列表端點共用的 limit / all / cursor 參數處理與單頁查詢。
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import os
+
+# 列表端點預設與最大每頁筆數
+DEFAULT_PAGE_LIMIT = 100
+MAX_PAGE_LIMIT = 1000
+
+
+class InvalidCursorError(ValueError):
+    """cursor 格式錯誤、簽章不符或不屬於本次查詢"""
+
+
+_secret_value = None
+
+
+def set_secret(secret):
+    """直接指定簽章金鑰（本地負載測試與單元測試用，不經環境變數）"""
+    global _secret_value
+    _secret_value = secret.encode('utf-8') if isinstance(secret, str) else secret
+
+
+def _secret():
+    """
+    cursor 簽章金鑰：每個執行環境以 CURSOR_SECRET_ARN 從 Secrets Manager 讀取一次
+    未設定時拋出 RuntimeError，不退回可猜測的預設值
+    """
+    if _secret_value is None:
+        secret_arn = os.environ.get('CURSOR_SECRET_ARN')
+        if not secret_arn:
+            raise RuntimeError('CURSOR_SECRET_ARN is not configured')
+        import boto3
+
+        response = boto3.client('secretsmanager').get_secret_value(SecretId=secret_arn)
+        set_secret(response['SecretString'])
+    return _secret_value
+
+
+def _b64encode(raw):
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def encode_cursor(last_evaluated_key, scope):
+    """將 LastEvaluatedKey 封裝為 HMAC 簽章的不透明 cursor"""
+    payload = json.dumps({'k': last_evaluated_key, 's': scope}, separators=(',', ':'), sort_keys=True).encode('utf-8')
+    signature = hmac.new(_secret(), payload, hashlib.sha256).digest()
+    return f"{_b64encode(payload)}.{_b64encode(signature)}"
+
+
+def decode_cursor(cursor, scope):
+    """驗證 cursor 簽章與查詢範圍，回傳 ExclusiveStartKey"""
+    try:
+        payload_part, signature_part = cursor.split('.', 1)
+        payload = _b64decode(payload_part)
+        signature = _b64decode(signature_part)
+    except (ValueError, TypeError):
+        raise InvalidCursorError('Malformed cursor')
+
+    expected = hmac.new(_secret(), payload, hashlib.sha256).digest()
+    if not hmac.compare_digest(signature, expected):
+        raise InvalidCursorError('Cursor signature mismatch')
+
+    data = json.loads(payload)
+    if data.get('s') != scope or not isinstance(data.get('k'), dict):
+        raise InvalidCursorError('Cursor does not belong to this query')
+    return data['k']
+
+
+def wants_all(query_params):
+    """all=true 時讀完整個查詢範圍（不分頁）"""
+    return str(query_params.get('all', '')).lower() in ('true', '1')
+
+
+def parse_limit(query_params):
+    """解析 limit 參數；格式錯誤或超出範圍時拋出 ValueError（訊息可直接回給客戶端）"""
+    try:
+        limit = int(query_params.get('limit') or DEFAULT_PAGE_LIMIT)
+    except ValueError:
+        raise ValueError('limit must be an integer')
+    if limit < 1 or limit > MAX_PAGE_LIMIT:
+        raise ValueError(f'limit must be between 1 and {MAX_PAGE_LIMIT}')
+    return limit
+
+
+def query_page(table, query_kwargs, scope, limit=None, cursor=None):
+    """
+    執行查詢並回傳 (items, next_cursor)
+    - limit 為 None：依 LastEvaluatedKey 讀完整個範圍，next_cursor 為 None
+    - 否則讀取一頁；cursor 無效時拋出 InvalidCursorError
+    帶 FilterExpression 時 Limit 計算的是讀取筆數，單頁可能少於 limit，客戶端應以 nextCursor 判斷是否結束。
+    """
+    if limit is None:
+        response = table.query(**query_kwargs)
+        items = response.get('Items', [])
+        while 'LastEvaluatedKey' in response:
+            response = table.query(ExclusiveStartKey=response['LastEvaluatedKey'], **query_kwargs)
+            items.extend(response.get('Items', []))
+        return items, None
+
+    page_kwargs = dict(query_kwargs, Limit=limit)
+    if cursor:
+        page_kwargs['ExclusiveStartKey'] = decode_cursor(cursor, scope)
+    response = table.query(**page_kwargs)
+    next_cursor = None
+    if 'LastEvaluatedKey' in response:
+        next_cursor = encode_cursor(response['LastEvaluatedKey'], scope)
+    return response.get('Items', []), next_cursor
@@ -0,0 +1,119 @@
+"""
+專案成員角色快取
+以 (projectId, userId) 為鍵、每個執行環境一份的 TTL + LRU 快取，讓權限檢查不必每次讀取 MEMBER# 項目。
+
+失效機制：
+- 成員關係經由資料表串流觸發 membership_events Lambda，遞增 ACL#GENERATION 項目的 generation
+- 各執行環境最多每 GENERATION_CHECK_SECONDS 秒讀一次 generation，有變動即清空快取
+- TTL 為最後防線；同一執行環境內寫入成員關係時可直接呼叫 invalidate()
+"""
+
+import os
+import time
+from collections import OrderedDict
+
+from calendar_core import keys
+from calendar_core import pagination
+
+CACHE_TTL_SECONDS = int(os.environ.get('PERMISSION_CACHE_TTL', '60'))
+CACHE_MAX_ENTRIES = int(os.environ.get('PERMISSION_CACHE_SIZE', '2048'))
+GENERATION_CHECK_SECONDS = int(os.environ.get('PERMISSION_GENERATION_CHECK', '5'))
+
+# (project_id, user_id) -> (role 或 None, 到期時間)
+_roles = OrderedDict()
+_generation = None
+_generation_checked_at = 0.0
+
+
+def _now():
+    return time.monotonic()
+
+
+def _sync_generation(table):
+    """定期比對全域 generation，成員關係有異動時清空快取"""
+    global _generation, _generation_checked_at
+    now = _now()
+    if now - _generation_checked_at < GENERATION_CHECK_SECONDS:
+        return
+    item = table.get_item(
+        Key=keys.acl_generation_key(),
+        ProjectionExpression='generation'
+    ).get('Item') or {}
+    generation = item.get('generation', 0)
+    if generation != _generation:
+        _roles.clear()
+        _generation = generation
+    _generation_checked_at = now
+
+
+def get_member_role(project_id, user_id, table=None):
+    """取得用戶在專案中的角色；非成員回傳 None（亦會快取）"""
+    if table is None:
+        from calendar_core.db import get_table
+
+        table = get_table()
+    _sync_generation(table)
+
+    cache_key = (project_id, user_id)
+    cached = _roles.get(cache_key)
+    if cached is not None and cached[1] > _now():
+        _roles.move_to_end(cache_key)
+        return cached[0]
+
+    item = table.get_item(
+        Key=keys.member_key(project_id, user_id),
+        ProjectionExpression='#role',
+        ExpressionAttributeNames={'#role': 'role'}
+    ).get('Item')
+    role = item.get('role') if item else None
+
+    _roles[cache_key] = (role, _now() + CACHE_TTL_SECONDS)
+    _roles.move_to_end(cache_key)
+    while len(_roles) > CACHE_MAX_ENTRIES:
+        _roles.popitem(last=False)
+    return role
+
+
+def has_project_role(project_id, user_id, allowed_roles, table=None):
+    """用戶在專案中的角色是否屬於 allowed_roles"""
+    return get_member_role(project_id, user_id, table) in allowed_roles
+
+
+def invalidate(project_id=None, user_id=None):
+    """清除快取；未指定參數時全部清除，只指定 project_id 時清除該專案所有用戶"""
+    if project_id is None and user_id is None:
+        _roles.clear()
+        return
+    for cache_key in [k for k in _roles if k[0] == project_id and (user_id is None or k[1] == user_id)]:
+        del _roles[cache_key]
+
+
+def member_project_ids(table, user_id):
+    """用戶所屬專案的 ID（GSI1：USER# 分區下的成員關係項目）"""
+    query_kwargs = {
+        'IndexName': 'GSI1',
+        'KeyConditionExpression': 'GSI1PK = :pk AND begins_with(GSI1SK, :prefix)',
+        'FilterExpression': 'begins_with(SK, :member)',
+        'ProjectionExpression': 'GSI1SK',
+        'ExpressionAttributeValues': {
+            ':pk': keys.user_pk(user_id),
+            ':prefix': keys.PROJECT_PREFIX,
+            ':member': keys.MEMBER_PREFIX
+        }
+    }
+    response = table.query(**query_kwargs)
+    items = response.get('Items', [])
+    while 'LastEvaluatedKey' in response:
+        response = table.query(ExclusiveStartKey=response['LastEvaluatedKey'], **query_kwargs)
+        items.extend(response.get('Items', []))
+    return sorted({keys.strip_prefix(item['GSI1SK'], keys.PROJECT_PREFIX) for item in items})
+
+
+def project_member_ids(table, project_id):
+    """專案成員的 userId（PROJECT# 分區下的 MEMBER# 項目）"""
+    items = pagination.query_page(table, {
+        'KeyConditionExpression': 'PK = :pk AND begins_with(SK, :prefix)',
+        'ProjectionExpression': 'SK',
+        'ExpressionAttributeValues': {':pk': keys.project_pk(project_id), ':prefix': keys.MEMBER_PREFIX}
+    }, None)[0]
+    return [keys.strip_prefix(item['SK'], keys.MEMBER_PREFIX) for item in items]
@@ -0,0 +1,54 @@
+"""
+任務列表投影
+任務主項目（TASK#{id} / TASK#{id}）是唯一的寫入來源；列表讀取的是關係項目上的反正規化副本：
+- PROJECT#{projectId} / TASK#{taskId}：帶 GSI3（專案 + 截止日）與 GSI4（差異同步）；
+  專案啟用寫入分片後依 taskId 落在 PROJECT#{projectId}#{shard}（見 calendar_core.sharding）
+- USER#{assigneeId} / TASK#{taskId}：帶 GSI2（負責人 + 截止日）
+create_task 以同一筆交易寫入三個項目；之後的修改由 task_projector 依資料表串流同步到關係項目。
+"""
+
+from calendar_core import keys
+from calendar_core import sharding
+from calendar_core import sync
+
+# 列表端點回傳的任務欄位（同時複製到關係項目上）
+LIST_FIELDS = (
+    'title', 'description', 'status', 'priority', 'projectId',
+    'assigneeId', 'dueDate', 'createdAt', 'updatedAt'
+)
+
+
+def list_fields(task):
+    """取出任務主項目上需反正規化的欄位"""
+    return {field: task.get(field) for field in LIST_FIELDS}
+
+
+def project_task_item(task_id, task, assigned_at):
+    """專案端的任務列表項目"""
+    project_id = task['projectId']
+    shard = sharding.shard_for(project_id, task_id)
+    return {
+        **keys.project_task_key(project_id, task_id, shard),
+        'GSI1PK': keys.task_pk(task_id),
+        'GSI1SK': keys.project_pk(project_id),
+        'GSI3PK': keys.project_shard_pk(project_id, shard),
+        'GSI3SK': keys.task_due_sk(task.get('dueDate'), task_id),
+        **sync.index_keys(project_id, shard),
+        'assignedAt': assigned_at,
+        **list_fields(task)
+    }
+
+
+def user_task_item(task_id, task, assigned_at):
+    """負責人端的任務列表項目（任務須有 assigneeId）"""
+    assignee_id = task['assigneeId']
+    return {
+        **keys.user_task_key(assignee_id, task_id),
+        'GSI1PK': keys.task_pk(task_id),
+        'GSI1SK': keys.user_pk(assignee_id),
+        'GSI2PK': keys.user_pk(assignee_id),
+        'GSI2SK': keys.task_due_sk(task.get('dueDate'), task_id),
+        'assignedAt': assigned_at,
+        **list_fields(task)
+    }
+
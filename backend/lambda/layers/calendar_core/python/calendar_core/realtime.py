@@ -0,0 +1,87 @@
+"""
+WebSocket 即時推播
+- 連線表（CONNECTIONS_TABLE）：connectionId 為主鍵，UserIndex（userId）供推播時查詢用戶的所有連線；
+  項目以 expiresAt TTL 過期（API Gateway WebSocket 連線最長 2 小時）
+- diff：資料表串流的單筆變更轉為精簡訊息
+  {op: 'upsert' | 'patch' | 'delete', type: 'project' | 'event' | 'eventException' | 'task', projectId, id, data?}
+  新增送完整列表格式，修改只送變動欄位，刪除只送 id
+"""
+
+import os
+
+from calendar_core import keys
+from calendar_core.db import Table
+from calendar_core.formatting import format_event, format_event_exception, format_task, format_project
+
+CONNECTION_TTL_SECONDS = 3 * 60 * 60
+USER_INDEX = 'UserIndex'
+
+_connections_table = None
+
+
+def connections_table():
+    """取得連線表的 Table 物件"""
+    global _connections_table
+    if _connections_table is None:
+        _connections_table = Table(os.environ['CONNECTIONS_TABLE'])
+    return _connections_table
+
+
+def user_connection_ids(user_id):
+    """用戶目前的所有連線 ID"""
+    table = connections_table()
+    query_kwargs = {
+        'IndexName': USER_INDEX,
+        'KeyConditionExpression': 'userId = :userId',
+        'ProjectionExpression': 'connectionId',
+        'ExpressionAttributeValues': {':userId': user_id}
+    }
+    response = table.query(**query_kwargs)
+    items = response.get('Items', [])
+    while 'LastEvaluatedKey' in response:
+        response = table.query(ExclusiveStartKey=response['LastEvaluatedKey'], **query_kwargs)
+        items.extend(response.get('Items', []))
+    return [item['connectionId'] for item in items]
+
+
+def _format(item):
+    """依排序鍵判斷類型並轉為 API 格式，回傳 (類型, id, 資料)；不推播的項目回傳 None"""
+    sk = item['SK']
+    if sk == item['PK']:
+        return 'project', keys.strip_prefix(sk, keys.PROJECT_PREFIX), format_project(item)
+    if sk.startswith(keys.EVENT_EXCEPTION_PREFIX):
+        data = format_event_exception(item)
+        return 'eventException', f"{data['eventId']}#{data['recurrenceId']}", data
+    if sk.startswith(keys.EVENT_PREFIX):
+        data = format_event(item.get('GSI1PK', '').replace(keys.USER_PREFIX, '', 1), item)
+        return 'event', data['eventId'], data
+    if sk.startswith(keys.TASK_PREFIX):
+        data = format_task(item)
+        return 'task', data['id'], data
+    return None
+
+
+def diff(old_item, new_item):
+    """由串流新舊影像產生推播訊息；沒有使用者可見的變動時回傳 None"""
+    current = new_item or old_item
+    # 只推播專案分區內的項目（衝突檢查的 SLOTS# 分桶項目排序鍵也是 EVENT#）
+    if not current['PK'].startswith(keys.PROJECT_PREFIX):
+        return None
+    project_id = keys.project_id_from_pk(current['PK'])
+    old = _format(old_item) if old_item else None
+    new = _format(new_item) if new_item else None
+    if (new or old) is None:
+        return None
+    entity_type, entity_id, _ = new or old
+    message = {'type': entity_type, 'projectId': project_id, 'id': entity_id}
+
+    # 刪除中的專案對客戶端等同已刪除
+    if new is None or (entity_type == 'project' and new[2].get('status') == 'DELETING'):
+        return {**message, 'op': 'delete'}
+    if old is None:
+        return {**message, 'op': 'upsert', 'data': new[2]}
+    changed = {k: v for k, v in new[2].items() if old[2].get(k) != v}
+    changed.update({k: None for k in old[2] if k not in new[2]})
+    if not changed:
+        return None
+    return {**message, 'op': 'patch', 'data': changed}
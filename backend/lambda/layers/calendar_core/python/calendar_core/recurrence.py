@@ -0,0 +1,222 @@
+"""
+週期事件（RRULE 子集）展開引擎
+支援 RFC 5545 的 FREQ=DAILY|WEEKLY|MONTHLY|YEARLY、INTERVAL、COUNT、UNTIL，以及 WEEKLY 的 BYDAY。
+
+展開以產生器實作，只產出查詢視窗內的發生時間：
+- DAILY / WEEKLY 直接以算術跳到視窗起點，不會從序列開頭逐一走訪
+- MONTHLY / YEARLY 每年最多 12 次整數迭代，不建立任何序列
+因此十年的每日序列也不會配置完整序列。
+
+時間運算一律在事件本身的牆上時間（dtstart 的時區）進行，輸出時沿用 dtstart 的字串格式。
+"""
+
+from datetime import datetime, date, timedelta
+
+FREQUENCIES = ('DAILY', 'WEEKLY', 'MONTHLY', 'YEARLY')
+WEEKDAYS = {'MO': 0, 'TU': 1, 'WE': 2, 'TH': 3, 'FR': 4, 'SA': 5, 'SU': 6}
+MAX_COUNT = 10000
+
+
+class RecurrenceRule:
+    """解析後的 RRULE"""
+
+    __slots__ = ('freq', 'interval', 'count', 'until', 'byday', 'text')
+
+    def __init__(self, freq, interval=1, count=None, until=None, byday=None, text=''):
+        self.freq = freq
+        self.interval = interval
+        self.count = count
+        self.until = until
+        self.byday = byday
+        self.text = text
+
+
+def parse_rrule(text):
+    """解析 RRULE 字串（可帶或不帶 'RRULE:' 前綴），格式錯誤時拋出 ValueError"""
+    if not isinstance(text, str) or not text.strip():
+        raise ValueError('Empty rrule')
+    body = text.strip()
+    if body.upper().startswith('RRULE:'):
+        body = body[6:]
+
+    parts = {}
+    for part in body.split(';'):
+        name, sep, value = part.partition('=')
+        if not sep or not value:
+            raise ValueError(f'Invalid rrule part: {part}')
+        parts[name.strip().upper()] = value.strip().upper()
+
+    freq = parts.pop('FREQ', None)
+    if freq not in FREQUENCIES:
+        raise ValueError('FREQ must be one of DAILY, WEEKLY, MONTHLY, YEARLY')
+
+    interval = int(parts.pop('INTERVAL', '1'))
+    if interval < 1:
+        raise ValueError('INTERVAL must be positive')
+
+    count = parts.pop('COUNT', None)
+    if count is not None:
+        count = int(count)
+        if count < 1 or count > MAX_COUNT:
+            raise ValueError(f'COUNT must be between 1 and {MAX_COUNT}')
+
+    until = parts.pop('UNTIL', None)
+    if until is not None:
+        until = _parse_until(until)
+    if count is not None and until is not None:
+        raise ValueError('COUNT and UNTIL are mutually exclusive')
+
+    byday = parts.pop('BYDAY', None)
+    if byday is not None:
+        if freq != 'WEEKLY':
+            raise ValueError('BYDAY is only supported with FREQ=WEEKLY')
+        try:
+            byday = sorted({WEEKDAYS[d] for d in byday.split(',')})
+        except KeyError:
+            raise ValueError('BYDAY must list MO,TU,WE,TH,FR,SA,SU')
+
+    if parts:
+        raise ValueError(f"Unsupported rrule parts: {', '.join(sorted(parts))}")
+    return RecurrenceRule(freq, interval, count, until, byday, text.strip())
+
+
+def _parse_until(value):
+    """UNTIL 為 YYYYMMDD 或 YYYYMMDDTHHMMSS[Z]"""
+    if len(value) == 8:
+        return datetime.strptime(value, '%Y%m%d').replace(hour=23, minute=59, second=59)
+    if value.endswith('Z'):
+        from datetime import timezone
+
+        return datetime.strptime(value, '%Y%m%dT%H%M%SZ').replace(tzinfo=timezone.utc)
+    return datetime.strptime(value, '%Y%m%dT%H%M%S')
+
+
+def parse_datetime(text):
+    """ISO 字串轉 datetime；僅日期時為當天 00:00"""
+    if len(text) == 10:
+        return datetime.combine(date.fromisoformat(text), datetime.min.time())
+    return datetime.fromisoformat(text.replace('Z', '+00:00'))
+
+
+def _to_wall(dt, tz):
+    """轉為 dtstart 時區下不帶時區的牆上時間"""
+    if dt.tzinfo is None:
+        return dt
+    if tz is not None:
+        dt = dt.astimezone(tz)
+    return dt.replace(tzinfo=None)
+
+
+def format_like(template, wall_dt, tz):
+    """依 template（原始 startDate）的格式輸出牆上時間"""
+    if len(template) == 10:
+        return wall_dt.date().isoformat()
+    text = wall_dt.replace(tzinfo=tz).isoformat() if tz is not None else wall_dt.isoformat()
+    if template.endswith('Z') and text.endswith('+00:00'):
+        text = text[:-6] + 'Z'
+    return text
+
+
+def _add_months(dt, months):
+    """加上月數；目標月份沒有該日時回傳 None（RFC 5545：略過無效日期）"""
+    total = dt.month - 1 + months
+    year, month = dt.year + total // 12, total % 12 + 1
+    try:
+        return dt.replace(year=year, month=month)
+    except ValueError:
+        return None
+
+
+def _iter_candidates(rule, start, window_start):
+    """
+    依序產生 (序號, 發生時間)；序號為該次在整個序列中的索引（供 COUNT 判斷）
+    DAILY/WEEKLY 從最接近 window_start 的週期開始
+    """
+    if rule.freq == 'DAILY' or (rule.freq == 'WEEKLY' and not rule.byday):
+        step = timedelta(days=rule.interval * (7 if rule.freq == 'WEEKLY' else 1))
+        n = 0
+        if window_start > start:
+            n = -(-(window_start - start) // step)  # 無條件進位
+        while True:
+            yield n, start + step * n
+            n += 1
+
+    elif rule.freq == 'WEEKLY':
+        days = rule.byday
+        time_of_day = start.time()
+        week0 = start.date() - timedelta(days=start.weekday())
+        first_week_count = sum(1 for d in days if d >= start.weekday())
+        period_days = 7 * rule.interval
+        period = 0
+        if window_start > start:
+            window_monday = window_start.date() - timedelta(days=window_start.weekday())
+            period = max(0, (window_monday - week0).days // period_days)
+        while True:
+            monday = week0 + timedelta(days=period_days * period)
+            index = 0 if period == 0 else first_week_count + (period - 1) * len(days)
+            for d in days:
+                occurrence = datetime.combine(monday + timedelta(days=d), time_of_day)
+                if occurrence < start:
+                    continue
+                yield index, occurrence
+                index += 1
+            period += 1
+
+    else:
+        months = rule.interval * (12 if rule.freq == 'YEARLY' else 1)
+        index = 0
+        step = 0
+        while True:
+            occurrence = _add_months(start, months * step)
+            step += 1
+            if occurrence is None:
+                continue
+            yield index, occurrence
+            index += 1
+
+
+def occurrences(rule, dtstart, window_start=None, window_end=None):
+    """
+    產生 [window_start, window_end) 內的發生時間（牆上時間 datetime）
+    dtstart / window_* 可為 datetime 或 ISO 字串；window_end 為 None 時不設上限（呼叫端需自行截斷）
+    """
+    start_dt = parse_datetime(dtstart) if isinstance(dtstart, str) else dtstart
+    tz = start_dt.tzinfo
+    start = start_dt.replace(tzinfo=None)
+
+    lower = start
+    if window_start is not None:
+        ws = parse_datetime(window_start) if isinstance(window_start, str) else window_start
+        lower = max(start, _to_wall(ws, tz))
+    upper = None
+    if window_end is not None:
+        upper = parse_datetime(window_end) if isinstance(window_end, str) else window_end
+        # 僅日期的結束值包含當天整天
+        if isinstance(window_end, str) and len(window_end) == 10:
+            upper += timedelta(days=1)
+        upper = _to_wall(upper, tz)
+    until = _to_wall(rule.until, tz) if rule.until is not None else None
+
+    for index, occurrence in _iter_candidates(rule, start, lower):
+        if rule.count is not None and index >= rule.count:
+            return
+        if until is not None and occurrence > until:
+            return
+        if upper is not None and occurrence >= upper:
+            return
+        if occurrence >= lower:
+            yield occurrence
+
+
+def series_end(rule, dtstart):
+    """序列最後一次發生時間（字串，格式同 dtstart）；無上限時回傳 None"""
+    start_dt = parse_datetime(dtstart)
+    tz = start_dt.tzinfo
+    if rule.until is not None:
+        return format_like(dtstart, _to_wall(rule.until, tz), tz)
+    if rule.count is None:
+        return None
+    last = None
+    for last in occurrences(rule, dtstart):
+        pass
+    return format_like(dtstart, last, tz) if last is not None else dtstart
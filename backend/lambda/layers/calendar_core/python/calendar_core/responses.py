@@ -0,0 +1,153 @@
+"""
+HTTP 響應與請求輔助
+- JSON 序列化：有 orjson 時使用 orjson（需打包進 layer），否則退回標準庫；Decimal/set 皆可序列化
+- 壓縮由 API Gateway 處理（RestApi min_compression_size），處理器一律回傳未壓縮的 JSON 文字
+- 列表端點支援條件式 GET：ETag 由查詢前讀取的版本戳算出（calendar_core.versions），
+  If-None-Match 相符時在列表查詢之前回 304
+- http_handler 每個請求輸出一行 EMF 指標（DynamoDB 呼叫次數、延遲、容量、讀取/回傳筆數）
+"""
+
+import functools
+import hashlib
+import json
+from datetime import datetime, timezone
+from email.utils import format_datetime
+
+from calendar_core import metrics
+
+try:
+    import orjson
+except ImportError:  # 未打包 orjson 時使用標準庫
+    orjson = None
+
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Content-Type,Authorization,X-Amz-Date,X-Api-Key,X-Amz-Security-Token,If-None-Match',
+    'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS',
+    'Access-Control-Expose-Headers': 'ETag,Last-Modified'
+}
+
+
+def build_response(status_code, body):
+    """構建 HTTP 響應"""
+    return {
+        'statusCode': status_code,
+        'headers': {
+            'Content-Type': 'application/json',
+            **CORS_HEADERS
+        },
+        'body': dumps(body) if body is not None else ''
+    }
+
+
+def _json_default(value):
+    """標準 JSON 不支援的型別：Decimal 轉為 int/float，set 轉為 list"""
+    from decimal import Decimal
+
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def dumps(body):
+    """序列化為緊湊 JSON 字串（不跳脫中文）"""
+    if orjson is not None:
+        return orjson.dumps(body, default=_json_default).decode('utf-8')
+    return json.dumps(body, ensure_ascii=False, separators=(',', ':'), default=_json_default)
+
+
+def http_handler(handler):
+    """
+    API Lambda 處理器包裝
+    - 記錄請求內的 DynamoDB 呼叫，結束時輸出一行 EMF 指標（calendar_core.metrics）
+    """
+    @functools.wraps(handler)
+    def wrapper(event, context):
+        metrics.start(event, context)
+        response = None
+        try:
+            response = handler(event, context)
+            return response
+        finally:
+            metrics.finish(response)
+    return wrapper
+
+
+def get_user_id(event):
+    """僅從 API Gateway Cognito Authorizer 取得用戶ID；若缺失則返回 None"""
+    request_context = event.get('requestContext') or {}
+    authorizer = request_context.get('authorizer') or {}
+    claims = authorizer.get('claims') or {}
+    return claims.get('sub')
+
+
+def get_header(event, name):
+    """不分大小寫讀取請求標頭；不存在時回傳 None"""
+    name = name.lower()
+    for key, value in (event.get('headers') or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def list_validators(event, version):
+    """
+    列表端點的 (ETag, Last-Modified)
+    ETag 由版本戳（calendar_core.versions，[(版本號, 最後遞增時間)]）加上請求者與查詢條件算出，
+    不需先執行列表查詢
+    """
+    fingerprint = json.dumps([
+        get_user_id(event),
+        event.get('path'),
+        event.get('pathParameters'),
+        event.get('queryStringParameters'),
+        version
+    ], sort_keys=True, default=str)
+    etag = f'W/"{hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()[:32]}"'
+    latest = max((updated_at for _, updated_at in version), default='')
+    return etag, http_date(latest)
+
+
+def list_headers(event, version):
+    """列表響應共用的快取標頭"""
+    etag, last_modified = list_validators(event, version)
+    headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+    if last_modified:
+        headers['Last-Modified'] = last_modified
+    return headers
+
+
+def not_modified_response(event, version):
+    """If-None-Match 符合目前版本戳時的 304 響應（於列表查詢之前呼叫）；不符合時回傳 None"""
+    headers = list_headers(event, version)
+    if not etag_matches(get_header(event, 'If-None-Match'), headers['ETag']):
+        return None
+    return {'statusCode': 304, 'headers': {**CORS_HEADERS, **headers}, 'body': ''}
+
+
+def build_list_response(event, body, version):
+    """列表端點的 200 響應，帶與 not_modified_response 相同版本戳算出的 ETag / Last-Modified"""
+    response = build_response(200, body)
+    response['headers'].update(list_headers(event, version))
+    return response
+
+
+def etag_matches(if_none_match, etag):
+    """If-None-Match 是否含有此 ETag（弱比較，支援逗號分隔與 *）"""
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(',')]
+    return '*' in candidates or any(value.removeprefix('W/') == etag.removeprefix('W/') for value in candidates)
+
+
+def http_date(timestamp):
+    """ISO 時間字串轉為 HTTP 日期；無時區者視為 UTC，格式錯誤時回傳 None"""
+    try:
+        parsed = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return format_datetime(parsed.astimezone(timezone.utc), usegmt=True)
@@ -0,0 +1,168 @@
+"""
+全文搜尋：事件與任務標題/描述的反向索引
+每個 (詞元, 項目) 一筆索引項目，位於被索引項目所屬專案（分片）對應的搜尋分區：
+- SEARCH#PROJECT#{projectId}[#{shard}] / {詞元}#{EVENT|TASK}#{id}，weight 為詞元在標題（×TITLE_WEIGHT）與描述中的出現次數
+索引由 search_indexer 串流消費者依項目的新舊影像增量維護；查詢時以 begins_with(SK, '{詞元}#') 精確比對、
+begins_with(SK, 詞元) 前綴比對，只查詢用戶所屬專案的分區（權限即成員關係）。
+
+斷詞：NFKC 正規化（全形英數轉半形）並轉小寫後
+- 中日韓文字的連續段落切成相鄰兩字（bigram），段落最後一字另存為單字詞元，
+  使每個字都是某個詞元的開頭，單字查詢以前綴比對即可找到
+- 其他文字以非文字字元分隔為單字，至少 MIN_WORD_CHARS 字，超過 MAX_TOKEN_CHARS 截斷
+"""
+
+import math
+import re
+import unicodedata
+from collections import Counter
+
+from calendar_core import ids
+from calendar_core import keys
+from calendar_core import sharding
+
+TITLE_WEIGHT = 3
+MIN_WORD_CHARS = 2
+MAX_TOKEN_CHARS = 32
+MAX_TOKENS_PER_ITEM = 256
+MAX_QUERY_CHARS = 100
+MAX_QUERY_TERMS = 8
+
+# 索引的項目類型 -> API 回應中的類型
+ENTITY_TYPES = {'EVENT': 'event', 'TASK': 'task'}
+
+# 平假名/片假名、CJK 擴充 A、CJK 統一表意文字、相容表意文字、韓文音節
+_CJK = r'\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af'
+_RUN = re.compile(rf'(?P<cjk>[{_CJK}]+)|(?P<word>(?:(?![{_CJK}])[^\W_])+)')
+
+
+def normalize(text):
+    return unicodedata.normalize('NFKC', text or '').lower()
+
+
+def _runs(text):
+    """(是否為中日韓文字段落, 段落) 的產生器"""
+    for match in _RUN.finditer(normalize(text)):
+        yield match.lastgroup == 'cjk', match.group()
+
+
+def tokenize(text):
+    """索引用詞元（保留重複，供計算出現次數）"""
+    tokens = []
+    for cjk, run in _runs(text):
+        if cjk:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+            tokens.append(run[-1])
+        elif len(run) >= MIN_WORD_CHARS:
+            tokens.append(run[:MAX_TOKEN_CHARS])
+    return tokens
+
+
+def query_terms(text):
+    """
+    查詢字串轉為 [(詞元, 是否前綴比對)]（去重，最多 MAX_QUERY_TERMS 個）
+    中日韓文字兩字以上切成 bigram 精確比對，單字以前綴比對；
+    其他單字精確比對，最後一個以前綴比對（邊打邊搜）；過長的查詢拋出 ValueError
+    """
+    if len(text or '') > MAX_QUERY_CHARS:
+        raise ValueError(f'q must be at most {MAX_QUERY_CHARS} characters')
+    terms = []
+    runs = list(_runs(text))
+    for index, (cjk, run) in enumerate(runs):
+        if cjk and len(run) == 1:
+            terms.append((run, True))
+        elif cjk:
+            terms.extend((run[i:i + 2], False) for i in range(len(run) - 1))
+        elif len(run) >= MIN_WORD_CHARS:
+            terms.append((run[:MAX_TOKEN_CHARS], index == len(runs) - 1 and len(run) < MAX_TOKEN_CHARS))
+    return list(dict.fromkeys(terms))[:MAX_QUERY_TERMS]
+
+
+def token_weights(item):
+    """項目的 {詞元: 權重}；詞元過多時保留權重最高的 MAX_TOKENS_PER_ITEM 個"""
+    weights = Counter()
+    for token in tokenize(item.get('title')):
+        weights[token] += TITLE_WEIGHT
+    for token in tokenize(item.get('description')):
+        weights[token] += 1
+    if len(weights) <= MAX_TOKENS_PER_ITEM:
+        return dict(weights)
+    return dict(sorted(weights.items(), key=lambda tw: (-tw[1], tw[0]))[:MAX_TOKENS_PER_ITEM])
+
+
+def indexed_entity(item, table=None):
+    """(項目類型, ID, 專案或分片分區鍵)；不需索引的項目回傳 None"""
+    if not item:
+        return None
+    entity_type = item.get('entityType')
+    if entity_type == 'EVENT' and item['PK'].startswith(keys.PROJECT_PREFIX) and item['SK'].startswith(keys.EVENT_PREFIX):
+        return 'EVENT', keys.strip_prefix(item['SK'], keys.EVENT_PREFIX), item['PK']
+    if entity_type == 'TASK' and item['PK'] == item['SK'] and item.get('projectId'):
+        task_id = keys.strip_prefix(item['PK'], keys.TASK_PREFIX)
+        shard = sharding.shard_for(item['projectId'], task_id, table)
+        return 'TASK', task_id, keys.project_shard_pk(item['projectId'], shard)
+    return None
+
+
+def posting_items(item, table=None):
+    """項目的搜尋索引項目"""
+    entity = indexed_entity(item, table)
+    if entity is None:
+        return []
+    entity_type, entity_id, partition_pk = entity
+    return [
+        {
+            **keys.search_posting_key(partition_pk, token, entity_type, entity_id),
+            'entityType': 'SEARCH_POSTING',
+            'weight': weight
+        }
+        for token, weight in token_weights(item).items()
+    ]
+
+
+def posting_changes(old_item, new_item, table=None):
+    """
+    依項目的新舊影像計算索引異動，回傳 (寫入的索引項目, 刪除的鍵)
+    標題與描述未變時兩者皆為空
+    """
+    old_weights = {(p['PK'], p['SK']): p['weight'] for p in posting_items(old_item, table)}
+    new_postings = posting_items(new_item, table)
+    new_keys = {(p['PK'], p['SK']) for p in new_postings}
+    puts = [p for p in new_postings if old_weights.get((p['PK'], p['SK'])) != p['weight']]
+    deletes = [{'PK': pk, 'SK': sk} for pk, sk in old_weights if (pk, sk) not in new_keys]
+    return puts, deletes
+
+
+def project_partitions(project_id, table=None):
+    """專案所有分片的搜尋分區鍵"""
+    return [keys.search_pk(pk) for pk in sharding.partitions(project_id, table)]
+
+
+def parse_posting(posting_pk, posting_sk):
+    """索引項目 -> (詞元, 項目類型, ID, 原項目的鍵)"""
+    token, entity_type, entity_id = posting_sk.rsplit('#', 2)
+    if entity_type == 'TASK':
+        source_key = keys.task_key(entity_id)
+    else:
+        source_key = {'PK': keys.strip_prefix(posting_pk, keys.SEARCH_PREFIX), 'SK': keys.event_sk(entity_id)}
+    return token, entity_type, entity_id, source_key
+
+
+def rank(term_matches):
+    """
+    term_matches 為每個查詢詞元的 {文件: 權重}（文件為可雜湊的 (項目類型, ID, ...)），
+    回傳符合所有詞元的 [(分數, 文件)]，依分數由高到低、同分時 ID 由新到舊
+    分數為 Σ 權重 × log(1 + 候選文件數 / 含該詞元的文件數)，少見的詞元比重較高
+    """
+    if not term_matches or not all(term_matches):
+        return []
+    candidates = len(set().union(*term_matches))
+    idf = [math.log(1 + candidates / len(matches)) for matches in term_matches]
+    documents = set.intersection(*(set(matches) for matches in term_matches))
+    scored = [
+        (sum(matches[doc] * weight for matches, weight in zip(term_matches, idf)), doc)
+        for doc in documents
+    ]
+    # 依建立時間排序（舊版 ID 見 ids.ordering_key）
+    scored.sort(key=lambda sd: ids.ordering_key(sd[1][1]), reverse=True)
+    scored.sort(key=lambda sd: sd[0], reverse=True)
+    return scored
@@ -0,0 +1,104 @@
+"""
+DynamoDB AttributeValue <-> Python 轉換
+取代 boto3 的 TypeSerializer/TypeDeserializer：
+- 整數數值直接轉為 int，只有帶小數或指數的數值才建立 Decimal（延遲導入）
+- 以型別對照表分派，避免逐一 isinstance 判斷
+"""
+
+
+def _deserialize_number(text):
+    # 整數（本專案絕大多數數值）不需要 Decimal
+    if '.' not in text and 'e' not in text and 'E' not in text:
+        return int(text)
+    from decimal import Decimal
+
+    return Decimal(text)
+
+
+def _deserialize_map(value):
+    return {k: deserialize(v) for k, v in value.items()}
+
+
+def _deserialize_list(value):
+    return [deserialize(v) for v in value]
+
+
+_DESERIALIZERS = {
+    'S': lambda v: v,
+    'N': _deserialize_number,
+    'BOOL': lambda v: v,
+    'NULL': lambda v: None,
+    'M': _deserialize_map,
+    'L': _deserialize_list,
+    'SS': set,
+    'NS': lambda v: {_deserialize_number(n) for n in v},
+    'B': bytes,
+    'BS': lambda v: {bytes(b) for b in v},
+}
+
+
+def deserialize(attribute_value):
+    """單一 AttributeValue 轉 Python 值"""
+    (type_code, value), = attribute_value.items()
+    return _DESERIALIZERS[type_code](value)
+
+
+def deserialize_item(item):
+    """整筆項目轉 Python dict；None 原樣返回"""
+    if item is None:
+        return None
+    # 字串屬性佔絕大多數，直接取值省去一次函數呼叫
+    result = {}
+    for name, attribute_value in item.items():
+        string_value = attribute_value.get('S')
+        result[name] = string_value if string_value is not None else deserialize(attribute_value)
+    return result
+
+
+def _serialize_number(value):
+    return {'N': str(value)}
+
+
+def _serialize_set(value):
+    if not value:
+        raise ValueError('Empty sets are not supported by DynamoDB')
+    sample = next(iter(value))
+    if isinstance(sample, str):
+        return {'SS': list(value)}
+    if isinstance(sample, (bytes, bytearray)):
+        return {'BS': [bytes(v) for v in value]}
+    return {'NS': [str(v) for v in value]}
+
+
+_SERIALIZERS = {
+    str: lambda v: {'S': v},
+    bool: lambda v: {'BOOL': v},
+    int: _serialize_number,
+    float: _serialize_number,
+    type(None): lambda v: {'NULL': True},
+    dict: lambda v: {'M': serialize_item(v)},
+    list: lambda v: {'L': [serialize(x) for x in v]},
+    tuple: lambda v: {'L': [serialize(x) for x in v]},
+    set: _serialize_set,
+    frozenset: _serialize_set,
+    bytes: lambda v: {'B': v},
+    bytearray: lambda v: {'B': bytes(v)},
+}
+
+
+def serialize(value):
+    """Python 值轉單一 AttributeValue"""
+    serializer = _SERIALIZERS.get(type(value))
+    if serializer is not None:
+        return serializer(value)
+    # Decimal 與其他數值子類
+    from decimal import Decimal
+
+    if isinstance(value, Decimal):
+        return _serialize_number(value)
+    raise TypeError(f'Unsupported type for DynamoDB: {type(value).__name__}')
+
+
+def serialize_item(item):
+    """Python dict 轉 AttributeValue map"""
+    return {k: serialize(v) for k, v in item.items()}
@@ -0,0 +1,207 @@
+"""
+大型專案的寫入分片
+專案的事件、週期事件例外、任務列表項目與墓碑原本都在同一個 PROJECT#{id} 分區（及同一個 GSI3/GSI4 分區），
+協作高峰時會撞上 DynamoDB 單一分區的吞吐上限。專案項目數超過門檻後改寫到 shardCount 個分區：
+- 分片 = hash(事件/任務 ID) % shardCount；分片 0 即原本的 PROJECT#{id}，其餘為 PROJECT#{id}#{shard}
+- 分片項目的 GSI3PK / GSI4PK 也使用分片分區，索引端同樣分散
+- 專案主項目、成員、計數項目固定留在 PROJECT#{id}
+
+啟用方式：dashboard_aggregator 依計數項目判斷，於專案主項目寫入 shardCount 與 shardsActiveAt（毫秒）。
+只有 ID（ULID）時間戳不早於 shardsActiveAt 的項目才寫入分片，既有項目留在原分區、不需搬移，
+由 ID 即可決定位置。shardsActiveAt 比啟用時間晚兩個快取週期，屆時所有執行環境的分片設定快取都已更新，
+不會有執行環境把新項目寫到錯誤位置。
+
+讀取以 scatter-gather 平行查詢所有分片，依排序鍵合併；分頁 cursor 記錄每個分片各自的起始鍵。
+"""
+
+import hashlib
+import heapq
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from calendar_core import keys
+from calendar_core import pagination
+
+# 專案項目（事件 + 任務）達到此數量時啟用分片
+SHARD_THRESHOLD_ITEMS = int(os.environ.get('SHARD_THRESHOLD_ITEMS', '5000'))
+SHARD_COUNT = int(os.environ.get('PROJECT_SHARD_COUNT', '8'))
+LAYOUT_CACHE_SECONDS = 60
+LAYOUT_CACHE_MAX_ENTRIES = 1024
+READ_WORKERS = 8
+
+_ULID_ALPHABET = {c: i for i, c in enumerate('0123456789ABCDEFGHJKMNPQRSTVWXYZ')}
+_ULID_LENGTH = 26
+
+# project_id -> (shardCount, shardsActiveAt, 快取到期時間)
+_layouts = {}
+
+
+def ulid_millis(entity_id):
+    """ID 結尾 ULID 的毫秒時間戳（支援 task- 等前綴）；不是 ULID 時回傳 None"""
+    if len(entity_id) < _ULID_LENGTH:
+        return None
+    value = 0
+    for char in entity_id[-_ULID_LENGTH:][:10]:
+        digit = _ULID_ALPHABET.get(char)
+        if digit is None:
+            return None
+        value = value * 32 + digit
+    return value
+
+
+def layout(project_id, table=None):
+    """專案的 (shardCount, shardsActiveAt)，每個執行環境快取 LAYOUT_CACHE_SECONDS 秒"""
+    cached = _layouts.get(project_id)
+    if cached is not None and cached[2] > time.monotonic():
+        return cached[:2]
+    if table is None:
+        from calendar_core.db import get_table
+
+        table = get_table()
+
+    item = table.get_item(
+        Key=keys.project_key(project_id),
+        ProjectionExpression='shardCount, shardsActiveAt'
+    ).get('Item') or {}
+    value = (int(item.get('shardCount', 1)), int(item.get('shardsActiveAt', 0)))
+    _layouts.pop(project_id, None)
+    _layouts[project_id] = (*value, time.monotonic() + LAYOUT_CACHE_SECONDS)
+    while len(_layouts) > LAYOUT_CACHE_MAX_ENTRIES:
+        _layouts.pop(next(iter(_layouts)))
+    return value
+
+
+def shard_for(project_id, entity_id, table=None):
+    """事件/任務所在的分片編號；未分片的專案或分片啟用前建立的項目為 0"""
+    shard_count, active_at = layout(project_id, table)
+    if shard_count <= 1:
+        return 0
+    created_at = ulid_millis(entity_id)
+    if created_at is None or created_at < active_at:
+        return 0
+    digest = hashlib.md5(entity_id.encode('utf-8')).digest()
+    return int.from_bytes(digest[:4], 'big') % shard_count
+
+
+def partitions(project_id, table=None):
+    """專案所有分片的分區鍵（分片 0 在前）"""
+    shard_count, _ = layout(project_id, table)
+    return [keys.project_shard_pk(project_id, shard) for shard in range(shard_count)]
+
+
+def enable_if_needed(table, project_ids):
+    """
+    項目數達門檻的專案啟用分片（由 dashboard_aggregator 於每批串流記錄後呼叫）
+    以條件更新確保只啟用一次；回傳本次啟用的專案 ID
+    """
+    candidates = [project_id for project_id in project_ids if layout(project_id, table)[0] <= 1]
+    if not candidates:
+        return []
+    counters = table.batch_get([keys.project_stats_key(project_id) for project_id in candidates])
+
+    enabled = []
+    for project_id in candidates:
+        stats_key = keys.project_stats_key(project_id)
+        counter = counters.get((stats_key['PK'], stats_key['SK'])) or {}
+        if counter.get('events', 0) + counter.get('tasks', 0) < SHARD_THRESHOLD_ITEMS:
+            continue
+        active_at = int(time.time() * 1000) + 2 * LAYOUT_CACHE_SECONDS * 1000
+        try:
+            table.update_item(
+                Key=keys.project_key(project_id),
+                UpdateExpression='SET shardCount = :count, shardsActiveAt = :activeAt',
+                ConditionExpression='attribute_exists(PK) AND attribute_not_exists(shardCount) '
+                                    'AND (attribute_not_exists(#status) OR #status <> :deleting)',
+                ExpressionAttributeNames={'#status': 'status'},
+                ExpressionAttributeValues={':count': SHARD_COUNT, ':activeAt': active_at, ':deleting': 'DELETING'}
+            )
+        except table.exceptions.ConditionalCheckFailedException:
+            continue
+        _layouts.pop(project_id, None)
+        enabled.append(project_id)
+    return enabled
+
+
+def _partition_query(query_kwargs, pk):
+    return dict(query_kwargs, ExpressionAttributeValues={**query_kwargs['ExpressionAttributeValues'], ':pk': pk})
+
+
+def _map(function, values):
+    if len(values) == 1:
+        return [function(values[0])]
+    with ThreadPoolExecutor(max_workers=min(len(values), READ_WORKERS)) as executor:
+        return list(executor.map(function, values))
+
+
+def query_all(table, query_kwargs, pks, sort_key_name):
+    """
+    平行讀完每個分區（query_kwargs 的 :pk 逐一代換），依 sort_key_name 合併排序後回傳
+    ScanIndexForward=False 時為遞減
+    """
+    results = _map(lambda pk: pagination.query_page(table, _partition_query(query_kwargs, pk), None)[0], pks)
+    if len(results) == 1:
+        return results[0]
+    return list(heapq.merge(
+        *results,
+        key=lambda item: item.get(sort_key_name, ''),
+        reverse=not query_kwargs.get('ScanIndexForward', True)
+    ))
+
+
+def query_page(table, query_kwargs, pks, scope, key_names, limit=None, cursor=None):
+    """
+    跨分區的分頁查詢，回傳 (items, next_cursor)
+    key_names 為查詢所用索引的 (分區鍵, 排序鍵) 名稱，例如 ('GSI3PK', 'GSI3SK') 或 ('PK', 'SK')。
+    只有一個分區時與 pagination.query_page 相同（cursor 格式不變）；
+    多個分區時每個分區各讀 limit 筆，合併後取前 limit 筆，cursor 記錄各分區下一次的起始鍵
+    （{} 表示從頭開始，已讀完的分區不列入）。
+    """
+    if limit is None:
+        return query_all(table, query_kwargs, pks, key_names[1]), None
+    if len(pks) == 1:
+        return pagination.query_page(table, _partition_query(query_kwargs, pks[0]), scope, limit=limit, cursor=cursor)
+
+    positions = {pk: {} for pk in pks}
+    if cursor:
+        positions = pagination.decode_cursor(cursor, scope)
+        # 啟用分片前取得的單一分區 cursor：分片 0 從原位置續讀，其他分片從頭讀取，不遺漏分片後寫入的項目
+        # （其他分片中排序在原位置之前的項目會出現在後續頁面）
+        if 'PK' in positions:
+            positions = {pks[0]: positions, **{pk: {} for pk in pks[1:]}}
+    active = [pk for pk in pks if pk in positions]
+
+    def read(pk):
+        page_kwargs = dict(_partition_query(query_kwargs, pk), Limit=limit)
+        if positions[pk]:
+            page_kwargs['ExclusiveStartKey'] = positions[pk]
+        return table.query(**page_kwargs)
+
+    responses = _map(read, active) if active else []
+    streams = [[(index, item) for item in response.get('Items', [])] for index, response in enumerate(responses)]
+    merged = heapq.merge(
+        *streams,
+        key=lambda entry: entry[1].get(key_names[1], ''),
+        reverse=not query_kwargs.get('ScanIndexForward', True)
+    )
+    items, consumed = [], [0] * len(active)
+    for index, item in merged:
+        if len(items) >= limit:
+            break
+        items.append(item)
+        consumed[index] += 1
+
+    next_positions = {}
+    key_attributes = {'PK', 'SK', *key_names}
+    for index, (pk, response) in enumerate(zip(active, responses)):
+        returned = response.get('Items', [])
+        if consumed[index] == len(returned):
+            if 'LastEvaluatedKey' in response:
+                next_positions[pk] = response['LastEvaluatedKey']
+        elif consumed[index]:
+            last = returned[consumed[index] - 1]
+            next_positions[pk] = {name: last[name] for name in key_attributes}
+        else:
+            next_positions[pk] = positions[pk]
+    next_cursor = pagination.encode_cursor(next_positions, scope) if next_positions else None
+    return items, next_cursor
@@ -0,0 +1,90 @@
+"""
+儀表板彙總計數
+每個專案與用戶各有一個計數項目（STATS#SUMMARY），由 dashboard_aggregator 依資料表串流以原子 ADD 維護：
+- tasks / taskStatus#{status}：任務總數與各狀態數
+- openDue#{YYYY-MM-DD}：未完成任務依截止日分桶；逾期數於讀取時加總今天以前的分桶，
+  因此時間經過不需任何寫入
+- events / eventsWeek#{YYYY-Www}：事件總數與每週事件數
+任務計入專案與負責人；事件計入專案與建立者。
+"""
+
+from collections import defaultdict
+
+from calendar_core import keys
+
+STATUS_PREFIX = 'taskStatus#'
+OPEN_DUE_PREFIX = 'openDue#'
+WEEK_PREFIX = 'eventsWeek#'
+DONE_STATUSES = ('DONE',)
+
+
+def contributions(item):
+    """單一項目對各計數項目的貢獻 [(計數項目鍵, 屬性)]；不計數的項目回傳空串列"""
+    if not item:
+        return []
+    entity_type = item.get('entityType')
+    if entity_type == 'TASK' and item['PK'] == item['SK']:
+        status = item.get('status', 'TODO')
+        attributes = ['tasks', f'{STATUS_PREFIX}{status}']
+        if status not in DONE_STATUSES and item.get('dueDate'):
+            attributes.append(f"{OPEN_DUE_PREFIX}{item['dueDate'][:10]}")
+        scopes = [keys.project_stats_key(item['projectId'])] if item.get('projectId') else []
+        if item.get('assigneeId'):
+            scopes.append(keys.user_stats_key(item['assigneeId']))
+    elif entity_type == 'EVENT':
+        attributes = ['events']
+        if item.get('weekOfYear'):
+            attributes.append(f"{WEEK_PREFIX}{item['weekOfYear']}")
+        scopes = [keys.project_stats_key(item['projectId'])] if item.get('projectId') else []
+        if str(item.get('GSI1PK', '')).startswith(keys.USER_PREFIX):
+            scopes.append(keys.user_stats_key(keys.strip_prefix(item['GSI1PK'], keys.USER_PREFIX)))
+    else:
+        return []
+    return [(scope, attribute) for scope in scopes for attribute in attributes]
+
+
+def deltas(old_item, new_item):
+    """
+    由串流的新舊影像計算計數增減，回傳 {(PK, SK): {屬性: 增減}}（已去除為 0 的項目）
+    新增時 old_item 為 None，刪除時 new_item 為 None
+    """
+    changes = defaultdict(lambda: defaultdict(int))
+    for scope, attribute in contributions(new_item):
+        changes[(scope['PK'], scope['SK'])][attribute] += 1
+    for scope, attribute in contributions(old_item):
+        changes[(scope['PK'], scope['SK'])][attribute] -= 1
+    return {
+        scope: {attribute: delta for attribute, delta in counters.items() if delta}
+        for scope, counters in changes.items()
+        if any(counters.values())
+    }
+
+
+def summarize(item, today):
+    """計數項目轉為 API 回應；today 為 YYYY-MM-DD（UTC）"""
+    item = item or {}
+    by_status, by_week = {}, {}
+    overdue = due_today = 0
+    for name, value in item.items():
+        if name.startswith(STATUS_PREFIX) and value:
+            by_status[name[len(STATUS_PREFIX):]] = value
+        elif name.startswith(WEEK_PREFIX) and value:
+            by_week[name[len(WEEK_PREFIX):]] = value
+        elif name.startswith(OPEN_DUE_PREFIX):
+            due_date = name[len(OPEN_DUE_PREFIX):]
+            if due_date < today:
+                overdue += value
+            elif due_date == today:
+                due_today += value
+    return {
+        'tasks': {
+            'total': item.get('tasks', 0),
+            'byStatus': by_status,
+            'overdue': overdue,
+            'dueToday': due_today
+        },
+        'events': {
+            'total': item.get('events', 0),
+            'byWeek': dict(sorted(by_week.items()))
+        }
+    }
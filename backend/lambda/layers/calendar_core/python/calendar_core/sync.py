@@ -0,0 +1,42 @@
+"""
+差異同步（GET /sync）
+- 專案分區內會變動的項目（專案主項目、事件、週期事件例外、專案任務關係項目）帶 GSI4PK = PROJECT#{projectId}
+  （寫入分片的項目為 PROJECT#{projectId}#{shard}，讀取時逐一查詢各分片，見 calendar_core.sharding）；
+  GSI4 以 updatedAt 為排序鍵，一次範圍查詢即可取出某時間點之後新增或修改的項目
+- 刪除事件/任務時在同一分區寫入墓碑（TOMBSTONE#{類型}#{id}），同樣出現在 GSI4 上，
+  並以 expiresAt TTL 於保留期後過期；同步 token 早於保留期時客戶端需整批重新載入
+- GSI4 上的 updatedAt 一律以 timestamp() 產生（UTC、固定到微秒、Z 結尾），字串順序即時間順序
+"""
+
+import time
+from datetime import datetime
+
+from calendar_core import keys
+
+SYNC_INDEX = 'GSI4'
+TOMBSTONE_RETENTION_SECONDS = 30 * 24 * 60 * 60
+TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%S.%fZ'
+
+
+def timestamp(moment=None):
+    """updatedAt 等時間戳：UTC，固定寬度（isoformat 在微秒為 0 時會省略小數，排序會錯）"""
+    return (moment or datetime.utcnow()).strftime(TIMESTAMP_FORMAT)
+
+
+def index_keys(project_id, shard=0):
+    """項目加入專案差異同步索引所需的鍵（分片項目的索引分區跟著分片）"""
+    return {'GSI4PK': keys.project_shard_pk(project_id, shard)}
+
+
+def tombstone_item(project_id, entity_type, entity_id, shard=0):
+    """刪除墓碑項目；entity_type 為 'event' 或 'task'，shard 為被刪項目所在分片"""
+    return {
+        **keys.tombstone_key(project_id, entity_type, entity_id, shard),
+        **index_keys(project_id, shard),
+        'entityType': 'TOMBSTONE',
+        'deletedType': entity_type,
+        'deletedId': entity_id,
+        'projectId': project_id,
+        'updatedAt': timestamp(),
+        'expiresAt': int(time.time()) + TOMBSTONE_RETENTION_SECONDS
+    }
@@ -0,0 +1,35 @@
+"""
+列表 ETag 的版本戳（在列表查詢之前以一次 GetItem 讀取，未修改時直接回 304，不執行列表查詢與描述補讀）
+版本戳是計數項目（keys.LIST_VERSION_SK），由 stream_dispatcher 分派的 list_versions 依資料表串流遞增，
+讀取成本與專案數、分片數無關：
+- 專案範圍的列表（專案事件、專案任務）：PROJECT#{id} / VERSION#LIST，專案分區（含各分片）內
+  會出現在列表上的項目（帶 GSI4PK 的專案主項目、事件、週期事件例外、任務關係項目、刪除墓碑）變動時遞增
+- 用戶範圍的列表（用戶的事件、負責人的任務、專案列表）：USER#{id} / VERSION#LIST，
+  所屬專案有上述變動或用戶加入/退出專案時遞增；不屬於任何所屬專案的項目不在版本戳的範圍內
+
+版本戳比列表內容保守：專案內任何修改都會讓該專案與其所有成員的列表 ETag 失效。
+計數由串流非同步遞增，寫入後約 1～2 秒內（批次視窗加上處理時間）仍可能讀到舊版本戳而回 304。
+"""
+
+from calendar_core import keys
+
+
+def read_version(table, key):
+    """計數項目的版本戳 [(版本號, 最後遞增時間)]；尚未遞增過時為 [('0', '')]"""
+    item = table.get_item(
+        Key=key,
+        ConsistentRead=True,
+        ProjectionExpression='#version, updatedAt',
+        ExpressionAttributeNames={'#version': 'version'}
+    ).get('Item') or {}
+    return [(str(item.get('version', 0)), item.get('updatedAt', ''))]
+
+
+def project_version(table, project_id):
+    """專案範圍列表的版本戳"""
+    return read_version(table, keys.project_list_version_key(project_id))
+
+
+def user_version(table, user_id):
+    """用戶範圍列表的版本戳"""
+    return read_version(table, keys.user_list_version_key(user_id))
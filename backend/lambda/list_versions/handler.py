@@ -0,0 +1,80 @@
+"""
+列表版本戳 Lambda
+由 stream_dispatcher 依資料表串流分派：帶 GSI4PK 的項目（專案分區內會出現在列表上的項目）與 MEMBER# 項目異動時，
+遞增列表 ETag 讀取的版本計數（見 calendar_core.versions）。
+- 每批記錄每個變動的專案只遞增一次專案計數，並遞增該專案每位成員的用戶計數；
+  同一批內多個專案共用的成員只遞增一次，寫入集中在批次層級，熱門專案不會因每次寫入而產生熱鍵
+- 成員關係異動時遞增該用戶的計數（所屬專案集合改變）
+- 專案不存在或刪除中時略過專案計數，避免串聯刪除途中重新建立計數項目
+重試時重複遞增只會讓 ETag 多失效一次，不需要去重標記。
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from calendar_core import get_table
+from calendar_core import keys
+from calendar_core import sync
+from calendar_core.db import cancellation_codes
+from calendar_core.permissions import project_member_ids
+
+UPDATE_WORKERS = 8
+
+
+def lambda_handler(event, context):
+    project_ids, user_ids = set(), set()
+    for record in event.get('Records', []):
+        images = record.get('dynamodb', {})
+        sk = images.get('Keys', {}).get('SK', {}).get('S', '')
+        if sk.startswith(keys.MEMBER_PREFIX):
+            user_ids.add(keys.strip_prefix(sk, keys.MEMBER_PREFIX))
+        for image in ('NewImage', 'OldImage'):
+            pk = images.get(image, {}).get('GSI4PK', {}).get('S')
+            if pk:
+                project_ids.add(keys.project_id_from_pk(pk))
+
+    if not project_ids and not user_ids:
+        return {'projects': 0, 'users': 0}
+
+    table = get_table()
+    updated_at = sync.timestamp()
+    project_ids = sorted(project_ids)
+    with ThreadPoolExecutor(max_workers=UPDATE_WORKERS) as executor:
+        for members in executor.map(lambda project_id: project_member_ids(table, project_id), project_ids):
+            user_ids.update(members)
+        bumped = sum(executor.map(lambda project_id: bump_project(table, project_id, updated_at), project_ids))
+        list(executor.map(lambda user_id: bump(table, keys.user_list_version_key(user_id), updated_at), sorted(user_ids)))
+
+    print(f"Bumped list versions of {bumped} projects and {len(user_ids)} users")
+    return {'projects': bumped, 'users': len(user_ids)}
+
+
+def bump_operation(key, updated_at):
+    return {
+        'Key': key,
+        'UpdateExpression': 'ADD #version :one SET updatedAt = :updatedAt',
+        'ExpressionAttributeNames': {'#version': 'version'},
+        'ExpressionAttributeValues': {':one': 1, ':updatedAt': updated_at}
+    }
+
+
+def bump(table, key, updated_at):
+    table.update_item(**bump_operation(key, updated_at))
+
+
+def bump_project(table, project_id, updated_at):
+    """遞增專案計數；專案不存在或刪除中時回傳 False"""
+    try:
+        table.transact_write([
+            {'ConditionCheck': {
+                'Key': keys.project_key(project_id),
+                'ConditionExpression': 'attribute_exists(PK) AND (attribute_not_exists(#status) OR #status <> :deleting)',
+                'ExpressionAttributeNames': {'#status': 'status'},
+                'ExpressionAttributeValues': {':deleting': 'DELETING'}
+            }},
+            {'Update': bump_operation(keys.project_list_version_key(project_id), updated_at)}
+        ])
+        return True
+    except table.exceptions.TransactionCanceledException as e:
+        if cancellation_codes(e)[:1] == ['ConditionalCheckFailed']:
+            return False
+        raise
@@ -0,0 +1,27 @@
+"""
+成員關係異動 Lambda
+由 stream_dispatcher 依資料表串流分派：MEMBER# 項目新增、修改或刪除時遞增 ACL#GENERATION，
+讓各執行環境內的成員角色快取（calendar_core.permissions）在下次比對 generation 時失效。
+"""
+
+from calendar_core import get_table
+from calendar_core import keys
+
+
+def lambda_handler(event, context):
+    """一批串流記錄只遞增一次 generation"""
+    changed = [
+        record for record in event.get('Records', [])
+        if record.get('dynamodb', {}).get('Keys', {}).get('SK', {}).get('S', '').startswith(keys.MEMBER_PREFIX)
+    ]
+    if not changed:
+        return {'invalidated': 0}
+
+    get_table().update_item(
+        Key=keys.acl_generation_key(),
+        UpdateExpression='ADD #generation :one',
+        ExpressionAttributeNames={'#generation': 'generation'},
+        ExpressionAttributeValues={':one': 1}
+    )
+    print(f"Membership changed in {len(changed)} records, permission caches invalidated")
+    return {'invalidated': len(changed)}
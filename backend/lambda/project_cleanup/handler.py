@@ -0,0 +1,146 @@
+"""
+專案串聯刪除 Lambda
+由 stream_dispatcher 以非同步呼叫啟動：專案主項目的 status 轉為 DELETING 時，在背景清除：
+- PROJECT#{id} 分區內所有項目（EVENT#、EVENTEX#、MEMBER#、TASK# 關係…），
+  已啟用寫入分片時先逐一清除 PROJECT#{id}#{shard} 分區
+- 專案任務對應的 TASK#{taskId} 主項目與 USER#{assigneeId} / TASK#{taskId} 關係
+- 最後刪除專案主項目本身
+
+以分頁查詢 + 25 筆 BatchWriteItem 執行；每頁完成後把檢查點（分區 + 排序鍵）寫回專案主項目，
+失敗重試或逾時續跑時從檢查點繼續。剩餘時間不足時以非同步方式呼叫自己接續。
+"""
+
+import json
+
+from calendar_core import get_table
+from calendar_core import keys
+from calendar_core.serde import deserialize_item
+
+# 每頁讀取筆數與續跑保留時間
+PAGE_SIZE = 200
+MIN_REMAINING_MILLIS = 15000
+BATCH_WRITE_WORKERS = 4
+
+
+def lambda_handler(event, context):
+    """
+    支援兩種輸入：
+    - DynamoDB 串流事件（Records）
+    - stream_dispatcher 的啟動呼叫與續跑呼叫：{"projectId": "..."}
+    """
+    project_ids = []
+    if 'projectId' in event:
+        project_ids.append(event['projectId'])
+    for record in event.get('Records', []):
+        new_image = deserialize_item(record.get('dynamodb', {}).get('NewImage'))
+        if new_image and new_image.get('entityType') == 'PROJECT' and new_image.get('status') == 'DELETING':
+            project_ids.append(keys.strip_prefix(new_image['PK'], keys.PROJECT_PREFIX))
+
+    for project_id in project_ids:
+        finished = cleanup_project(project_id, context)
+        if not finished:
+            continue_later(project_id, context)
+
+    return {'processed': len(project_ids)}
+
+
+def cleanup_project(project_id, context):
+    """清除專案資料；全部完成時回傳 True，因時間不足中斷時回傳 False"""
+    table = get_table()
+    header = table.get_item(Key=keys.project_key(project_id), ConsistentRead=True).get('Item')
+    if not header or header.get('status') != 'DELETING':
+        print(f"Project {project_id} is not marked for deletion, skipping")
+        return True
+
+    # 分片分區先清，主項目所在的 PROJECT#{id} 最後
+    partitions = [keys.project_shard_pk(project_id, shard) for shard in range(int(header.get('shardCount', 1)))]
+    partitions.reverse()
+    if header.get('cleanupPartition') in partitions:
+        partitions = partitions[partitions.index(header['cleanupPartition']):]
+    header_sk = keys.project_pk(project_id)
+
+    for position, partition in enumerate(partitions):
+        query_kwargs = {
+            'KeyConditionExpression': 'PK = :pk',
+            'ExpressionAttributeValues': {':pk': partition},
+            'ProjectionExpression': 'PK, SK',
+            'ConsistentRead': True,
+            'Limit': PAGE_SIZE
+        }
+        # 從上次的檢查點繼續
+        if position == 0 and header.get('cleanupCheckpoint'):
+            query_kwargs['ExclusiveStartKey'] = {'PK': partition, 'SK': header['cleanupCheckpoint']}
+
+        while True:
+            response = table.query(**query_kwargs)
+            page = response.get('Items', [])
+            delete_keys = collect_delete_keys(table, [item for item in page if item['SK'] != header_sk])
+            if delete_keys:
+                delete_items(table, delete_keys)
+
+            last_key = response.get('LastEvaluatedKey')
+            if not last_key:
+                break
+            save_checkpoint(table, project_id, partition, last_key['SK'], len(delete_keys))
+            query_kwargs['ExclusiveStartKey'] = last_key
+            if context is not None and context.get_remaining_time_in_millis() < MIN_REMAINING_MILLIS:
+                return False
+
+    # 分區清空後才刪除主項目，途中失敗時仍保留 DELETING 標記以便重試
+    table.delete_item(
+        Key=keys.project_key(project_id),
+        ConditionExpression='#status = :deleting',
+        ExpressionAttributeNames={'#status': 'status'},
+        ExpressionAttributeValues={':deleting': 'DELETING'}
+    )
+    print(f"Project {project_id} cleanup finished")
+    return True
+
+
+def collect_delete_keys(table, page):
+    """由分區內的項目推導出要刪除的所有主鍵（含任務主項目與用戶任務關係）"""
+    delete_keys = [{'PK': item['PK'], 'SK': item['SK']} for item in page]
+    task_ids = [keys.strip_prefix(item['SK'], keys.TASK_PREFIX) for item in page if item['SK'].startswith(keys.TASK_PREFIX)]
+    if task_ids:
+        tasks = table.batch_get([keys.task_key(task_id) for task_id in task_ids])
+        for task_id in task_ids:
+            task = tasks.get((keys.task_pk(task_id), keys.task_pk(task_id)))
+            if task is None:
+                continue
+            delete_keys.append(keys.task_key(task_id))
+            if task.get('assigneeId'):
+                delete_keys.append(keys.user_task_key(task['assigneeId'], task_id))
+    return delete_keys
+
+
+def delete_items(table, delete_keys):
+    """批次刪除；任何項目失敗即拋出例外，讓串流重試並從檢查點續跑"""
+    table.batch_write(delete_keys=delete_keys, max_workers=BATCH_WRITE_WORKERS)
+
+
+def save_checkpoint(table, project_id, partition, last_sk, deleted_count):
+    """把目前的分區、最後處理的排序鍵與累計刪除數寫回專案主項目"""
+    table.update_item(
+        Key=keys.project_key(project_id),
+        UpdateExpression='SET #partition = :pk, #checkpoint = :sk ADD #deleted :count',
+        ConditionExpression='#status = :deleting',
+        ExpressionAttributeNames={
+            '#partition': 'cleanupPartition',
+            '#checkpoint': 'cleanupCheckpoint',
+            '#deleted': 'cleanupDeletedCount',
+            '#status': 'status'
+        },
+        ExpressionAttributeValues={':pk': partition, ':sk': last_sk, ':count': deleted_count, ':deleting': 'DELETING'}
+    )
+
+
+def continue_later(project_id, context):
+    """剩餘時間不足：非同步呼叫自己，從檢查點接續"""
+    import boto3
+
+    boto3.client('lambda').invoke(
+        FunctionName=context.invoked_function_arn,
+        InvocationType='Event',
+        Payload=json.dumps({'projectId': project_id}).encode('utf-8')
+    )
+    print(f"Project {project_id} cleanup continues in a new invocation")
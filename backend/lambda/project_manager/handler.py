@@ -4,15 +4,15 @@
 """
 
 import json
-import boto3
-import os
-from datetime import datetime
-from boto3.dynamodb.conditions import Key, Attr
-
-# 初始化 DynamoDB 客戶端
-dynamodb = boto3.resource('dynamodb')
-table = dynamodb.Table(os.environ['DYNAMODB_TABLE'])
+from calendar_core import build_response, http_handler, build_list_response, not_modified_response, get_user_id, get_table, has_project_role, new_id
+from calendar_core import index_projection
+from calendar_core import keys
+from calendar_core import pagination
+from calendar_core import sync
+from calendar_core import versions
+from calendar_core.formatting import format_project
 
+@http_handler
 def lambda_handler(event, context):
     """
     處理專案管理請求
@@ -23,7 +23,7 @@ def lambda_handler(event, context):
         path = event['path']
         
         # 只依賴 API Gateway Cognito Authorizer
-        user_id = get_user_id_from_event(event)
+        user_id = get_user_id(event)
         if not user_id:
             return build_response(401, {'error': 'Unauthorized'})
         
@@ -52,32 +52,31 @@ def create_project(event, user_id):
             return build_response(400, {'error': 'Project name is required'})
         
         # 生成專案ID
-        project_id = f"project-{int(datetime.now().timestamp())}"
+        project_id = new_id('project-')
         
         # 專案資料
         project_data = {
-            'PK': f'PROJECT#{project_id}',
-            'SK': f'PROJECT#{project_id}',
-            'GSI1PK': f'USER#{user_id}',
-            'GSI1SK': f'PROJECT#{project_id}',
+            **keys.project_key(project_id),
+            'GSI1PK': keys.user_pk(user_id),
+            'GSI1SK': keys.project_pk(project_id),
+            **sync.index_keys(project_id),
             'name': body['name'],
             'description': body.get('description', ''),
             'color': body.get('color', '#FF9900'),
             'ownerId': user_id,
             'status': 'ACTIVE',
             'entityType': 'PROJECT',
-            'createdAt': datetime.now().isoformat(),
-            'updatedAt': datetime.now().isoformat()
+            'createdAt': sync.timestamp(),
+            'updatedAt': sync.timestamp()
         }
         
         # 創建專案擁有者關係
         owner_relation = {
-            'PK': f'PROJECT#{project_id}',
-            'SK': f'MEMBER#{user_id}',
-            'GSI1PK': f'USER#{user_id}',
-            'GSI1SK': f'PROJECT#{project_id}',
+            **keys.member_key(project_id, user_id),
+            'GSI1PK': keys.user_pk(user_id),
+            'GSI1SK': keys.project_pk(project_id),
             'role': 'OWNER',
-            'joinedAt': datetime.now().isoformat()
+            'joinedAt': sync.timestamp()
         }
 
         # 可選：同時建立初始成員關係（避免額外端點）
@@ -88,20 +87,15 @@ def create_project(event, user_id):
                 continue
             role = m.get('role', 'MEMBER')
             initial_members.append({
-                'PK': f'PROJECT#{project_id}',
-                'SK': f'MEMBER#{member_id}',
-                'GSI1PK': f'USER#{member_id}',
-                'GSI1SK': f'PROJECT#{project_id}',
+                **keys.member_key(project_id, member_id),
+                'GSI1PK': keys.user_pk(member_id),
+                'GSI1SK': keys.project_pk(project_id),
                 'role': role,
-                'joinedAt': datetime.now().isoformat()
+                'joinedAt': sync.timestamp()
             })
         
         # 寫入 DynamoDB
-        with table.batch_writer() as batch:
-            batch.put_item(Item=project_data)
-            batch.put_item(Item=owner_relation)
-            for im in initial_members:
-                batch.put_item(Item=im)
+        get_table().batch_write(put_items=[project_data, owner_relation, *initial_members])
         
         return build_response(201, {
             'message': 'Project created successfully',
@@ -123,29 +117,69 @@ def create_project(event, user_id):
         return build_response(500, {'error': 'Failed to create project'})
 
 def get_projects(event, user_id):
-    """獲取用戶的所有專案"""
+    """
+    獲取用戶的所有專案（分頁，最新在前）
+    支援 status 篩選（逗號分隔）；刪除中的專案一律不回傳
+    """
     try:
-        # 使用 GSI1 查詢用戶的所有專案
-        response = table.query(
-            IndexName='GSI1',
-            KeyConditionExpression=Key('GSI1PK').eq(f'USER#{user_id}') & 
-                                  Key('GSI1SK').begins_with('PROJECT#'),
-            FilterExpression=Attr('entityType').eq('PROJECT')
-        )
+        query_params = event.get('queryStringParameters') or {}
+        limit = None
+        if not pagination.wants_all(query_params):
+            try:
+                limit = pagination.parse_limit(query_params)
+            except ValueError as e:
+                return build_response(400, {'error': 'Invalid limit', 'details': str(e)})
+        try:
+            fields = index_projection.parse_fields(query_params)
+        except ValueError as e:
+            return build_response(400, {'error': 'Invalid fields', 'details': str(e)})
         
-        projects = []
-        for item in response['Items']:
-            projects.append({
-                'id': item['PK'].replace('PROJECT#', ''),
-                'name': item['name'],
-                'description': item.get('description', ''),
-                'color': item.get('color', '#FF9900'),
-                'status': item.get('status', 'ACTIVE'),
-                'createdAt': item['createdAt'],
-                'updatedAt': item['updatedAt']
-            })
+        # 用戶版本戳（所屬專案或專案內容有變動時遞增）未變時直接回 304，不執行列表查詢
+        version = versions.user_version(get_table(), user_id)
+        cached = not_modified_response(event, version)
+        if cached:
+            return cached
+        
+        # 使用 GSI1 查詢用戶的所有專案；專案ID依建立時間排序，倒序即最新在前
+        filter_expression = 'entityType = :entityType AND (attribute_not_exists(#status) OR #status <> :deleting)'
+        expression_attribute_values = {
+            ':pk': keys.user_pk(user_id),
+            ':prefix': keys.PROJECT_PREFIX,
+            ':entityType': 'PROJECT',
+            ':deleting': 'DELETING'
+        }
+        if query_params.get('status'):
+            statuses = [v for v in query_params['status'].split(',') if v]
+            placeholders = [f':status{i}' for i in range(len(statuses))]
+            filter_expression += f" AND #status IN ({', '.join(placeholders)})"
+            expression_attribute_values.update(zip(placeholders, statuses))
+        query_kwargs = {
+            'IndexName': 'GSI1',
+            'KeyConditionExpression': 'GSI1PK = :pk AND begins_with(GSI1SK, :prefix)',
+            'ScanIndexForward': False,
+            'FilterExpression': filter_expression,
+            'ExpressionAttributeNames': {'#status': 'status'},
+            'ExpressionAttributeValues': expression_attribute_values
+        }
+        
+        scope = '|'.join(['GSI1', keys.user_pk(user_id), query_params.get('status') or ''])
+        try:
+            items, next_cursor = pagination.query_page(
+                get_table(), query_kwargs, scope, limit=limit, cursor=query_params.get('cursor')
+            )
+        except pagination.InvalidCursorError as e:
+            return build_response(400, {'error': 'Invalid cursor', 'details': str(e)})
         
-        return build_response(200, {'projects': projects})
+        # 索引只投影列表欄位，fields=full 時才由資料表補上描述（預設 summary 不補讀、省略描述欄位）
+        full = fields == index_projection.FIELDS_FULL
+        if full:
+            index_projection.hydrate(get_table(), items)
+        projects = [format_project(item, full) for item in items]
+        
+        response_body = {'projects': projects, 'count': len(projects)}
+        if limit is not None:
+            response_body['nextCursor'] = next_cursor
+        return build_list_response(event, response_body, version)
         
     except Exception as e:
         print(f"Error getting projects: {str(e)}")
@@ -185,14 +219,11 @@ def update_project(event, user_id):
         
         update_expression += '#updatedAt = :updatedAt'
         expression_attribute_names['#updatedAt'] = 'updatedAt'
-        expression_attribute_values[':updatedAt'] = datetime.now().isoformat()
+        expression_attribute_values[':updatedAt'] = sync.timestamp()
         
         # 更新專案
-        table.update_item(
-            Key={
-                'PK': f'PROJECT#{project_id}',
-                'SK': f'PROJECT#{project_id}'
-            },
+        get_table().update_item(
+            Key=keys.project_key(project_id),
             UpdateExpression=update_expression,
             ExpressionAttributeNames=expression_attribute_names,
             ExpressionAttributeValues=expression_attribute_values
@@ -213,69 +244,41 @@ def delete_project(event, user_id):
         if not check_project_permission(project_id, user_id, ['OWNER']):
             return build_response(403, {'error': 'Insufficient permissions'})
         
-        # 刪除專案及相關數據
-        # 注意：這裡應該刪除所有相關的任務、事件等，簡化處理
-        table.delete_item(
-            Key={
-                'PK': f'PROJECT#{project_id}',
-                'SK': f'PROJECT#{project_id}'
-            }
-        )
-        
-        # 刪除專案成員關係
-        table.delete_item(
-            Key={
-                'PK': f'PROJECT#{project_id}',
-                'SK': f'MEMBER#{user_id}'
-            }
-        )
+        # 標記為刪除中；實際的串聯刪除由 project_cleanup Lambda 透過資料表串流在背景執行
+        # 一併更新 updatedAt，差異同步會把刪除中的專案回報為已刪除
+        table = get_table()
+        try:
+            table.update_item(
+                Key=keys.project_key(project_id),
+                UpdateExpression='SET #status = :deleting, #deletingAt = :now, #deletedBy = :user, #updatedAt = :now',
+                ConditionExpression='attribute_exists(PK) AND (attribute_not_exists(#status) OR #status <> :deleting)',
+                ExpressionAttributeNames={
+                    '#status': 'status',
+                    '#deletingAt': 'deletingAt',
+                    '#deletedBy': 'deletedBy',
+                    '#updatedAt': 'updatedAt'
+                },
+                ExpressionAttributeValues={
+                    ':deleting': 'DELETING',
+                    ':now': sync.timestamp(),
+                    ':user': user_id
+                }
+            )
+        except table.exceptions.ConditionalCheckFailedException:
+            # 專案不存在或已在刪除中，視為已受理
+            pass
         
-        return build_response(200, {'message': 'Project deleted successfully'})
+        return build_response(202, {'message': 'Project deletion started', 'status': 'DELETING'})
         
     except Exception as e:
         print(f"Error deleting project: {str(e)}")
         return build_response(500, {'error': 'Failed to delete project'})
 
 def check_project_permission(project_id, user_id, allowed_roles):
-    """檢查用戶對專案的權限"""
+    """檢查用戶對專案的權限（成員角色經由執行環境內快取）"""
     try:
-        response = table.get_item(
-            Key={
-                'PK': f'PROJECT#{project_id}',
-                'SK': f'MEMBER#{user_id}'
-            }
-        )
-        
-        if 'Item' in response:
-            return response['Item'].get('role') in allowed_roles
-        
-        return False
+        return has_project_role(project_id, user_id, allowed_roles)
         
     except Exception as e:
         print(f"Error checking permission: {str(e)}")
         return False
-
-def get_user_id_from_event(event):
-    """僅從 API Gateway Cognito Authorizer 取得用戶ID；若缺失則返回 None"""
-    try:
-        request_context = event.get('requestContext') or {}
-        authorizer = (request_context.get('authorizer') or {})
-        claims = authorizer.get('claims') or {}
-        sub = claims.get('sub')
-        return sub
-    except Exception as e:
-        print(f"Error extracting user ID: {str(e)}")
-        return None
-
-def build_response(status_code, body):
-    """構建 HTTP 響應"""
-    return {
-        'statusCode': status_code,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Headers': 'Content-Type,Authorization',
-            'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS'
-        },
-        'body': json.dumps(body, ensure_ascii=False)
-    }
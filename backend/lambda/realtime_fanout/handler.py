@@ -0,0 +1,109 @@
+"""
+即時推播 Lambda
+由 stream_dispatcher 依資料表串流分派：PROJECT# 分區內的專案、事件、週期事件例外與任務列表項目變更時，
+以 calendar_core.realtime.diff 轉為精簡訊息，依專案彙整後推送給該專案所有成員的 WebSocket 連線。
+- 訊息格式：{"type": "changes", "changes": [diff, ...]}，單則超過上限時分批送出
+- 每批記錄只查詢一次各專案的成員與各成員的連線（平行查詢），多個專案共用的成員不重複查詢
+- 連線已斷開（GoneException）時以 BatchWriteItem 一次刪除本批所有失效的連線記錄
+推播為盡力而為：送出失敗不重試整批，客戶端重新連線後以 GET /sync 補齊。
+"""
+
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from calendar_core import get_table
+from calendar_core import realtime
+from calendar_core.permissions import project_member_ids
+from calendar_core.responses import dumps
+from calendar_core.serde import deserialize_item
+
+# API Gateway WebSocket 單則訊息上限為 128 KB，保留餘裕
+MAX_MESSAGE_BYTES = 100 * 1024
+POST_WORKERS = 16
+LOOKUP_WORKERS = 8
+
+_management_client = None
+
+
+def management_client():
+    """API Gateway Management API 用戶端（以 WebSocket stage 的 callback URL 為端點）"""
+    global _management_client
+    if _management_client is None:
+        import boto3
+        from calendar_core.db import client_config
+
+        _management_client = boto3.client(
+            'apigatewaymanagementapi',
+            endpoint_url=os.environ['WEBSOCKET_CALLBACK_URL'],
+            config=client_config()
+        )
+    return _management_client
+
+
+def lambda_handler(event, context):
+    changes_by_project = defaultdict(list)
+    for record in event.get('Records', []):
+        images = record.get('dynamodb', {})
+        message = realtime.diff(
+            deserialize_item(images.get('OldImage')),
+            deserialize_item(images.get('NewImage'))
+        )
+        if message:
+            changes_by_project[message['projectId']].append(message)
+
+    if not changes_by_project:
+        return {'sent': 0, 'stale': 0}
+
+    table = get_table()
+    with ThreadPoolExecutor(max_workers=LOOKUP_WORKERS) as executor:
+        project_ids = list(changes_by_project)
+        members_by_project = dict(zip(project_ids, executor.map(lambda pid: project_member_ids(table, pid), project_ids)))
+        user_ids = sorted({user_id for members in members_by_project.values() for user_id in members})
+        connections_by_user = dict(zip(user_ids, executor.map(realtime.user_connection_ids, user_ids)))
+
+    deliveries = []
+    for project_id, changes in changes_by_project.items():
+        connection_ids = [c for user_id in members_by_project[project_id] for c in connections_by_user[user_id]]
+        for payload in message_payloads(changes):
+            deliveries.extend((connection_id, payload) for connection_id in connection_ids)
+
+    if not deliveries:
+        return {'sent': 0, 'stale': 0}
+    with ThreadPoolExecutor(max_workers=POST_WORKERS) as executor:
+        results = list(executor.map(lambda delivery: post_message(*delivery), deliveries))
+
+    stale = sorted({connection_id for (connection_id, _), ok in zip(deliveries, results) if ok is None})
+    if stale:
+        realtime.connections_table().batch_write(delete_keys=[{'connectionId': c} for c in stale])
+    sent = sum(1 for ok in results if ok)
+    print(f"Pushed {sent} messages for {len(changes_by_project)} projects, removed {len(stale)} stale connections")
+    return {'sent': sent, 'stale': len(stale)}
+
+
+def message_payloads(changes):
+    """將變更分批編碼，每則不超過 MAX_MESSAGE_BYTES"""
+    payloads, batch, size = [], [], 0
+    for change in changes:
+        encoded_size = len(dumps(change).encode('utf-8'))
+        if batch and size + encoded_size > MAX_MESSAGE_BYTES:
+            payloads.append(dumps({'type': 'changes', 'changes': batch}).encode('utf-8'))
+            batch, size = [], 0
+        batch.append(change)
+        size += encoded_size
+    if batch:
+        payloads.append(dumps({'type': 'changes', 'changes': batch}).encode('utf-8'))
+    return payloads
+
+
+def post_message(connection_id, payload):
+    """送出單則訊息：成功回傳 True，連線已斷開回傳 None，其他錯誤回傳 False"""
+    client = management_client()
+    try:
+        client.post_to_connection(ConnectionId=connection_id, Data=payload)
+        return True
+    except client.exceptions.GoneException:
+        return None
+    except Exception as e:
+        print(f"Error posting to connection {connection_id}: {str(e)}")
+        return False
@@ -0,0 +1,178 @@
+"""
+全文搜尋 Lambda
+GET /search?q=<關鍵字>[&projectId=][&types=event,task][&limit=20][&cursor=]
+以反向索引（calendar_core.search，由 search_indexer 串流維護）搜尋事件與任務的標題/描述：
+- 權限：只查詢用戶所屬專案的搜尋分區（GSI1 成員關係）；帶 projectId 時須為該專案成員
+- 每個查詢詞元 × 每個分區一次 begins_with 查詢（平行送出），只取 SK 與 weight；
+  每個詞元在每個分區最多讀 MAX_POSTINGS_PER_TERM 筆，超過時回應帶 truncated=true
+- 結果須包含所有詞元，依 TF-IDF 分數排序；只對當頁結果以 BatchGetItem 讀取原項目
+- 排序需要完整的候選集合，分頁以簽章 cursor 記錄位移，每頁重新查詢並排序
+
+索引為最終一致：剛寫入的項目在串流處理後（通常數秒內）才搜尋得到；已刪除而索引尚未清除的項目略過。
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from calendar_core import build_response, http_handler, get_user_id, get_table, get_member_role
+from calendar_core import encode_cursor, decode_cursor, InvalidCursorError
+from calendar_core import search
+from calendar_core.formatting import format_event, format_task
+from calendar_core.permissions import member_project_ids
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 50
+MAX_POSTINGS_PER_TERM = 5000
+QUERY_PAGE_SIZE = 1000
+QUERY_WORKERS = 16
+
+
+@http_handler
+def lambda_handler(event, context):
+    try:
+        if event['httpMethod'] != 'GET':
+            return build_response(405, {'error': 'Method not allowed'})
+
+        user_id = get_user_id(event)
+        if not user_id:
+            return build_response(401, {'error': 'Unauthorized'})
+
+        return handle_search(user_id, event.get('queryStringParameters') or {})
+
+    except Exception as e:
+        print(f"Error searching: {str(e)}")
+        return build_response(500, {'error': 'Internal server error'})
+
+
+def handle_search(user_id, query_params):
+    query = (query_params.get('q') or '').strip()
+    if not query:
+        return build_response(400, {'error': 'Missing parameters', 'details': 'q is required'})
+    try:
+        terms = search.query_terms(query)
+        entity_types = parse_types(query_params.get('types'))
+        limit = parse_limit(query_params.get('limit'))
+    except ValueError as e:
+        return build_response(400, {'error': 'Invalid parameters', 'details': str(e)})
+    if not terms:
+        return build_response(400, {'error': 'Invalid parameters', 'details': 'q contains no searchable terms'})
+
+    project_id = query_params.get('projectId')
+    scope = '|'.join(['SEARCH', user_id, search.normalize(query), project_id or '', ','.join(entity_types)])
+    offset = 0
+    if query_params.get('cursor'):
+        try:
+            offset = int(decode_cursor(query_params['cursor'], scope)['offset'])
+        except (InvalidCursorError, KeyError, TypeError, ValueError) as e:
+            return build_response(400, {'error': 'Invalid cursor', 'details': str(e)})
+
+    table = get_table()
+    if project_id:
+        if get_member_role(project_id, user_id, table) is None:
+            return build_response(403, {'error': 'Insufficient permissions'})
+        project_ids = [project_id]
+    else:
+        project_ids = member_project_ids(table, user_id)
+
+    partitions = [pk for pid in project_ids for pk in search.project_partitions(pid, table)]
+    term_matches, truncated = find_postings(table, partitions, terms, entity_types)
+    ranked = search.rank(term_matches)
+
+    page = ranked[offset:offset + limit]
+    results = load_results(table, user_id, page)
+    body = {
+        'query': query,
+        'results': results,
+        'total': len(ranked),
+        'truncated': truncated
+    }
+    if offset + limit < len(ranked):
+        body['nextCursor'] = encode_cursor({'offset': offset + limit}, scope)
+    return build_response(200, body)
+
+
+def parse_types(value):
+    """types 參數（event、task，逗號分隔）轉為索引的項目類型；未帶時為全部"""
+    if not value:
+        return sorted(search.ENTITY_TYPES)
+    names = {name: entity_type for entity_type, name in search.ENTITY_TYPES.items()}
+    requested = [v.strip() for v in value.split(',') if v.strip()]
+    unknown = [v for v in requested if v not in names]
+    if unknown or not requested:
+        raise ValueError(f"types must be a comma-separated subset of {', '.join(sorted(names))}")
+    return sorted({names[v] for v in requested})
+
+
+def parse_limit(value):
+    try:
+        limit = int(value or DEFAULT_LIMIT)
+    except ValueError:
+        raise ValueError('limit must be an integer')
+    if limit < 1 or limit > MAX_LIMIT:
+        raise ValueError(f'limit must be between 1 and {MAX_LIMIT}')
+    return limit
+
+
+def read_postings(table, partition_pk, token, prefix):
+    """單一分區中符合詞元的索引項目 [(SK, weight)]，回傳 (項目, 是否達上限而截斷)"""
+    query_kwargs = {
+        'KeyConditionExpression': 'PK = :pk AND begins_with(SK, :token)',
+        'ProjectionExpression': 'SK, weight',
+        'ExpressionAttributeValues': {':pk': partition_pk, ':token': token if prefix else f'{token}#'},
+        'Limit': QUERY_PAGE_SIZE
+    }
+    postings = []
+    while True:
+        response = table.query(**query_kwargs)
+        postings.extend((item['SK'], item['weight']) for item in response.get('Items', []))
+        if 'LastEvaluatedKey' not in response:
+            return postings, False
+        if len(postings) >= MAX_POSTINGS_PER_TERM:
+            return postings, True
+        query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def find_postings(table, partitions, terms, entity_types):
+    """
+    每個查詢詞元的 {文件: 權重}，文件為 (項目類型, ID, 原項目 PK, 原項目 SK)
+    前綴比對到同一文件的多個詞元時取最高權重
+    """
+    jobs = [(index, pk, token, prefix) for index, (token, prefix) in enumerate(terms) for pk in partitions]
+    with ThreadPoolExecutor(max_workers=QUERY_WORKERS) as executor:
+        pages = list(executor.map(lambda job: read_postings(table, job[1], job[2], job[3]), jobs))
+
+    term_matches = [{} for _ in terms]
+    truncated = False
+    for (index, pk, _, _), (postings, page_truncated) in zip(jobs, pages):
+        truncated = truncated or page_truncated
+        matches = term_matches[index]
+        for sk, weight in postings:
+            _, entity_type, entity_id, source_key = search.parse_posting(pk, sk)
+            if entity_type not in entity_types:
+                continue
+            doc = (entity_type, entity_id, source_key['PK'], source_key['SK'])
+            matches[doc] = max(matches.get(doc, 0), int(weight))
+    return term_matches, truncated
+
+
+def load_results(table, user_id, page):
+    """讀取當頁結果的原項目；已刪除的項目略過"""
+    if not page:
+        return []
+    found = table.batch_get([{'PK': doc[2], 'SK': doc[3]} for _, doc in page])
+    results = []
+    for score, (entity_type, entity_id, pk, sk) in page:
+        item = found.get((pk, sk))
+        if item is None:
+            continue
+        result = {
+            'type': search.ENTITY_TYPES[entity_type],
+            'id': entity_id,
+            'projectId': item.get('projectId'),
+            'score': round(score, 3)
+        }
+        if entity_type == 'EVENT':
+            result['event'] = format_event(user_id, item)
+        else:
+            result['task'] = format_task(item)
+        results.append(result)
+    return results
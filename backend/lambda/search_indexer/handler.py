@@ -0,0 +1,40 @@
+"""
+全文搜尋索引 Lambda
+由 stream_dispatcher 依資料表串流分派：事件（EVENT#）與任務主項目（TASK#{id} / TASK#{id}）新增、修改、刪除時，
+依新舊影像的標題/描述詞元增量維護反向索引（見 calendar_core.search）。
+- 只寫入權重有變的索引項目、刪除不再出現的詞元；標題與描述未變的修改不產生寫入
+- 同一批記錄內同一索引鍵只保留最後一次異動（串流記錄依項目有序），再以 BatchWriteItem 寫入
+- 寫入失敗時拋出例外由串流重試；重複套用同一筆記錄的結果相同
+專案串聯刪除產生的 REMOVE 記錄會一併清除該專案的索引。
+"""
+
+from calendar_core import get_table
+from calendar_core import search
+from calendar_core.batch import write_batches
+from calendar_core.serde import deserialize_item
+
+WRITE_WORKERS = 4
+
+
+def lambda_handler(event, context):
+    table = get_table()
+    writes = {}
+    for record in event.get('Records', []):
+        images = record.get('dynamodb', {})
+        puts, deletes = search.posting_changes(
+            deserialize_item(images.get('OldImage')),
+            deserialize_item(images.get('NewImage')),
+            table
+        )
+        for key in deletes:
+            writes[(key['PK'], key['SK'])] = ('delete', key)
+        for posting in puts:
+            writes[(posting['PK'], posting['SK'])] = ('put', posting)
+
+    if not writes:
+        return {'written': 0}
+    errors = write_batches(table.client, table.name, list(writes.values()), max_workers=WRITE_WORKERS)
+    if errors:
+        raise RuntimeError(f"Failed to write {len(errors)} of {len(writes)} search postings: {next(iter(errors.values()))}")
+    print(f"Updated {len(writes)} search postings")
+    return {'written': len(writes)}
@@ -0,0 +1,38 @@
+"""
+衝突檢查分桶索引 Lambda
+由 stream_dispatcher 依資料表串流分派：事件（EVENT#）新增、修改、刪除時，
+依新舊影像維護依日分桶的區間項目（見 calendar_core.conflicts）。
+- 未帶 conflictCheck 的建立/更新與批次寫入只寫事件，分桶項目由這裡非同步補上
+- 同一批記錄內同一事件只套用第一筆舊影像到最後一筆新影像的淨變化（串流記錄依項目有序）；
+  區間未變（標題、描述等修改）時不產生寫入
+- 寫入後遞增各分桶版本，進行中的衝突檢查在提交時重新檢查
+- 帶 conflictCheck 的寫入與刪除已在交易內維護分桶項目，重複套用的結果相同；寫入失敗時拋出例外由串流重試
+"""
+
+from calendar_core import conflicts
+from calendar_core import get_table
+from calendar_core.serde import deserialize_item
+
+
+def lambda_handler(event, context):
+    changes = {}
+    for record in event.get('Records', []):
+        images = record.get('dynamodb', {})
+        old_item = deserialize_item(images.get('OldImage'))
+        new_item = deserialize_item(images.get('NewImage'))
+        item = new_item or old_item
+        if not item or item.get('entityType') != 'EVENT':
+            continue
+        key = (item['PK'], item['SK'])
+        first_old = changes[key][0] if key in changes else old_item
+        changes[key] = (first_old, new_item)
+
+    changed = [
+        (old_item, new_item) for old_item, new_item in changes.values()
+        if conflicts.entry_items(old_item) != conflicts.entry_items(new_item)
+    ]
+    if not changed:
+        return {'written': 0, 'deleted': 0}
+    written, deleted = conflicts.apply_changes(get_table(), changed)
+    print(f"Indexed {len(changed)} events: wrote {written} slot entries, deleted {deleted}")
+    return {'written': written, 'deleted': deleted}
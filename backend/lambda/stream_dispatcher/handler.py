@@ -0,0 +1,145 @@
+"""
+資料表串流分派 Lambda
+CalendarAppTable 的 DynamoDB 串流只由這個函數讀取：每個串流分片建議最多兩個讀取者，
+各背景作業各自掛事件來源映射時會互相爭用讀取額度而被節流。本函數在行程內依記錄內容分派：
+- membership_events：MEMBER# 項目異動
+- task_projector：任務主項目修改
+- dashboard_aggregator、search_indexer：任務與事件主項目的新增/修改/刪除
+- slot_indexer：事件主項目的新增/修改/刪除（衝突檢查的分桶項目）
+- list_versions：帶 GSI4PK 的項目與 MEMBER# 項目異動（列表 ETag 的版本計數）
+- project_cleanup：專案轉為刪除中時以非同步呼叫交給獨立的清除函數（可能執行數分鐘，不佔住串流）
+- realtime_fanout：PROJECT# 分區內的專案、事件/例外、任務列表項目；其他消費者都成功後才推播，
+  推播失敗只記錄不重試（客戶端以 GET /sync 補齊）
+各消費者只收到原本事件來源篩選條件會送達的記錄。任一消費者失敗時拋出例外讓整批重試（bisect），
+其他消費者會再次收到同一批記錄，因此每個消費者都必須可重複套用。
+
+部署時以 ../lambda 為程式碼根目錄（只打包被分派的目錄），各消費者以套件方式匯入。
+"""
+
+import json
+import os
+
+from calendar_core import keys
+
+from dashboard_aggregator import handler as dashboard_aggregator
+from list_versions import handler as list_versions
+from membership_events import handler as membership_events
+from realtime_fanout import handler as realtime_fanout
+from search_indexer import handler as search_indexer
+from slot_indexer import handler as slot_indexer
+from task_projector import handler as task_projector
+
+_lambda_client = None
+
+
+def _record_keys(record):
+    return record.get('dynamodb', {}).get('Keys', {})
+
+
+def _image_value(record, image, attribute):
+    """串流影像中字串屬性的值（AttributeValue 格式）；不存在時回傳 None"""
+    return record.get('dynamodb', {}).get(image, {}).get(attribute, {}).get('S')
+
+
+def is_membership_change(record):
+    return _record_keys(record).get('SK', {}).get('S', '').startswith(keys.MEMBER_PREFIX)
+
+
+def is_task_modify(record):
+    return record.get('eventName') == 'MODIFY' and _image_value(record, 'NewImage', 'entityType') == 'TASK'
+
+
+def is_task_or_event(record):
+    """新增/修改看 NewImage、刪除看 OldImage"""
+    return any(_image_value(record, image, 'entityType') in ('TASK', 'EVENT') for image in ('NewImage', 'OldImage'))
+
+
+def is_event(record):
+    """新增/修改看 NewImage、刪除看 OldImage"""
+    return any(_image_value(record, image, 'entityType') == 'EVENT' for image in ('NewImage', 'OldImage'))
+
+
+def is_list_change(record):
+    """專案分區內會出現在列表上的項目（新舊影像任一帶 GSI4PK）或成員關係異動"""
+    images = record.get('dynamodb', {})
+    return is_membership_change(record) or any('GSI4PK' in images.get(image, {}) for image in ('NewImage', 'OldImage'))
+
+
+def is_project_deletion(record):
+    """只在 status 由其他值轉為 DELETING 時觸發；清除函數寫回檢查點不會重複觸發"""
+    return (
+        record.get('eventName') == 'MODIFY'
+        and _image_value(record, 'NewImage', 'entityType') == 'PROJECT'
+        and _image_value(record, 'NewImage', 'status') == 'DELETING'
+        and _image_value(record, 'OldImage', 'status') != 'DELETING'
+    )
+
+
+def is_realtime_change(record):
+    """排序鍵 EVENT 前綴同時涵蓋 EVENT# 與 EVENTEX#；PROJECT# 為專案主項目"""
+    record_keys = _record_keys(record)
+    return (
+        record_keys.get('PK', {}).get('S', '').startswith(keys.PROJECT_PREFIX)
+        and record_keys.get('SK', {}).get('S', '').startswith((keys.PROJECT_PREFIX, 'EVENT', keys.TASK_PREFIX))
+    )
+
+
+# (名稱, 篩選條件, 處理函數)；依序執行
+CONSUMERS = (
+    ('membership_events', is_membership_change, membership_events.lambda_handler),
+    ('task_projector', is_task_modify, task_projector.lambda_handler),
+    ('dashboard_aggregator', is_task_or_event, dashboard_aggregator.lambda_handler),
+    ('search_indexer', is_task_or_event, search_indexer.lambda_handler),
+    ('slot_indexer', is_event, slot_indexer.lambda_handler),
+    ('list_versions', is_list_change, list_versions.lambda_handler),
+)
+
+
+def lambda_handler(event, context):
+    records = event.get('Records', [])
+    results, errors = {}, []
+    for name, accepts, handle in CONSUMERS:
+        selected = [record for record in records if accepts(record)]
+        if not selected:
+            continue
+        try:
+            results[name] = handle({'Records': selected}, context)
+        except Exception as e:
+            print(f"Error in stream consumer {name}: {str(e)}")
+            errors.append(e)
+
+    deleting = [record for record in records if is_project_deletion(record)]
+    if deleting:
+        try:
+            results['project_cleanup'] = start_project_cleanup(deleting)
+        except Exception as e:
+            print(f"Error starting project cleanup: {str(e)}")
+            errors.append(e)
+
+    if errors:
+        raise errors[0]
+
+    changes = [record for record in records if is_realtime_change(record)]
+    if changes:
+        try:
+            results['realtime_fanout'] = realtime_fanout.lambda_handler({'Records': changes}, context)
+        except Exception as e:
+            print(f"Error in stream consumer realtime_fanout: {str(e)}")
+    return results
+
+
+def start_project_cleanup(records):
+    """以非同步呼叫啟動專案清除函數（續跑輸入 {"projectId": ...}，每個專案一次）"""
+    global _lambda_client
+    if _lambda_client is None:
+        import boto3
+
+        _lambda_client = boto3.client('lambda')
+    project_ids = sorted({keys.strip_prefix(_image_value(record, 'NewImage', 'PK'), keys.PROJECT_PREFIX) for record in records})
+    for project_id in project_ids:
+        _lambda_client.invoke(
+            FunctionName=os.environ['PROJECT_CLEANUP_FUNCTION'],
+            InvocationType='Event',
+            Payload=json.dumps({'projectId': project_id}).encode('utf-8')
+        )
+    return {'started': len(project_ids)}
@@ -0,0 +1,183 @@
+"""
+差異同步 Lambda 函數
+GET /sync?since=<syncToken>：只回傳上次同步之後新增、修改或刪除的資料
+- 每個所屬專案一次 GSI4 查詢（GSI4PK = PROJECT#{id}，updatedAt > 水位），見 calendar_core.sync；
+  已啟用寫入分片的專案以 sharding.query_page 合併各分片
+- syncToken 為 HMAC 簽章的 {水位, 已同步專案}；新加入的專案整批回傳，
+  不再屬於的專案（退出或已刪除）回報為已刪除
+- 未帶 since、token 早於墓碑保留期時回傳完整資料並標記 full=true，客戶端應以此取代本地資料
+- 每頁最多 limit 筆（預設 SYNC_PAGE_LIMIT，避免超過 Lambda 6 MB 回應上限）；還有資料時回傳 nextCursor
+  （簽章的續讀位置：專案序號與該專案的分頁 cursor），客戶端以 ?cursor= 續讀，
+  syncToken 只出現在最後一頁，full 只出現在第一頁
+
+客戶端逐頁先套用 deleted，再以 id 覆寫 events/eventExceptions/tasks/projects；讀完最後一頁才保存 syncToken。
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from calendar_core import build_response, http_handler, get_user_id, get_table, encode_cursor, decode_cursor, InvalidCursorError
+from calendar_core import keys
+from calendar_core import pagination
+from calendar_core import sharding
+from calendar_core import sync
+from calendar_core.formatting import format_event, format_event_exception, format_task, format_project
+from calendar_core.permissions import member_project_ids
+
+# 水位往前重疊的秒數：涵蓋 GSI 最終一致延遲與各 Lambda 間的時鐘差，重疊部分客戶端以 id 覆寫即可
+SYNC_OVERLAP_SECONDS = 5
+SYNC_QUERY_WORKERS = 8
+# 每頁最多回傳的變動項目數（每筆約 1 KB 以內，遠低於 6 MB 回應上限）
+SYNC_PAGE_LIMIT = pagination.MAX_PAGE_LIMIT
+
+
+@http_handler
+def lambda_handler(event, context):
+    try:
+        if event['httpMethod'] != 'GET':
+            return build_response(405, {'error': 'Method not allowed'})
+
+        user_id = get_user_id(event)
+        if not user_id:
+            return build_response(401, {'error': 'Unauthorized'})
+
+        query_params = event.get('queryStringParameters') or {}
+        try:
+            limit = pagination.parse_limit({'limit': query_params.get('limit') or SYNC_PAGE_LIMIT})
+        except ValueError as e:
+            return build_response(400, {'error': str(e)})
+        return handle_sync(user_id, query_params.get('since'), query_params.get('cursor'), limit)
+
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        return build_response(500, {'error': 'Internal server error'})
+
+
+def handle_sync(user_id, since_token=None, cursor=None, limit=SYNC_PAGE_LIMIT):
+    """
+    回傳一頁同步資料
+    cursor 記錄第一頁決定的同步狀態（水位、下一個水位、專案清單與其中已同步的專案）
+    與續讀位置（專案序號 i、該專案的分頁 cursor k），續讀時不再讀取 since
+    """
+    scope = f'SYNC|{keys.user_pk(user_id)}'
+    page_scope = f'SYNC-PAGE|{keys.user_pk(user_id)}'
+    table = get_table()
+    body = {'events': [], 'eventExceptions': [], 'tasks': [], 'projects': [], 'deleted': []}
+
+    if cursor:
+        try:
+            state = decode_cursor(cursor, page_scope)
+        except InvalidCursorError as e:
+            return build_response(400, {'error': 'Invalid cursor', 'details': str(e)})
+    else:
+        now = datetime.utcnow()
+        watermark, synced_projects = None, set()
+        if since_token:
+            try:
+                token = decode_cursor(since_token, scope)
+            except InvalidCursorError as e:
+                return build_response(400, {'error': 'Invalid sync token', 'details': str(e)})
+            expired_before = sync.timestamp(now - timedelta(seconds=sync.TOMBSTONE_RETENTION_SECONDS))
+            # 墓碑可能已過期，無法得知期間的刪除，改為完整同步
+            if token['w'] >= expired_before:
+                watermark, synced_projects = token['w'], set(token['p'])
+
+        project_ids = member_project_ids(table, user_id)
+        for project_id in sorted(synced_projects - set(project_ids)):
+            body['deleted'].append({'type': 'project', 'id': project_id})
+        body['full'] = watermark is None
+        state = {
+            'w': watermark,
+            'n': sync.timestamp(now - timedelta(seconds=SYNC_OVERLAP_SECONDS)),
+            'p': sorted(project_ids),
+            's': sorted(synced_projects & set(project_ids)),
+            'i': 0,
+            'k': None
+        }
+
+    index, project_cursor = read_changes(table, user_id, state, body, limit)
+    if index < len(state['p']):
+        body['nextCursor'] = encode_cursor(dict(state, i=index, k=project_cursor), page_scope)
+    else:
+        body['syncToken'] = encode_cursor({'w': state['n'], 'p': state['p']}, scope)
+    return build_response(200, body)
+
+
+def read_changes(table, user_id, state, body, limit):
+    """
+    從 state 的續讀位置起，每次平行查詢最多 SYNC_QUERY_WORKERS 個專案（每個專案讀一頁），
+    依專案順序收進 body，直到累計 limit 筆；回傳下一頁的 (專案序號, 專案分頁 cursor)。
+    某專案的一頁放不下時不收入，下一頁從該專案原位置重讀（第一個專案一定收入，確保每頁都有進度）
+    """
+    project_ids, synced = state['p'], set(state['s'])
+    index, project_cursor = state['i'], state['k']
+    count = 0
+    while index < len(project_ids) and count < limit:
+        batch = project_ids[index:index + SYNC_QUERY_WORKERS]
+        cursors = [project_cursor] + [None] * (len(batch) - 1)
+        remaining = limit - count
+        with ThreadPoolExecutor(max_workers=SYNC_QUERY_WORKERS) as executor:
+            pages = list(executor.map(
+                lambda args: changed_items(
+                    table, args[0], state['w'] if args[0] in synced else None, remaining, args[1]
+                ),
+                zip(batch, cursors)
+            ))
+        for project_id, start, (items, next_cursor) in zip(batch, cursors, pages):
+            if count and count + len(items) > limit:
+                return index, start
+            count += len(items)
+            # 專案刪除中時不再讀取其餘頁面
+            if not collect_changes(body, user_id, project_id, items) and next_cursor:
+                return index, next_cursor
+            index, project_cursor = index + 1, None
+    return index, project_cursor
+
+
+def changed_items(table, project_id, watermark=None, limit=None, cursor=None):
+    """
+    專案分區在水位之後變動的項目，回傳 (items, next_cursor)；watermark 為 None 時回傳全部
+    已啟用寫入分片的專案合併各分片（依 updatedAt 排序）
+    """
+    key_condition = 'GSI4PK = :pk'
+    values = {':pk': keys.project_pk(project_id)}
+    if watermark:
+        key_condition += ' AND updatedAt > :since'
+        values[':since'] = watermark
+    query_kwargs = {
+        'IndexName': sync.SYNC_INDEX,
+        'KeyConditionExpression': key_condition,
+        'ExpressionAttributeValues': values
+    }
+    scope = '|'.join(['SYNC', keys.project_pk(project_id), watermark or ''])
+    return sharding.query_page(
+        table, query_kwargs, sharding.partitions(project_id, table), scope, ('GSI4PK', 'updatedAt'),
+        limit=limit, cursor=cursor
+    )
+
+
+def collect_changes(body, user_id, project_id, items):
+    """依排序鍵分類單一專案的變動項目；專案刪除中時只回報專案已刪除並回傳 True"""
+    header_sk = keys.project_pk(project_id)
+    if any(it['SK'] == header_sk and it.get('status') == 'DELETING' for it in items):
+        body['deleted'].append({'type': 'project', 'id': project_id})
+        return True
+
+    for it in items:
+        sk = it['SK']
+        if sk == header_sk:
+            body['projects'].append(format_project(it))
+        elif sk.startswith(keys.TOMBSTONE_PREFIX):
+            body['deleted'].append({
+                'type': it['deletedType'],
+                'id': it['deletedId'],
+                'projectId': project_id,
+                'deletedAt': it['updatedAt']
+            })
+        elif sk.startswith(keys.EVENT_EXCEPTION_PREFIX):
+            body['eventExceptions'].append(format_event_exception(it))
+        elif sk.startswith(keys.EVENT_PREFIX):
+            body['events'].append(format_event(user_id, it))
+        elif sk.startswith(keys.TASK_PREFIX):
+            body['tasks'].append(format_task(it))
+    return False
@@ -4,15 +4,22 @@
 """
 
 import json
-import boto3
-import os
-from datetime import datetime
-from boto3.dynamodb.conditions import Key, Attr
+from calendar_core import build_response, http_handler, build_list_response, not_modified_response, get_user_id, get_table, get_member_role, new_id
+from calendar_core import index_projection
+from calendar_core import keys
+from calendar_core import pagination
+from calendar_core import projections
+from calendar_core import sharding
+from calendar_core import sync
+from calendar_core import versions
+from calendar_core.formatting import format_task
+from calendar_core.db import cancellation_codes, cancellation_item, condition_failure_item
 
-# 初始化 DynamoDB 客戶端
-dynamodb = boto3.resource('dynamodb')
-table = dynamodb.Table(os.environ['DYNAMODB_TABLE'])
+# 刪除任務時讀取後被修改，以交易附帶的最新任務重建交易的次數上限
+DELETE_TASK_ATTEMPTS = 3
 
+
+@http_handler
 def lambda_handler(event, context):
     """
     處理任務管理請求
@@ -49,15 +56,14 @@ def create_task(event, user_id):
         if not body.get('title') or not body.get('projectId'):
             return build_response(400, {'error': 'Task title and projectId are required'})
         
-        # 生成任務ID
-        task_id = f"task-{int(datetime.now().timestamp())}"
+        # 生成任務ID（ULID：唯一且依建立時間排序）
+        task_id = new_id('task-')
         
         # 任務資料
         task_data = {
-            'PK': f'TASK#{task_id}',
-            'SK': f'TASK#{task_id}',
-            'GSI1PK': f'TASK#{task_id}',
-            'GSI1SK': f'TASK#{task_id}',
+            **keys.task_key(task_id),
+            'GSI1PK': keys.task_pk(task_id),
+            'GSI1SK': keys.task_pk(task_id),
             'title': body['title'],
             'description': body.get('description', ''),
             'status': body.get('status', 'TODO'),
@@ -66,36 +72,40 @@ def create_task(event, user_id):
             'assigneeId': body.get('assigneeId'),
             'dueDate': body.get('dueDate'),
             'entityType': 'TASK',
-            'createdAt': datetime.now().isoformat(),
-            'updatedAt': datetime.now().isoformat()
-        }
-        
-        # 創建專案任務關係
-        project_task_relation = {
-            'PK': f'PROJECT#{body["projectId"]}',
-            'SK': f'TASK#{task_id}',
-            'GSI1PK': f'TASK#{task_id}',
-            'GSI1SK': f'PROJECT#{body["projectId"]}',
-            'assignedAt': datetime.now().isoformat()
+            'createdAt': sync.timestamp(),
+            'updatedAt': sync.timestamp()
         }
+        # 創建專案任務關係：帶列表欄位與 GSI3（專案 + 截止日），列出專案任務只需一次查詢
+        project_task_relation = projections.project_task_item(task_id, task_data, task_data['createdAt'])
         
-        # 創建用戶任務關係（如果指定了負責人）
+        # 創建用戶任務關係（如果指定了負責人）：帶列表欄位與 GSI2（負責人 + 截止日）
         user_task_relation = None
         if body.get('assigneeId'):
-            user_task_relation = {
-                'PK': f'USER#{body["assigneeId"]}',
-                'SK': f'TASK#{task_id}',
-                'GSI1PK': f'TASK#{task_id}',
-                'GSI1SK': f'USER#{body["assigneeId"]}',
-                'assignedAt': datetime.now().isoformat()
-            }
-        
-        # 寫入 DynamoDB
-        with table.batch_writer() as batch:
-            batch.put_item(Item=task_data)
-            batch.put_item(Item=project_task_relation)
-            if user_task_relation:
-                batch.put_item(Item=user_task_relation)
+            user_task_relation = projections.user_task_item(task_id, task_data, task_data['createdAt'])
+        
+        # 寫入 DynamoDB：單次往返的交易寫入，任務與關係項目全部成功或全部不寫
+        put_items = [task_data, project_task_relation]
+        if user_task_relation:
+            put_items.append(user_task_relation)
+        table = get_table()
+        try:
+            table.transact_write([
+                # 專案須存在且未在刪除中，避免在串聯刪除途中留下孤兒任務
+                {'ConditionCheck': {
+                    'Key': keys.project_key(body['projectId']),
+                    'ConditionExpression': 'attribute_exists(PK) AND (attribute_not_exists(#status) OR #status <> :deleting)',
+                    'ExpressionAttributeNames': {'#status': 'status'},
+                    'ExpressionAttributeValues': {':deleting': 'DELETING'}
+                }},
+                *[{'Put': {'Item': item, 'ConditionExpression': 'attribute_not_exists(PK)'}} for item in put_items]
+            ])
+        except table.exceptions.TransactionCanceledException as e:
+            codes = cancellation_codes(e)
+            if codes and codes[0] == 'ConditionalCheckFailed':
+                return build_response(404, {'error': 'Project not found'})
+            if 'ConditionalCheckFailed' in codes:
+                return build_response(409, {'error': 'Task already exists'})
+            raise
         
         return build_response(201, {
             'message': 'Task created successfully',
@@ -115,57 +125,119 @@ def create_task(event, user_id):
         return build_response(500, {'error': 'Failed to create task'})
 
 def get_tasks(event, user_id):
-    """獲取任務"""
+    """
+    獲取任務（分頁）
+    - 專案任務：GSI3（PROJECT# + 截止日）；否則為負責人任務：GSI2（USER# + 截止日，未指定時為目前用戶）
+    - 兩者讀取的都是帶列表欄位的關係項目，一次查詢即可，不需再讀任務主項目
+    - 已啟用寫入分片的專案平行查詢各分片並依截止日合併（calendar_core.sharding）
+    - 截止日區間（dueFrom/dueTo）為 KeyCondition；status/priority/assigneeId 為伺服器端 FilterExpression
+    - 專案任務限專案成員讀取；assigneeId 只在專案內作為篩選條件，未指定專案時一律為目前用戶的任務
+    - 依截止日排序（order=desc 反向），無截止日的任務排在最後
+    """
     try:
-        # 檢查是否有專案ID參數
-        path_parameters = event.get('pathParameters', {})
-        project_id = path_parameters.get('projectId')
-        
+        path_parameters = event.get('pathParameters') or {}
+        query_params = event.get('queryStringParameters') or {}
+        project_id = path_parameters.get('projectId') or query_params.get('projectId')
+        assignee_id = query_params.get('assigneeId')
+        
+        limit = None
+        if not pagination.wants_all(query_params):
+            try:
+                limit = pagination.parse_limit(query_params)
+            except ValueError as e:
+                return build_response(400, {'error': 'Invalid limit', 'details': str(e)})
+        try:
+            fields = index_projection.parse_fields(query_params)
+        except ValueError as e:
+            return build_response(400, {'error': 'Invalid fields', 'details': str(e)})
+        order = (query_params.get('order') or 'asc').lower()
+        if order not in ('asc', 'desc'):
+            return build_response(400, {'error': 'Invalid order', 'details': 'order must be asc or desc'})
+        
+        table = get_table()
         if project_id:
-            # 獲取指定專案的所有任務
-            response = table.query(
-                KeyConditionExpression=Key('PK').eq(f'PROJECT#{project_id}') & 
-                                      Key('SK').begins_with('TASK#')
-            )
+            if get_member_role(project_id, user_id, table) is None:
+                return build_response(403, {'error': 'Insufficient permissions'})
+            index_name, pk_name, sk_name, partition = 'GSI3', 'GSI3PK', 'GSI3SK', keys.project_pk(project_id)
+            partitions = sharding.partitions(project_id)
         else:
-            # 獲取用戶的所有任務
-            response = table.query(
-                IndexName='GSI1',
-                KeyConditionExpression=Key('GSI1PK').eq(f'USER#{user_id}') & 
-                                      Key('GSI1SK').begins_with('TASK#')
+            # 未指定專案時只列出目前用戶的任務（不能查看其他用戶跨專案的任務）
+            assignee_id = user_id
+            index_name, pk_name, sk_name, partition = 'GSI2', 'GSI2PK', 'GSI2SK', keys.user_pk(assignee_id)
+            partitions = [partition]
+        
+        # 版本戳未變時直接回 304，不執行列表查詢（負責人的任務以負責人所屬專案為範圍）
+        version = versions.project_version(table, project_id) if project_id else versions.user_version(table, assignee_id)
+        cached = not_modified_response(event, version)
+        if cached:
+            return cached
+        
+        range_expr, values = due_date_condition(sk_name, query_params.get('dueFrom'), query_params.get('dueTo'))
+        query_kwargs = {
+            'IndexName': index_name,
+            'KeyConditionExpression': f'{pk_name} = :pk AND {range_expr}',
+            'ExpressionAttributeValues': {':pk': partition, **values},
+            'ScanIndexForward': order == 'asc'
+        }
+        
+        filters, names = [], {}
+        for param, attribute in (('status', 'status'), ('priority', 'priority')):
+            if query_params.get(param):
+                options = [v for v in query_params[param].split(',') if v]
+                placeholders = [f':{param}{i}' for i in range(len(options))]
+                filters.append(f"#{attribute} IN ({', '.join(placeholders)})")
+                names[f'#{attribute}'] = attribute
+                query_kwargs['ExpressionAttributeValues'].update(zip(placeholders, options))
+        if project_id and assignee_id:
+            filters.append('#assigneeId = :assigneeId')
+            names['#assigneeId'] = 'assigneeId'
+            query_kwargs['ExpressionAttributeValues'][':assigneeId'] = assignee_id
+        if filters:
+            query_kwargs['FilterExpression'] = ' AND '.join(filters)
+            query_kwargs['ExpressionAttributeNames'] = names
+        
+        # cursor 綁定索引、分區與所有篩選條件
+        scope = '|'.join([index_name, partition, order] + [
+            query_params.get(name) or '' for name in ('assigneeId', 'status', 'priority', 'dueFrom', 'dueTo')
+        ])
+        try:
+            items, next_cursor = sharding.query_page(
+                get_table(), query_kwargs, partitions, scope, (pk_name, sk_name),
+                limit=limit, cursor=query_params.get('cursor')
             )
+        except pagination.InvalidCursorError as e:
+            return build_response(400, {'error': 'Invalid cursor', 'details': str(e)})
+        
+        # 索引只投影列表欄位，fields=full 時才由資料表補上描述（預設 summary 不補讀、省略描述欄位）
+        full = fields == index_projection.FIELDS_FULL
+        if full:
+            index_projection.hydrate(get_table(), items)
+        tasks = [format_task(item, full) for item in items]
         
-        tasks = []
-        for item in response['Items']:
-            if 'title' in item:  # 確保是任務項目
-                tasks.append({
-                    'id': item['PK'].replace('TASK#', ''),
-                    'title': item['title'],
-                    'description': item.get('description', ''),
-                    'status': item.get('status', 'TODO'),
-                    'priority': item.get('priority', 'MEDIUM'),
-                    'projectId': item.get('projectId'),
-                    'assigneeId': item.get('assigneeId'),
-                    'dueDate': item.get('dueDate'),
-                    'createdAt': item['createdAt'],
-                    'updatedAt': item['updatedAt']
-                })
-        
-        return build_response(200, {'tasks': tasks})
+        response_body = {'tasks': tasks, 'count': len(tasks)}
+        if limit is not None:
+            response_body['nextCursor'] = next_cursor
+        return build_list_response(event, response_body, version)
         
     except Exception as e:
         print(f"Error getting tasks: {str(e)}")
         return build_response(500, {'error': 'Failed to get tasks'})
 
+def due_date_condition(sk_name, due_from, due_to):
+    """
+    建立截止日排序鍵（TASK#{截止日}#{taskId}）的範圍條件，回傳 (條件字串, 參數值)
+    指定任一端點時排除沒有截止日的任務；結束值補上 '~' 以涵蓋當天所有任務
+    """
+    if not due_from and not due_to:
+        return f'begins_with({sk_name}, :taskPrefix)', {':taskPrefix': keys.TASK_PREFIX}
+    lower = f'{keys.TASK_PREFIX}{due_from or ""}'
+    upper = f'{keys.TASK_PREFIX}{due_to or "9999-12-31"}~'
+    return f'{sk_name} BETWEEN :dueFrom AND :dueTo', {':dueFrom': lower, ':dueTo': upper}
+
 def update_task(event, user_id):
     """更新任務"""
     try:
         task_id = event['pathParameters']['taskId']
-        
-        # 檢查用戶權限（任務創建者或專案擁有者）
-        if not check_task_permission(task_id, user_id):
-            return build_response(403, {'error': 'Insufficient permissions'})
-        
         body = json.loads(event['body'])
         
         # 更新表達式
@@ -205,18 +277,18 @@ def update_task(event, user_id):
         
         update_expression += '#updatedAt = :updatedAt'
         expression_attribute_names['#updatedAt'] = 'updatedAt'
-        expression_attribute_values[':updatedAt'] = datetime.now().isoformat()
-        
-        # 更新任務
-        table.update_item(
-            Key={
-                'PK': f'TASK#{task_id}',
-                'SK': f'TASK#{task_id}'
-            },
+        expression_attribute_values[':updatedAt'] = sync.timestamp()
+        
+        # 更新任務（權限檢查併入條件寫入）；關係項目上的列表副本由 task_projector 依串流同步
+        table = get_table()
+        task = write_task_as_permitted(
+            table.update_item, task_id, user_id,
             UpdateExpression=update_expression,
             ExpressionAttributeNames=expression_attribute_names,
             ExpressionAttributeValues=expression_attribute_values
         )
+        if task is None:
+            return build_response(403, {'error': 'Insufficient permissions'})
         
         return build_response(200, {'message': 'Task updated successfully'})
         
@@ -229,103 +301,104 @@ def delete_task(event, user_id):
     try:
         task_id = event['pathParameters']['taskId']
         
-        # 檢查用戶權限
-        if not check_task_permission(task_id, user_id):
-            return build_response(403, {'error': 'Insufficient permissions'})
-        
-        # 獲取任務信息以刪除相關關係
-        task_response = table.get_item(
-            Key={
-                'PK': f'TASK#{task_id}',
-                'SK': f'TASK#{task_id}'
-            }
-        )
-        
-        if 'Item' in task_response:
-            task = task_response['Item']
-            project_id = task.get('projectId')
-            assignee_id = task.get('assigneeId')
-            
-            # 刪除任務本身
-            table.delete_item(
-                Key={
-                    'PK': f'TASK#{task_id}',
-                    'SK': f'TASK#{task_id}'
-                }
-            )
-            
-            # 刪除專案任務關係
-            if project_id:
-                table.delete_item(
-                    Key={
-                        'PK': f'PROJECT#{project_id}',
-                        'SK': f'TASK#{task_id}'
-                    }
-                )
-            
-            # 刪除用戶任務關係
-            if assignee_id:
-                table.delete_item(
-                    Key={
-                        'PK': f'USER#{assignee_id}',
-                        'SK': f'TASK#{task_id}'
-                    }
-                )
-        
-        return build_response(200, {'message': 'Task deleted successfully'})
+        # 專案/用戶任務關係項目的鍵（專案分片、負責人）只記錄在任務本身，交易無法在伺服器端推導，
+        # 所以仍需先讀一次任務；讀取後被修改時由交易失敗附帶的最新任務重建交易，不再重讀
+        table = get_table()
+        task = table.get_item(Key=keys.task_key(task_id), ConsistentRead=True).get('Item')
+        for _ in range(DELETE_TASK_ATTEMPTS):
+            if not task or not can_modify_task(task, user_id, table):
+                return build_response(403, {'error': 'Insufficient permissions'})
+            try:
+                table.transact_write(delete_task_operations(task_id, task, table))
+                return build_response(200, {'message': 'Task deleted successfully'})
+            except table.exceptions.TransactionCanceledException as e:
+                if cancellation_codes(e)[0] != 'ConditionalCheckFailed':
+                    raise
+                task = cancellation_item(e, 0)
+        
+        return build_response(409, {'error': 'Task was modified, please retry'})
         
     except Exception as e:
         print(f"Error deleting task: {str(e)}")
         return build_response(500, {'error': 'Failed to delete task'})
 
-def check_task_permission(task_id, user_id):
-    """檢查用戶對任務的權限"""
+def delete_task_operations(task_id, task, table):
+    """
+    任務與專案/用戶任務關係在同一筆交易中刪除（並寫入同步墓碑）；以 updatedAt 確認讀取後未被修改，
+    條件失敗時附帶最新任務（第一個操作）
+    """
+    operations = [{'Delete': {
+        'Key': keys.task_key(task_id),
+        'ConditionExpression': 'attribute_exists(PK) AND #updatedAt = :updatedAt',
+        'ExpressionAttributeNames': {'#updatedAt': 'updatedAt'},
+        'ExpressionAttributeValues': {':updatedAt': task['updatedAt']},
+        'ReturnValuesOnConditionCheckFailure': 'ALL_OLD'
+    }}]
+    if task.get('projectId'):
+        shard = sharding.shard_for(task['projectId'], task_id, table)
+        operations.append({'Delete': {'Key': keys.project_task_key(task['projectId'], task_id, shard)}})
+        operations.append({'Put': {'Item': sync.tombstone_item(task['projectId'], 'task', task_id, shard)}})
+    if task.get('assigneeId'):
+        operations.append({'Delete': {'Key': keys.user_task_key(task['assigneeId'], task_id)}})
+    return operations
+
+def can_modify_task(task, user_id, table):
+    """任務負責人或專案擁有者可修改任務"""
+    if task.get('assigneeId') == user_id:
+        return True
+    project_id = task.get('projectId')
+    return bool(project_id) and get_member_role(project_id, user_id, table) == 'OWNER'
+
+def write_task_as_permitted(write, task_id, user_id, **kwargs):
+    """
+    以條件寫入代替「先讀任務、再讀成員關係、最後寫入」：
+    - 任務負責人：條件 assigneeId = 用戶，一次往返完成
+    - 其他用戶：由條件失敗時附帶的舊任務取得 projectId，確認（快取的）成員角色為 OWNER 後，
+      以 projectId 未變為條件重試
+    write 為 table.update_item 等單項寫入；成功時回傳寫入前的任務，任務不存在或無權限時回傳 None
+    """
+    table = get_table()
+    names = kwargs.pop('ExpressionAttributeNames', {})
+    values = kwargs.pop('ExpressionAttributeValues', {})
     try:
-        # 獲取任務信息
-        task_response = table.get_item(
-            Key={
-                'PK': f'TASK#{task_id}',
-                'SK': f'TASK#{task_id}'
-            }
+        response = write(
+            Key=keys.task_key(task_id),
+            ConditionExpression='attribute_exists(PK) AND #permAssignee = :permUser',
+            ExpressionAttributeNames={**names, '#permAssignee': 'assigneeId'},
+            ExpressionAttributeValues={**values, ':permUser': user_id},
+            ReturnValues='ALL_OLD',
+            ReturnValuesOnConditionCheckFailure='ALL_OLD',
+            **kwargs
         )
-        
-        if 'Item' not in task_response:
-            return False
-        
-        task = task_response['Item']
-        project_id = task.get('projectId')
-        
-        # 檢查是否是任務創建者
-        if task.get('assigneeId') == user_id:
-            return True
-        
-        # 檢查是否是專案擁有者
-        if project_id:
-            member_response = table.get_item(
-                Key={
-                    'PK': f'PROJECT#{project_id}',
-                    'SK': f'MEMBER#{user_id}'
-                }
-            )
-            
-            if 'Item' in member_response:
-                return member_response['Item'].get('role') == 'OWNER'
-        
-        return False
-        
-    except Exception as e:
-        print(f"Error checking task permission: {str(e)}")
-        return False
+        return response['Attributes']
+    except table.exceptions.ConditionalCheckFailedException as e:
+        task = condition_failure_item(e)
+
+    if not task or not can_modify_task(task, user_id, table):
+        return None
+    project_id = task['projectId']
+
+    try:
+        response = write(
+            Key=keys.task_key(task_id),
+            ConditionExpression='attribute_exists(PK) AND #permProject = :permProject',
+            ExpressionAttributeNames={**names, '#permProject': 'projectId'},
+            ExpressionAttributeValues={**values, ':permProject': project_id},
+            ReturnValues='ALL_OLD',
+            **kwargs
+        )
+        return response['Attributes']
+    except table.exceptions.ConditionalCheckFailedException:
+        # 任務在兩次請求之間被刪除或移到其他專案
+        return None
 
 def get_user_id_from_event(event):
     """從事件中獲取用戶ID"""
     try:
         # 從 Cognito 認證中獲取用戶ID
-        if 'requestContext' in event and 'authorizer' in event['requestContext']:
-            if 'claims' in event['requestContext']['authorizer']:
-                claims = event['requestContext']['authorizer']['claims']
-                if 'sub' in claims:
-                    return claims['sub']
+        user_id = get_user_id(event)
+        if user_id:
+            return user_id
         
         # 如果沒有 Cognito 認證，嘗試從 Authorization header 解析 JWT（延遲導入 jwt）
         if 'headers' in event and event['headers'] and ('Authorization' in event['headers'] or 'authorization' in event['headers']):
@@ -347,16 +420,3 @@ def get_user_id_from_event(event):
     except Exception as e:
         print(f"Error extracting user ID: {str(e)}")
         return 'demo-user'
-
-def build_response(status_code, body):
-    """構建 HTTP 響應"""
-    return {
-        'statusCode': status_code,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Headers': 'Content-Type,Authorization',
-            'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS'
-        },
-        'body': json.dumps(body, ensure_ascii=False)
-    }
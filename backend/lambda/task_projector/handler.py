@@ -0,0 +1,95 @@
+"""
+任務列表投影 Lambda
+由 stream_dispatcher 依資料表串流分派：任務主項目（TASK#{id} / TASK#{id}）被修改時，
+把列表欄位同步到 PROJECT# / USER# 關係項目（見 calendar_core.projections）。
+- 關係項目以 projections 產生的完整項目覆寫（Put），舊資料缺少的欄位或索引鍵一併補上
+- 負責人變更時刪除所有不屬於目前負責人的 USER# 項目：以 GSI1 找出任務現有的關係項目，
+  而不是依串流舊影像，較早的記錄被略過後重播也不會留下前任負責人的項目
+- 每筆記錄以一筆交易寫入，並確認主項目的 updatedAt 仍與串流影像相同；
+  主項目已被刪除或再次修改時略過（較新的串流記錄會接手）
+新增與刪除已由 create_task / delete_task 在同一筆交易中處理，不需投影。
+"""
+
+from calendar_core import get_table
+from calendar_core import keys
+from calendar_core import projections
+from calendar_core.db import cancellation_codes
+from calendar_core.serde import deserialize_item
+
+
+def lambda_handler(event, context):
+    table = get_table()
+    projected = skipped = 0
+    for record in event.get('Records', []):
+        if record.get('eventName') != 'MODIFY':
+            continue
+        images = record.get('dynamodb', {})
+        new_task = deserialize_item(images.get('NewImage'))
+        old_task = deserialize_item(images.get('OldImage'))
+        if not new_task or new_task.get('entityType') != 'TASK' or new_task['PK'] != new_task['SK']:
+            continue
+        if project_task(table, new_task, old_task or {}):
+            projected += 1
+        else:
+            skipped += 1
+
+    if projected or skipped:
+        print(f"Projected {projected} task updates, skipped {skipped} stale records")
+    return {'projected': projected, 'skipped': skipped}
+
+
+def project_task(table, task, old_task):
+    """同步單一任務的關係項目；記錄已過時時回傳 False"""
+    task_id = keys.strip_prefix(task['PK'], keys.TASK_PREFIX)
+    operations = [{'ConditionCheck': {
+        'Key': keys.task_key(task_id),
+        'ConditionExpression': '#updatedAt = :updatedAt',
+        'ExpressionAttributeNames': {'#updatedAt': 'updatedAt'},
+        'ExpressionAttributeValues': {':updatedAt': task['updatedAt']}
+    }}]
+
+    # 專案端：關係項目建立時 assignedAt 即為任務建立時間
+    operations.append({'Put': {'Item': projections.project_task_item(task_id, task, task['createdAt'])}})
+
+    # 負責人端：GSI1 為最終一致，剛建立的項目可能尚未出現，串流舊影像的負責人也一併刪除
+    assignee_id = task.get('assigneeId')
+    stale_assignees = set(current_assignees(table, task_id))
+    if old_task.get('assigneeId'):
+        stale_assignees.add(old_task['assigneeId'])
+    stale_assignees.discard(assignee_id)
+    for stale_assignee_id in sorted(stale_assignees):
+        operations.append({'Delete': {'Key': keys.user_task_key(stale_assignee_id, task_id)}})
+    if assignee_id:
+        operations.append({'Put': {
+            'Item': projections.user_task_item(task_id, task, assigned_at(table, task_id, task))
+        }})
+
+    try:
+        table.transact_write(operations)
+    except table.exceptions.TransactionCanceledException as e:
+        codes = cancellation_codes(e)
+        if codes and codes[0] == 'ConditionalCheckFailed':
+            return False
+        raise
+    return True
+
+
+def current_assignees(table, task_id):
+    """任務現有 USER# 關係項目的負責人 ID（GSI1：GSI1PK = TASK#{id}，只取鍵）"""
+    response = table.query(
+        IndexName='GSI1',
+        KeyConditionExpression='GSI1PK = :pk AND begins_with(GSI1SK, :prefix)',
+        ProjectionExpression='GSI1SK',
+        ExpressionAttributeValues={':pk': keys.task_pk(task_id), ':prefix': keys.USER_PREFIX}
+    )
+    return [keys.strip_prefix(item['GSI1SK'], keys.USER_PREFIX) for item in response.get('Items', [])]
+
+
+def assigned_at(table, task_id, task):
+    """負責人未變時沿用既有項目的 assignedAt，新負責人以本次修改時間為準"""
+    item = table.get_item(
+        Key=keys.user_task_key(task['assigneeId'], task_id),
+        ProjectionExpression='assignedAt',
+        ConsistentRead=True
+    ).get('Item')
+    return (item or {}).get('assignedAt') or task['updatedAt']
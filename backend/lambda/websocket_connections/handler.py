@@ -0,0 +1,50 @@
+"""
+WebSocket 連線管理 Lambda
+- $connect：驗證查詢參數 token（Cognito ID/access token），以其 sub 為 userId 記錄連線
+- $disconnect：刪除連線記錄
+連線記錄供 realtime_fanout 查詢專案成員的連線並推播變更。
+"""
+
+import time
+from datetime import datetime
+
+from calendar_core import realtime
+from calendar_core.cognito import InvalidTokenError, verify_token
+
+
+def lambda_handler(event, context):
+    request_context = event.get('requestContext') or {}
+    route_key = request_context.get('routeKey')
+    connection_id = request_context.get('connectionId')
+
+    try:
+        if route_key == '$connect':
+            return handle_connect(connection_id, event.get('queryStringParameters') or {})
+        if route_key == '$disconnect':
+            realtime.connections_table().delete_item(Key={'connectionId': connection_id})
+            return {'statusCode': 200}
+        return {'statusCode': 400}
+
+    except Exception as e:
+        print(f"Error handling {route_key}: {str(e)}")
+        return {'statusCode': 500}
+
+
+def handle_connect(connection_id, query_params):
+    """驗證 token 並記錄連線；token 無效時回 401（API Gateway 會拒絕連線）"""
+    token = query_params.get('token')
+    if not token:
+        return {'statusCode': 401}
+    try:
+        claims = verify_token(token)
+    except InvalidTokenError as e:
+        print(f"Rejected WebSocket connection: {str(e)}")
+        return {'statusCode': 401}
+
+    realtime.connections_table().put_item(Item={
+        'connectionId': connection_id,
+        'userId': claims['sub'],
+        'connectedAt': datetime.utcnow().isoformat() + 'Z',
+        'expiresAt': int(time.time()) + realtime.CONNECTION_TTL_SECONDS
+    })
+    return {'statusCode': 200}
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+事件日期索引鍵回填腳本
+為既有的 EVENT 項目補上日期範圍查詢所需的鍵：
+- GSI2SK：使用者 + 開始時間索引的排序鍵（與 startDate 同步）
+- GSI3PK / GSI3SK：專案 + 開始時間索引
+- weekOfYear：改以 ISO 週曆計算（修正跨年週次）
+
+用法：
+    python backfill_event_date_keys.py --table calendar-app-data [--segments 4] [--dry-run]
+"""
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import boto3
+from boto3.dynamodb.conditions import Attr
+
+
+def compute_week_of_year(start_date):
+    """與 events/handler.py 相同的 ISO 週次計算"""
+    start_dt = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
+    iso_year, iso_week, _ = start_dt.isocalendar()
+    return f"{iso_year}-W{iso_week:02d}"
+
+
+def desired_keys(item):
+    """計算項目應有的日期索引鍵；無法判定時回傳 None"""
+    start_date = item.get('startDate')
+    project_id = item.get('projectId') or item['PK'].replace('PROJECT#', '')
+    if not start_date:
+        return None
+    return {
+        'GSI2SK': start_date,
+        'GSI3PK': f'PROJECT#{project_id}',
+        'GSI3SK': start_date,
+        'weekOfYear': compute_week_of_year(start_date)
+    }
+
+
+def backfill_segment(table, segment, total_segments, dry_run):
+    """處理單一平行掃描區段，回傳 (掃描數, 更新數)"""
+    scan_kwargs = {
+        'FilterExpression': Attr('entityType').eq('EVENT'),
+        'Segment': segment,
+        'TotalSegments': total_segments
+    }
+    scanned = updated = 0
+    while True:
+        response = table.scan(**scan_kwargs)
+        for item in response.get('Items', []):
+            scanned += 1
+            keys = desired_keys(item)
+            if not keys or all(item.get(k) == v for k, v in keys.items()):
+                continue
+            updated += 1
+            if dry_run:
+                print(f"[dry-run] {item['PK']} {item['SK']} -> {keys}")
+                continue
+            try:
+                table.update_item(
+                    Key={'PK': item['PK'], 'SK': item['SK']},
+                    UpdateExpression='SET ' + ', '.join(f"#{k} = :{k}" for k in keys),
+                    ExpressionAttributeNames={f"#{k}": k for k in keys},
+                    ExpressionAttributeValues={f":{k}": v for k, v in keys.items()},
+                    # 回填期間項目可能已被刪除，避免把它重新建立
+                    ConditionExpression='attribute_exists(PK)'
+                )
+            except table.meta.client.exceptions.ConditionalCheckFailedException:
+                updated -= 1
+        if 'LastEvaluatedKey' not in response:
+            return scanned, updated
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backfill GSI2/GSI3 date keys for EVENT items')
+    parser.add_argument('--table', default='calendar-app-data')
+    parser.add_argument('--segments', type=int, default=4, help='平行掃描區段數')
+    parser.add_argument('--dry-run', action='store_true', help='只列出將更新的項目')
+    args = parser.parse_args()
+
+    table = boto3.resource('dynamodb').Table(args.table)
+    with ThreadPoolExecutor(max_workers=args.segments) as executor:
+        results = list(executor.map(
+            lambda seg: backfill_segment(table, seg, args.segments, args.dry_run),
+            range(args.segments)
+        ))
+
+    scanned = sum(r[0] for r in results)
+    updated = sum(r[1] for r in results)
+    print(f"Scanned {scanned} events, {'would update' if args.dry_run else 'updated'} {updated}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+衝突檢查分桶項目回填腳本
+為既有的非週期 EVENT 項目寫入依日分桶的區間項目（SLOTS#PROJECT#… / SLOTS#USER#…，見 calendar_core.conflicts），
+寫入後遞增各分桶版本，使回填期間進行中的衝突檢查重新檢查。
+已結束超過保留期（SLOT_RETENTION_SECONDS）的事件略過；重複執行只會覆寫相同內容。
+
+用法：
+    python backfill_event_slots.py --table calendar-app-data [--segments 4] [--dry-run]
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from boto3.dynamodb.conditions import Attr
+
+LAYER_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          'lambda', 'layers', 'calendar_core', 'python')
+sys.path.insert(0, LAYER_PATH)
+
+from calendar_core import conflicts  # noqa: E402
+
+
+def backfill_segment(table, segment, total_segments, dry_run):
+    """處理單一平行掃描區段，回傳 (掃描數, 回填事件數)"""
+    scan_kwargs = {
+        'FilterExpression': Attr('entityType').eq('EVENT') & Attr('rrule').not_exists(),
+        'Segment': segment,
+        'TotalSegments': total_segments
+    }
+    cutoff = int(time.time()) - conflicts.SLOT_RETENTION_SECONDS
+    scanned = updated = 0
+    while True:
+        response = table.scan(**scan_kwargs)
+        entries = []
+        for item in response.get('Items', []):
+            scanned += 1
+            item_entries = [e for e in conflicts.entry_items(item) if e['end'] > cutoff]
+            if not item_entries:
+                continue
+            updated += 1
+            if dry_run:
+                print(f"[dry-run] {item['PK']} {item['SK']} -> {len(item_entries)} slot entries")
+                continue
+            entries.extend(item_entries)
+        if entries:
+            with table.batch_writer() as batch:
+                for entry in entries:
+                    batch.put_item(Item=entry)
+            for update in conflicts.version_updates(entries):
+                table.update_item(**update)
+        if 'LastEvaluatedKey' not in response:
+            return scanned, updated
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backfill conflict-check slot entries for EVENT items')
+    parser.add_argument('--table', default='calendar-app-data')
+    parser.add_argument('--segments', type=int, default=4, help='平行掃描區段數')
+    parser.add_argument('--dry-run', action='store_true', help='只列出將回填的事件')
+    args = parser.parse_args()
+
+    table = boto3.resource('dynamodb').Table(args.table)
+    with ThreadPoolExecutor(max_workers=args.segments) as executor:
+        results = list(executor.map(
+            lambda seg: backfill_segment(table, seg, args.segments, args.dry_run),
+            range(args.segments)
+        ))
+
+    scanned = sum(r[0] for r in results)
+    updated = sum(r[1] for r in results)
+    print(f"Scanned {scanned} events, {'would backfill' if args.dry_run else 'backfilled'} {updated}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+全文搜尋索引回填腳本
+為既有的事件（EVENT#）與任務主項目寫入反向索引項目（SEARCH#PROJECT#…，見 calendar_core.search），
+之後的異動由 search_indexer 串流消費者維護。重複執行只會覆寫相同內容。
+
+用法：
+    python backfill_search_index.py --table calendar-app-data [--segments 4] [--dry-run]
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from boto3.dynamodb.conditions import Attr
+
+LAYER_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          'lambda', 'layers', 'calendar_core', 'python')
+sys.path.insert(0, LAYER_PATH)
+
+from calendar_core import search  # noqa: E402
+
+
+def backfill_segment(table, segment, total_segments, dry_run):
+    """處理單一平行掃描區段，回傳 (掃描數, 索引項目數)"""
+    scan_kwargs = {
+        'FilterExpression': Attr('entityType').is_in(list(search.ENTITY_TYPES)),
+        'Segment': segment,
+        'TotalSegments': total_segments
+    }
+    scanned = postings = 0
+    while True:
+        response = table.scan(**scan_kwargs)
+        items = []
+        for item in response.get('Items', []):
+            scanned += 1
+            item_postings = search.posting_items(item)
+            postings += len(item_postings)
+            if dry_run:
+                if item_postings:
+                    print(f"[dry-run] {item['PK']} {item['SK']} -> {len(item_postings)} postings")
+                continue
+            items.extend(item_postings)
+        if items:
+            with table.batch_writer() as batch:
+                for posting in items:
+                    batch.put_item(Item=posting)
+        if 'LastEvaluatedKey' not in response:
+            return scanned, postings
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backfill full-text search postings for events and tasks')
+    parser.add_argument('--table', default='calendar-app-data')
+    parser.add_argument('--segments', type=int, default=4, help='平行掃描區段數')
+    parser.add_argument('--dry-run', action='store_true', help='只列出將寫入的索引項目數')
+    args = parser.parse_args()
+
+    # 任務所在的分片由 calendar_core 讀取專案主項目決定
+    os.environ.setdefault('DYNAMODB_TABLE', args.table)
+    table = boto3.resource('dynamodb').Table(args.table)
+    with ThreadPoolExecutor(max_workers=args.segments) as executor:
+        results = list(executor.map(
+            lambda seg: backfill_segment(table, seg, args.segments, args.dry_run),
+            range(args.segments)
+        ))
+
+    scanned = sum(r[0] for r in results)
+    postings = sum(r[1] for r in results)
+    print(f"Scanned {scanned} items, {'would write' if args.dry_run else 'wrote'} {postings} search postings")
+
+
+if __name__ == '__main__':
+    main()
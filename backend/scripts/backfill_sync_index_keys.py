@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+差異同步索引鍵回填腳本
+為 PROJECT# 分區內的既有項目補上 GSI4PK（= PROJECT#{projectId}），使其出現在 GET /sync 使用的 GSI4 上：
+- 專案主項目：PROJECT#{id} / PROJECT#{id}
+- 事件與週期事件例外：EVENT#… / EVENTEX#…
+- 專案任務關係項目：TASK#…
+GSI4 以 updatedAt 為排序鍵，缺少 updatedAt 的項目不會進入索引，將列出供人工處理。
+
+用法：
+    python backfill_sync_index_keys.py --table calendar-app-data [--segments 4] [--dry-run]
+"""
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from boto3.dynamodb.conditions import Attr
+
+SYNCED_SK_PREFIXES = ('EVENT#', 'EVENTEX#', 'TASK#')
+
+
+def needs_sync_key(item):
+    """項目應帶 GSI4PK 但尚未帶"""
+    if 'GSI4PK' in item:
+        return False
+    return item['SK'] == item['PK'] or item['SK'].startswith(SYNCED_SK_PREFIXES)
+
+
+def backfill_segment(table, segment, total_segments, dry_run):
+    """處理單一平行掃描區段，回傳 (掃描數, 更新數)"""
+    scan_kwargs = {
+        'FilterExpression': Attr('PK').begins_with('PROJECT#') & Attr('GSI4PK').not_exists(),
+        'Segment': segment,
+        'TotalSegments': total_segments
+    }
+    scanned = updated = 0
+    while True:
+        response = table.scan(**scan_kwargs)
+        for item in response.get('Items', []):
+            scanned += 1
+            if not needs_sync_key(item):
+                continue
+            if 'updatedAt' not in item:
+                print(f"Missing updatedAt, not indexed: {item['PK']} {item['SK']}")
+            updated += 1
+            if dry_run:
+                print(f"[dry-run] {item['PK']} {item['SK']}")
+                continue
+            try:
+                table.update_item(
+                    Key={'PK': item['PK'], 'SK': item['SK']},
+                    UpdateExpression='SET #gsi4pk = :pk',
+                    ExpressionAttributeNames={'#gsi4pk': 'GSI4PK'},
+                    ExpressionAttributeValues={':pk': item['PK']},
+                    # 回填期間項目可能已被刪除，避免把它重新建立
+                    ConditionExpression='attribute_exists(PK)'
+                )
+            except table.meta.client.exceptions.ConditionalCheckFailedException:
+                updated -= 1
+        if 'LastEvaluatedKey' not in response:
+            return scanned, updated
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backfill GSI4PK sync keys for items in PROJECT# partitions')
+    parser.add_argument('--table', default='calendar-app-data')
+    parser.add_argument('--segments', type=int, default=4, help='平行掃描區段數')
+    parser.add_argument('--dry-run', action='store_true', help='只列出將更新的項目')
+    args = parser.parse_args()
+
+    table = boto3.resource('dynamodb').Table(args.table)
+    with ThreadPoolExecutor(max_workers=args.segments) as executor:
+        results = list(executor.map(
+            lambda seg: backfill_segment(table, seg, args.segments, args.dry_run),
+            range(args.segments)
+        ))
+
+    scanned = sum(r[0] for r in results)
+    updated = sum(r[1] for r in results)
+    print(f"Scanned {scanned} items, {'would update' if args.dry_run else 'updated'} {updated}")
+
+
+if __name__ == '__main__':
+    main()
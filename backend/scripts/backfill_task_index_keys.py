@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+任務列表項目回填腳本
+由既有的 TASK 主項目重建分頁列表所讀取的關係項目：
+- PROJECT#{projectId} / TASK#{taskId}：列表欄位 + GSI3PK / GSI3SK（專案 + 截止日）
+- USER#{assigneeId} / TASK#{taskId}：列表欄位 + GSI2PK / GSI2SK（負責人 + 截止日）
+並移除主項目上舊版留下的 GSI2/GSI3 鍵，避免同一任務在列表中出現兩次。
+
+用法：
+    python backfill_task_index_keys.py --table calendar-app-data [--segments 4] [--dry-run]
+"""
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from boto3.dynamodb.conditions import Attr
+
+NO_DUE_DATE = '~'
+# 與 calendar_core.projections.LIST_FIELDS 相同
+LIST_FIELDS = (
+    'title', 'description', 'status', 'priority', 'projectId',
+    'assigneeId', 'dueDate', 'createdAt', 'updatedAt'
+)
+HEADER_LIST_KEYS = ('GSI2PK', 'GSI2SK', 'GSI3PK', 'GSI3SK')
+
+
+def relation_updates(item):
+    """計算任務主項目對應的關係項目更新 [(Key, 欄位)]；非主項目回傳空串列"""
+    if item['PK'] != item['SK'] or not item.get('projectId'):
+        return []
+    task_id = item['PK'].replace('TASK#', '', 1)
+    sort_key = f"TASK#{item.get('dueDate') or NO_DUE_DATE}#{task_id}"
+    fields = {field: item.get(field) for field in LIST_FIELDS}
+    updates = [(
+        {'PK': f"PROJECT#{item['projectId']}", 'SK': item['PK']},
+        {**fields, 'GSI1PK': item['PK'], 'GSI1SK': f"PROJECT#{item['projectId']}",
+         'GSI3PK': f"PROJECT#{item['projectId']}", 'GSI3SK': sort_key}
+    )]
+    if item.get('assigneeId'):
+        updates.append((
+            {'PK': f"USER#{item['assigneeId']}", 'SK': item['PK']},
+            {**fields, 'GSI1PK': item['PK'], 'GSI1SK': f"USER#{item['assigneeId']}",
+             'GSI2PK': f"USER#{item['assigneeId']}", 'GSI2SK': sort_key}
+        ))
+    return updates
+
+
+def backfill_segment(table, segment, total_segments, dry_run):
+    """處理單一平行掃描區段，回傳 (掃描數, 更新數)"""
+    scan_kwargs = {
+        'FilterExpression': Attr('entityType').eq('TASK'),
+        'Segment': segment,
+        'TotalSegments': total_segments
+    }
+    scanned = updated = 0
+    while True:
+        response = table.scan(**scan_kwargs)
+        for item in response.get('Items', []):
+            scanned += 1
+            updates = relation_updates(item)
+            if not updates:
+                continue
+            updated += 1
+            if dry_run:
+                print(f"[dry-run] {item['PK']} -> {[key['PK'] for key, _ in updates]}")
+                continue
+            # 以 SET 覆寫：保留 assignedAt，沒有關係項目時一併建立
+            for key, fields in updates:
+                table.update_item(
+                    Key=key,
+                    UpdateExpression='SET ' + ', '.join(f"#{k} = :{k}" for k in fields),
+                    ExpressionAttributeNames={f"#{k}": k for k in fields},
+                    ExpressionAttributeValues={f":{k}": v for k, v in fields.items()}
+                )
+            stale = [k for k in HEADER_LIST_KEYS if k in item]
+            if stale:
+                try:
+                    table.update_item(
+                        Key={'PK': item['PK'], 'SK': item['SK']},
+                        UpdateExpression='REMOVE ' + ', '.join(f"#{k}" for k in stale),
+                        ExpressionAttributeNames={f"#{k}": k for k in stale},
+                        # 回填期間項目可能已被刪除，避免把它重新建立
+                        ConditionExpression='attribute_exists(PK)'
+                    )
+                except table.meta.client.exceptions.ConditionalCheckFailedException:
+                    pass
+        if 'LastEvaluatedKey' not in response:
+            return scanned, updated
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rebuild denormalized task list rows from TASK items')
+    parser.add_argument('--table', default='calendar-app-data')
+    parser.add_argument('--segments', type=int, default=4, help='平行掃描區段數')
+    parser.add_argument('--dry-run', action='store_true', help='只列出將更新的項目')
+    args = parser.parse_args()
+
+    table = boto3.resource('dynamodb').Table(args.table)
+    with ThreadPoolExecutor(max_workers=args.segments) as executor:
+        results = list(executor.map(
+            lambda seg: backfill_segment(table, seg, args.segments, args.dry_run),
+            range(args.segments)
+        ))
+
+    scanned = sum(r[0] for r in results)
+    updated = sum(r[1] for r in results)
+    print(f"Scanned {scanned} tasks, {'would update' if args.dry_run else 'updated'} {updated}")
+
+
+if __name__ == '__main__':
+    main()
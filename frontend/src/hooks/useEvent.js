@@ -1,5 +1,6 @@
 import { useState, useEffect, useRef } from 'react';
 import ApiClient from '../services/apiClient';
+import realtimeClient from '../services/realtimeClient';
 
 export const useEvent = (user, selectedProject) => {
   const [events, setEvents] = useState([]);
@@ -22,6 +23,27 @@ export const useEvent = (user, selectedProject) => {
     fetchEvents();
   }, [user, selectedProject]);
 
+  // 即時推播：其他成員修改專案事件時直接套用變更；斷線重連後以差異同步補齊
+  useEffect(() => {
+    if (!user || isDemo || !selectedProject) return undefined;
+    return realtimeClient.subscribe((message) => {
+      if (message.type === 'reconnected') {
+        fetchEvents();
+        return;
+      }
+      const changes = message.changes || [];
+      const snapshot = api.applyRealtimeChanges(changes);
+      const touchesProjectEvents = changes.some(change =>
+        change.projectId === selectedProject.id && change.type === 'event'
+      );
+      if (touchesProjectEvents) {
+        setEvents(formatEvents(
+          Object.values(snapshot.events).filter(event => event.projectId === selectedProject.id)
+        ));
+      }
+    });
+  }, [user, selectedProject]);
+
   const loadDemoEvents = () => {
     const demo = getDemoEvents();
     const filteredDemo = selectedProject 
@@ -41,13 +63,17 @@ export const useEvent = (user, selectedProject) => {
         return;
       }
       
-      const data = await api.getEvents(null, selectedProject?.id);
-      console.log('Project events data:', data);
-      
-      const eventsArray = Array.isArray(data?.events) ? data.events : [];
-      const filteredEvents = selectedProject 
-        ? eventsArray.filter(event => event.projectId === selectedProject.id)
-        : eventsArray;
+      // 專案事件走差異同步（只取回上次之後的變動）；未選專案時仍列出自己建立的事件
+      let filteredEvents;
+      if (selectedProject) {
+        const snapshot = await api.syncChanges();
+        filteredEvents = Object.values(snapshot.events)
+          .filter(event => event.projectId === selectedProject.id);
+      } else {
+        const data = await api.getEvents();
+        console.log('Project events data:', data);
+        filteredEvents = Array.isArray(data?.events) ? data.events : [];
+      }
 
       const formattedEvents = formatEvents(filteredEvents);
       
@@ -34,7 +34,7 @@ export const useProject = (user) => {
       if (projectsData && Array.isArray(projectsData) && projectsData.length > 0) {
         const formattedProjects = formatProjects(projectsData, user);
         setProjects(formattedProjects);
-        updateProjectStatsCounts(formattedProjects);
+        updateProjectStatsCounts(formattedProjects, dataService, setProjects);
       } else {
         setProjects([]);
       }
@@ -220,9 +220,22 @@ const getRandomColor = () => {
   return colors[Math.floor(Math.random() * colors.length)];
 };
 
-const updateProjectStatsCounts = (projects) => {
-  // 这里可以添加更新项目统计的逻辑
-  console.log('Updating project stats counts for:', projects.length, 'projects');
+const updateProjectStatsCounts = async (projects, dataService, setProjects) => {
+  // 每個專案讀取一次 GET /dashboard/summary（後端由串流維護計數，不需下載全部任務與事件）
+  const summaries = await Promise.all(
+    projects.map(project => dataService.getDashboardSummary(project.id))
+  );
+  const byId = new Map(projects.map((project, index) => [project.id, summaries[index]]));
+  setProjects(prev => prev.map(project => {
+    const summary = byId.get(project.id);
+    if (!summary) return project;
+    return {
+      ...project,
+      eventCount: summary.events?.total || 0,
+      taskCount: summary.tasks?.total || 0,
+      overdueTaskCount: summary.tasks?.overdue || 0
+    };
+  }));
 };
 
 const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms));
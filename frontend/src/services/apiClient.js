@@ -6,6 +6,72 @@
 import { fetchAuthSession } from 'aws-amplify/auth';
 import { get, post, put, del } from 'aws-amplify/api';
 
+// 差異同步快照（GET /sync）：重新整理頁面後以 syncToken 只取回變動
+const SYNC_STORAGE_KEY = 'calendar-sync-snapshot';
+
+const emptySyncSnapshot = () => ({ syncToken: null, projects: {}, events: {}, eventExceptions: {}, tasks: {} });
+
+const loadSyncSnapshot = () => {
+  try {
+    return { ...emptySyncSnapshot(), ...JSON.parse(localStorage.getItem(SYNC_STORAGE_KEY) || '{}') };
+  } catch {
+    return emptySyncSnapshot();
+  }
+};
+
+const saveSyncSnapshot = (snapshot) => {
+  try {
+    localStorage.setItem(SYNC_STORAGE_KEY, JSON.stringify(snapshot));
+  } catch (error) {
+    console.warn('Failed to persist sync snapshot:', error);
+  }
+};
+
+const removeWhere = (collection, predicate) => {
+  Object.keys(collection).forEach(key => {
+    if (predicate(collection[key])) delete collection[key];
+  });
+};
+
+// 推播訊息 type 對應的快照集合
+const SNAPSHOT_COLLECTIONS = {
+  project: 'projects',
+  event: 'events',
+  eventException: 'eventExceptions',
+  task: 'tasks'
+};
+
+const deleteFromSnapshot = (snapshot, type, id) => {
+  if (type === 'project') {
+    delete snapshot.projects[id];
+    [snapshot.events, snapshot.eventExceptions, snapshot.tasks].forEach(collection =>
+      removeWhere(collection, item => item.projectId === id)
+    );
+  } else if (type === 'event') {
+    delete snapshot.events[id];
+    removeWhere(snapshot.eventExceptions, item => item.eventId === id);
+  } else if (SNAPSHOT_COLLECTIONS[type]) {
+    delete snapshot[SNAPSHOT_COLLECTIONS[type]][id];
+  }
+};
+
+/**
+ * 將 GET /sync 的回應合併進快照：先套用刪除，再以 id 覆寫
+ */
+const applySyncChanges = (snapshot, changes) => {
+  const next = changes.full ? emptySyncSnapshot() : snapshot;
+  (changes.deleted || []).forEach(({ type, id }) => deleteFromSnapshot(next, type, id));
+  (changes.projects || []).forEach(project => { next.projects[project.id] = project; });
+  (changes.events || []).forEach(event => { next.events[event.eventId] = event; });
+  (changes.eventExceptions || []).forEach(exception => {
+    next.eventExceptions[`${exception.eventId}#${exception.recurrenceId}`] = exception;
+  });
+  (changes.tasks || []).forEach(task => { next.tasks[task.id] = task; });
+  // syncToken 只在最後一頁
+  if (changes.syncToken) next.syncToken = changes.syncToken;
+  return next;
+};
+
 class ApiClient {
   constructor() {
     this.baseUrl = process.env.REACT_APP_API_GATEWAY_URL;
@@ -93,7 +159,7 @@ class ApiClient {
       // 僅對 GET 採用後備重試，避免 POST/PUT/DELETE 造成重複提交
       const isEmptyAmplify = !parsed || (typeof parsed === 'object' && Object.keys(parsed).length === 0);
       if (isEmptyAmplify && this.baseUrl && method.toLowerCase() === 'get') {
-        return this.requestViaFetch(method, path, data, headers);
+        return this.requestViaFetch(method, path, data, headers, options.queryParams);
       }
 
       return parsed;
@@ -101,7 +167,7 @@ class ApiClient {
       console.warn(`Amplify API request failed${method.toLowerCase() === 'get' ? ', fallback to fetch' : ''}: ${method} ${path}`, error);
       if (this.baseUrl && method.toLowerCase() === 'get') {
         const headers = await this.buildHeaders();
-        return this.requestViaFetch(method, path, data, headers);
+        return this.requestViaFetch(method, path, data, headers, options.queryParams);
       }
       throw error;
     }
@@ -110,8 +176,9 @@ class ApiClient {
   /**
    * 使用 fetch 直連 API Gateway（後備方案）
    */
-  async requestViaFetch(method, path, data, headers) {
-    const url = `${this.baseUrl}${path}`;
+  async requestViaFetch(method, path, data, headers, queryParams = null) {
+    const query = queryParams ? `?${new URLSearchParams(queryParams).toString()}` : '';
+    const url = `${this.baseUrl}${path}${query}`;
     const init = {
       method: method.toUpperCase(),
       headers
@@ -240,7 +307,9 @@ class ApiClient {
     if (projectId) {
       return this.request('get', '/projects', { projectId });
     }
-    return this.request('get', '/projects');
+    // 專案卡片顯示描述：列表預設只回索引上的欄位，需明確要求 fields=full
+    const projects = await this.getAllPages('/projects', 'projects', { fields: 'full' });
+    return { projects, count: projects.length };
   }
 
   async createProject(projectData) {
@@ -261,10 +330,8 @@ class ApiClient {
 
   // 任務管理 API（新的統一接口）
   async getTasks(projectId = null) {
-    if (projectId) {
-      return this.request('get', '/tasks', { projectId });
-    }
-    return this.request('get', '/tasks');
+    const tasks = await this.getAllPages('/tasks', 'tasks', projectId ? { projectId } : null);
+    return { tasks, count: tasks.length };
   }
 
   async createTask(taskData) {
@@ -282,16 +349,103 @@ class ApiClient {
     return this.request('delete', '/tasks', { taskId });
   }
 
+  // 儀表板彙總：未帶 projectId 時為目前用戶
+  async getDashboardSummary(projectId = null) {
+    const options = projectId ? { queryParams: { projectId } } : {};
+    return this.request('get', '/dashboard/summary', null, options);
+  }
+
   // 事件管理 API（新的統一接口）
   async getEvents(eventId = null, projectId = null) {
-    const params = {};
+    // 事件詳情與編輯表單需要描述（列表預設 fields=summary 不回傳）
+    const params = { fields: 'full' };
     if (eventId) params.eventId = eventId;
     if (projectId) params.projectId = projectId;
-    
-    if (Object.keys(params).length > 0) {
-      return this.request('get', '/events', params);
+    return this.getEventPages('/events', params);
+  }
+
+  /**
+   * 差異同步：帶上次的 syncToken 呼叫 GET /sync，合併變動後回傳完整快照
+   * token 無效（例如換了帳號）時清除快照並完整同步一次
+   */
+  async syncChanges() {
+    const snapshot = loadSyncSnapshot();
+    let merged = null;
+    if (snapshot.syncToken) {
+      try {
+        merged = await this.getSyncPages(snapshot, snapshot.syncToken);
+      } catch (error) {
+        console.warn('Incremental sync failed, falling back to full sync:', error);
+      }
     }
-    return this.request('get', '/events');
+    if (!merged) merged = await this.getSyncPages(emptySyncSnapshot(), null);
+    saveSyncSnapshot(merged);
+    return merged;
+  }
+
+  /**
+   * 依 nextCursor 讀完 GET /sync 的所有頁面並逐頁合併；最後一頁須帶 syncToken
+   */
+  async getSyncPages(snapshot, since) {
+    let next = snapshot;
+    let queryParams = since ? { since } : null;
+    for (;;) {
+      const changes = await this.request('get', '/sync', null, queryParams ? { queryParams } : {});
+      next = applySyncChanges(next, changes || {});
+      if (changes?.nextCursor) {
+        queryParams = { cursor: changes.nextCursor };
+      } else if (changes?.syncToken) {
+        return next;
+      } else {
+        throw new Error('Sync response missing syncToken');
+      }
+    }
+  }
+
+  /**
+   * 將 WebSocket 推播的變更（upsert / patch / delete）套用到同步快照並回傳
+   * syncToken 不變，下次 GET /sync 仍會取回這些變更（以 id 覆寫，不會重複）
+   */
+  applyRealtimeChanges(changes) {
+    const snapshot = loadSyncSnapshot();
+    (changes || []).forEach(({ op, type, id, data }) => {
+      const collection = snapshot[SNAPSHOT_COLLECTIONS[type]];
+      if (!collection) return;
+      if (op === 'delete') {
+        deleteFromSnapshot(snapshot, type, id);
+      } else if (op === 'upsert') {
+        collection[id] = data;
+      } else if (op === 'patch' && collection[id]) {
+        collection[id] = { ...collection[id], ...data };
+      }
+    });
+    saveSyncSnapshot(snapshot);
+    return snapshot;
+  }
+
+  /**
+   * 依 nextCursor 逐頁讀取事件（後端 GET /events 預設分頁）
+   */
+  async getEventPages(path, data = null) {
+    const events = await this.getAllPages(path, 'events', data);
+    return { events, count: events.length };
+  }
+
+  /**
+   * 依 nextCursor 逐頁讀取列表端點，回傳 listKey 欄位合併後的陣列
+   * data 同時作為查詢參數（例如 projectId），cursor 綁定這些條件
+   */
+  async getAllPages(path, listKey, data = null) {
+    const results = [];
+    let cursor = null;
+    do {
+      const queryParams = { ...(data || {}), ...(cursor ? { cursor } : {}) };
+      const options = Object.keys(queryParams).length > 0 ? { queryParams } : {};
+      const page = await this.request('get', path, data, options);
+      if (Array.isArray(page?.[listKey])) results.push(...page[listKey]);
+      cursor = page?.nextCursor || null;
+    } while (cursor);
+    return results;
   }
 
   async createEvent(eventData) {
@@ -163,6 +163,19 @@ export class DataService {
     }
   }
 
+  async getDashboardSummary(projectId = null) {
+    try {
+      const result = await this.api.getDashboardSummary(projectId);
+      if (result && result.tasks && result.events) {
+        return result;
+      }
+      return null;
+    } catch (error) {
+      console.error('Error fetching dashboard summary:', error);
+      return null;
+    }
+  }
+
   // 任務相關操作
   async createTask(taskData) {
     try {
@@ -0,0 +1,104 @@
+/**
+ * WebSocket 即時推播客戶端
+ * 以 Cognito ID token（查詢參數 token）連線到 REACT_APP_WEBSOCKET_URL，
+ * 收到 {type: 'changes', changes: [...]} 時通知所有訂閱者；
+ * 斷線後以指數退避重新連線，連上後通知 {type: 'reconnected'}，訂閱者應以 GET /sync 補齊期間的變更。
+ */
+
+import { fetchAuthSession } from 'aws-amplify/auth';
+
+const INITIAL_RECONNECT_DELAY_MS = 1000;
+const MAX_RECONNECT_DELAY_MS = 30000;
+
+class RealtimeClient {
+  constructor(url = process.env.REACT_APP_WEBSOCKET_URL) {
+    this.url = url;
+    this.listeners = new Set();
+    this.socket = null;
+    this.reconnectDelay = INITIAL_RECONNECT_DELAY_MS;
+    this.reconnectTimer = null;
+    this.hasConnected = false;
+  }
+
+  /**
+   * 訂閱推播訊息，回傳取消訂閱函數；最後一個訂閱者離開時關閉連線
+   */
+  subscribe(listener) {
+    this.listeners.add(listener);
+    if (!this.socket && !this.reconnectTimer) this.connect();
+    return () => {
+      this.listeners.delete(listener);
+      if (this.listeners.size === 0) this.close();
+    };
+  }
+
+  async connect() {
+    if (!this.url) return;
+    let token;
+    try {
+      const session = await fetchAuthSession();
+      token = session.tokens?.idToken?.toString();
+    } catch (error) {
+      console.warn('Realtime: failed to get auth token', error);
+    }
+    if (!token || this.listeners.size === 0) {
+      if (this.listeners.size > 0) this.scheduleReconnect();
+      return;
+    }
+
+    const socket = new WebSocket(`${this.url}?token=${encodeURIComponent(token)}`);
+    this.socket = socket;
+    socket.onopen = () => {
+      this.reconnectDelay = INITIAL_RECONNECT_DELAY_MS;
+      if (this.hasConnected) this.emit({ type: 'reconnected' });
+      this.hasConnected = true;
+    };
+    socket.onmessage = (event) => {
+      try {
+        this.emit(JSON.parse(event.data));
+      } catch (error) {
+        console.warn('Realtime: invalid message', error);
+      }
+    };
+    socket.onclose = () => {
+      if (this.socket !== socket) return;
+      this.socket = null;
+      if (this.listeners.size > 0) this.scheduleReconnect();
+    };
+  }
+
+  scheduleReconnect() {
+    clearTimeout(this.reconnectTimer);
+    this.reconnectTimer = setTimeout(() => {
+      this.reconnectTimer = null;
+      this.connect();
+    }, this.reconnectDelay);
+    this.reconnectDelay = Math.min(this.reconnectDelay * 2, MAX_RECONNECT_DELAY_MS);
+  }
+
+  emit(message) {
+    this.listeners.forEach(listener => {
+      try {
+        listener(message);
+      } catch (error) {
+        console.error('Realtime listener failed:', error);
+      }
+    });
+  }
+
+  close() {
+    clearTimeout(this.reconnectTimer);
+    this.reconnectTimer = null;
+    this.hasConnected = false;
+    if (this.socket) {
+      const socket = this.socket;
+      this.socket = null;
+      socket.close();
+    }
+  }
+}
+
+// 整個頁面共用一條連線
+const realtimeClient = new RealtimeClient();
+
+export default realtimeClient;